@@ -15,6 +15,7 @@ app = Flask(__name__, static_folder='static', static_url_path='/static')
 CORS(app)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STATUS_FILE = os.path.join(BASE_DIR, "bot_status.json")
+LATENCY_FILE = os.path.join(BASE_DIR, "latency.json")  # 봇이 LATENCY_REPORT_INTERVAL마다 기록
 logger = logging.getLogger(__name__)
 def get_bot_status1():
     if os.path.exists(STATUS_FILE):
@@ -325,6 +326,28 @@ def get_coin_data(symbol):
         session.close()
 
 
+@app.route('/latency', methods=['GET'])
+def get_latency():
+    """
+    구간별 지연 백분위 (ms, 봇이 마지막으로 기록한 latency.json)
+
+    ?symbol=XRPUSDT 이면 해당 심볼 구간만, 없으면 전체 합산 + 심볼별
+    """
+    try:
+        if not os.path.exists(LATENCY_FILE):
+            return jsonify({"status": "error", "message": "No latency data (bot not running or LATENCY_TRACING disabled)"})
+        with open(LATENCY_FILE, "r") as f:
+            latency = json.load(f)
+        symbol = request.args.get('symbol')
+        if symbol:
+            latency = {"updated": latency["updated"], "since": latency["since"],
+                       "symbol": symbol, "stages": latency["symbols"].get(symbol.upper(), {})}
+        return jsonify({"status": "success", "latency": latency})
+    except Exception as e:
+        logger.error(f"Error getting latency: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)})
+
+
 @app.route('/logs', methods=['GET'])
 def get_logs():
     try:
@@ -0,0 +1,140 @@
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import websockets
+
+from logger import logger
+
+
+class AsyncStreamHandle:
+    """
+    asyncio 엔진에서 실행 중인 개별 스트림 핸들
+    - WebSocketApp 대신 처리 함수의 ws 인자로 전달됨
+    - close()는 어느 스레드에서 호출해도 안전
+    """
+    def __init__(self, engine, url, on_message, blocking=False):
+        self.engine = engine
+        self.url = url
+        self.on_message = on_message
+        self.blocking = blocking
+        self.closed = False
+        self.connects = 0   # 연결 성공 횟수 (2 이상이면 재연결)
+        self.ws = None      # 현재 연결된 websockets 커넥션
+        self.task = None
+
+    def close(self):
+        """스트림 종료 (재연결 중지)"""
+        self.closed = True
+        if self.task is not None:
+            self.engine.loop.call_soon_threadsafe(self.task.cancel)
+
+
+class AsyncWebSocketEngine:
+    """
+    단일 asyncio 이벤트 루프에서 모든 웹소켓 스트림을 코루틴으로 실행하는 엔진
+    - 스트림마다 스레드를 만들지 않고 전용 루프 스레드 1개만 사용
+    - 재연결은 지터가 포함된 지수 백오프로 비동기 대기 (루프를 막지 않음)
+    - 처리 함수 시그니처는 websocket-client와 동일: on_message(ws, message)
+    """
+    def __init__(self, on_error=None, on_close=None, base_delay=1.0, max_delay=60.0, on_open=None):
+        self.on_error = on_error
+        self.on_open = on_open
+        self.on_close = on_close
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.loop = asyncio.new_event_loop()
+        self.streams = []
+        # 블로킹 처리 함수(REST 호출 등)는 순서 보장을 위해 단일 워커에서 실행
+        self.blocking_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AsyncWSBlocking")
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.name = "AsyncWebSocketLoop"
+        self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def add_stream(self, url, on_message, blocking=False):
+        """
+        스트림을 루프에 등록합니다.
+
+        :param url: 웹소켓 URL
+        :param on_message: 처리 함수 (ws, message)
+        :param blocking: True면 루프 대신 별도 워커 스레드에서 처리 함수 실행
+        :return: AsyncStreamHandle
+        """
+        handle = AsyncStreamHandle(self, url, on_message, blocking)
+        self.streams.append(handle)
+
+        def spawn():
+            handle.task = self.loop.create_task(self._run_stream(handle))
+
+        self.loop.call_soon_threadsafe(spawn)
+        return handle
+
+    def _backoff_delay(self, attempt):
+        """지수 백오프 + full jitter (동시 재연결 폭주 방지)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def _run_stream(self, handle):
+        attempt = 0
+        while not handle.closed:
+            try:
+                async with websockets.connect(handle.url, ping_interval=20, ping_timeout=20, max_size=None) as ws:
+                    handle.ws = ws
+                    handle.connects += 1
+                    if self.on_open:
+                        self.on_open(handle)
+                    async for message in ws:
+                        attempt = 0  # 메시지를 받았으면 정상 연결로 간주
+                        self._dispatch(handle, ws, message)
+                    if self.on_close:
+                        self.on_close(handle, ws.close_code, ws.close_reason)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(handle, e)
+            finally:
+                handle.ws = None
+
+            if handle.closed:
+                break
+            delay = self._backoff_delay(attempt)
+            attempt += 1
+            logger.info(f"웹소켓 재연결 대기 {delay:.1f}s: {handle.url}")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                break
+
+    def _dispatch(self, handle, ws, message):
+        if handle.blocking:
+            self.loop.run_in_executor(self.blocking_executor, self._call_handler, handle, message)
+        else:
+            self._call_handler(handle, message)
+
+    def _call_handler(self, handle, message):
+        try:
+            handle.on_message(handle, message)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(handle, e)
+
+    def stop(self, timeout=2):
+        """모든 스트림 종료 후 루프 정지"""
+        for handle in self.streams:
+            handle.close()
+
+        async def shutdown():
+            tasks = [h.task for h in self.streams if h.task is not None]
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.loop.stop()
+
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+            self.thread.join(timeout=timeout)
+        self.blocking_executor.shutdown(wait=False)
+        self.streams.clear()
@@ -0,0 +1,687 @@
+"""
+BasicStrategy 백테스트
+- 입력: data/klines_<symbol>_<tf>.csv (탭 구분) 또는 CoinData 테이블
+- 지표는 전체 기간에 대해 한 번만 계산 (calculate_indicators_numpy)
+- 엔진
+  vector: 전략별 진입/청산 조건 중 포지션과 무관한 부분을 전체 기간 boolean 마스크로 미리 계산하고,
+          마스크가 하나라도 참인 봉에서만 포지션/잔고 판단(_check_open_condition 등)을 순서대로 적용
+  loop:   봉마다 최근 INDICATOR_FRAME_ROWS행을 generate_trading_signals에 넘김 (기준 구현, backtest_parity.py)
+- 평가는 마감 봉마다 한 번, 주문은 main.evaluate_symbol과 같은 규칙으로 포지션 방향에 맞는 신호만 실행
+- 오더북: 과거 캔들에는 호가가 없으므로 캔들에서 만든 대용값 사용 (orderbook_proxy)
+  candle: 종가의 고저 범위 내 위치(CLV)를 매수 압력으로 사용 (mpr = CLV, 불균형 = 2*CLV-1, 깊이 = 거래량 x 비율)
+  neutral: 매수/매도 압력 동일 (오더북 조건이 들어간 진입은 거의 발생하지 않음)
+- 체결: 신호 가격(high_ask/low_bid = 종가 -/+ slippage)에 즉시 전량 체결, 테이커 수수료, 단방향 포지션
+
+사용법: python backtest.py HBARUSDT [XRPUSDT ...] [--db] [--strategies macd_rsi,bollinger_rsi | --each] [--regime]
+        [--params '{"macd_rsi": {"rsi_lower": 40}}']
+"""
+import argparse
+import copy
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from candle_store import CANDLE_COLUMNS
+from config import DATA_DIR, INDICATOR_FRAME_ROWS, TARGET_LEVERAGE
+from indicators import Indicators
+from strategy_params import strategy_key as strategy_name, strategy_params
+
+STRATEGIES = ('_volume_breakout_strategy', '_trend_momentum_strategy', '_macd_rsi_strategy',
+              '_bollinger_rsi_strategy', '_atr_trend_follow_strategy', '_rsi_divergence_strategy')
+MARKET_STATUSES = ('Sideways_Or_Weak_Trend', 'Strong_Trend_Up', 'Strong_Trend_Down', 'Rising', 'Falling')
+WALLET = 1000.0        # 시작 잔고 (USDT)
+TAKER_FEE = 0.0005
+SLIPPAGE = 0.0005      # 주문 가격 = 종가 x (1 +/- SLIPPAGE) (실거래의 high_ask/low_bid는 상위 호가 끝 가격)
+ACTION_PRICE = {'ENTER_LONG': 'high_ask', 'EXIT_SHORT': 'high_ask', 'ENTER_SHORT': 'low_bid', 'EXIT_LONG': 'low_bid'}
+
+
+def load_csv(path):
+    """data_handler가 저장한 캔들 CSV -> OHLCV DataFrame (지표 컬럼은 버리고 다시 계산)"""
+    df = pd.read_csv(path, sep='\t', usecols=CANDLE_COLUMNS)
+    df['Open time'] = pd.to_datetime(df['Open time'])
+    return df.drop_duplicates('Open time', keep='last').sort_values('Open time').reset_index(drop=True)
+
+
+def load_db(symbol, interval='1m'):
+    """CoinData 테이블 -> OHLCV DataFrame"""
+    from models import Session, CoinData
+
+    session = Session()
+    try:
+        rows = session.query(CoinData).filter_by(symbol=symbol, interval=interval).order_by(CoinData.open_time).all()
+        df = pd.DataFrame([(row.open_time, row.open, row.high, row.low, row.close, row.volume) for row in rows],
+                          columns=CANDLE_COLUMNS)
+    finally:
+        session.close()
+    return df.drop_duplicates('Open time', keep='last').reset_index(drop=True)
+
+
+def csv_path(symbol, interval='1m'):
+    """심볼 -> 캔들 CSV 경로 (DATA_DIR, 없으면 저장소 data/)"""
+    for directory in (DATA_DIR, os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")):
+        path = os.path.join(directory, f"klines_{symbol}_{interval}.csv")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"klines_{symbol}_{interval}.csv 없음")
+
+
+def orderbook_proxy(df, mode='candle', slippage=SLIPPAGE):
+    """
+    캔들 -> 봉별 오더북 지표 대용값 (calculate_orderbook_indicators 결과 중 전략이 읽는 키)
+
+    :param df: OHLCV DataFrame 또는 {컬럼: ndarray}
+    :return: {key: ndarray}
+    """
+    close = np.asarray(df['Close'], dtype=float)
+    volume = np.asarray(df['Volume'], dtype=float)
+    if mode == 'candle':
+        high = np.asarray(df['High'], dtype=float)
+        low = np.asarray(df['Low'], dtype=float)
+        span = high - low
+        clv = np.divide(close - low, span, out=np.full_like(close, 0.5), where=span > 0)
+    elif mode == 'neutral':
+        clv = np.full_like(close, 0.5)
+    else:
+        raise ValueError(f"알 수 없는 오더북 대용값: {mode}")
+    return {
+        'high_ask': close * (1 + slippage),
+        'low_bid': close * (1 - slippage),
+        'mpr': np.round(clv, 4),
+        'order_imbalance': np.round(2 * clv - 1, 4),
+        'bid_depth': np.round(volume * clv, 4),
+        'ask_depth': np.round(volume * (1 - clv), 4),
+    }
+
+
+class SimAccount:
+    """
+    단방향 포지션 + USDT 잔고 모의 계정
+    - BasicStrategy의 data_handler 자리에 넘김 (balance_data만 사용)
+    """
+    def __init__(self, wallet=WALLET, leverage=TARGET_LEVERAGE, fee=TAKER_FEE):
+        self.wallet = wallet
+        self.leverage = leverage
+        self.fee = fee
+        self.amount = 0.0
+        self.avg_price = 0.0
+        self.fees = 0.0
+        self.balance_data = {}
+
+    def position(self, price):
+        """position_data 형식 dict (가격 기준 미실현 손익 반영, balance_data도 같이 갱신)"""
+        unrealized = self.amount * (price - self.avg_price) if self.amount else 0.0
+        used = abs(self.amount) * self.avg_price / self.leverage
+        self.balance_data = {'wallet': self.wallet, 'total': self.wallet + unrealized,
+                             'free': self.wallet + unrealized - used, 'used': used, 'PNL': unrealized}
+        return {'leverage': self.leverage, 'avg_price': self.avg_price, 'position_amount': self.amount,
+                'unrealizedProfit': unrealized, 'breakeven_price': self.avg_price}
+
+    def fill(self, side, quantity, price):
+        """
+        체결 반영
+
+        :return: (실현 손익, 수수료)
+        """
+        signed = quantity if side == 'BUY' else -quantity
+        fee = quantity * price * self.fee
+        realized = 0.0
+        if self.amount == 0 or (self.amount > 0) == (signed > 0):
+            total = self.amount + signed
+            self.avg_price = (self.avg_price * abs(self.amount) + price * quantity) / abs(total)
+            self.amount = total
+        else:
+            closed = min(abs(signed), abs(self.amount))
+            realized = closed * (price - self.avg_price) * (1 if self.amount > 0 else -1)
+            self.amount += signed
+            if abs(self.amount) < 1e-12:
+                self.amount, self.avg_price = 0.0, 0.0
+            elif (self.amount > 0) == (signed > 0):  # 반대 방향으로 넘어감
+                self.avg_price = price
+        self.wallet += realized - fee
+        self.fees += fee
+        return realized, fee
+
+
+def order_side(action, amount):
+    """main.evaluate_symbol 주문 규칙: 포지션 방향에 맞는 신호만 주문 -> 'BUY' | 'SELL' | None"""
+    if amount == 0:
+        return {'ENTER_LONG': 'BUY', 'ENTER_SHORT': 'SELL'}.get(action)
+    if amount > 0:
+        return {'ENTER_LONG': 'BUY', 'EXIT_LONG': 'SELL'}.get(action)
+    return {'EXIT_SHORT': 'BUY', 'ENTER_SHORT': 'SELL'}.get(action)
+
+
+def _prev(values, k=1):
+    out = np.full(len(values), np.nan)
+    out[k:] = values[:-k]
+    return out
+
+
+def _rolling_mean(values, window):
+    return pd.Series(values).rolling(window).mean().to_numpy()
+
+
+def _round(values, digits):
+    """파이썬 round와 같은 결과 (np.round는 경계값에서 다를 수 있음)"""
+    return np.fromiter((round(value, digits) for value in values.tolist()), float, len(values))
+
+
+def market_status_array(f):
+    """Indicators.determine_market_status를 봉마다 적용한 결과 (MARKET_STATUSES 번호)"""
+    macd, signal, adx = f['MACD'], f['MACD_signal'], f['ADX']
+    sma_short, sma_mid, sma_long = f['SMA_short'], f['SMA_mid'], f['SMA_long']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(signal == 0, 0.0, _round(np.abs(macd - signal) / signal * 100, 2))
+    rising_ma = ((sma_short > sma_mid) & (sma_mid > sma_long) & (sma_short > _prev(sma_short))
+                 & (sma_mid > _prev(sma_mid)))
+    falling_ma = ((sma_short < sma_mid) & (sma_mid < sma_long) & (sma_short < _prev(sma_short))
+                  & (sma_mid < _prev(sma_mid)))
+    rising_macd = (macd > signal) & (macd > _prev(macd)) & (_prev(macd) > _prev(macd, 2)) & (rate > 10)
+    falling_macd = (macd < signal) & (macd < _prev(macd)) & (_prev(macd) < _prev(macd, 2)) & (rate > 10)
+    rising = rising_ma | rising_macd
+    falling = falling_ma | falling_macd
+    strong = adx > 25
+    status = np.zeros(len(macd), dtype=np.int8)
+    status[strong & falling & ~rising] = MARKET_STATUSES.index('Strong_Trend_Down')
+    status[strong & rising] = MARKET_STATUSES.index('Strong_Trend_Up')
+    status[~strong & falling & ~rising] = MARKET_STATUSES.index('Falling')
+    status[~strong & rising] = MARKET_STATUSES.index('Rising')
+    return status
+
+
+def condition_inputs(f):
+    """전략 조건에 쓰는 파생 배열 중 임계값과 무관한 것 (파라미터 탐색 중 심볼마다 한 번만 계산)"""
+    close, open_, volume, atr, rsi = f['Close'], f['Open'], f['Volume'], f['ATR'], f['RSI']
+    macd, signal, histogram = f['MACD'], f['MACD_signal'], f['MACD_histogram']
+    c = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c['atr_ma'] = _rolling_mean(atr, 14)
+        c['vol_ma'] = _rolling_mean(volume, 20)
+        c['volume_trend'] = (_prev(volume, 2) + _prev(volume) + volume) / 3 > _prev(c['vol_ma'])
+        c['macd_1'], c['macd_2'], c['macd_3'], c['macd_4'] = (_prev(macd, k) for k in (1, 2, 3, 4))
+        c['hist_1'], c['hist_2'], c['hist_3'] = (_prev(histogram, k) for k in (1, 2, 3))
+        c['signal_rate'] = np.where(signal != 0, _round(np.abs((macd - signal) / signal * 100), 2), 0.0)
+        c['rsi_min'] = _round(pd.Series(rsi).rolling(5).min().shift(2).to_numpy(), 3)
+        upraise = np.where(open_ != 0, _round((close - open_) / open_ * 100, 2), 0.0)
+        c['raise_condition'] = (np.abs(_prev(upraise)) < 0.4) & (np.abs(upraise) <= 0.3)
+        c['hist_mean'] = (c['hist_3'] + c['hist_2'] + c['hist_1']) / 3
+        c['band_expansion'] = ((f['BB_upper'] - f['BB_lower'])
+                               > _rolling_mean(np.diff(f['BB_upper'], prepend=np.nan), 5) * 2)
+        c['rsi_1'], c['close_1'] = _prev(rsi), _prev(close)
+        c['high_1'], c['high_2'] = _prev(f['High']), _prev(f['High'], 2)
+        c['low_1'], c['low_2'] = _prev(f['Low']), _prev(f['Low'], 2)
+    return c
+
+
+def _volume_breakout_masks(f, ob, c, p, status):
+    close, atr, adx, histogram, mpr = f['Close'], f['ATR'], f['ADX'], f['MACD_histogram'], ob['mpr']
+    atr_ma, imbalance = c['atr_ma'], ob['order_imbalance']
+    return {
+        'enter_long': ((f['Volume'] > c['vol_ma'] * p['volume_ratio']) & (histogram > c['hist_1'] * 1.2)
+                       & (close > f['fib_0.786']) & (mpr > p['mpr_long']) & (imbalance > p['imbalance'])
+                       & (adx < p['adx_threshold']) & (atr < atr_ma * p['atr_ratio'])),
+        'enter_short': ((histogram < c['hist_1'] * 0.8) & (f['RSI'] > 70) & (close < f['EMA_fast']) & (mpr < p['mpr_short'])
+                        & (imbalance < -p['imbalance']) & (adx > p['adx_threshold']) & (atr < atr_ma * p['atr_ratio'])),
+        'exit_long': (close < f['EMA_slow']) | (mpr < p['exit_long_mpr']) | (atr > atr_ma * p['atr_ratio']),
+        'exit_short': (close > f['EMA_fast']) | (mpr > p['exit_short_mpr']) | (atr > atr_ma * p['atr_ratio']),
+    }
+
+
+def _trend_momentum_masks(f, ob, c, p, status):
+    close, atr, adx, mpr, atr_ma = f['Close'], f['ATR'], f['ADX'], ob['mpr'], c['atr_ma']
+    bid_depth, ask_depth = ob['bid_depth'], ob['ask_depth']
+    adx_threshold = (p['adx_threshold'] if status is None else
+                     np.where(status == MARKET_STATUSES.index('Strong_Trend_Up'),
+                              p['adx_threshold_strong'], p['adx_threshold']))
+    return {
+        'enter_long': ((f['EMA_slow'] > f['EMA_fast']) & (adx > adx_threshold) & c['volume_trend']
+                       & (mpr > p['mpr_long']) & (bid_depth > ask_depth * p['depth_ratio']) & (atr < atr_ma * p['atr_ratio'])),
+        'enter_short': ((f['EMA_slow'] < f['EMA_fast']) & (adx > adx_threshold) & (f['RSI'] > 70)
+                        & (mpr < p['mpr_short']) & (ask_depth > bid_depth * p['depth_ratio']) & (atr < atr_ma * p['atr_ratio'])),
+        'exit_long': (close < f['EMA_fast']) & (mpr < p['exit_long_mpr']) & (atr > atr_ma * p['exit_atr_ratio']),
+        'exit_short': (close > f['EMA_fast']) & (mpr > p['exit_short_mpr']) & (atr > atr_ma * p['exit_atr_ratio']),
+    }
+
+
+def _macd_rsi_masks(f, ob, c, p, status):
+    macd, histogram, rsi, mpr = f['MACD'], f['MACD_histogram'], f['RSI'], ob['mpr']
+    macd_1, macd_2, macd_3, macd_4 = c['macd_1'], c['macd_2'], c['macd_3'], c['macd_4']
+    hist_1, hist_2 = c['hist_1'], c['hist_2']
+    rate = c['signal_rate'] > p['signal_rate']
+    up_change = (macd > macd_1) & (macd_1 >= macd_2) & (macd_2 <= macd_3) & (macd_3 < macd_4) & (histogram < 0) & rate
+    down_change = (macd < macd_1) & (macd_1 <= macd_2) & (macd_2 >= macd_3) & (macd_3 > macd_4) & (histogram > 0) & rate
+    golden_cross = ((histogram > hist_1) & (hist_1 > hist_2) & (c['hist_mean'] < 0)
+                    & ((histogram > 0) | (hist_1 > 0)) & rate)
+    dead_cross = ((histogram < hist_1) & (hist_1 < hist_2) & (c['hist_mean'] > 0)
+                  & ((histogram < 0) | (hist_1 < 0)) & rate)
+    return {
+        'enter_long': ((up_change | golden_cross) & c['raise_condition'] & (rsi < p['rsi_lower'])
+                       & (c['rsi_min'] < p['rsi_min_lower']) & (mpr > p['mpr_long'])),
+        'enter_short': ((down_change | dead_cross) & c['raise_condition'] & (rsi > p['rsi_upper'])
+                        & (c['rsi_min'] > p['rsi_min_upper']) & (mpr < p['mpr_short'])),
+        'exit_long': (down_change | dead_cross) & (mpr < p['mpr_short']),
+        'exit_short': (up_change | golden_cross) & (mpr > p['mpr_long']),
+        'histogram_down': (histogram <= 0) & (histogram <= hist_1) & (hist_1 < hist_2),  # + 롱 손실 -10% 초과
+        'histogram_up': (histogram >= 0) & (histogram >= hist_1) & (hist_1 > hist_2),    # + 숏 손실 -10% 초과
+    }
+
+
+def _bollinger_rsi_masks(f, ob, c, p, status):
+    close, atr, rsi, mpr, atr_ma, imbalance = f['Close'], f['ATR'], f['RSI'], ob['mpr'], c['atr_ma'], ob['order_imbalance']
+    return {
+        'enter_long': ((close < f['BB_lower']) & (rsi < p['rsi_lower']) & c['volume_trend'] & (mpr > p['mpr_long'])
+                       & (imbalance > p['imbalance']) & (atr < atr_ma * p['atr_ratio'])),
+        'enter_short': ((close > f['BB_upper']) & (rsi > p['rsi_upper']) & c['volume_trend'] & (mpr < p['mpr_short'])
+                        & (imbalance < -p['imbalance']) & (atr < atr_ma * p['atr_ratio'])),
+        'exit_long': (close > f['BB_middle']) & (rsi > 65) & (mpr < p['exit_long_mpr']) & (atr > atr_ma * p['exit_atr_ratio']),
+        'exit_short': (close < f['BB_middle']) & (rsi < 35) & (mpr > p['exit_short_mpr']) & (atr > atr_ma * p['exit_atr_ratio']),
+    }
+
+
+def _atr_trend_follow_masks(f, ob, c, p, status):  # 진입은 + _check_open_condition
+    close, atr, adx, mpr, atr_ma = f['Close'], f['ATR'], f['ADX'], ob['mpr'], c['atr_ma']
+    bid_depth, ask_depth, low, high = ob['bid_depth'], ob['ask_depth'], f['Low'], f['High']
+    expansion = (atr > atr_ma * p['atr_threshold']) & (adx > p['adx_threshold']) & c['band_expansion']
+    return {
+        'enter_short': (expansion & (c['low_2'] >= c['low_1']) & (c['low_1'] >= low)
+                        & (ask_depth > bid_depth * p['depth_ratio']) & (mpr < p['mpr_short'])),
+        'enter_long': (expansion & (c['high_2'] <= c['high_1']) & (c['high_1'] <= high)
+                       & (bid_depth > ask_depth * p['depth_ratio']) & (mpr > p['mpr_long'])),
+        'exit_short': ((atr < atr_ma * 0.8) & (adx < p['adx_threshold'] - 5) & (close > f['BB_middle']) & (mpr > p['mpr_long'])
+                       & (atr > atr_ma * p['exit_atr_ratio'])),
+        'exit_long': ((atr < atr_ma * 0.8) & (adx < p['adx_threshold'] - 5) & (close < f['BB_middle']) & (mpr < p['mpr_short'])
+                      & (atr > atr_ma * p['exit_atr_ratio'])),
+        'emergency_exit': atr > atr_ma * p['exit_atr_ratio'],  # + 평균가 대비 5% 이상 변동
+    }
+
+
+def _rsi_divergence_masks(f, ob, c, p, status):  # 진입은 + _check_open_condition, 청산은 + 평균가 대비 1%
+    close, atr, adx, rsi, mpr, atr_ma = f['Close'], f['ATR'], f['ADX'], f['RSI'], ob['mpr'], c['atr_ma']
+    bid_depth, ask_depth = ob['bid_depth'], ob['ask_depth']
+    return {
+        'enter_long': ((rsi > c['rsi_1']) & (close < c['close_1']) & (rsi < p['rsi_lower']) & (close < f['BB_lower'])
+                       & (mpr > p['mpr_long']) & (bid_depth > ask_depth * p['depth_ratio']) & c['volume_trend']
+                       & (adx < p['adx_threshold']) & (atr < atr_ma * p['atr_ratio'])),
+        'enter_short': ((rsi < c['rsi_1']) & (close > c['close_1']) & (rsi > p['rsi_upper']) & (close > f['BB_upper'])
+                        & (mpr < p['mpr_short']) & (ask_depth > bid_depth * p['depth_ratio']) & c['volume_trend']
+                        & (adx < p['adx_threshold']) & (atr < atr_ma * p['atr_ratio'])),
+        'exit_long': (close > f['BB_middle']) & (rsi > 50) & (mpr < p['exit_long_mpr']) & (atr > atr_ma * p['exit_atr_ratio']),
+        'exit_short': (close < f['BB_middle']) & (rsi < 50) & (mpr > p['exit_short_mpr']) & (atr > atr_ma * p['exit_atr_ratio']),
+    }
+
+
+MASK_BUILDERS = {
+    '_volume_breakout_strategy': _volume_breakout_masks,
+    '_trend_momentum_strategy': _trend_momentum_masks,
+    '_macd_rsi_strategy': _macd_rsi_masks,
+    '_bollinger_rsi_strategy': _bollinger_rsi_masks,
+    '_atr_trend_follow_strategy': _atr_trend_follow_masks,
+    '_rsi_divergence_strategy': _rsi_divergence_masks,
+}
+
+
+def strategy_masks(f, ob, status=None, params=None, names=STRATEGIES, inputs=None):
+    """
+    전략별 조건 마스크 (포지션/잔고와 무관한 부분만)
+
+    :param f: {컬럼: ndarray} 지표 배열
+    :param ob: orderbook_proxy 결과
+    :param status: market_status_array 결과 (None이면 시장 상태 미설정, _trend_momentum_strategy는 기본 ADX 기준)
+    :param params: strategy_params 결과 (None이면 strategy_params())
+    :param names: 계산할 전략
+    :param inputs: condition_inputs 결과 (없으면 여기서 계산)
+    :return: {strategy: {조건: bool ndarray}}
+    """
+    params = params or strategy_params()
+    inputs = inputs if inputs is not None else condition_inputs(f)
+    with np.errstate(invalid='ignore'):
+        return {name: MASK_BUILDERS[name](f, ob, inputs, params[name], status) for name in names}
+
+
+class VectorDecider:
+    """
+    후보 봉 하나에서 전략 핸들러의 분기 순서를 그대로 따라 신호 결정
+    - 포지션/잔고 판단은 BasicStrategy의 _check_open_condition/_check_close_condition을 그대로 호출
+    :return: (action, amount) 또는 None(HOLD)
+    """
+    def __init__(self, strategy, masks):
+        self.strategy = strategy
+        self.masks = masks
+
+    def decide(self, name, i, position, price):
+        return getattr(self, name)(self.masks[name], i, position, price)
+
+    def _enter(self, action, position, price):
+        return action, self.strategy._calculate_order_size(price, position)
+
+    def _exit(self, action, position, price):
+        return action, abs(self.strategy._calculate_order_size(price, position))
+
+    def _ordered(self, m, i, position, price):
+        """진입 조건 -> 보유 중 청산 조건 순서, 조건이 맞았는데 진입/청산 불가면 HOLD"""
+        amount = position['position_amount']
+        if m['enter_long'][i]:
+            return self._enter('ENTER_LONG', position, price) if self.strategy._check_open_condition(position) else None
+        if m['enter_short'][i]:
+            return self._enter('ENTER_SHORT', position, price) if self.strategy._check_open_condition(position) else None
+        if amount > 0 and m['exit_long'][i]:
+            return self._exit('EXIT_LONG', position, price) if self.strategy._check_close_condition(position) else None
+        if amount < 0 and m['exit_short'][i]:
+            return self._exit('EXIT_SHORT', position, price) if self.strategy._check_close_condition(position) else None
+        return None
+
+    _volume_breakout_strategy = _ordered
+    _trend_momentum_strategy = _ordered
+    _bollinger_rsi_strategy = _ordered
+
+    def _macd_rsi_strategy(self, m, i, position, price):
+        amount, avg_price = position['position_amount'], position['avg_price']
+        if self.strategy._check_open_condition(position):
+            if m['enter_long'][i]:
+                return self._enter('ENTER_LONG', position, price)
+            if m['enter_short'][i]:
+                return self._enter('ENTER_SHORT', position, price)
+            return None
+        if self.strategy._check_close_condition(position):
+            if amount > 0 and m['exit_long'][i]:
+                return self._exit('EXIT_LONG', position, price)
+            if amount < 0 and m['exit_short'][i]:
+                return self._exit('EXIT_SHORT', position, price)
+            return None
+        mygain = (price - avg_price) / avg_price * 100 * position['leverage'] if avg_price != 0 and amount != 0 else 0
+        if amount > 0 and mygain < -10 and m['histogram_down'][i]:
+            return self._exit('EXIT_LONG', position, price)
+        if amount < 0 and mygain < -10 and m['histogram_up'][i]:
+            return self._exit('EXIT_SHORT', position, price)
+        return None
+
+    def _atr_trend_follow_strategy(self, m, i, position, price):
+        amount, avg_price = position['position_amount'], position['avg_price']
+        if (m['enter_short'][i] or m['enter_long'][i]) and self.strategy._check_open_condition(position):
+            return self._enter('ENTER_SHORT' if m['enter_short'][i] else 'ENTER_LONG', position, price)
+        if amount < 0 and m['exit_short'][i]:
+            return self._exit('EXIT_SHORT', position, price) if self.strategy._check_close_condition(position) else None
+        if amount > 0 and m['exit_long'][i]:
+            return self._exit('EXIT_LONG', position, price) if self.strategy._check_close_condition(position) else None
+        if (amount > 0 and m['emergency_exit'][i] and abs(price - avg_price) > price * 0.05
+                and self.strategy._check_close_condition(position)):
+            return 'EXIT_LONG', amount
+        return None
+
+    def _rsi_divergence_strategy(self, m, i, position, price):
+        amount, avg_price = position['position_amount'], position['avg_price']
+        if (m['enter_long'][i] or m['enter_short'][i]) and self.strategy._check_open_condition(position):
+            return self._enter('ENTER_LONG' if m['enter_long'][i] else 'ENTER_SHORT', position, price)
+        if amount > 0 and m['exit_long'][i] and price - avg_price < -0.01 * avg_price:
+            return self._exit('EXIT_LONG', position, price) if self.strategy._check_close_condition(position) else None
+        if amount < 0 and m['exit_short'][i] and price - avg_price > 0.01 * avg_price:
+            return self._exit('EXIT_SHORT', position, price) if self.strategy._check_close_condition(position) else None
+        return None
+
+
+class BacktestResult:
+    def __init__(self, symbol, strategies, times, close, trades, signals, account, wallet, seconds):
+        self.symbol = symbol
+        self.strategies = strategies
+        self.times = times
+        self.trades = trades      # [{'bar', 'time', 'action', 'strategy', 'side', 'quantity', 'price', 'realized', 'fee',
+                                  #   'wallet', 'amount', 'avg_price'}] (wallet/amount/avg_price는 체결 후 값)
+        self.signals = signals    # 주문으로 이어지지 않은 신호 포함 전체 신호 수
+        self.account = account
+        self.wallet = wallet      # 시작 잔고
+        self.seconds = seconds
+        self.equity = self._equity(close)
+
+    def _equity(self, close):
+        """봉별 평가 잔고 (체결 사이에는 포지션/평균가/잔고가 그대로이므로 구간별로 채움)"""
+        wallet = np.full(len(close), self.wallet)
+        amount = np.zeros(len(close))
+        avg_price = np.zeros(len(close))
+        if self.trades:
+            bars = np.array([trade['bar'] for trade in self.trades])
+            index = np.searchsorted(bars, np.arange(len(close)), side='right') - 1
+            filled = index >= 0
+            wallet[filled] = np.array([trade['wallet'] for trade in self.trades])[index[filled]]
+            amount[filled] = np.array([trade['amount'] for trade in self.trades])[index[filled]]
+            avg_price[filled] = np.array([trade['avg_price'] for trade in self.trades])[index[filled]]
+        return wallet + amount * (close - avg_price)
+
+    def summary(self):
+        closes = [trade for trade in self.trades if trade['realized'] != 0]
+        peak = np.maximum.accumulate(self.equity)
+        drawdown = float(np.max((peak - self.equity) / peak)) if len(self.equity) else 0.0
+        return {
+            'symbol': self.symbol,
+            'bars': len(self.equity),
+            'signals': self.signals,
+            'trades': len(self.trades),
+            'win_rate': sum(trade['realized'] > 0 for trade in closes) / len(closes) if closes else 0.0,
+            'realized': sum(trade['realized'] for trade in self.trades),
+            'fees': self.account.fees,
+            'final_equity': float(self.equity[-1]) if len(self.equity) else self.wallet,
+            'return': (float(self.equity[-1]) / self.wallet - 1) if len(self.equity) else 0.0,
+            'max_drawdown': drawdown,
+            'seconds': self.seconds,
+        }
+
+
+def frame_arrays(frame):
+    """지표 포함 DataFrame -> {컬럼: ndarray} (Open time은 datetime64 그대로)"""
+    arrays = {column: frame[column].to_numpy(dtype=float) for column in frame.columns if column != 'Open time'}
+    arrays['Open time'] = frame['Open time'].to_numpy()
+    return arrays
+
+
+class Backtester:
+    """
+    :param strategies: 실행할 전략 목록 (우선순위 순, None이면 BasicStrategy 기본 active_strategies)
+    :param regime: True면 봉마다 determine_market_status(1m) 결과로 strategy_map 전략 선택
+    :param orderbook: 오더북 대용값 방식 ('candle' | 'neutral')
+    :param params: 전략 임계값 덮어쓰기 {전략: {파라미터: 값}} (strategy_params)
+    """
+    def __init__(self, strategies=None, regime=False, orderbook='candle', slippage=SLIPPAGE,
+                 wallet=WALLET, leverage=TARGET_LEVERAGE, fee=TAKER_FEE, window=INDICATOR_FRAME_ROWS, params=None):
+        self.strategies = [strategy_name(name) for name in strategies] if strategies else None
+        self.regime = regime
+        self.orderbook = orderbook
+        self.slippage = slippage
+        self.wallet = wallet
+        self.leverage = leverage
+        self.fee = fee
+        self.window = window
+        self.params = params
+        self.indicators = Indicators()
+        self._prototype = None
+
+    def prepare(self, df):
+        """OHLCV -> 지표 포함 DataFrame (전체 기간 한 번 계산, 지표 준비 전 구간 제외)"""
+        frame = self.indicators.calculate_indicators_numpy(df.reset_index(drop=True))
+        if isinstance(frame, str):
+            raise ValueError("지표 계산 실패")
+        return frame.reset_index(drop=True)
+
+    def precompute(self, arrays):
+        """임계값과 무관한 배열 (오더북 대용값, 조건 파생 배열, 시장 상태), 파라미터만 바꿔 여러 번 돌릴 때 재사용"""
+        return {
+            'ob': orderbook_proxy(arrays, self.orderbook, self.slippage),
+            'inputs': condition_inputs(arrays),
+            'status': market_status_array(arrays) if self.regime else None,
+        }
+
+    def _strategy(self, account):
+        """실행마다 새 BasicStrategy (생성 로그가 반복되지 않게 처음 만든 인스턴스를 복사)"""
+        if self._prototype is None:
+            from basic_strategy import BasicStrategy  # data_handler 모듈을 같이 불러오므로 실행 시점에 import
+            self._prototype = BasicStrategy(account)
+        strategy = copy.copy(self._prototype)
+        strategy.data_handler = account
+        strategy.params = strategy_params(self.params)
+        strategy.signal_delay = 0
+        strategy.market_status = None
+        if self.strategies is not None:
+            strategy.active_strategies = list(self.strategies)
+        return strategy
+
+    def run(self, df, symbol, engine='vector', prepared=False):
+        """
+        :param df: OHLCV DataFrame (prepared=True면 prepare 결과)
+        :param engine: 'vector' | 'loop'
+        """
+        frame = df if prepared else self.prepare(df)
+        if engine == 'vector':
+            return self.run_arrays(frame_arrays(frame), symbol)
+        if engine != 'loop':
+            raise ValueError(f"알 수 없는 엔진: {engine}")
+        account = SimAccount(self.wallet, self.leverage, self.fee)
+        strategy = self._strategy(account)
+        ob = orderbook_proxy(frame, self.orderbook, self.slippage)
+        t0 = time.perf_counter()
+        trades, signals = self._run_loop(frame, ob, account, strategy, symbol)
+        return self._result(symbol, frame_arrays(frame), strategy, trades, signals, account, time.perf_counter() - t0)
+
+    def run_arrays(self, arrays, symbol, cache=None):
+        """
+        vector 엔진
+
+        :param arrays: {컬럼: ndarray} 지표 배열 (frame_arrays, Open time은 없어도 됨)
+        :param cache: precompute 결과 (없으면 여기서 계산)
+        """
+        account = SimAccount(self.wallet, self.leverage, self.fee)
+        strategy = self._strategy(account)
+        t0 = time.perf_counter()
+        cache = cache or self.precompute(arrays)
+        trades, signals = self._run_vector(arrays, cache, account, strategy)
+        return self._result(symbol, arrays, strategy, trades, signals, account, time.perf_counter() - t0)
+
+    def _result(self, symbol, arrays, strategy, trades, signals, account, seconds):
+        start = self.window - 1
+        for trade in trades:
+            trade['bar'] -= start
+        times = arrays.get('Open time')
+        strategies = list(STRATEGIES) if self.regime else list(strategy.active_strategies)
+        return BacktestResult(symbol, strategies, times[start:] if times is not None else None, arrays['Close'][start:],
+                              trades, signals, account, self.wallet, seconds)
+
+    def _active(self, strategy, status):
+        """봉별 활성 전략 (regime이 아니면 고정 목록)"""
+        if status is None:
+            return lambda i: strategy.active_strategies
+        names = [strategy.strategy_map.get(name, []) for name in MARKET_STATUSES]
+        return lambda i: names[status[i]]
+
+    def _execute(self, account, trades, i, time_, action, amount, strategy_name_, price):
+        side = order_side(action, account.amount)
+        quantity = abs(amount) if amount else 0
+        if side is None or quantity <= 0:
+            return
+        realized, fee = account.fill(side, quantity, price)
+        trades.append({'bar': i, 'time': time_, 'action': action, 'strategy': strategy_name_, 'side': side,
+                       'quantity': quantity, 'price': price, 'realized': realized, 'fee': fee,
+                       'wallet': account.wallet, 'amount': account.amount, 'avg_price': account.avg_price})
+
+    def _run_vector(self, arrays, cache, account, strategy):
+        ob, status = cache['ob'], cache['status']
+        names = STRATEGIES if status is not None else strategy.active_strategies
+        masks = strategy_masks(arrays, ob, status, strategy.params, names, cache['inputs'])
+        # 후보 봉: 그 봉에서 활성인 전략의 조건 마스크가 하나라도 참 (나머지 봉은 모든 전략이 HOLD)
+        close = arrays['Close']
+        candidate = np.zeros(len(close), dtype=bool)
+        if status is None:
+            for name in names:
+                for mask in masks[name].values():
+                    candidate |= mask
+        else:
+            for code, state in enumerate(MARKET_STATUSES):
+                for name in strategy.strategy_map.get(state, []):
+                    for mask in masks[name].values():
+                        candidate |= mask & (status == code)
+        candidate[:self.window - 1] = False
+
+        decider = VectorDecider(strategy, masks)
+        active = self._active(strategy, status)
+        times = arrays.get('Open time')
+        trades, signals = [], 0
+        for i in np.flatnonzero(candidate).tolist():
+            price = close[i]
+            position = account.position(price)
+            for name in active(i):
+                decision = decider.decide(name, i, position, price)
+                if decision is not None:
+                    action, amount = decision
+                    signals += 1
+                    self._execute(account, trades, i, times[i] if times is not None else None, action, amount,
+                                  name, ob[ACTION_PRICE[action]][i])
+                    break
+        return trades, signals
+
+    def _run_loop(self, frame, ob, account, strategy, symbol):
+        keys = ('high_ask', 'low_bid', 'mpr', 'order_imbalance', 'bid_depth', 'ask_depth')
+        rows = {key: ob[key].tolist() for key in keys}
+        close = frame['Close'].to_numpy(dtype=float)
+        times = frame['Open time'].to_numpy()
+        trades, signals = [], 0
+        for i in range(self.window - 1, len(frame)):
+            window = frame.iloc[i - self.window + 1:i + 1]
+            position = account.position(close[i])
+            position['symbol'] = symbol
+            if self.regime:
+                position['market_status_1m'] = self.indicators.determine_market_status(window)
+            orderbook = {key: rows[key][i] for key in keys}
+            orderbook['symbol'] = symbol
+            result = strategy.generate_trading_signals(window, position, orderbook)
+            if result['action'] != 'HOLD':
+                signals += 1
+                self._execute(account, trades, i, times[i], result['action'], result['amount'],
+                              result['strategy'], result['price'])
+        return trades, signals
+
+
+def format_summary(summary):
+    return (f"{summary['symbol']:<12} 봉 {summary['bars']:>8,} 신호 {summary['signals']:>6,} 체결 {summary['trades']:>6,} "
+            f"승률 {summary['win_rate']:>6.1%} 실현 {summary['realized']:>10.2f} 수수료 {summary['fees']:>8.2f} "
+            f"수익률 {summary['return']:>8.2%} MDD {summary['max_drawdown']:>6.2%} ({summary['seconds']:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BasicStrategy 백테스트")
+    parser.add_argument('symbols', nargs='+', help="심볼 (data/klines_<심볼>_<tf>.csv) 또는 CSV 경로")
+    parser.add_argument('--interval', default='1m', help="캔들 타임프레임")
+    parser.add_argument('--db', action='store_true', help="CSV 대신 CoinData 테이블에서 읽기")
+    parser.add_argument('--strategies', help="쉼표 구분 전략 목록 (우선순위 순, 예: macd_rsi,bollinger_rsi)")
+    parser.add_argument('--each', action='store_true', help="여섯 전략을 하나씩 따로 실행해서 비교")
+    parser.add_argument('--regime', action='store_true', help="봉마다 시장 상태(1m)로 strategy_map 전략 선택")
+    parser.add_argument('--orderbook', default='candle', choices=('candle', 'neutral'), help="오더북 대용값")
+    parser.add_argument('--slippage', type=float, default=SLIPPAGE, help="주문 가격 = 종가 x (1 +/- slippage)")
+    parser.add_argument('--wallet', type=float, default=WALLET, help="시작 잔고 (USDT)")
+    parser.add_argument('--params', help="전략 임계값 JSON (예: '{\"macd_rsi\": {\"rsi_lower\": 40}}', strategy_params.PARAM_SPACE)")
+    parser.add_argument('--engine', default='vector', choices=('vector', 'loop'))
+    parser.add_argument('--trades', action='store_true', help="체결 내역 출력")
+    args = parser.parse_args()
+
+    params = {strategy_name(name): values for name, values in json.loads(args.params).items()} if args.params else None
+    runs = [[name] for name in STRATEGIES] if args.each else [args.strategies.split(',') if args.strategies else None]
+    for arg in args.symbols:
+        if args.db:
+            symbol, df = arg, load_db(arg, args.interval)
+        else:
+            path = arg if arg.endswith('.csv') else csv_path(arg, args.interval)
+            symbol = os.path.basename(path).split('_')[1] if os.path.basename(path).startswith('klines_') else arg
+            df = load_csv(path)
+        t0 = time.perf_counter()
+        backtester = Backtester(regime=args.regime, orderbook=args.orderbook, slippage=args.slippage, wallet=args.wallet,
+                                params=params)
+        frame = backtester.prepare(df)
+        print(f"{symbol} {args.interval} {len(df):,}봉, 지표 계산 {time.perf_counter() - t0:.2f}s")
+        for strategies in runs:
+            backtester.strategies = [strategy_name(name) for name in strategies] if strategies else None
+            result = backtester.run(frame, symbol, args.engine, prepared=True)
+            label = ','.join(name.strip('_').replace('_strategy', '') for name in result.strategies)
+            print(f"  [{label}] {format_summary(result.summary())}")
+            if args.trades:
+                for trade in result.trades:
+                    print(f"    {pd.Timestamp(trade['time'])} {trade['action']:<11} {trade['side']:<4} "
+                          f"{trade['quantity']:>10g} @ {trade['price']:.6g} 실현 {trade['realized']:>9.4f} "
+                          f"잔고 {trade['wallet']:.2f} ({trade['strategy']})")
@@ -0,0 +1,103 @@
+"""
+백테스트 엔진 동등성 검사
+- 같은 캔들/오더북 대용값에 대해
+  loop:   봉마다 BasicStrategy.generate_trading_signals 호출 (기준)
+  vector: 조건 마스크 + 후보 봉에서만 포지션 판단
+- 전략 하나씩, 기본 전략 목록, 시장 상태별 전략 선택(regime), 무작위 임계값(regime) 각각에서 체결 내역(봉, 신호, 방향, 수량, 가격)이 같아야 통과
+- data/klines_*_1m.csv + 시드 고정 합성 캔들(봉 수가 적은 저장 데이터만으로는 신호가 거의 안 나옴)
+
+사용법: python backtest_parity.py [csv 경로 ...] [--bars 5000] [--seed 0]
+"""
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from backtest import STRATEGIES, Backtester, load_csv
+from config import DATA_DIR
+from strategy_params import PARAM_SPACE, grid, random_params
+
+
+def synthetic_klines(bars, seed=0, price=1.0):
+    """변동성 국면이 바뀌는 랜덤 워크 1분봉"""
+    rng = np.random.default_rng(seed)
+    volatility = np.repeat(rng.uniform(0.0005, 0.004, bars // 200 + 1), 200)[:bars]
+    close = price * np.exp(np.cumsum(rng.normal(0, volatility)))
+    open_ = np.concatenate([[price], close[:-1]])
+    wick = np.abs(rng.normal(0, volatility, (2, bars))) * close
+    return pd.DataFrame({
+        'Open time': pd.date_range('2025-01-01', periods=bars, freq='1min'),
+        'Open': open_,
+        'High': np.maximum(open_, close) + wick[0],
+        'Low': np.minimum(open_, close) - wick[1],
+        'Close': close,
+        'Volume': rng.lognormal(10, 0.8, bars),
+    })
+
+
+def trade_keys(result):
+    return [(trade['bar'], trade['action'], trade['side'], trade['quantity'], trade['price'])
+            for trade in result.trades]
+
+
+def check(name, df):
+    cases = [(f"[{strategy.strip('_')}]", dict(strategies=[strategy])) for strategy in STRATEGIES]
+    cases += [("기본 전략", {}), ("regime", dict(regime=True))]
+    # 임계값을 바꿔도 두 엔진이 같은 파라미터를 읽는지 (전략별 무작위 파라미터 + regime)
+    params = {strategy: random_params(strategy, 1, seed=seed)[0] for seed, strategy in enumerate(STRATEGIES)}
+    cases += [("무작위 파라미터 regime", dict(regime=True, params=params))]
+    failed = 0
+    for label, options in cases:
+        backtester = Backtester(**options)
+        frame = backtester.prepare(df)
+        loop = backtester.run(frame, name, 'loop', prepared=True)
+        vector = backtester.run(frame, name, 'vector', prepared=True)
+        expected, actual = trade_keys(loop), trade_keys(vector)
+        ok = expected == actual and loop.signals == vector.signals
+        failed += not ok
+        detail = f"체결 {len(expected)}건, 신호 {loop.signals}건, loop {loop.seconds:.2f}s / vector {vector.seconds:.3f}s"
+        if not ok:
+            first = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+            detail += (f" - 불일치 (신호 {loop.signals} != {vector.signals}, 첫 차이 #{first}: "
+                       f"{expected[first] if first < len(expected) else None} != {actual[first] if first < len(actual) else None})")
+        print(f"{'OK  ' if ok else 'FAIL'} {name} {label}: {detail}")
+    return failed
+
+
+def check_param_space():
+    """소수 범위 파라미터의 탐색 후보가 정수로 반올림되지 않는지 (기본값이 int면 _cast가 정수로 자름)"""
+    failed = 0
+    for strategy, space in PARAM_SPACE.items():
+        for name, (default, low, high) in space.items():
+            if float(low).is_integer() and float(high).is_integer():
+                continue
+            values = [params[name] for params in grid(strategy, steps=5, names=[name])]
+            values += [params[name] for params in random_params(strategy, 20, names=[name])]
+            ok = any(not float(value).is_integer() for value in values) and all(low <= value <= high for value in values)
+            failed += not ok
+            if not ok:
+                print(f"FAIL 파라미터 범위 {strategy}.{name} ({default}, {low}, {high}): {sorted(set(values))}")
+    if not failed:
+        print("OK   파라미터 범위: 소수 범위 후보 정상")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="백테스트 vector/loop 엔진 동등성 검사")
+    parser.add_argument('paths', nargs='*', help="캔들 CSV (기본: data/klines_*_1m.csv)")
+    parser.add_argument('--bars', type=int, default=5000, help="합성 캔들 봉 수 (0이면 생략)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(DATA_DIR, "klines_*_1m.csv")))
+    if not paths and not args.paths:
+        paths = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "klines_*_1m.csv")))
+    failed = check_param_space()
+    for path in paths:
+        failed += check(os.path.basename(path), load_csv(path))
+    if args.bars:
+        failed += check(f"synthetic(seed={args.seed})", synthetic_klines(args.bars, args.seed))
+    sys.exit(1 if failed else 0)
@@ -8,12 +8,26 @@ import logging
 import time
 from data_handler import DataHandler
 from logger import logger
+from strategy_params import strategy_params
 
 class BasicStrategy:
-    def __init__(self, data_handler: DataHandler):
+    # 전략별로 읽는 지표 컬럼 (IndicatorPlanner가 활성 전략에 필요한 지표만 계산하는 데 사용)
+    STRATEGY_FEATURES = {
+        '_volume_breakout_strategy': ('ADX', 'ATR', 'EMA_fast', 'EMA_slow', 'MACD_histogram', 'RSI', 'fib_0.786'),
+        '_trend_momentum_strategy': ('ADX', 'ATR', 'EMA_fast', 'EMA_slow', 'RSI'),
+        '_macd_rsi_strategy': ('MACD', 'MACD_histogram', 'MACD_signal', 'RSI'),
+        '_bollinger_rsi_strategy': ('ATR', 'BB_lower', 'BB_middle', 'BB_upper', 'RSI'),
+        '_atr_trend_follow_strategy': ('ADX', 'ATR', 'BB_lower', 'BB_middle', 'BB_upper'),
+        '_rsi_divergence_strategy': ('ADX', 'ATR', 'BB_lower', 'BB_middle', 'BB_upper', 'RSI'),
+    }
+
+    def __init__(self, data_handler: DataHandler, params: Optional[Dict] = None):
+        """:param params: 전략별 임계값 덮어쓰기 {전략: {파라미터: 값}} (없으면 strategy_params 기본값)"""
         self.trade_history = []  # 거래 내역 저장
         self.data_handler = data_handler
+        self.params = strategy_params(params)
         self.active_strategies = ['_bollinger_rsi_strategy', '_macd_rsi_strategy']  # 초기값
+        self.signal_delay = 0.5  # 매매 신호가 나온 뒤 대기 시간 (초), 재생/백테스트에서는 0
         self.strategy_map = {
             'Strong_Trend_Up': ['_trend_momentum_strategy', '_volume_breakout_strategy'],
             'Rising': ['_trend_momentum_strategy', '_macd_rsi_strategy'],
@@ -30,6 +44,20 @@ class BasicStrategy:
         self.market_status = market_status
         self.active_strategies = self.strategy_map.get(market_status, [])
 
+    def active_strategies_for(self, position: Dict) -> List[str]:
+        """generate_trading_signals가 이 포지션에 대해 실행할 전략 목록 (상태 변경 없음)"""
+        market_status = position.get('market_status_1m')
+        if market_status:
+            return self.strategy_map.get(market_status, [])
+        return self.active_strategies
+
+    def required_features(self, position: Dict) -> set:
+        """활성 전략이 읽는 지표 컬럼 합집합"""
+        features = set()
+        for strategy in self.active_strategies_for(position):
+            features.update(self.STRATEGY_FEATURES.get(strategy, ()))
+        return features
+
     def generate_trading_signals(self, df: pd.DataFrame, position: Dict, orderbook: Dict) -> Dict:
         """
         다중 조건 기반 매매 신호 생성
@@ -70,7 +98,8 @@ class BasicStrategy:
                 if strategy_signal['action'] != 'HOLD':
                     strategy_signal['strategy'] = strategy
                     signals.update(strategy_signal)
-                    time.sleep(0.5)
+                    if self.signal_delay:
+                        time.sleep(self.signal_delay)
                     break  # 우선순위 전략 신호 사용
 
         return signals
@@ -80,6 +109,7 @@ class BasicStrategy:
         - 강한 상승장 초기에 롱 진입, 말기에는 숏 진입으로 수익 극대화
         """
         latest = df.iloc[-1]
+        p = self.params['_volume_breakout_strategy']  # 임계값 (strategy_params)
         price_high = orderbook['high_ask']
         price_low = orderbook['low_bid']
         current_price = latest['Close']
@@ -94,47 +124,47 @@ class BasicStrategy:
         }
 
         # 설정값
-        adx_threshold = 25
+        adx_threshold = p['adx_threshold']
         atr_ma = df['ATR'].rolling(14).mean().iloc[-1]
         vol_ma = df['Volume'].rolling(20).mean().iloc[-1]
 
         # 롱 진입 조건: 강한 상승장 초기
         enter_long_cond = all([
-            latest['Volume'] > vol_ma * 1.5,
+            latest['Volume'] > vol_ma * p['volume_ratio'],
             latest['MACD_histogram'] > df['MACD_histogram'].iloc[-2] * 1.2,
             latest['Close'] > latest['fib_0.786'],
-            orderbook['mpr'] > 0.6,
-            orderbook['order_imbalance'] > 0.2,
+            orderbook['mpr'] > p['mpr_long'],
+            orderbook['order_imbalance'] > p['imbalance'],
             latest['ADX'] < adx_threshold,
-            latest['ATR'] < atr_ma * 2
+            latest['ATR'] < atr_ma * p['atr_ratio']
             # self.status_duration >= 3,  # 상태 지속성 확인
         ])
 
         # 숏 진입 조건: 강한 상승장 말기
         enter_short_cond = all([
-            # latest['Volume'] > vol_ma * 1.5,
+            # latest['Volume'] > vol_ma * p['volume_ratio'],
             latest['MACD_histogram'] < df['MACD_histogram'].iloc[-2] * 0.8,
             latest['RSI'] > 70,
             current_price < latest['EMA_fast'],
-            orderbook['mpr'] < 0.45,
-            orderbook['order_imbalance'] < -0.2,
+            orderbook['mpr'] < p['mpr_short'],
+            orderbook['order_imbalance'] < -p['imbalance'],
             latest['ADX'] > adx_threshold,
-            latest['ATR'] < atr_ma * 2
+            latest['ATR'] < atr_ma * p['atr_ratio']
         ])
 
         # 롱 청산 조건: 추세 약화 또는 상태 전환
         exit_long_cond = any([
             current_price < latest['EMA_slow'],
-            orderbook['mpr'] < 0.4,
-            latest['ATR'] > atr_ma * 2
+            orderbook['mpr'] < p['exit_long_mpr'],
+            latest['ATR'] > atr_ma * p['atr_ratio']
             # self.market_status in ['Rising', 'Sideways_Or_Weak_Trend']  # 상태 전환 시 청산
         ])
 
         # 숏 청산 조건: 반등 신호
         exit_short_cond = any([
             current_price > latest['EMA_fast'],
-            orderbook['mpr'] > 0.55,
-            latest['ATR'] > atr_ma * 2
+            orderbook['mpr'] > p['exit_short_mpr'],
+            latest['ATR'] > atr_ma * p['atr_ratio']
         ])
 
         # 포지션 없음: 신규 진입
@@ -188,6 +218,7 @@ class BasicStrategy:
         - 단기 매매에서 상승 및 하락 추세를 모두 추적하며 양방향 진입과 빠른 청산
         """
         latest = df.iloc[-1]
+        p = self.params['_trend_momentum_strategy']  # 임계값 (strategy_params)
         price_high = orderbook['high_ask']  # 롱 진입/숏 청산 시 매수 호가
         price_low = orderbook['low_bid']    # 숏 진입/롱 청산 시 매도 호가
         current_price = latest['Close']
@@ -202,7 +233,7 @@ class BasicStrategy:
         }
 
         # 설정값 (Thresholds)
-        adx_threshold = 25 if self.market_status == 'Strong_Trend_Up' else 22  # 상태별 ADX 기준 (조정 가능: 20~27)
+        adx_threshold = p['adx_threshold_strong'] if self.market_status == 'Strong_Trend_Up' else p['adx_threshold']  # 상태별 ADX 기준
         atr_ma = df['ATR'].rolling(14).mean().iloc[-1]  # 평균 ATR 계산 (변동성 기준)
         volume_trend = df['Volume'].iloc[-3:].mean() > df['Volume'].rolling(20).mean().iloc[-2]  # 최근 3봉 거래량 상승
 
@@ -211,8 +242,8 @@ class BasicStrategy:
             latest['EMA_slow'] > latest['EMA_fast'],  # EMA_slow > EMA_fast: 상승 추세 확인
             latest['ADX'] > adx_threshold,  # ADX 기준: 상승 추세 강도 (ADX_14 → ADX)
             volume_trend,  # 거래량 증가로 모멘텀 검증
-            orderbook['mpr'] > 0.55 and orderbook['bid_depth'] > orderbook['ask_depth'] * 1.2,  # 매수 압력 강함
-            latest['ATR'] < atr_ma * 1.5  # 변동성 안정 (조정 가능: 1.2~2)
+            orderbook['mpr'] > p['mpr_long'] and orderbook['bid_depth'] > orderbook['ask_depth'] * p['depth_ratio'],  # 매수 압력 강함
+            latest['ATR'] < atr_ma * p['atr_ratio']  # 변동성 안정
         ])
 
         enter_short_cond = all([
@@ -220,23 +251,23 @@ class BasicStrategy:
             latest['ADX'] > adx_threshold,  # ADX 기준: 하락 추세 강도
             # volume_trend,  # 거래량 증가로 모멘텀 검증
             latest['RSI'] > 70,
-            orderbook['mpr'] < 0.45 and orderbook['ask_depth'] > orderbook['bid_depth'] * 1.2,  # 매도 압력 강함
-            latest['ATR'] < atr_ma * 1.5  # 변동성 안정
+            orderbook['mpr'] < p['mpr_short'] and orderbook['ask_depth'] > orderbook['bid_depth'] * p['depth_ratio'],  # 매도 압력 강함
+            latest['ATR'] < atr_ma * p['atr_ratio']  # 변동성 안정
         ])
 
         # 청산 조건: 빠른 추세 약화 또는 반전 대응
         exit_long_cond = all([
             current_price < latest['EMA_fast'],  # EMA_slow 이탈: 상승 추세 약화
             # latest['ADX'] < adx_threshold - 5,  # ADX 감소: 추세 소멸
-            orderbook['mpr'] < 0.45,  # 매수 압력 급감 (조정 가능: 0.35~0.45)
-            latest['ATR'] > atr_ma * 2  # 변동성 급등: 리스크 관리
+            orderbook['mpr'] < p['exit_long_mpr'],  # 매수 압력 급감
+            latest['ATR'] > atr_ma * p['exit_atr_ratio']  # 변동성 급등: 리스크 관리
         ])
 
         exit_short_cond = all([
             current_price > latest['EMA_fast'],  # EMA_slow 돌파: 하락 추세 약화
             # latest['ADX'] < adx_threshold - 5,  # ADX 감소: 추세 소멸
-            orderbook['mpr'] > 0.55,  # 매도 압력 감소 (조정 가능: 0.5~0.6)
-            latest['ATR'] > atr_ma * 2  # 변동성 급등: 리스크 관리
+            orderbook['mpr'] > p['exit_short_mpr'],  # 매도 압력 감소
+            latest['ATR'] > atr_ma * p['exit_atr_ratio']  # 변동성 급등: 리스크 관리
         ])
 
         # 포지션 없음: 신규 진입
@@ -292,6 +323,7 @@ class BasicStrategy:
         - 단기 추세 전환 및 조정 포착에 초점
         """
         latest = df.iloc[-1]
+        p = self.params['_macd_rsi_strategy']  # 임계값 (strategy_params)
         price_high = orderbook['high_ask']  # 롱 진입/숏 청산 시 매수 호가
         price_low = orderbook['low_bid']    # 숏 진입/롱 청산 시 매도 호가
         current_price = latest['Close']
@@ -346,7 +378,7 @@ class BasicStrategy:
             macd.iloc[-3] <= macd.iloc[-4] and
             macd.iloc[-4] < macd.iloc[-5] and
             histogram.iloc[-1] < 0 and
-            macd_signal_rate > 10
+            macd_signal_rate > p['signal_rate']
         )
         
         # MACD 하락 추세 전환 (Downward Change)
@@ -356,7 +388,7 @@ class BasicStrategy:
             macd.iloc[-3] >= macd.iloc[-4] and
             macd.iloc[-4] > macd.iloc[-5] and
             histogram.iloc[-1] > 0 and
-            macd_signal_rate > 10
+            macd_signal_rate > p['signal_rate']
         )
         
         # MACD 골든크로스 조건
@@ -364,7 +396,7 @@ class BasicStrategy:
             histogram.iloc[-1] > histogram.iloc[-2] > histogram.iloc[-3] and
             histogram.iloc[-4:-1].mean() < 0 and
             (histogram.iloc[-1] > 0 or histogram.iloc[-2] > 0) and
-            macd_signal_rate > 10
+            macd_signal_rate > p['signal_rate']
         )
         
         # MACD 데드크로스 조건
@@ -372,7 +404,7 @@ class BasicStrategy:
             histogram.iloc[-1] < histogram.iloc[-2] < histogram.iloc[-3] and
             histogram.iloc[-4:-1].mean() > 0 and
             (histogram.iloc[-1] < 0 or histogram.iloc[-2] < 0) and
-            macd_signal_rate > 10
+            macd_signal_rate > p['signal_rate']
         )
 
         # 추가 - 배드 포지션 청산 조건 (장기 보유 시 손절매)
@@ -388,10 +420,10 @@ class BasicStrategy:
         )  # 숏 포지션 손실 과다 시 청산
 
         # 쓰레드홀드 변수화
-        rsi_lower = 45  # 조정 가능: 30~40
-        rsi_upper = 55  # 조정 가능: 60~70
-        rsi_lower_cond = latest['RSI'] < rsi_lower and rsi_min < 35 # RSI 과매도 (rsi → RSI)
-        rsi_upper_cond = latest['RSI'] > rsi_upper and rsi_min > 65 # RSI 과매수 (rsi → RSI)
+        rsi_lower = p['rsi_lower']
+        rsi_upper = p['rsi_upper']
+        rsi_lower_cond = latest['RSI'] < rsi_lower and rsi_min < p['rsi_min_lower'] # RSI 과매도 (rsi → RSI)
+        rsi_upper_cond = latest['RSI'] > rsi_upper and rsi_min > p['rsi_min_upper'] # RSI 과매수 (rsi → RSI)
         
 
         # 포지션 진입 조건 (신중하게)
@@ -399,23 +431,23 @@ class BasicStrategy:
             (macd_up_change or macd_golden_cross) and
             raise_condition and
             rsi_lower_cond and
-            mpr > 0.55
+            mpr > p['mpr_long']
         )
         enter_short_condition = (
             (macd_down_change or macd_dead_cross) and
             raise_condition and
             rsi_upper_cond and
-            mpr < 0.45
+            mpr < p['mpr_short']
         )
 
         # 포지션 청산 조건 (신속하게)
         exit_long_condition = (
             (macd_down_change or macd_dead_cross) and
-            mpr < 0.45
+            mpr < p['mpr_short']
         )
         exit_short_condition = (
             (macd_up_change or macd_golden_cross) and
-            mpr > 0.55
+            mpr > p['mpr_long']
         )
 
         # 신규 진입 또는 추가 진입
@@ -485,6 +517,7 @@ class BasicStrategy:
         - 횡보 범위 내 평균 회귀를 타겟팅하며 신중한 진입과 빠른 청산
         """
         latest = df.iloc[-1]
+        p = self.params['_bollinger_rsi_strategy']  # 임계값 (strategy_params)
         price_high = orderbook['high_ask']  # 롱 진입/숏 청산 시 매수 호가
         price_low = orderbook['low_bid']    # 숏 진입/롱 청산 시 매도 호가
         current_price = latest['Close']
@@ -500,8 +533,8 @@ class BasicStrategy:
         }
 
         # 쓰레드홀드 변수화
-        rsi_lower = 35  # 조정 가능: 30~40
-        rsi_upper = 65  # 조정 가능: 60~70
+        rsi_lower = p['rsi_lower']
+        rsi_upper = p['rsi_upper']
         atr_ma = df['ATR'].rolling(14).mean().iloc[-1]  # atr → ATR
 
         # 진입 조건: 신중한 평균 회귀 신호
@@ -510,15 +543,15 @@ class BasicStrategy:
         rsi_lower_cond = latest['RSI'] < rsi_lower  # RSI 과매도 (rsi → RSI)
         rsi_upper_cond = latest['RSI'] > rsi_upper  # RSI 과매수 (rsi → RSI)
         volume_trend = df['Volume'].iloc[-3:].mean() > df['Volume'].rolling(20).mean().iloc[-2]  # 최근 3봉 평균 거래량 상승
-        orderbook_long = orderbook['mpr'] > 0.55 and orderbook['order_imbalance'] > 0.2  # 매수 압력
-        orderbook_short = orderbook['mpr'] < 0.45 and orderbook['order_imbalance'] < -0.2  # 매도 압력
+        orderbook_long = orderbook['mpr'] > p['mpr_long'] and orderbook['order_imbalance'] > p['imbalance']  # 매수 압력
+        orderbook_short = orderbook['mpr'] < p['mpr_short'] and orderbook['order_imbalance'] < -p['imbalance']  # 매도 압력
 
         enter_long_cond = all([
             bb_lower_condition,  # 볼린저 하단 반전
             rsi_lower_cond,  # 과매도 상태
             volume_trend,  # 거래량 모멘텀
             orderbook_long,  # 오더북 매수 심리
-            latest['ATR'] < atr_ma * 1.5  # 변동성 안정 
+            latest['ATR'] < atr_ma * p['atr_ratio']  # 변동성 안정 
         ])
 
         enter_short_cond = all([
@@ -526,22 +559,22 @@ class BasicStrategy:
             rsi_upper_cond,  # 과매수 상태
             volume_trend,  # 거래량 모멘텀
             orderbook_short,  # 오더북 매도 심리
-            latest['ATR'] < atr_ma * 1.5  # 변동성 안정 (atr → ATR)
+            latest['ATR'] < atr_ma * p['atr_ratio']  # 변동성 안정 (atr → ATR)
         ])
 
         # 청산 조건: 빠른 범위 이탈 대응
         exit_long_cond = all([
             current_price > latest['BB_middle'],  # 볼린저 중간선 복귀 (유지)
             latest['RSI'] > 65,  # RSI 중립 이상 (rsi → RSI)
-            orderbook['mpr'] < 0.5,  # 매수 압력 급감
-            latest['ATR'] > atr_ma * 2  # 변동성 급등 (atr → ATR)
+            orderbook['mpr'] < p['exit_long_mpr'],  # 매수 압력 급감
+            latest['ATR'] > atr_ma * p['exit_atr_ratio']  # 변동성 급등 (atr → ATR)
         ])
 
         exit_short_cond = all([
             current_price < latest['BB_middle'],  # 볼린저 중간선 복귀 (유지)
             latest['RSI'] < 35,  # RSI 중립 이하 (rsi → RSI)
-            orderbook['mpr'] > 0.5,  # 매도 압력 감소
-            latest['ATR'] > atr_ma * 2  # 변동성 급등 (atr → ATR)
+            orderbook['mpr'] > p['exit_short_mpr'],  # 매도 압력 감소
+            latest['ATR'] > atr_ma * p['exit_atr_ratio']  # 변동성 급등 (atr → ATR)
         ])
 
         # 포지션 없음: 신규 진입
@@ -593,6 +626,7 @@ class BasicStrategy:
         - 단기 매매에서 완만/강한 하락 및 반등 추세를 모두 추적하며 양방향 대응
         """
         latest = df.iloc[-1]
+        p = self.params['_atr_trend_follow_strategy']  # 임계값 (strategy_params)
         price_high = orderbook['high_ask']  # 롱 진입/숏 청산 시 매수 호가
         price_low = orderbook['low_bid']    # 숏 진입/롱 청산 시 매도 호가
         current_price = latest['Close']
@@ -607,9 +641,9 @@ class BasicStrategy:
         }
 
         # 설정값 (Thresholds)
-        adx_threshold = 32  # Falling과 Strong_Trend_Down 기준 (조정 가능: 30~35)
+        adx_threshold = p['adx_threshold']  # Falling과 Strong_Trend_Down 기준
         atr_ma = df['ATR'].rolling(14).mean().iloc[-1]  # 평균 ATR 계산
-        atr_threshold = 1.4  # 변동성 확장 기준 (조정 가능: 1.3~1.5)
+        atr_threshold = p['atr_threshold']  # 변동성 확장 기준
 
         # 진입 조건: 신중한 추세 확인
         enter_short_cond = all([
@@ -617,8 +651,8 @@ class BasicStrategy:
             latest['ADX'] > adx_threshold,  # ADX 기준: 강한 하락 추세
             (latest['BB_upper'] - latest['BB_lower']) > df['BB_upper'].diff().rolling(5).mean().iloc[-1] * 2,  # 볼린저 밴드 확장
             df['Low'].iloc[-3:].is_monotonic_decreasing,  # 최근 3봉 저점 하락
-            orderbook['ask_depth'] > orderbook['bid_depth'] * 1.8,  # 매도 압력 강함
-            orderbook['mpr'] < 0.45,  # 시장 압력 약세
+            orderbook['ask_depth'] > orderbook['bid_depth'] * p['depth_ratio'],  # 매도 압력 강함
+            orderbook['mpr'] < p['mpr_short'],  # 시장 압력 약세
             self._check_open_condition(position)
         ])
 
@@ -627,8 +661,8 @@ class BasicStrategy:
             latest['ADX'] > adx_threshold,  # ADX 기준: 강한 추세 (하락 후 반등 가능성)
             (latest['BB_upper'] - latest['BB_lower']) > df['BB_upper'].diff().rolling(5).mean().iloc[-1] * 2,  # 볼린저 밴드 확장
             df['High'].iloc[-3:].is_monotonic_increasing,  # 최근 3봉 고점 상승: 반등 신호
-            orderbook['bid_depth'] > orderbook['ask_depth'] * 1.8,  # 매수 압력 강함
-            orderbook['mpr'] > 0.55,  # 시장 압력 강세
+            orderbook['bid_depth'] > orderbook['ask_depth'] * p['depth_ratio'],  # 매수 압력 강함
+            orderbook['mpr'] > p['mpr_long'],  # 시장 압력 강세
             self._check_open_condition(position)
         ])
 
@@ -637,20 +671,20 @@ class BasicStrategy:
             latest['ATR'] < atr_ma * 0.8,  # ATR 감소: 변동성 축소
             latest['ADX'] < adx_threshold - 5,  # ADX 감소: 추세 약화
             current_price > latest['BB_middle'],  # 볼린저 중간선 돌파: 반등 신호
-            orderbook['mpr'] > 0.55,  # 매수 압력 증가
-            latest['ATR'] > atr_ma * 2.5  # 변동성 급등: 리스크 관리
+            orderbook['mpr'] > p['mpr_long'],  # 매수 압력 증가
+            latest['ATR'] > atr_ma * p['exit_atr_ratio']  # 변동성 급등: 리스크 관리
         ])
 
         exit_long_cond = all([
             latest['ATR'] < atr_ma * 0.8,  # ATR 감소: 변동성 축소
             latest['ADX'] < adx_threshold - 5,  # ADX 감소: 추세 약화
             current_price < latest['BB_middle'],  # 볼린저 중간선 이탈: 반등 종료
-            orderbook['mpr'] < 0.45,  # 매수 압력 감소
-            latest['ATR'] > atr_ma * 2.5  # 변동성 급등: 리스크 관리
+            orderbook['mpr'] < p['mpr_short'],  # 매수 압력 감소
+            latest['ATR'] > atr_ma * p['exit_atr_ratio']  # 변동성 급등: 리스크 관리
         ])
         # 긴급 청산: 손실 제한
         emergency_exit = all([
-            latest['ATR'] > atr_ma * 2.5,  # 극단적 변동성 확대 (atr → ATR)
+            latest['ATR'] > atr_ma * p['exit_atr_ratio'],  # 극단적 변동성 확대 (atr → ATR)
             abs(current_price - position['avg_price']) > current_price * 0.05  # 5% 이상 변동
         ])
 
@@ -714,6 +748,7 @@ class BasicStrategy:
         - 단기 매매에서 강한 하락 후 반등 및 추가 하락을 포착하며 양방향 대응
         """
         latest = df.iloc[-1]
+        p = self.params['_rsi_divergence_strategy']  # 임계값 (strategy_params)
         price_high = orderbook['high_ask']  # 롱 진입/숏 청산 시 매수 호가
         price_low = orderbook['low_bid']    # 숏 진입/롱 청산 시 매도 호가
         current_price = latest['Close']
@@ -728,9 +763,9 @@ class BasicStrategy:
         }
 
         # 설정값 (Thresholds)
-        adx_threshold = 25  # Strong_Trend_Down 기준 (조정 가능: 20~30)
-        rsi_lower = 30  # 과매도 기준 (조정 가능: 25~35)
-        rsi_upper = 70  # 과매수 기준 (조정 가능: 65~75)
+        adx_threshold = p['adx_threshold']  # Strong_Trend_Down 기준
+        rsi_lower = p['rsi_lower']  # 과매도 기준
+        rsi_upper = p['rsi_upper']  # 과매수 기준
         atr_ma = df['ATR'].rolling(14).mean().iloc[-1]  # 평균 ATR 계산
 
         # RSI 다이버전스 계산
@@ -742,11 +777,11 @@ class BasicStrategy:
             bullish_divergence,  # RSI 다이버전스: 반등 신호
             latest['RSI'] < rsi_lower,  # RSI 강한 과매도
             current_price < latest['BB_lower'],  # 볼린저 하단 근처
-            orderbook['mpr'] > 0.5,  # 매수 압력 회복
-            orderbook['bid_depth'] > orderbook['ask_depth'] * 1.5,  # 매수 깊이 우세
+            orderbook['mpr'] > p['mpr_long'],  # 매수 압력 회복
+            orderbook['bid_depth'] > orderbook['ask_depth'] * p['depth_ratio'],  # 매수 깊이 우세
             df['Volume'].iloc[-3:].mean() > df['Volume'].rolling(20).mean().iloc[-2],  # 최근 3봉 거래량 상승
             latest['ADX'] < adx_threshold,  # ADX 약함: 추세 약화
-            latest['ATR'] < atr_ma * 1.5,  # 변동성 안정
+            latest['ATR'] < atr_ma * p['atr_ratio'],  # 변동성 안정
             self._check_open_condition(position)
         ])
 
@@ -754,11 +789,11 @@ class BasicStrategy:
             bearish_divergence,  # RSI 다이버전스: 하락 신호
             latest['RSI'] > rsi_upper,  # RSI 강한 과매수
             current_price > latest['BB_upper'],  # 볼린저 상단 근처
-            orderbook['mpr'] < 0.45,  # 매도 압력 강함
-            orderbook['ask_depth'] > orderbook['bid_depth'] * 1.5,  # 매도 깊이 우세
+            orderbook['mpr'] < p['mpr_short'],  # 매도 압력 강함
+            orderbook['ask_depth'] > orderbook['bid_depth'] * p['depth_ratio'],  # 매도 깊이 우세
             df['Volume'].iloc[-3:].mean() > df['Volume'].rolling(20).mean().iloc[-2],  # 최근 3봉 거래량 상승
             latest['ADX'] < adx_threshold,  # ADX 약함: 추세 약화
-            latest['ATR'] < atr_ma * 1.5,  # 변동성 안정
+            latest['ATR'] < atr_ma * p['atr_ratio'],  # 변동성 안정
             self._check_open_condition(position)
         ])
 
@@ -766,16 +801,16 @@ class BasicStrategy:
         exit_long_cond = all([
             current_price > latest['BB_middle'],  # 볼린저 중간선 복귀: 반등 완료
             latest['RSI'] > 50,  # RSI 중립 이상
-            orderbook['mpr'] < 0.4,  # 매수 압력 급감
-            latest['ATR'] > atr_ma * 2,  # 변동성 급등
+            orderbook['mpr'] < p['exit_long_mpr'],  # 매수 압력 급감
+            latest['ATR'] > atr_ma * p['exit_atr_ratio'],  # 변동성 급등
             current_price - position['avg_price'] < -0.01 * position['avg_price']  # 1% 손절
         ])
 
         exit_short_cond = all([
             current_price < latest['BB_middle'],  # 볼린저 중간선 이탈: 하락 종료
             latest['RSI'] < 50,  # RSI 중립 이하
-            orderbook['mpr'] > 0.55,  # 매도 압력 감소
-            latest['ATR'] > atr_ma * 2,  # 변동성 급등
+            orderbook['mpr'] > p['exit_short_mpr'],  # 매도 압력 감소
+            latest['ATR'] > atr_ma * p['exit_atr_ratio'],  # 변동성 급등
             current_price - position['avg_price'] > 0.01 * position['avg_price']  # 1% 손절 (숏 기준 반대 방향)
         ])
 
@@ -0,0 +1,158 @@
+"""
+지정가 체결 시뮬레이션 벤치마크
+- 합성 테이프 (500ms 스냅샷, 틱 단위 랜덤 워크 호가 + 최우선 호가 체결, 가격이 밀리면 이전 최우선 레벨을 관통하는 체결)를
+  하루 단위로 TapeWriter에 기록한 뒤 np.memmap으로 열어서 주기적 주문(같은 편 최우선 대기 / high_ask·low_bid)을 시뮬레이션
+- 대기 주문 체결은 이벤트마다 앞 대기열을 직접 갱신하는 루프 구현과 결과(체결 시각/수량)가 같은지 확인
+
+사용법: python bench_fill_simulator.py [--days 30] [--levels 20] [--every 60] [--expire 300] [--check 300] [--dir 경로]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from fill_simulator import FillSimulator, MarketTape, TapeWriter, format_summary, periodic_orders, summarize
+
+SNAPSHOT_MS = 500
+DAY_MS = 86_400_000
+TICK = 0.0001
+
+
+def write_synthetic_tape(directory, days, levels, seed=0):
+    """하루씩 생성해서 기록 (메모리는 하루 분량만 사용)"""
+    rng = np.random.default_rng(seed)
+    writer = TapeWriter(directory, levels)
+    start = 1_700_000_000_000
+    tick = 10_000  # 최우선 매수호가 (틱)
+    rows = DAY_MS // SNAPSHOT_MS
+    depth = np.arange(levels)
+    for day in range(days):
+        times = start + day * DAY_MS + np.arange(rows) * SNAPSHOT_MS
+        bid = tick + np.cumsum(rng.choice((-1, 0, 1), rows, p=(0.1, 0.8, 0.1)))
+        tick = int(bid[-1])
+        arrays = {
+            'bid_px': np.round((bid[:, None] - depth) * TICK, 4),
+            'ask_px': np.round((bid[:, None] + 1 + depth) * TICK, 4),
+            'bid_qty': np.round(rng.lognormal(6, 1, (rows, levels)), 1),
+            'ask_qty': np.round(rng.lognormal(6, 1, (rows, levels)), 1),
+        }
+        writer.write_books(times, arrays)
+
+        # 스냅샷 사이 체결: 최우선 호가 체결 (포아송) + 호가가 밀린 구간은 이전 최우선 레벨 관통
+        previous = np.concatenate([[bid[0]], bid[:-1]])
+        counts = rng.poisson(2, rows)
+        interval = np.repeat(np.arange(rows), counts)
+        sell = rng.random(len(interval)) < 0.5
+        trade_tick = np.where(sell, previous[interval], previous[interval] + 1)
+        trade_time = times[interval] - SNAPSHOT_MS + np.sort(rng.integers(1, SNAPSHOT_MS, len(interval)))
+        moved = np.flatnonzero(bid != previous)
+        sweep_sell = bid[moved] < previous[moved]
+        sweep_tick = np.where(sweep_sell, previous[moved] - 1, previous[moved] + 2)  # 이전 최우선 다음 레벨까지 체결
+        trade_time = np.concatenate([trade_time, times[moved] - 1])
+        trade_tick = np.concatenate([trade_tick, sweep_tick])
+        sell = np.concatenate([sell, sweep_sell])
+        order = np.argsort(trade_time, kind='stable')
+        quantities = np.round(rng.exponential(300, len(order)), 1) + 0.1
+        writer.write_trades(trade_time[order], np.round(trade_tick[order] * TICK, 4), quantities, sell[order])
+    writer.flush()
+
+
+def reference_rest(tape, buy, price, start, end, book_first, quantity, ahead):
+    """대기 주문 체결 (이벤트마다 앞 대기열 갱신하는 루프, FillSimulator._rest 비교 기준)"""
+    trade_first = int(np.searchsorted(tape.trade_time, start, side='left'))
+    trade_last = int(np.searchsorted(tape.trade_time, end, side='left'))
+    book_last = int(np.searchsorted(tape.book_time, end, side='left'))
+    events = [(int(tape.trade_time[i]), 0, i) for i in range(trade_first, trade_last)]
+    events += [(int(tape.book_time[i]), 1, i) for i in range(book_first, book_last)]
+    events.sort()
+    fills, filled = [], 0.0
+    for time_, kind, i in events:
+        if kind == 0:
+            aggressive = bool(tape.trade_sell[i]) == buy
+            trade_px = float(tape.trade_px[i])
+            if not aggressive:
+                continue
+            if (trade_px < price) if buy else (trade_px > price):
+                fills.append((time_, quantity - filled))
+                break
+            if trade_px == price:
+                volume = float(tape.trade_qty[i])
+                if volume <= ahead:
+                    ahead -= volume
+                else:
+                    take = min(volume - ahead, quantity - filled)
+                    ahead = 0.0
+                    if take > 0:
+                        fills.append((time_, take))
+                        filled += take
+        else:
+            best = float(tape.ask_px[i, 0] if buy else tape.bid_px[i, 0])
+            if (best <= price) if buy else (best >= price):
+                fills.append((time_, quantity - filled))
+                break
+            prices = np.asarray(tape.bid_px[i] if buy else tape.ask_px[i])
+            valid = prices[~np.isnan(prices)]
+            visible = price >= valid.min() if buy else price <= valid.max()
+            if visible:
+                level = float(np.asarray(tape.bid_qty[i] if buy else tape.ask_qty[i])[prices == price].sum())
+                ahead = min(ahead, level)
+        if filled >= quantity:
+            break
+    return [(time_, quantity_) for time_, quantity_ in fills if quantity_ > 0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지정가 체결 시뮬레이션 벤치마크")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--levels', type=int, default=20)
+    parser.add_argument('--every', type=float, default=60, help="주문 간격 (초)")
+    parser.add_argument('--expire', type=float, default=300, help="미체결 주문 취소까지 시간 (초)")
+    parser.add_argument('--quantity', type=float, default=1000)
+    parser.add_argument('--check', type=int, default=300, help="루프 구현과 비교할 주문 수")
+    parser.add_argument('--dir', help="테이프 디렉토리 (기본: 임시 디렉토리, 끝나면 삭제)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="fill_tape_")
+    failed = 0
+    try:
+        t0 = time.perf_counter()
+        write_synthetic_tape(directory, args.days, args.levels)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        tape = MarketTape(directory)
+        print(f"테이프 {args.days}일: 스냅샷 {len(tape.book_time):,}개 x {tape.levels}레벨, 체결 {len(tape.trade_time):,}건, "
+              f"{size / 1e9:.2f}GB, 생성 {time.perf_counter() - t0:.1f}s")
+
+        simulator = FillSimulator(tape, latency_ms=50, expire_ms=int(args.expire * 1000))
+        for side in ('BUY', 'SELL'):
+            for mode in ('touch', 'bot'):
+                orders = periodic_orders(tape, side, args.quantity, int(args.every * 1000), mode)
+                t0 = time.perf_counter()
+                results = simulator.simulate_many(orders)
+                elapsed = time.perf_counter() - t0
+                print(f"{side:<4} {mode:<5} {format_summary(summarize(results))} "
+                      f"({elapsed:.2f}s, 주문당 {elapsed / max(len(orders), 1) * 1e6:.0f}us)")
+
+                for result in results[:args.check]:
+                    order = result.order
+                    maker = [(fill[0], fill[2]) for fill in result.fills if fill[3]]
+                    if result.queue_ahead is None:
+                        continue
+                    taker = sum(fill[2] for fill in result.fills if not fill[3])
+                    start = order.time + simulator.latency_ms
+                    expected = reference_rest(tape, side == 'BUY', order.price, start, start + simulator.expire_ms,
+                                              tape.book_index(start) + 1, order.quantity - taker, result.queue_ahead)
+                    same = len(expected) == len(maker) and all(
+                        a[0] == b[0] and abs(a[1] - b[1]) <= 1e-6 * order.quantity for a, b in zip(expected, maker))
+                    if not same:
+                        failed += 1
+                        if failed <= 5:
+                            print(f"FAIL {side} {mode} t={order.time} @ {order.price}: {maker[:3]} != {expected[:3]}")
+        print(f"{'OK  ' if not failed else 'FAIL'} 루프 구현과 대기 체결 비교 (불일치 {failed}건)")
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,112 @@
+"""
+지표 계산 방식 벤치마크: pandas_ta vs NumPy 커널 (vs 증분 엔진의 진행 중 캔들 갱신)
+- data/klines_*.csv 각 파일에 대해 실행 시간과 pandas_ta 대비 수치 차이를 출력
+- 심볼 수를 늘려가며 심볼별 NumPy 계산과 심볼 묶음(numpy_batch) 계산 시간 비교
+- 시장 상태별 활성 전략에 필요한 지표만 계산(planned)할 때의 시간과 전체 계산 대비 값 차이
+
+사용법: python bench_indicators.py [반복 횟수]
+"""
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from candle_store import CANDLE_COLUMNS, CandleRingBuffer
+from indicator_kernels import compute_indicators
+from basic_strategy import BasicStrategy
+from indicators import Indicators, MARKET_STATUS_FEATURES
+from streaming_indicators import INDICATOR_COLUMNS
+
+
+def load_klines(path):
+    df = pd.read_csv(path, sep='\t', usecols=CANDLE_COLUMNS)
+    df['Open time'] = pd.to_datetime(df['Open time'])
+    return df
+
+
+def timed(func, repeat):
+    """repeat회 실행 중 최소 시간 (ms)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def compare(expected, actual):
+    """(행 일치 여부, 최대 절대 차이, 1e-4 초과 값 수)"""
+    if list(expected.index) != list(actual.index):
+        return False, float('nan'), -1
+    a = expected[INDICATOR_COLUMNS].to_numpy()
+    b = actual[INDICATOR_COLUMNS].to_numpy()
+    diff = np.where(np.isnan(a) & np.isnan(b), 0.0, np.abs(a - b))
+    return True, float(np.nanmax(diff)), int((diff > 1e-4 + 1e-12).sum())
+
+
+def bench_batch(indicators, frames, repeat):
+    """심볼 수 N에 따른 심볼별 계산 vs 묶음 계산 시간"""
+    print(f"\n{'심볼 수':<8}{'심볼별 numpy':>14}{'numpy_batch':>14}{'batch 지표만':>14}{'최대차이':>10}")
+    for count in (1, 4, 16, 64):
+        batch_frames = {f"S{i}": frames[i % len(frames)] for i in range(count)}
+        single_ms = timed(lambda: [indicators.calculate_indicators_numpy(df.copy()) for df in batch_frames.values()], repeat)
+        batch_ms = timed(lambda: indicators.calculate_indicators_batch(batch_frames), repeat)
+        stacked = [np.stack([df[col].to_numpy(dtype=float) for df in batch_frames.values()])
+                   for col in ('High', 'Low', 'Close')]
+        kernel_ms = timed(lambda: compute_indicators(indicators, *stacked), repeat)
+        single = indicators.calculate_indicators_numpy(batch_frames['S0'].copy())
+        _, max_diff, _ = compare(single, indicators.calculate_indicators_batch(batch_frames)['S0'])
+        print(f"{count:<8}{single_ms:>12.2f}ms{batch_ms:>12.2f}ms{kernel_ms:>12.2f}ms{max_diff:>10.2g}")
+
+
+def bench_planned(indicators, df, repeat):
+    """시장 상태(활성 전략 조합)별 planned 계산 vs 전체 NumPy 계산"""
+    strategy = BasicStrategy(None)
+    full = indicators.calculate_indicators_numpy(df.copy())
+    full_ms = timed(lambda: indicators.calculate_indicators_numpy(df.copy()), repeat)
+    print(f"\n{'시장 상태':<26}{'지표 수':>8}{'노드 수':>8}{'planned':>10}{'전체 numpy':>12}{'최대차이':>10}")
+    for status, strategies in strategy.strategy_map.items():
+        features = set(MARKET_STATUS_FEATURES)
+        for name in strategies:
+            features.update(strategy.STRATEGY_FEATURES[name])
+        planned_ms = timed(lambda: indicators.calculate_indicators_planned(df.copy(), features), repeat)
+        planned = indicators.calculate_indicators_planned(df.copy(), features)
+        targets, order = indicators.planner.plan(features)
+        columns = sorted(targets)
+        # planned는 요청 지표의 NaN만 제거하므로 전체 계산 결과의 행 기준으로 비교
+        diff = np.abs(full[columns].to_numpy() - planned.loc[full.index, columns].to_numpy())
+        print(f"{status:<26}{len(targets):>8}{len(order):>8}{planned_ms:>8.2f}ms{full_ms:>10.2f}ms{np.nanmax(diff):>10.2g}")
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    indicators = Indicators()
+    paths = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "klines_*.csv")))
+    print(f"{'파일':<26}{'행':>6}{'pandas_ta':>12}{'numpy':>10}{'streaming':>11}"
+          f"{'배속':>8}  {'행일치':>6}{'최대차이':>11}{'1e-4초과':>9}")
+    for path in paths:
+        df = load_klines(path)
+        candles = CandleRingBuffer.from_frame(df, len(df))
+        batch = indicators.calculate_indicators(df.copy())
+        vectorized = indicators.calculate_indicators_numpy(df.copy())
+        key = (os.path.basename(path), 'bench')
+        indicators.calculate_indicators_incremental(key, candles)
+
+        pandas_ms = timed(lambda: indicators.calculate_indicators(df.copy()), repeat)
+        numpy_ms = timed(lambda: indicators.calculate_indicators_numpy(df.copy()), repeat)
+        # 증분 엔진: 진행 중 캔들 갱신 + 최근 60행 DataFrame 생성
+        streaming_ms = timed(lambda: indicators.calculate_indicators_incremental(key, candles, 60), repeat)
+        rows_ok, max_diff, over = compare(batch, vectorized)
+        print(f"{os.path.basename(path):<26}{len(df):>6}{pandas_ms:>10.2f}ms{numpy_ms:>8.2f}ms{streaming_ms:>9.2f}ms"
+              f"{pandas_ms / numpy_ms:>7.1f}x  {str(rows_ok):>6}{max_diff:>11.2g}{over:>9}")
+
+    # 같은 길이(260행)의 1m 캔들로 심볼 묶음 구성
+    frames = [load_klines(path).tail(260).reset_index(drop=True) for path in paths if path.endswith('_1m.csv')]
+    if frames:
+        bench_batch(indicators, frames, max(1, repeat // 4))
+
+    if paths:
+        bench_planned(indicators, load_klines(paths[0]), repeat)
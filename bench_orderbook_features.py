@@ -0,0 +1,124 @@
+"""
+오더북 지표 계산 벤치마크
+- 기존 경로: 파이썬 제너레이터로 합계/±1% 깊이/최우선·최하위 호가를 각각 계산
+- 신규 경로: orderbook_features.OrderBookFeatures (bisect 구간 경계 + map 합계, 결과 캐시)
+- depth20 이벤트(±1% 밖 레벨이 있는 넓은 호가 간격, 교차 호가 포함)와 1000레벨 로컬 오더북에 대해
+  기존 키 값이 같은지 확인 후 시간 비교
+
+사용법: python bench_orderbook_features.py [반복 횟수]
+"""
+import bisect
+import sys
+import timeit
+
+import numpy as np
+
+from config import ORDERBOOK_LEVELS
+from order_book import LocalOrderBook
+from orderbook_features import OrderBookFeatures
+from stream_events import DepthEvent
+
+CONTRACT_KEYS = ('symbol', 'high_ask', 'low_bid', 'spread', 'order_imbalance', 'bid_depth', 'ask_depth', 'mpr')
+
+
+def legacy_features(symbol, bids, asks, bid_depth=None, ask_depth=None):
+    """기존 calculate_orderbook_indicators 계산 (bid_depth/ask_depth가 주어지면 로컬 오더북 경로)"""
+    best_bid = bids[0][0] if bids else 0
+    best_ask = asks[0][0] if asks else 0
+    total_bid_volume = sum(qty for _, qty in bids)
+    total_ask_volume = sum(qty for _, qty in asks)
+    total_volume = total_bid_volume + total_ask_volume
+    if bid_depth is None:
+        current_price = (best_bid + best_ask) / 2
+        price_range = current_price * 0.01
+        bid_depth = sum(qty for price, qty in bids if current_price - price_range <= price <= current_price)
+        ask_depth = sum(qty for price, qty in asks if current_price <= price <= current_price + price_range)
+    return {
+        'symbol': symbol,
+        'high_ask': asks[-1][0] if asks else 0,
+        'low_bid': bids[-1][0] if bids else 0,
+        'spread': round(best_ask - best_bid, 6),
+        'order_imbalance': round((total_bid_volume - total_ask_volume) / total_volume if total_volume > 0 else 0, 4),
+        'bid_depth': round(bid_depth, 4),
+        'ask_depth': round(ask_depth, 4),
+        'mpr': round(total_bid_volume / total_volume, 4) if total_volume > 0 else 0.5
+    }
+
+
+def legacy_local(book):
+    """기존 로컬 오더북 경로 (top_bids/top_asks 리스트 컴프리헨션 + depth_within 제너레이터 합계)"""
+    with book.lock:
+        bids = [(p, book.bids[p]) for p in book.bid_prices[:-ORDERBOOK_LEVELS - 1:-1]]
+        asks = [(p, book.asks[p]) for p in book.ask_prices[:ORDERBOOK_LEVELS]]
+        mid = (book.bid_prices[-1] + book.ask_prices[0]) / 2
+        lo = bisect.bisect_left(book.bid_prices, mid * (1 - 0.01))
+        hi = bisect.bisect_right(book.bid_prices, mid)
+        bid_depth = sum(book.bids[p] for p in book.bid_prices[lo:hi])
+        lo = bisect.bisect_left(book.ask_prices, mid)
+        hi = bisect.bisect_right(book.ask_prices, mid * (1 + 0.01))
+        ask_depth = sum(book.asks[p] for p in book.ask_prices[lo:hi])
+    return legacy_features(book.symbol, bids, asks, bid_depth, ask_depth)
+
+
+def make_depth_event(rng, update_id, levels=20, mid=37000.0, tick=0.1, cross=0):
+    """cross > 0이면 매수 상위 cross개 레벨이 최우선 매도호가 위에 있는 교차 호가"""
+    bids = [(round(mid - tick * (i + 1 - cross), 1), round(rng.uniform(0.001, 5), 3)) for i in range(levels)]
+    asks = [(round(mid + tick * i, 1), round(rng.uniform(0.001, 5), 3)) for i in range(levels)]
+    return DepthEvent("BTCUSDT", update_id, update_id, update_id, update_id, update_id - 1, bids, asks)
+
+
+def make_local_book(rng, levels=1000, mid=37000.0, tick=0.5):
+    book = LocalOrderBook("BTCUSDT")
+    book.apply_snapshot({
+        'lastUpdateId': 1,
+        'bids': [[f"{mid - tick * (i + 1):.1f}", f"{rng.uniform(0.001, 5):.3f}"] for i in range(levels)],
+        'asks': [[f"{mid + tick * i:.1f}", f"{rng.uniform(0.001, 5):.3f}"] for i in range(levels)]
+    })
+    return book
+
+
+def check(expected, actual):
+    return all(expected[key] == actual[key] for key in CONTRACT_KEYS)
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = np.random.default_rng(0)
+    features = OrderBookFeatures()
+
+    # 넓은 호가 간격(30, 50): 상위 20레벨 일부가 ±1% 밖, cross: 교차 호가
+    events = [make_depth_event(rng, i, tick=(0.1, 30.0, 50.0)[i % 3], cross=3 if i % 10 == 0 else 0)
+              for i in range(1, 201)]
+    mismatched = 0
+    for e in events:
+        mismatched += not check(legacy_features(e.symbol, e.bids, e.asks), features.features(e))
+    book = make_local_book(rng)
+    local_ok = check(legacy_local(book), features.features(book))
+    failed = mismatched + (not local_ok)
+    print(f"{'OK  ' if not mismatched and local_ok else 'FAIL'} 기존 키 값: depth20 {len(events) - mismatched}/{len(events)} 일치, "
+          f"로컬 오더북 {'일치' if local_ok else '불일치'}")
+
+    event = make_depth_event(rng, 1000)
+    cold = OrderBookFeatures()
+
+    def new_depth_cold():
+        cold.cache.clear()
+        return cold.features(event)
+
+    def new_local_cold():
+        cold.cache.clear()
+        return cold.features(book)
+
+    cases = [
+        ("depth20 기존", lambda: legacy_features(event.symbol, event.bids, event.asks)),
+        ("depth20 신규 (갱신 직후)", new_depth_cold),
+        ("depth20 신규 (캐시)", lambda: features.features(event)),
+        ("로컬 기존", lambda: legacy_local(book)),
+        ("로컬 신규 (갱신 직후)", new_local_cold),
+        ("로컬 신규 (캐시)", lambda: features.features(book)),
+    ]
+    print(f"{'경로':<28}{'호출당 시간':>12}")
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=repeat, repeat=3)) / repeat
+        print(f"{name:<28}{seconds * 1e6:>10.1f}us")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,250 @@
+"""
+모의 거래 체결 엔진 벤치마크
+- 합성 시세: 심볼마다 로컬 오더북 (틱 단위 랜덤 워크 diff 갱신 + 최우선 호가 체결), 일정 간격으로 무작위 지정가 주문
+- 가격 인덱스 큐(PaperExchange)와 갱신마다 심볼의 대기 주문 전체를 훑는 루프 구현의 체결 결과(주문/수량/가격)가 같은지 확인
+- 시세 이벤트당 체결 엔진 처리 시간만 측정 (이벤트는 _publish에서 dict 그대로 모음, JSON 변환/전달/체결 로그 제외)
+- 같은 가격 대기 주문의 앞 대기열 소진/체결 순서 확인
+- 기본 시나리오 두 가지
+  분산: 심볼이 많고 심볼당 대기 주문이 적음 (대기 주문 없는 심볼은 dict 조회 한 번)
+  집중: 소수 심볼에 최우선 호가에서 먼 가격까지 대기 주문이 쌓임 (닿은 가격 레벨만 확인하는 인덱스 효과)
+
+사용법: python bench_paper_exchange.py [--events N] [--levels 20]
+        [--symbols N --order-every N --offset N]  (지정하면 그 시나리오 하나만)
+"""
+import argparse
+import random
+import sys
+import time
+
+from order_book import LocalOrderBook
+from paper_exchange import PaperExchange
+from stream_events import AggTradeEvent
+
+TICK = 0.01
+SCENARIOS = (  # (이름, 심볼 수, 주문 간격, 최우선 호가에서 최대 틱, 시세 이벤트 수)
+    ('분산', 200, 50, 3, 300_000),
+    ('집중', 5, 5, 40, 100_000),  # 루프 구현이 대기 주문 수에 비례해 느려지므로 이벤트 수를 줄임
+)
+
+
+def price_of(tick):
+    return round(tick * TICK, 2)
+
+
+class SyntheticMarket:
+    """심볼별 오더북 (최우선 매수호가 틱 + 레벨 수량), diff 갱신을 LocalOrderBook에 적용"""
+    def __init__(self, symbols, levels, seed=0):
+        self.rng = random.Random(seed)
+        self.levels = levels
+        self.books = {}
+        self.best = {}
+        for symbol in symbols:
+            best = 10_000
+            book = LocalOrderBook(symbol)
+            book.apply_snapshot({
+                'lastUpdateId': 1,
+                'bids': [[str(price_of(best - i)), str(self.quantity())] for i in range(levels)],
+                'asks': [[str(price_of(best + 1 + i)), str(self.quantity())] for i in range(levels)],
+            })
+            self.books[symbol] = book
+            self.best[symbol] = best
+
+    def quantity(self):
+        return round(self.rng.uniform(1, 50), 1)
+
+    def step(self, symbol, time_ms):
+        """가격 이동(30%) 또는 레벨 수량 변경, 이동 시 밀려난 레벨은 반대편 레벨로"""
+        book, best = self.books[symbol], self.best[symbol]
+        bids, asks = [], []
+        move = self.rng.random()
+        if move < 0.15:     # 상승: 최우선 매도 레벨이 매수 레벨로
+            bids.append((price_of(best + 1), self.quantity()))
+            bids.append((price_of(best - self.levels + 1), 0.0))
+            asks.append((price_of(best + 1), 0.0))
+            asks.append((price_of(best + 1 + self.levels), self.quantity()))
+            best += 1
+        elif move < 0.3:    # 하락
+            asks.append((price_of(best), self.quantity()))
+            asks.append((price_of(best + self.levels), 0.0))
+            bids.append((price_of(best), 0.0))
+            bids.append((price_of(best - self.levels), self.quantity()))
+            best -= 1
+        else:
+            depth = self.rng.randrange(self.levels)
+            if self.rng.random() < 0.5:
+                bids.append((price_of(best - depth), self.quantity()))
+            else:
+                asks.append((price_of(best + 1 + depth), self.quantity()))
+        self.best[symbol] = best
+        with book.lock:
+            book._apply_levels(bids, book.bids, book.bid_prices)
+            book._apply_levels(asks, book.asks, book.ask_prices)
+            book.event_time = time_ms
+
+    def trade(self, symbol, time_ms):
+        """최우선 호가 체결 (매도 테이커면 최우선 매수호가)"""
+        sell = self.rng.random() < 0.5
+        best = self.best[symbol]
+        return AggTradeEvent(symbol, time_ms, time_ms, price_of(best if sell else best + 1),
+                             round(self.rng.uniform(1, 30), 1), time_ms, sell)
+
+
+class ReferenceMatcher:
+    """심볼의 대기 주문 리스트 전체를 갱신마다 훑는 구현 (PaperExchange 대기 체결 비교 기준)"""
+    def __init__(self, books):
+        self.books = books
+        self.orders = {}    # symbol -> [주문 dict] (접수 순서)
+        self.fills = []
+
+    def add(self, order_id, symbol, buy, price, quantity, ahead):
+        self.orders.setdefault(symbol, []).append(
+            {'id': order_id, 'buy': buy, 'price': price, 'left': quantity, 'ahead': ahead})
+
+    def _fill(self, order, quantity):
+        self.fills.append((order['id'], round(quantity, 8), order['price']))
+        order['left'] -= quantity
+        if order['left'] <= 1e-9:
+            self.orders[self.symbol].remove(order)
+
+    def on_book(self, symbol):
+        self.symbol = symbol
+        book = self.books[symbol]
+        bid, ask = book.best_bid()[0], book.best_ask()[0]
+        for buy in (True, False):
+            # 가격 우선, 같은 가격은 접수 순서
+            crossed = [o for o in self.orders.get(symbol, []) if o['buy'] == buy and
+                       ((o['price'] >= ask) if buy else (o['price'] <= bid))]
+            crossed.sort(key=lambda o: -o['price'] if buy else o['price'])
+            for order in crossed:
+                self._fill(order, order['left'])
+        for order in self.orders.get(symbol, []):
+            prices, levels = (book.bid_prices, book.bids) if order['buy'] else (book.ask_prices, book.asks)
+            visible = prices and (order['price'] >= prices[0] if order['buy'] else order['price'] <= prices[-1])
+            if visible:
+                order['ahead'] = min(order['ahead'], levels.get(order['price'], 0.0))
+
+    def on_trade(self, event):
+        self.symbol = event.symbol
+        resting = [o for o in self.orders.get(event.symbol, []) if o['buy'] == event.buyer_maker]
+        through = [o for o in resting if ((o['price'] > event.price) if o['buy'] else (o['price'] < event.price))]
+        through.sort(key=lambda o: -o['price'] if o['buy'] else o['price'])
+        for order in through:
+            self._fill(order, order['left'])
+        volume, taken = event.quantity, 0.0
+        for order in [o for o in resting if o['price'] == event.price]:
+            available = volume - order['ahead'] - taken
+            order['ahead'] = max(order['ahead'] - volume, 0.0)
+            take = min(available, order['left'])
+            if take > 1e-9:
+                self._fill(order, take)
+                taken += take
+
+
+def run(symbol_count, order_every, offset, events, levels):
+    symbols = [f"S{i:03d}USDT" for i in range(symbol_count)]
+    market = SyntheticMarket(symbols, levels)
+    exchange = PaperExchange(market.books, balance=1e12, log_fills=False)
+    published = []
+    exchange._publish = published.extend  # 체결 엔진만 측정 (JSON 변환/전달 없음)
+    reference = ReferenceMatcher(market.books)
+
+    rng = random.Random(1)
+    engine_seconds = reference_seconds = 0.0
+    orders = resting = 0
+    for index in range(events):
+        time_ms = 1_700_000_000_000 + index
+        symbol = symbols[rng.randrange(len(symbols))]
+        if index % order_every == 0:
+            # 같은 편 최우선 호가부터 offset 틱 안의 대기 주문 (테이커 체결이 없는 가격만, 대기 체결 비교용)
+            buy = rng.random() < 0.5
+            best = market.best[symbol]
+            price = price_of(best - rng.randrange(offset) if buy else best + 1 + rng.randrange(offset))
+            quantity = round(rng.uniform(1, 40), 1)
+            response = exchange.create_order(symbol=symbol, side='BUY' if buy else 'SELL', type='LIMIT',
+                                             quantity=quantity, price=price)
+            order = exchange.orders.get(response['orderId'])
+            reference.add(response['orderId'], symbol, buy, price, quantity, order.ahead if order else 0.0)
+            orders += 1
+        resting += len(reference.orders.get(symbol, ()))
+        if rng.random() < 0.7:
+            market.step(symbol, time_ms)
+            t0 = time.perf_counter()
+            exchange.on_market_update(symbol, 'orderbook')
+            engine_seconds += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            reference.on_book(symbol)
+            reference_seconds += time.perf_counter() - t0
+        else:
+            event = market.trade(symbol, time_ms)
+            t0 = time.perf_counter()
+            exchange.on_trade(event)
+            engine_seconds += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            reference.on_trade(event)
+            reference_seconds += time.perf_counter() - t0
+    fills = [(e['o']['i'], round(float(e['o']['l']), 8), float(e['o']['L'])) for e in published
+             if e['e'] == 'ORDER_TRADE_UPDATE' and e['o']['x'] == 'TRADE']
+    return exchange, fills, reference, orders, resting / events, engine_seconds, reference_seconds
+
+
+def check_queue_position():
+    """
+    같은 가격 대기 주문 두 개 (앞 대기열 10) 체결 순서
+    - 대기열보다 작은 체결: 두 주문 모두 앞 대기열만 줄고, 이후 체결은 접수 순서대로
+    - 대기열보다 큰 체결: 넘친 수량을 첫 주문부터 나눔 (앞 대기열을 주문마다 다시 빼지 않음)
+    """
+    cases = (
+        ("대기열보다 작은 체결", (6, 6, 5), [(1, 2.0), (1, 1.0), (2, 4.0)]),
+        ("대기열보다 큰 체결", (15,), [(1, 3.0), (2, 2.0)]),
+    )
+    failed = 0
+    for label, trades, expected in cases:
+        book = LocalOrderBook("TESTUSDT")
+        book.apply_snapshot({'lastUpdateId': 1, 'bids': [["100.0", "10"]], 'asks': [["100.1", "10"]]})
+        exchange = PaperExchange({"TESTUSDT": book}, balance=1e12, log_fills=False)
+        published = []
+        exchange._publish = published.extend
+        ids = [exchange.create_order(symbol="TESTUSDT", side='BUY', type='LIMIT', quantity=quantity, price=100.0)['orderId']
+               for quantity in (3, 4)]
+        for index, quantity in enumerate(trades):
+            exchange.on_trade(AggTradeEvent("TESTUSDT", index, index, 100.0, quantity, index, True))
+        fills = [(ids.index(e['o']['i']) + 1, float(e['o']['l'])) for e in published
+                 if e['e'] == 'ORDER_TRADE_UPDATE' and e['o']['x'] == 'TRADE']
+        ok = fills == expected
+        failed += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} 같은 가격 대기열 ({label}): 체결 {fills}" + ("" if ok else f" != {expected}"))
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="모의 거래 체결 엔진 벤치마크")
+    parser.add_argument('--events', type=int, help="시나리오별 기본값 대신 시세 이벤트 N건")
+    parser.add_argument('--levels', type=int, default=20)
+    parser.add_argument('--symbols', type=int)
+    parser.add_argument('--order-every', type=int, help="시세 이벤트 N건마다 주문 1건")
+    parser.add_argument('--offset', type=int, help="주문 가격은 같은 편 최우선 호가부터 N틱 안")
+    args = parser.parse_args()
+    scenarios = SCENARIOS
+    if args.symbols or args.order_every or args.offset:
+        default = SCENARIOS[0]
+        scenarios = (('지정', args.symbols or default[1], args.order_every or default[2], args.offset or default[3],
+                      default[4]),)
+
+    failed = check_queue_position()
+    for name, symbol_count, order_every, offset, events in scenarios:
+        events = args.events or events
+        exchange, fills, reference, orders, resting, engine_seconds, reference_seconds = run(
+            symbol_count, order_every, offset, events, args.levels)
+        summary = exchange.summary()
+        print(f"[{name}] 심볼 {symbol_count}개, 시세 이벤트 {events:,}건, 주문 {orders:,}건, 체결 {len(fills):,}건, "
+              f"이벤트 심볼의 평균 대기 주문 {resting:,.0f}건, 종료 시 대기 주문 {summary['open_orders']:,}건")
+        print(f"[{name}] PaperExchange {engine_seconds:.2f}s (이벤트당 {engine_seconds / events * 1e6:.1f}us, "
+              f"{events / engine_seconds:,.0f}건/s), 루프 구현 {reference_seconds:.2f}s "
+              f"(이벤트당 {reference_seconds / events * 1e6:.1f}us)")
+        mismatch = fills != reference.fills
+        if mismatch:
+            index = next(i for i, (a, b) in enumerate(zip(fills + [None], reference.fills + [None])) if a != b)
+            print(f"FAIL [{name}] {index}번째 체결부터 다름: {fills[index:index + 3]} != {reference.fills[index:index + 3]}")
+        print(f"{'FAIL' if mismatch else 'OK  '} [{name}] 루프 구현과 대기 체결 비교 ({len(reference.fills):,}건)")
+        failed += mismatch
+    sys.exit(1 if failed else 0)
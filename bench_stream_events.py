@@ -0,0 +1,99 @@
+"""
+스트림 이벤트 디코딩 마이크로벤치마크
+- 기존 경로: json.loads 후 처리 함수마다 문자열 -> float 변환 (depth20은 지표 계산에서 레벨당 여러 번 변환)
+- 신규 경로: stream_events.loads(orjson 사용 가능 시 orjson) + 타입 레코드로 한 번만 변환
+
+사용법: python bench_stream_events.py [반복 횟수]
+"""
+import json
+import sys
+import timeit
+
+from stream_events import JSON_BACKEND, loads, decode_kline, decode_depth, decode_user_event
+
+KLINE_MESSAGE = json.dumps({
+    "e": "kline", "E": 1700000000123, "s": "BTCUSDT",
+    "k": {"t": 1700000000000, "T": 1700000059999, "s": "BTCUSDT", "i": "1m", "f": 100, "L": 200,
+          "o": "37000.10", "c": "37010.20", "h": "37020.30", "l": "36990.40", "v": "123.456",
+          "n": 100, "x": False, "q": "4567890.12", "V": "60.1", "Q": "2223333.4", "B": "0"}
+})
+
+DEPTH_MESSAGE = json.dumps({
+    "e": "depthUpdate", "E": 1700000000123, "T": 1700000000120, "s": "BTCUSDT",
+    "U": 1000, "u": 1010, "pu": 999,
+    "b": [[f"{37000 - i * 0.1:.1f}", f"{1 + i * 0.01:.3f}"] for i in range(20)],
+    "a": [[f"{37000.1 + i * 0.1:.1f}", f"{1 + i * 0.02:.3f}"] for i in range(20)]
+})
+
+ORDER_MESSAGE = json.dumps({
+    "e": "ORDER_TRADE_UPDATE", "E": 1700000000123, "T": 1700000000120,
+    "o": {"s": "BTCUSDT", "c": "abc", "S": "BUY", "o": "LIMIT", "f": "GTC", "q": "0.010", "p": "37000",
+          "ap": "37000", "sp": "0", "x": "TRADE", "X": "FILLED", "i": 123456, "l": "0.010", "z": "0.010",
+          "L": "37000", "N": "USDT", "n": "0.074", "T": 1700000000120, "t": 1, "rp": "1.2345"}
+})
+
+
+def old_kline(message):
+    data = json.loads(message)
+    kline = data['k']
+    return (kline['t'], float(kline['o']), float(kline['h']), float(kline['l']),
+            float(kline['c']), float(kline['v']), kline['x'])
+
+
+def old_depth(message):
+    # 기존 calculate_orderbook_indicators의 변환 패턴 재현
+    data = json.loads(message)
+    bids, asks = data['b'], data['a']
+    best_bid, best_ask = float(bids[0][0]), float(asks[0][0])
+    total_bid = sum(float(b[1]) for b in bids)
+    total_ask = sum(float(a[1]) for a in asks)
+    mid = (best_bid + best_ask) / 2
+    bid_depth = sum(float(b[1]) for b in bids if mid * 0.99 <= float(b[0]) <= mid)
+    ask_depth = sum(float(a[1]) for a in asks if mid <= float(a[0]) <= mid * 1.01)
+    return total_bid, total_ask, bid_depth, ask_depth
+
+
+def new_kline(message):
+    return decode_kline(loads(message))
+
+
+def new_depth(message):
+    event = decode_depth(loads(message))
+    bids, asks = event.bids, event.asks
+    mid = (bids[0][0] + asks[0][0]) / 2
+    total_bid = sum(q for _, q in bids)
+    total_ask = sum(q for _, q in asks)
+    bid_depth = sum(q for p, q in bids if mid * 0.99 <= p <= mid)
+    ask_depth = sum(q for p, q in asks if mid <= p <= mid * 1.01)
+    return total_bid, total_ask, bid_depth, ask_depth
+
+
+def old_order(message):
+    data = json.loads(message)
+    order = data['o']
+    return (float(order.get('ap', 0)), float(order.get('q', 0)), float(order.get('z', 0)),
+            float(order.get('rp', 0)), float(order.get('n', 0)))
+
+
+def new_order(message):
+    return decode_user_event(loads(message))
+
+
+def bench(name, func, message, number):
+    elapsed = min(timeit.repeat(lambda: func(message), number=number, repeat=5))
+    per_call = elapsed / number * 1e6
+    print(f"{name:<12} {per_call:8.2f} us/msg")
+    return per_call
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"JSON 백엔드: {JSON_BACKEND}, 반복 {number}회")
+    for label, old, new, message in (
+        ('kline', old_kline, new_kline, KLINE_MESSAGE),
+        ('depth20', old_depth, new_depth, DEPTH_MESSAGE),
+        ('order', old_order, new_order, ORDER_MESSAGE),
+    ):
+        old_us = bench(f"{label} 기존", old, message, number)
+        new_us = bench(f"{label} 신규", new, message, number)
+        print(f"{label:<12} {old_us / new_us:8.2f}x\n")
@@ -0,0 +1,109 @@
+"""
+aggTrade 초 단위 캔들 집계 벤치마크
+- 체결 단위 경로: 체결마다 캔들 버퍼를 직접 갱신 (kline 처리와 같은 upsert 방식)
+- 묶음 경로: AggTradeAggregator (콜백은 튜플 적재만, 플러시 주기마다 NumPy로 묶음 집계)
+- 합성 체결 데이터로 두 경로의 캔들이 같은지 확인하고 체결당 처리 시간을 비교
+
+사용법: python bench_trade_bars.py [체결 수] [초당 체결 수]
+"""
+import sys
+import threading
+import time
+
+import numpy as np
+
+from candle_store import CandleRingBuffer
+from resampler import timeframe_ms
+from stream_events import AggTradeEvent
+from trade_aggregator import TRADE_BAR_COLUMNS, AggTradeAggregator
+
+TIMEFRAMES = ('5s', '15s')
+FLUSH_INTERVAL_MS = 100
+
+
+class _CandleStore:
+    """AggTradeAggregator가 사용하는 data_handler 속성만 가진 캔들 저장소"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.coin_data = {}
+
+
+def make_trades(count, rate, seed=0):
+    rng = np.random.default_rng(seed)
+    start = 1_700_000_000_000
+    # 간격은 지수 분포, 가끔 수 초간 체결이 없는 구간 포함
+    gaps = rng.exponential(1000 / rate, count)
+    gaps[rng.random(count) < 0.0005] += 20_000
+    times = start + np.floor(np.cumsum(gaps))
+    prices = np.round(2.0 + np.cumsum(rng.normal(0, 0.0005, count)), 4)
+    quantities = np.round(rng.exponential(500, count), 1) + 0.1
+    buyer_maker = rng.random(count) < 0.5
+    return [AggTradeEvent("WIFUSDT", int(t), i, float(p), float(q), int(t), bool(m))
+            for i, (t, p, q, m) in enumerate(zip(times, prices, quantities, buyer_maker))]
+
+
+def per_trade(events, timeframe, capacity):
+    """체결마다 캔들 갱신 (비교 기준)"""
+    period = timeframe_ms(timeframe)
+    candles = CandleRingBuffer(capacity, TRADE_BAR_COLUMNS)
+    for event in events:
+        bucket = event.trade_time - event.trade_time % period
+        buy = 0.0 if event.buyer_maker else event.quantity
+        sell = event.quantity - buy
+        last_open = candles.last_open_time
+        if last_open == bucket:
+            _, o, h, l, _, v, b, s = candles.last()
+            candles.update_last((bucket, o, max(h, event.price), min(l, event.price), event.price,
+                                 v + event.quantity, b + buy, s + sell))
+            continue
+        if last_open is not None:
+            close = candles.last_close
+            for k in range(1, (bucket - last_open) // period):
+                candles.append((last_open + k * period, close, close, close, close, 0.0, 0.0, 0.0))
+        candles.append((bucket, event.price, event.price, event.price, event.price, event.quantity, buy, sell))
+    return candles
+
+
+def batched(events, capacity):
+    """플러시 주기(체결 시각 기준 100ms)마다 묶어서 집계"""
+    aggregator = AggTradeAggregator(_CandleStore(), ["WIFUSDT"], TIMEFRAMES, capacity)
+    ingest = 0.0
+    flush = 0.0
+    next_flush = events[0].trade_time + FLUSH_INTERVAL_MS
+    for event in events:
+        if event.trade_time >= next_flush:
+            t0 = time.perf_counter()
+            aggregator.flush()
+            flush += time.perf_counter() - t0
+            next_flush = event.trade_time - event.trade_time % FLUSH_INTERVAL_MS + FLUSH_INTERVAL_MS
+        t0 = time.perf_counter()
+        aggregator.on_trade(event)
+        ingest += time.perf_counter() - t0
+    t0 = time.perf_counter()
+    aggregator.flush()
+    flush += time.perf_counter() - t0
+    return aggregator, ingest, flush
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 500.0
+    events = make_trades(count, rate)
+    capacity = 100_000
+
+    aggregator, ingest, flush = batched(events, capacity)
+    total = ingest + flush
+    print(f"체결 {count:,}개 (초당 약 {rate:g}건), 플러시 주기 {FLUSH_INTERVAL_MS}ms, 타임프레임 {', '.join(TIMEFRAMES)}")
+    print(f"묶음 집계: 적재 {ingest / count * 1e6:.2f}us + 집계 {flush / count * 1e6:.2f}us = 체결당 {total / count * 1e6:.2f}us")
+
+    t0 = time.perf_counter()
+    expected = {tf: per_trade(events, tf, capacity) for tf in TIMEFRAMES}
+    single = time.perf_counter() - t0
+    print(f"체결 단위 갱신: 체결당 {single / count * 1e6:.2f}us ({single / total:.1f}배)")
+
+    for builder in aggregator.builders["WIFUSDT"]:
+        reference = expected[builder.timeframe].view()
+        actual = builder.candles.view()
+        same = (reference.shape == actual.shape and np.array_equal(reference[:, :5], actual[:, :5])
+                and np.allclose(reference[:, 5:], actual[:, 5:], rtol=1e-12, atol=1e-9))
+        print(f"{builder.timeframe}: 캔들 {len(actual):,}개, 체결 단위 결과와 {'일치' if same else '불일치'}")
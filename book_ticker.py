@@ -0,0 +1,157 @@
+"""
+@bookTicker 기반 최우선 호가(BBO) 빠른 경로
+- 웹소켓 콜백은 심볼별 BboCell의 quote 참조 하나만 교체 (lock 없음, 읽는 쪽은 참조를 한 번 읽어서 사용)
+- 주문 가격/스프레드 계산 시 depth 지표의 최우선 호가를 더 최신인 bookTicker 값으로 덮어씀
+  high_ask / low_bid는 depth에서 구한 최우선 호가 대비 거리(상위 N 레벨 폭)를 유지한 채 새 최우선 호가 기준으로 이동
+- depth 기반 최우선 호가와 bookTicker 최우선 호가의 시각 차이(ms), 가격 불일치 비율을 심볼별로 집계
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from logger import logger
+
+STALENESS_SAMPLES = 5000  # 심볼별로 보관하는 최근 비교 표본 수
+PRICE_DECIMALS = 8  # 이동한 high_ask / low_bid 반올림 자릿수
+
+
+class BboQuote:
+    """bookTicker 한 건 (생성 후 변경하지 않음)"""
+    __slots__ = ('update_id', 'event_time', 'bid', 'bid_qty', 'ask', 'ask_qty', 'received_ms')
+
+    def __init__(self, update_id, event_time, bid, bid_qty, ask, ask_qty, received_ms):
+        self.update_id = update_id
+        self.event_time = event_time
+        self.bid = bid
+        self.bid_qty = bid_qty
+        self.ask = ask
+        self.ask_qty = ask_qty
+        self.received_ms = received_ms
+
+
+class BboCell:
+    """
+    심볼 하나의 최신 BBO
+    - 쓰기: 해당 심볼 스트림 스레드 하나 (quote 참조 교체는 원자적)
+    - 읽기: 평가 스레드에서 quote를 한 번 읽으면 이후 값이 바뀌어도 일관된 한 건을 사용
+    """
+    __slots__ = ('quote', 'updates', 'dropped')
+
+    def __init__(self):
+        self.quote = None
+        self.updates = 0
+        self.dropped = 0  # update_id가 더 오래된 (순서가 뒤바뀐) 메시지 수
+
+    def update(self, event):
+        quote = self.quote
+        if quote is not None and event.update_id <= quote.update_id:
+            self.dropped += 1
+            return False
+        self.quote = BboQuote(event.update_id, event.event_time, event.bid, event.bid_qty,
+                              event.ask, event.ask_qty, time.time() * 1000)
+        self.updates += 1
+        return True
+
+
+class BookTickerStore:
+    def __init__(self, symbols):
+        # 심볼 목록은 시작 시 고정 (이후 dict 자체는 변경하지 않음)
+        self.cells = {symbol: BboCell() for symbol in symbols}
+        self.samples = {symbol: deque(maxlen=STALENESS_SAMPLES) for symbol in symbols}
+        self.stats_lock = threading.Lock()
+
+    def update(self, event):
+        """bookTicker 이벤트 반영 (stream_events.BookTickerEvent)"""
+        cell = self.cells.get(event.symbol)
+        if cell is not None:
+            cell.update(event)
+
+    def latest(self, symbol):
+        """최신 BboQuote 또는 None"""
+        cell = self.cells.get(symbol)
+        return cell.quote if cell is not None else None
+
+    def apply(self, symbol, orderbook):
+        """
+        오더북 지표 dict의 최우선 호가 관련 키를 bookTicker 값으로 갱신 (bookTicker가 depth보다 최신일 때만)
+
+        :param orderbook: Indicators.calculate_orderbook_indicators 결과 (dict, 제자리 수정)
+        :return: orderbook ('bbo_source': 'bookTicker' | 'depth', 'bbo_lag_ms': depth가 뒤처진 시간)
+        """
+        quote = self.latest(symbol)
+        depth_time = orderbook.get('event_time', 0)
+        if quote is None or not depth_time:
+            orderbook['bbo_source'] = 'depth'
+            return orderbook
+        lag = quote.event_time - depth_time
+        self._record(symbol, lag, orderbook['best_bid'] != quote.bid or orderbook['best_ask'] != quote.ask,
+                     quote.received_ms)
+        orderbook['bbo_lag_ms'] = lag
+        if lag < 0 or quote.bid >= quote.ask or not orderbook['best_bid'] or not orderbook['best_ask']:
+            orderbook['bbo_source'] = 'depth'
+            return orderbook
+
+        # 상위 N 레벨 폭 유지: 새 최우선 호가 + (depth high_ask - depth best_ask)
+        # (가격 차이 계산의 부동소수점 오차가 주문 가격 자릿수에 섞이지 않도록 반올림)
+        orderbook['high_ask'] = round(quote.ask + (orderbook['high_ask'] - orderbook['best_ask']), PRICE_DECIMALS)
+        orderbook['low_bid'] = round(quote.bid - (orderbook['best_bid'] - orderbook['low_bid']), PRICE_DECIMALS)
+        total = quote.bid_qty + quote.ask_qty
+        orderbook['best_bid'] = quote.bid
+        orderbook['best_ask'] = quote.ask
+        orderbook['spread'] = round(quote.ask - quote.bid, 6)
+        orderbook['mid_price'] = (quote.bid + quote.ask) / 2
+        if total > 0:
+            orderbook['microprice'] = (quote.bid * quote.ask_qty + quote.ask * quote.bid_qty) / total
+        orderbook['bbo_source'] = 'bookTicker'
+        return orderbook
+
+    def _record(self, symbol, lag, mismatch, received_ms):
+        age = time.time() * 1000 - received_ms
+        with self.stats_lock:
+            self.samples[symbol].append((lag, mismatch, age))
+
+    def staleness_report(self):
+        """
+        심볼별 depth 대비 bookTicker 신선도 집계
+
+        :return: {symbol: {'samples', 'lag_p50', 'lag_p95', 'lag_max', 'ticker_newer', 'mismatch', 'ticker_age_p50',
+                           'updates', 'dropped'}}
+            lag_*: bookTicker 이벤트 시각 - depth 이벤트 시각 (ms, 양수면 depth 최우선 호가가 그만큼 뒤처짐)
+            ticker_newer / mismatch: bookTicker가 더 최신인 비율 / 최우선 호가가 서로 달랐던 비율
+            ticker_age_p50: 평가 시점에 마지막 bookTicker 수신 후 지난 시간 (ms)
+        """
+        with self.stats_lock:
+            samples = {symbol: list(values) for symbol, values in self.samples.items()}
+        report = {}
+        for symbol, values in samples.items():
+            cell = self.cells[symbol]
+            if not values:
+                report[symbol] = {'samples': 0, 'updates': cell.updates, 'dropped': cell.dropped}
+                continue
+            lag, mismatch, age = np.array(values, dtype=float).T
+            p50, p95 = np.percentile(lag, [50, 95])
+            report[symbol] = {
+                'samples': len(values),
+                'lag_p50': float(p50),
+                'lag_p95': float(p95),
+                'lag_max': float(lag.max()),
+                'ticker_newer': round(float(np.mean(lag > 0)), 4),
+                'mismatch': round(float(mismatch.mean()), 4),
+                'ticker_age_p50': float(np.median(age)),
+                'updates': cell.updates,
+                'dropped': cell.dropped,
+            }
+        return report
+
+    def log_staleness(self):
+        for symbol, stats in self.staleness_report().items():
+            if not stats['samples']:
+                logger.system(f"{symbol} bookTicker: 비교 표본 없음 (수신 {stats['updates']}건)")
+                continue
+            logger.system(
+                f"{symbol} depth 최우선 호가 지연: p50 {stats['lag_p50']:.0f}ms, p95 {stats['lag_p95']:.0f}ms, "
+                f"최대 {stats['lag_max']:.0f}ms, bookTicker가 최신 {stats['ticker_newer']:.1%}, "
+                f"호가 불일치 {stats['mismatch']:.1%} (표본 {stats['samples']}, 수신 {stats['updates']}건)"
+            )
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+CANDLE_COLUMNS = ['Open time', 'Open', 'High', 'Low', 'Close', 'Volume']
+KST_OFFSET = pd.Timedelta(hours=9)
+
+
+class RingBuffer:
+    """
+    고정 용량 2차원 float64 링 버퍼
+    - 각 행을 i, i+capacity 두 위치에 기록하여 최근 N행이 항상 연속 메모리에 위치
+      → view()가 복사 없이 (N, 컬럼 수) 배열을 반환
+    - append / update_last 모두 O(1), 메모리는 생성 시 한 번만 할당
+    """
+    def __init__(self, columns, capacity):
+        self.columns = list(columns)
+        self.col_index = {name: i for i, name in enumerate(self.columns)}
+        self.capacity = capacity
+        self._data = np.full((2 * capacity, len(self.columns)), np.nan)
+        self._end = 0   # 다음에 기록할 슬롯 (0 ~ capacity-1)
+        self._size = 0
+        self.generation = 0  # clear 등으로 내용이 재구성될 때마다 증가
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def empty(self):
+        return self._size == 0
+
+    def append(self, row):
+        """새 행 추가 (용량 초과 시 가장 오래된 행을 덮어씀)"""
+        i = self._end
+        self._data[i] = row
+        self._data[i + self.capacity] = row
+        self._end = (i + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def update_last(self, row):
+        """마지막 행을 제자리에서 갱신"""
+        i = (self._end - 1) % self.capacity
+        self._data[i] = row
+        self._data[i + self.capacity] = row
+
+    def last(self):
+        """마지막 행 (view)"""
+        return self._data[(self._end - 1) % self.capacity]
+
+    def view(self):
+        """최근 size개 행의 연속 배열 (zero-copy, 오래된 행 → 최신 행 순서)"""
+        stop = self._end + self.capacity
+        return self._data[stop - self._size:stop]
+
+    def column(self, name):
+        """단일 컬럼 view (zero-copy)"""
+        return self.view()[:, self.col_index[name]]
+
+    def clear(self):
+        self._data.fill(np.nan)
+        self._end = 0
+        self._size = 0
+        self.generation += 1
+
+
+class CandleRingBuffer(RingBuffer):
+    """
+    (symbol, timeframe) 별 OHLCV 캔들 저장소
+    - 'Open time'은 UTC epoch 밀리초(float64)로 저장, DataFrame 변환 시 기존과 동일하게 KST로 표시
+    - upsert(): 같은 open time이면 진행 중 캔들 갱신, 새 open time이면 추가
+    """
+    def __init__(self, capacity, extra_columns=()):
+        super().__init__(CANDLE_COLUMNS + list(extra_columns), capacity)
+
+    @classmethod
+    def from_frame(cls, df, capacity, extra_columns=()):
+        """load_historical_data 형식의 DataFrame으로 버퍼 생성"""
+        buffer = cls(capacity, extra_columns)
+        buffer.load_frame(df)
+        return buffer
+
+    def load_frame(self, df):
+        """DataFrame 내용으로 버퍼를 다시 채움 (최근 capacity개만 유지)"""
+        self.clear()
+        if df is None or df.empty:
+            return
+        df = df.tail(self.capacity)
+        open_times = (df['Open time'] - KST_OFFSET).to_numpy(dtype='datetime64[ms]').astype('int64')
+        rows = np.column_stack(
+            [open_times.astype(float)] + [df[col].to_numpy(dtype=float) for col in self.columns[1:]]
+        )
+        for row in rows:
+            self.append(row)
+
+    def upsert(self, open_time_ms, *values):
+        """
+        캔들 추가/갱신
+
+        :param open_time_ms: 캔들 시작 시각 (UTC epoch ms, kline['t'])
+        :param values: Open, High, Low, Close, Volume (+ 추가 컬럼) 순서의 값
+        :return: 'update' (진행 중 캔들 갱신), 'append' (새 캔들), None (과거 캔들 무시)
+        """
+        row = (float(open_time_ms),) + values
+        if self._size:
+            last_open_time = self.last()[0]
+            if open_time_ms == last_open_time:
+                self.update_last(row)
+                return 'update'
+            if open_time_ms < last_open_time:
+                return None
+        self.append(row)
+        return 'append'
+
+    def splice(self, rows):
+        """
+        과거 구간 캔들 끼워 넣기 (누락 구간 백필용)
+        - 기존 캔들과 합쳐 open time 순으로 다시 정렬, 같은 open time이면 rows 값을 사용
+        - 최근 capacity개만 유지하고 generation 증가 (증분 지표 상태는 다시 동기화됨)
+
+        :param rows: (n, 컬럼 수) 캔들 배열
+        :return: 새로 추가된 캔들 수
+        """
+        if len(rows) == 0:
+            return 0
+        current = self.view()
+        merged = np.concatenate((np.asarray(rows, dtype=float), current))
+        # np.unique는 같은 값 중 첫 번째 위치를 반환 -> rows가 앞에 있으므로 rows 우선
+        _, index = np.unique(merged[:, 0], return_index=True)
+        merged = merged[index][-self.capacity:]
+        added = len(merged) - len(np.intersect1d(merged[:, 0], current[:, 0]))
+        self.clear()
+        for row in merged:
+            self.append(row)
+        return added
+
+    @property
+    def last_open_time(self):
+        return int(self.last()[0]) if self._size else None
+
+    @property
+    def last_close(self):
+        return float(self.last()[self.col_index['Close']]) if self._size else None
+
+    def to_frame(self):
+        """지표 계산용 DataFrame 생성 (버퍼와 메모리를 공유하지 않는 복사본)"""
+        data = self.view()
+        df = pd.DataFrame(data[:, 1:].copy(), columns=self.columns[1:])
+        df.insert(0, 'Open time', pd.to_datetime(data[:, 0].astype('int64'), unit='ms') + KST_OFFSET)
+        return df
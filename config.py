@@ -13,11 +13,84 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 # 거래 설정
 # COIN_LIST = ['XRPUSDT','WIFUSDT']
 COIN_LIST = ['XRPUSDT','HBARUSDT','ADAUSDT','WIFUSDT']
+if os.getenv("BOT_COIN_LIST"):  # 심볼 목록 교체 (쉼표 구분, 모의 거래소 부하 테스트 등)
+    COIN_LIST = os.getenv("BOT_COIN_LIST").split(',')
 TRADE_RATE = 0.2
 TARGET_LEVERAGE = 5
 INTERVAL = "1m"
+CANDLE_BUFFER_SIZE = 260  # (symbol, timeframe) 별 메모리에 유지할 캔들 수
+KLINE_TIMEFRAMES = ['1m', '15m']  # 사용하는 캔들 타임프레임
+RESAMPLE_TIMEFRAMES = ['15m']  # 1m 스트림에서 로컬로 합성하는 상위 타임프레임 (별도 @kline 스트림/REST 호출 없음)
+AGG_TRADE_SYMBOLS = []  # @aggTrade로 초 단위 캔들을 만들 심볼 (예: ['WIFUSDT']), 비어 있으면 구독 안 함
+AGG_TRADE_TIMEFRAMES = ['5s', '15s']  # aggTrade 집계 캔들 타임프레임
+AGG_TRADE_FLUSH_INTERVAL = 0.1  # 대기 체결을 캔들에 묶음 반영하는 주기 (초)
+SIGNAL_TIMEFRAME = '1m'  # 매매 신호/단기 시장 상태 계산 타임프레임 (예: '5s'면 AGG_TRADE_SYMBOLS 심볼은 aggTrade 캔들로 평가, 나머지 심볼과 버퍼가 찰 때까지는 1m)
+RESAMPLE_HISTORY_LIMIT = 1500  # 시작 시 불러올 1m 과거 캔들 수 (상위 타임프레임 초기 구성용, REST 1회 최대 1500)
+GAP_FILL_ENABLED = True  # 재연결/시계 점프 후 캔들 누락 구간을 REST로 자동 백필
+GAP_CHECK_INTERVAL = 30  # 캔들 누락 주기 검사 간격 (초)
+GAP_FILL_WORKERS = 4  # 누락 구간 futures_klines 페이지 병렬 조회 수
+CANDLE_DB_FLUSH_INTERVAL = 5  # 진행 중 캔들을 CoinData DB에 일괄 반영하는 주기 (초), 캔들 마감 시에는 즉시 반영
+
+# 데이터 파일 기록 모드: "append" (행 추가) | "snapshot" (주기적 전체 덮어쓰기) | "disabled"
+KLINE_SINK_MODE = "append"        # 마감 캔들만 klines_*.csv 끝에 추가
+ORDERBOOK_SINK_MODE = "snapshot"  # 최신 오더북을 주기적으로 orderbook_*.csv에 기록
+SINK_QUEUE_SIZE = 10000  # append 싱크 대기 큐 최대 크기
+SINK_SNAPSHOT_INTERVAL = 5  # snapshot 싱크 기록 주기 (초)
 KST = timezone(timedelta(hours=9))
-BASE_URL = "https://fapi.binance.com"
+BINANCE_BASE_URL = "https://fapi.binance.com"
+BASE_URL = os.getenv("BINANCE_BASE_URL", BINANCE_BASE_URL)  # REST 주소 (모의 거래소: http://127.0.0.1:8090)
+
+# 스트림 기록 (재생: python stream_replay.py <기록 디렉토리>)
+STREAM_RECORD_ENABLED = False  # 웹소켓 원본 메시지를 수신 시각과 함께 gzip 청크 파일로 기록
+STREAM_RECORD_DIR = "my_bot/data/recordings"  # 기록 파일 디렉토리
+STREAM_RECORD_CHUNK_SECONDS = 300  # 청크 파일 하나에 담는 시간 (초)
+FILL_TAPE_DIR = "my_bot/data/fill_tape"  # 지정가 체결 시뮬레이션용 오더북/체결 배열 (python fill_simulator.py convert <기록 디렉토리>)
+
+# 모의 거래 (실제 주문 없이 실시간/재생 시세로 주문 체결, 잔고/포지션은 메모리에서 관리)
+PAPER_TRADING = os.getenv("BOT_PAPER_TRADING", "0") == "1"  # True면 OrderHandler 주문/계정 조회를 PaperExchange로 보냄
+PAPER_BALANCE = 1000.0  # 모의 거래 시작 지갑 잔고 (USDT)
+PAPER_MAKER_FEE = 0.0002  # 대기 주문 체결 수수료율
+PAPER_TAKER_FEE = 0.0005  # 상대 호가를 바로 체결한 수수료율
+PAPER_FILL_LOG = False  # True면 모의 체결마다 로그 기록 (종료 시 요약은 항상 기록)
+
+# 웹소켓 설정
+WS_STREAM_HOST = os.getenv("BINANCE_WS_HOST", "wss://fstream.binance.com")  # 스트림 주소 (모의 거래소: ws://127.0.0.1:8091)
+WS_COMBINED_STREAM = True  # 마켓 스트림을 /stream?streams=a/b/c 결합 연결로 묶어서 수신
+WS_MAX_STREAMS_PER_CONNECTION = 200  # 바이낸스 선물 결합 스트림 연결당 최대 스트림 수
+WS_ENGINE = "thread"  # "thread": 연결마다 스레드 + run_forever, "asyncio": 단일 이벤트 루프에서 코루틴으로 실행
+WS_RECONNECT_BASE_DELAY = 1.0  # asyncio 엔진 재연결 백오프 시작값 (초)
+WS_RECONNECT_MAX_DELAY = 60.0  # asyncio 엔진 재연결 백오프 최대값 (초)
+
+# 오더북 설정
+ORDERBOOK_SOURCE = "diff"  # "diff": @depth@100ms + 스냅샷 동기화 로컬 오더북, "depth20": @depth20@500ms 부분 스냅샷
+ORDERBOOK_SNAPSHOT_LIMIT = 1000  # 로컬 오더북 초기화용 REST 스냅샷 레벨 수
+ORDERBOOK_LEVELS = 20  # 오더북 지표(high_ask/low_bid, 불균형, MPR) 계산에 사용할 상위 레벨 수
+BOOK_TICKER_ENABLED = False  # @bookTicker 구독 (주문 가격/스프레드의 최우선 호가를 실시간 BBO로 갱신)
+BOOK_TICKER_REPORT_INTERVAL = 10  # depth 대비 bookTicker 최우선 호가 지연 통계 로그 주기 (분)
+
+# 매매 평가 스케줄링
+EVENT_DRIVEN_TRADING = True  # True: 캔들 마감/오더북 갱신 시 심볼별 평가, False: 기존 폴링 루프 (trade_cycle)
+SYMBOL_MIN_EVAL_INTERVAL = 1.0  # 같은 심볼 재평가 최소 간격 (초)
+EVAL_ON_ORDERBOOK = True  # 오더북 갱신도 평가 트리거로 사용 (False면 캔들 마감 시에만 평가)
+EVAL_WORKERS = 1  # 평가 작업 스레드 수 (주문 처리 중 다른 심볼 평가를 허용하려면 2 이상)
+
+# 지연 측정 (거래소 이벤트 -> 수신 -> 매매 판단 -> 주문 응답 -> 체결, 심볼/구간별 백분위)
+LATENCY_TRACING = True
+LATENCY_REPORT_INTERVAL = 60  # 지연 통계 로그 + latency.json(app.py /latency) 갱신 주기 (초)
+
+# 지표 계산 방식: "streaming" (캔들 마감 시 상태 갱신, 진행 중 캔들만 재계산)
+#               | "numpy" (NumPy 벡터화 커널로 전체 재계산) | "pandas_ta" (pandas_ta로 전체 재계산)
+#               | "numpy_batch" (여러 심볼을 (심볼 수, 시간) 행렬로 쌓아 NumPy 커널 한 번으로 계산)
+#               | "planned" (활성 전략과 시장 상태 판단에 필요한 지표만 NumPy 커널로 계산)
+INDICATOR_BACKEND = "streaming"
+INDICATOR_FRAME_ROWS = 60  # streaming 방식에서 전략에 넘길 최근 행 수 (전략은 최근 20여 행만 참조)
+
+# 전략 임계값 (기본값은 strategy_params.PARAM_SPACE, 실행 중인 봇/백테스트 모두 적용)
+STRATEGY_PARAMS = {}  # {전략: {파라미터: 값}} 덮어쓰기 (예: {'macd_rsi': {'rsi_lower': 40}}, param_sweep/walk_forward 결과 적용)
+
+# 워크포워드 최적화 (python walk_forward.py)
+INDICATOR_CACHE_DIR = "my_bot/data/indicator_cache"  # 지표 행렬 디스크 캐시 (내용 주소 방식, 지우면 다시 계산)
+WALK_FORWARD_DIR = "my_bot/data/walk_forward"  # 실행별 진행 상태 (중단 후 같은 인자로 다시 실행하면 완료된 폴드는 건너뜀)
 
 # 현재 디렉토리 기준으로 상대 경로 설정
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
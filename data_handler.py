@@ -13,9 +13,21 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 # 내부 모듈 및 ORM 관련 설정
-from binance.client import Client
-from config import API_KEY, SECRET_KEY, COIN_LIST, DATA_DIR, BASE_URL, TARGET_LEVERAGE
+from exchange_client import create_client
+from config import (API_KEY, SECRET_KEY, COIN_LIST, DATA_DIR, BASE_URL, TARGET_LEVERAGE, CANDLE_BUFFER_SIZE,
+                    KLINE_TIMEFRAMES, RESAMPLE_TIMEFRAMES, RESAMPLE_HISTORY_LIMIT,
+                    CANDLE_DB_FLUSH_INTERVAL, KLINE_SINK_MODE, ORDERBOOK_SINK_MODE, SINK_QUEUE_SIZE,
+                    SINK_SNAPSHOT_INTERVAL, ORDERBOOK_SNAPSHOT_LIMIT, ORDERBOOK_LEVELS, BOOK_TICKER_ENABLED,
+                    STREAM_RECORD_ENABLED, STREAM_RECORD_DIR, STREAM_RECORD_CHUNK_SECONDS, PAPER_TRADING)
 from models import MarketStatus, BalanceData, PositionData, CoinData, Session
+from candle_store import CandleRingBuffer
+from resampler import CandleResampler
+from data_sink import create_sink
+from order_book import OrderBookManager, LocalOrderBook
+from book_ticker import BookTickerStore
+from stream_recorder import StreamRecorder
+from stream_events import DepthEvent
+from paper_exchange import PaperExchange
 from logger import logger  # 내부 logger 사용
 
 import websocket
@@ -26,6 +38,26 @@ import sys
 # logger = logger.getLogger(__name__)
 # sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+def klines_frame(raw_data):
+    """futures_klines 응답 -> 캔들 DataFrame (Open time은 KST)"""
+    # 데이터프레임으로 변환
+    df = pd.DataFrame(raw_data, columns=[
+        'Open time', 'Open', 'High', 'Low', 'Close', 'Volume',
+        'Close time', 'Quote asset volume', 'Number of trades',
+        'Taker buy base asset volume', 'Taker buy quote asset volume', 'Ignore'
+    ])
+
+    # 필요한 컬럼만 선택 및 데이터 타입 변환
+    df = df[['Open time', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    df['Open time'] = pd.to_datetime(df['Open time'], unit='ms') + pd.Timedelta(hours=9)
+    df['Open'] = df['Open'].astype(float)
+    df['High'] = df['High'].astype(float)
+    df['Low'] = df['Low'].astype(float)
+    df['Close'] = df['Close'].astype(float)
+    df['Volume'] = df['Volume'].astype(float)
+    return df
+
+
 class DataHandler:
     _instance = None
     _lock = threading.Lock()
@@ -42,18 +74,39 @@ class DataHandler:
         if self.__initialized:
             return
         self.__initialized = True
-        self.client = Client(API_KEY, SECRET_KEY)
+        self.client = create_client()
         self.lock = threading.Lock()  # lock 속성 추가
-        self.coin_data = {symbol: {} for symbol in COIN_LIST}
-        self.orderbook_data = {symbol: None for symbol in COIN_LIST}  # orderbook_data 추가
+        self.coin_data = {symbol: {} for symbol in COIN_LIST}  # {symbol: {timeframe: CandleRingBuffer}}
+        self.resamplers = {symbol: {} for symbol in COIN_LIST}  # {symbol: {timeframe: CandleResampler}} (1m에서 합성)
+        self.orderbook_data = {symbol: None for symbol in COIN_LIST}  # orderbook_data 추가 (DepthEvent 또는 LocalOrderBook)
         self.position_data = {symbol: {} for symbol in COIN_LIST}
         self.balance_data = {"wallet": 0.0, "total": 0.0, "free": 0, "used": 0.0, "PNL": 0.0}
         self.tick_size = {symbol: {} for symbol in COIN_LIST}
+        # 캔들 DB write-behind: {(symbol, interval, open_time): 최신 캔들 상태}
+        self.pending_candles = {}
+        self.pending_candles_lock = threading.Lock()
+        self.candle_flush_event = threading.Event()
+        # 파일 기록은 백그라운드 싱크에서 처리 (웹소켓 콜백/lock 구간에서 디스크 I/O 제거)
+        self.kline_sink = create_sink(KLINE_SINK_MODE, SINK_QUEUE_SIZE, SINK_SNAPSHOT_INTERVAL)
+        self.orderbook_sink = create_sink(ORDERBOOK_SINK_MODE, SINK_QUEUE_SIZE, SINK_SNAPSHOT_INTERVAL)
+        # diff-depth 스트림 기반 로컬 오더북
+        self.order_book_manager = OrderBookManager(self.client, ORDERBOOK_SNAPSHOT_LIMIT)
+        # @bookTicker 최신 BBO (BOOK_TICKER_ENABLED일 때만)
+        self.book_ticker = BookTickerStore(COIN_LIST) if BOOK_TICKER_ENABLED else None
+        # 모의 거래: 주문/잔고/포지션을 메모리에서 관리 (계정 조회/레버리지 설정도 REST 대신 사용)
+        self.paper = PaperExchange(self.orderbook_data) if PAPER_TRADING else None
+        # 웹소켓 원본 메시지 + 재생에 필요한 REST 응답 기록 (STREAM_RECORD_ENABLED일 때만)
+        self.recorder = None
+        if STREAM_RECORD_ENABLED:
+            self.recorder = StreamRecorder(STREAM_RECORD_DIR, STREAM_RECORD_CHUNK_SECONDS)
+            self.recorder.start()
+            self.order_book_manager.on_snapshot = lambda symbol, snapshot: self.record(f"snapshot@{symbol}", snapshot)
         logger.system(f"DataHandler Class 시작")
         self.session = self._create_session()
         from models import initialize_database
         initialize_database()
         self.start_account_info_thread()
+        self.start_candle_writer_thread()
 
     def _create_session(self):
         session = requests.Session()
@@ -87,10 +140,15 @@ class DataHandler:
             # 코인별 데이터 초기화
             for symbol in COIN_LIST:
                 try:
-                    self.coin_data[symbol] = {
-                        '1m': self.load_historical_data(symbol, '1m'),
-                        '15m': self.load_historical_data(symbol, '15m')
-                    }
+                    # 상위 타임프레임을 1m에서 합성하면 1m 과거 데이터를 길게 한 번만 불러옴
+                    limit = max(CANDLE_BUFFER_SIZE, RESAMPLE_HISTORY_LIMIT) if RESAMPLE_TIMEFRAMES else CANDLE_BUFFER_SIZE
+                    history = self.load_historical_data(symbol, '1m', limit=limit)
+                    self.coin_data.setdefault(symbol, {})['1m'] = CandleRingBuffer.from_frame(history, CANDLE_BUFFER_SIZE)
+                    for timeframe in KLINE_TIMEFRAMES:
+                        if timeframe != '1m' and timeframe not in RESAMPLE_TIMEFRAMES:
+                            self.coin_data[symbol][timeframe] = CandleRingBuffer.from_frame(
+                                self.load_historical_data(symbol, timeframe), CANDLE_BUFFER_SIZE)
+                    self.init_resamplers(symbol, history)
                     self.position_data_update(symbol)
                     self.set_leverage(symbol)
                     # logger.trade(f"{symbol} 초기 데이터 로드 완료")
@@ -104,6 +162,60 @@ class DataHandler:
             raise    
 
 
+    def record(self, channel, payload):
+        """재생용 REST 응답/상태 기록 (recorder가 있을 때만)"""
+        if self.recorder is not None:
+            self.recorder.record(channel, json.dumps(payload, separators=(',', ':'), default=str))
+
+    def record_state(self):
+        """잔고/포지션 상태 기록 (REST로 갱신된 직후 호출)"""
+        if self.recorder is not None:
+            self.record('state', {'balance': self.balance_data, 'positions': self.position_data})
+
+    def init_resamplers(self, symbol, history, save_to_file=True):
+        """
+        1m 과거 데이터로 RESAMPLE_TIMEFRAMES 캔들 버퍼 구성 (load_historical_data와 같이 파일/DB에도 저장)
+
+        :param history: load_historical_data 형식의 1m DataFrame
+        """
+        if history is None or history.empty:
+            return
+        rows = CandleRingBuffer.from_frame(history, len(history)).view()
+        for timeframe in RESAMPLE_TIMEFRAMES:
+            resampler = CandleResampler(timeframe, CANDLE_BUFFER_SIZE)
+            resampler.backfill(rows)
+            self.resamplers[symbol][timeframe] = resampler
+            self.coin_data[symbol][timeframe] = resampler.candles
+            df = resampler.candles.to_frame()
+            if save_to_file:
+                df.to_csv(os.path.join(DATA_DIR, f"klines_{symbol}_{timeframe}.csv"), index=False, sep='\t')
+            self.save_to_coin_data_db(symbol, timeframe, df)
+
+    def update_resampled(self, symbol, open_time_ms, open_, high, low, close, volume, closed):
+        """
+        1m 캔들 갱신을 합성 타임프레임에 반영 (self.lock 보유 상태에서 호출)
+
+        :return: [(timeframe, 캔들 튜플, 마감 여부)]
+        """
+        updated = []
+        for timeframe, resampler in self.resamplers.get(symbol, {}).items():
+            bar = resampler.update(open_time_ms, open_, high, low, close, volume)
+            if bar is not None:
+                updated.append((timeframe, bar, closed and resampler.is_closing(open_time_ms)))
+        return updated
+
+    def get_candle_buffer(self, symbol, timeframe):
+        """(symbol, timeframe) 캔들 버퍼 반환 (없으면 빈 버퍼 생성)"""
+        timeframes = self.coin_data.setdefault(symbol, {})
+        if timeframe not in timeframes:
+            timeframes[timeframe] = CandleRingBuffer(CANDLE_BUFFER_SIZE)
+        return timeframes[timeframe]
+
+    def get_candles(self, symbol, timeframe):
+        """지표 계산용 캔들 DataFrame (버퍼 스냅샷)"""
+        with self.lock:
+            return self.get_candle_buffer(symbol, timeframe).to_frame()
+
     def get_tick_size(self):
         info = self.client.futures_exchange_info()
         for s in info['symbols']:
@@ -116,6 +228,9 @@ class DataHandler:
             
     def set_leverage(self, symbol):
         """레버리지 설정 (기존 로직 유지)"""
+        if self.paper is not None:
+            self.paper.change_leverage(symbol, TARGET_LEVERAGE)
+            return
         try:
             self.client.futures_change_leverage(
                 symbol=symbol, 
@@ -130,6 +245,8 @@ class DataHandler:
             fp.write('\n')
 
     def get_account_info(self):
+        if self.paper is not None:
+            return self.paper.account_info()
         url = f"{BASE_URL}/fapi/v2/account"
 
         # 타임스탬프와 서명 생성
@@ -232,9 +349,12 @@ class DataHandler:
         logger.balance(binance_balance)
         # print(binance_balance)
         self.write_balance(binance_balance) # write balance to file
+        self.record_state()
         return self.balance_data
     
     def position_data_update(self,symbol):
+        if self.paper is not None:
+            return self.update_position_risk(symbol, self.paper.position_risk(symbol))
         url = f"{BASE_URL}/fapi/v2/positionRisk"
 
         # 타임스탬프와 서명 생성
@@ -258,26 +378,54 @@ class DataHandler:
 
         # 결과 반환
         if response.status_code == 200:
-            data = response.json()
-            if data:
-                self.position_data[symbol].update({
-                    "avg_price": round(float(data[0]['entryPrice']),4),
-                    "position_amount": round(float(data[0]['positionAmt']),4),
-                    "leverage": int(data[0]['leverage']),
-                    "unrealizedProfit": round(float(data[0]['unRealizedProfit']),4),
-                    "breakeven_price": round(float(data[0]['breakEvenPrice']),4),
-                    "market_status" : "unknown "
-                })
-                logger.info(f"{symbol}, {self.position_data[symbol]}") # print(symbol,self.position_data[symbol])
-                return self.position_data[symbol]
+            return self.update_position_risk(symbol, response.json())
         else:
             logger.error(f"Error fetching leverage for {symbol}: {response.text}")
 
+    def update_position_risk(self, symbol, data):
+        """positionRisk 응답 반영"""
+        if data:
+            self.position_data[symbol].update({
+                "avg_price": round(float(data[0]['entryPrice']),4),
+                "position_amount": round(float(data[0]['positionAmt']),4),
+                "leverage": int(data[0]['leverage']),
+                "unrealizedProfit": round(float(data[0]['unRealizedProfit']),4),
+                "breakeven_price": round(float(data[0]['breakEvenPrice']),4),
+                "market_status" : "unknown "
+            })
+            logger.info(f"{symbol}, {self.position_data[symbol]}") # print(symbol,self.position_data[symbol])
+            self.record_state()
+            return self.position_data[symbol]
+
     def save_orderbook_data(self, symbol):
-        """오더북 데이터 저장"""
+        """오더북 데이터 저장 (DataFrame 생성과 파일 기록은 싱크 스레드에서 수행)"""
         path = os.path.join(DATA_DIR, f"orderbook_{symbol}.csv")
-        df = pd.DataFrame(self.orderbook_data[symbol])
-        df.to_csv(path, index=False)
+        data = self.orderbook_data[symbol]
+        if isinstance(data, LocalOrderBook):
+            self.orderbook_sink.put(path, lambda: pd.DataFrame(data.snapshot(ORDERBOOK_LEVELS)))
+        elif isinstance(data, DepthEvent):
+            self.orderbook_sink.put(path, lambda: pd.DataFrame(data.as_dict()))
+        else:
+            self.orderbook_sink.put(path, lambda: pd.DataFrame(data))
+
+    def save_kline_data(self, symbol, timeframe, candle, closed):
+        """
+        캔들 데이터 파일 기록 요청
+
+        :param candle: 캔들 데이터 딕셔너리
+        :param closed: 캔들 마감 여부 (append 모드는 마감 캔들만 기록)
+        """
+        path = os.path.join(DATA_DIR, f"klines_{symbol}_{timeframe}.csv")
+        if self.kline_sink.mode == 'append':
+            if closed:
+                self.kline_sink.put(path, lambda: pd.DataFrame([candle]), sep='\t')
+        else:
+            self.kline_sink.put(path, lambda: self.get_candles(symbol, timeframe), sep='\t')
+
+    def stop_sinks(self):
+        """대기 중인 파일 기록을 마치고 싱크 종료"""
+        self.kline_sink.stop()
+        self.orderbook_sink.stop()
 
 
     def load_historical_data(self, symbol, interval, limit=260, save_to_file=True):
@@ -297,22 +445,8 @@ class DataHandler:
                 interval=interval, 
                 limit=limit
             )
-            
-            # 데이터프레임으로 변환
-            df = pd.DataFrame(raw_data, columns=[
-                'Open time', 'Open', 'High', 'Low', 'Close', 'Volume',
-                'Close time', 'Quote asset volume', 'Number of trades',
-                'Taker buy base asset volume', 'Taker buy quote asset volume', 'Ignore'
-            ])
-            
-            # 필요한 컬럼만 선택 및 데이터 타입 변환
-            df = df[['Open time', 'Open', 'High', 'Low', 'Close', 'Volume']]
-            df['Open time'] = pd.to_datetime(df['Open time'], unit='ms') + pd.Timedelta(hours=9)
-            df['Open'] = df['Open'].astype(float)
-            df['High'] = df['High'].astype(float)
-            df['Low'] = df['Low'].astype(float)
-            df['Close'] = df['Close'].astype(float)
-            df['Volume'] = df['Volume'].astype(float)
+            self.record(f"history@{symbol}@{interval}", raw_data)
+            df = klines_frame(raw_data)
 
             # self.add_indicators(df)  # 지표 추가
             # 파일로 저장 (옵션)
@@ -402,6 +536,7 @@ class DataHandler:
                         # 'market_status': position.get('market_status', 'Unknown')
                     }
                     self.save_db_position_data(position_data)
+        self.record_state()
 
     def save_db_market_status(self, market_status):
         with self.session_scope() as session:
@@ -496,6 +631,74 @@ class DataHandler:
                 session.rollback()
                 logger.error(f"{symbol} {timeframe} 미완료 캔들 업데이트 실패: {str(e)}")
 
+    def queue_candle_update(self, symbol, timeframe, candle, closed=False):
+        """
+        캔들 상태를 메모리에 병합하고 DB 기록은 백그라운드 스레드에 맡깁니다.
+        같은 캔들의 틱은 마지막 상태 하나로 합쳐지며, 캔들 마감 시 즉시 flush를 요청합니다.
+
+        :param symbol: 코인 심볼 (예: 'BTCUSDT')
+        :param timeframe: 캔들 시간 간격 (예: '1m', '15m')
+        :param candle: 캔들 데이터 딕셔너리
+        :param closed: 캔들 마감 여부 (kline['x'])
+        """
+        with self.pending_candles_lock:
+            self.pending_candles[(symbol, timeframe, candle['Open time'])] = candle
+        if closed:
+            self.candle_flush_event.set()
+
+    def start_candle_writer_thread(self):
+        """대기 중인 캔들을 CANDLE_DB_FLUSH_INTERVAL 마다 (또는 캔들 마감 시) DB에 반영하는 스레드 시작"""
+        def run():
+            while True:
+                self.candle_flush_event.wait(CANDLE_DB_FLUSH_INTERVAL)
+                self.candle_flush_event.clear()
+                self.flush_pending_candles()
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.name = "CandleWriterThread"
+        thread.start()
+
+    def flush_pending_candles(self):
+        """대기 중인 캔들 전체를 단일 트랜잭션으로 CoinData DB에 반영"""
+        with self.pending_candles_lock:
+            pending, self.pending_candles = self.pending_candles, {}
+        if not pending:
+            return
+
+        try:
+            with self.session_scope() as session:
+                for (symbol, interval, open_time), candle in pending.items():
+                    existing = session.query(CoinData).filter_by(
+                        symbol=symbol,
+                        interval=interval,
+                        open_time=open_time
+                    ).first()
+
+                    if existing:
+                        existing.open = candle['Open']
+                        existing.high = candle['High']
+                        existing.low = candle['Low']
+                        existing.close = candle['Close']
+                        existing.volume = candle['Volume']
+                    else:
+                        session.add(CoinData(
+                            symbol=symbol,
+                            interval=interval,
+                            open_time=open_time,
+                            open=candle['Open'],
+                            high=candle['High'],
+                            low=candle['Low'],
+                            close=candle['Close'],
+                            volume=candle['Volume']
+                        ))
+        except Exception as e:
+            logger.error(f"캔들 일괄 DB 반영 실패 ({len(pending)}건): {str(e)}")
+            # 실패분은 다음 주기에 재시도 (그사이 들어온 최신 상태는 유지)
+            with self.pending_candles_lock:
+                for key, candle in pending.items():
+                    self.pending_candles.setdefault(key, candle)
+
     def save_db_balance_data(self, balance_data):
         with self.session_scope() as session:
             session.query(BalanceData).delete()
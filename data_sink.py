@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+
+from logger import logger
+
+
+def _resolve(payload):
+    """payload가 함수면 기록 스레드에서 호출하여 DataFrame 생성"""
+    return payload() if callable(payload) else payload
+
+
+class DataSink:
+    """
+    데이터 파일 기록 싱크 (disabled 모드)
+    - put(path, payload, sep): payload는 DataFrame 또는 DataFrame을 반환하는 함수
+    - 함수로 넘기면 DataFrame 생성까지 백그라운드 스레드에서 수행되어 웹소켓 콜백 부담이 없음
+    """
+    mode = 'disabled'
+
+    def put(self, path, payload, sep=','):
+        return
+
+    def stop(self):
+        return
+
+
+class AppendOnlySink(DataSink):
+    """
+    append 모드: payload 행을 파일 끝에 추가 (마감 캔들 기록용)
+    - 크기 제한 큐 사용, 큐가 가득 차면 기록을 버리고 개수만 집계 (수신 경로는 절대 막지 않음)
+    """
+    mode = 'append'
+
+    def __init__(self, queue_size=10000):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.name = "AppendOnlySinkThread"
+        self.thread.start()
+
+    def put(self, path, payload, sep=','):
+        try:
+            self.queue.put_nowait((path, payload, sep))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"append 싱크 큐 가득 참, 누적 버림 {self.dropped}건")
+
+    def _run(self):
+        while not (self.stop_event.is_set() and self.queue.empty()):
+            try:
+                path, payload, sep = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                df = _resolve(payload)
+                df.to_csv(path, mode='a', header=not os.path.exists(path), index=False, sep=sep)
+            except Exception as e:
+                logger.error(f"{path} append 기록 실패: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(timeout=5)
+
+
+class SnapshotSink(DataSink):
+    """
+    snapshot 모드: 파일별 최신 payload만 보관하다가 interval 초마다 파일 전체를 다시 씀 (진행 중 상태 기록용)
+    - 파일 수만큼만 메모리를 사용하므로 자연스럽게 크기가 제한됨
+    """
+    mode = 'snapshot'
+
+    def __init__(self, interval=5):
+        self.interval = interval
+        self.latest = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.name = "SnapshotSinkThread"
+        self.thread.start()
+
+    def put(self, path, payload, sep=','):
+        with self.lock:
+            self.latest[path] = (payload, sep)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            latest, self.latest = self.latest, {}
+        for path, (payload, sep) in latest.items():
+            try:
+                _resolve(payload).to_csv(path, index=False, sep=sep)
+            except Exception as e:
+                logger.error(f"{path} snapshot 기록 실패: {str(e)}")
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(timeout=5)
+        self.flush()
+
+
+def create_sink(mode, queue_size=10000, snapshot_interval=5):
+    """
+    설정 모드에 맞는 싱크 생성
+
+    :param mode: 'append' | 'snapshot' | 'disabled'
+    """
+    if mode == 'append':
+        return AppendOnlySink(queue_size)
+    if mode == 'snapshot':
+        return SnapshotSink(snapshot_interval)
+    if mode != 'disabled':
+        logger.warning(f"알 수 없는 싱크 모드 '{mode}', disabled로 처리")
+    return DataSink()
@@ -0,0 +1,17 @@
+"""
+바이낸스 REST 클라이언트 생성
+- BASE_URL이 바이낸스 주소가 아니면 (mock_exchange 등) 선물/현물 API 주소를 BASE_URL로 바꾸고 생성 시 ping 생략
+"""
+from binance.client import Client
+
+from config import API_KEY, SECRET_KEY, BASE_URL, BINANCE_BASE_URL
+
+
+def create_client():
+    if BASE_URL == BINANCE_BASE_URL:
+        return Client(API_KEY, SECRET_KEY)
+    client = Client(API_KEY, SECRET_KEY, ping=False)
+    client.API_URL = f"{BASE_URL}/api"
+    client.FUTURES_URL = f"{BASE_URL}/fapi"
+    client.FUTURES_DATA_URL = f"{BASE_URL}/futures/data"
+    return client
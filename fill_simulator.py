@@ -0,0 +1,514 @@
+"""
+지정가 주문 체결 시뮬레이션 (기록된 오더북 스냅샷 + 체결 기반)
+- OrderHandler는 high_ask/low_bid 가격에 GTC LIMIT 주문을 넣음 -> 즉시 전량 체결을 가정하는 대신
+  주문 시점 오더북에서 지정가까지 반대편 호가를 소진하는 부분(테이커)과 남은 수량의 대기(메이커)를 나눠서 계산
+- 대기 주문
+  - 대기열: 주문 시점 같은 가격 레벨 수량이 앞에 있음 (최우선보다 좋은 가격이면 0, 표시 범위 밖이면 처음 보일 때 수량)
+  - 같은 가격의 반대 방향 체결(매수 주문이면 매도 테이커 체결)이 앞 대기열부터 소진하고, 넘친 만큼 부분 체결
+  - 취소는 우리 뒤에서 일어난다고 가정, 단 스냅샷의 레벨 수량이 앞 대기열보다 작아지면 앞 대기열을 그 수량으로 줄임
+  - 지정가보다 불리한 가격의 체결(관통) 또는 반대편 최우선 호가가 지정가에 닿으면 남은 수량 전량 체결
+  - 우리 주문은 기록된 시장에 영향을 주지 않음 (체결 수량을 다른 참여자 몫에서 빼지 않음)
+- 테이프: 심볼별 배열 파일 (오더북 (스냅샷 x 레벨) 가격/수량, 체결 시각/가격/수량/방향)
+  np.memmap으로 열어서 몇 달 치도 메모리에 올리지 않고 주문 구간만 읽음
+  - @depth20@500ms 부분 스냅샷은 그대로, @depth@100ms diff는 로컬 오더북을 재구성해서 sample_ms마다 상위 레벨 저장
+  - 변환한 기록 파일은 sources.json에 남기고 다시 변환하지 않음 (기록이 늘면 새 파일만 이어 붙임)
+- 대기 구간은 시간 블록 단위 벡터 연산 (체결/스냅샷 이벤트 병합 -> 누적합 + 누적 최소), 전량 체결되면 중단
+  (블록은 10초부터 2배씩 늘림: 대부분 빨리 체결되는 주문은 짧게, 오래 대기하는 주문은 큰 블록으로)
+
+사용법:
+  python fill_simulator.py convert <기록 디렉토리 또는 파일 ...> [--out DIR] [--levels 20] [--sample 500]
+  python fill_simulator.py sim XRPUSDT [--side BUY] [--price bot|touch] [--quantity 100] [--every 60] [--latency 50] [--expire 300]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from config import FILL_TAPE_DIR, ORDERBOOK_LEVELS
+from order_book import LocalOrderBook
+from stream_events import decode_depth, loads
+from stream_recorder import read_records, recording_files
+
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0005
+BOOK_FIELDS = ('bid_px', 'bid_qty', 'ask_px', 'ask_qty')  # (스냅샷 수, 레벨) float64, 빈 레벨은 가격 NaN / 수량 0
+TRADE_FIELDS = (('trade_time', np.int64), ('trade_px', np.float64), ('trade_qty', np.float64),
+                ('trade_sell', np.bool_))  # trade_sell: 매도 테이커 체결 (aggTrade m=True)
+FIRST_BLOCK_MS = 10_000  # 대기 주문 계산 시간 블록 (블록마다 전량 체결 여부 확인, 2배씩 늘림)
+BLOCK_MS = 3_600_000
+FLUSH_ROWS = 50_000   # 변환 시 심볼별 버퍼 행 수
+
+
+def read_meta(directory):
+    path = os.path.join(directory, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    temp = f"{path}.tmp"
+    with open(temp, "w") as f:
+        json.dump(data, f)
+    os.replace(temp, path)
+
+
+class TapeWriter:
+    """
+    심볼 하나의 테이프 배열 파일에 행 추가 (메타는 flush마다 기록)
+    - 메타보다 긴 파일(기록 중 중단)은 열 때 메타 길이로 자름
+    - 시각이 이전 행보다 앞서는 스냅샷/체결과 이미 기록한 aggTrade ID는 버림 (searchsorted 전제, 재변환 시 중복 방지)
+    """
+    def __init__(self, directory, levels=20):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.meta = read_meta(directory) or {'levels': levels, 'books': 0, 'trades': 0, 'last_book': 0, 'last_trade': 0}
+        self.levels = self.meta['levels']
+        self.books = []   # (시각 ms, bids, asks)
+        self.trades = []  # (시각 ms, 가격, 수량, 매도 테이커)
+        self._truncate()
+
+    def _truncate(self):
+        sizes = {'book_time': 8, 'trade_time': 8, 'trade_px': 8, 'trade_qty': 8, 'trade_sell': 1}
+        sizes.update({name: 8 * self.levels for name in BOOK_FIELDS})
+        for name, size in sizes.items():
+            path = os.path.join(self.directory, f"{name}.bin")
+            rows = self.meta['trades'] if name.startswith('trade') else self.meta['books']
+            if os.path.exists(path) and os.path.getsize(path) > rows * size:
+                os.truncate(path, rows * size)
+
+    def add_book(self, time_ms, bids, asks):
+        if time_ms <= self.meta['last_book']:
+            return
+        self.meta['last_book'] = time_ms
+        self.books.append((time_ms, bids, asks))
+        if len(self.books) >= FLUSH_ROWS:
+            self.flush()
+
+    def add_trade(self, time_ms, price, quantity, seller, trade_id=None):
+        if time_ms < self.meta['last_trade'] or (trade_id is not None and trade_id <= self.meta.get('last_trade_id', -1)):
+            return
+        self.meta['last_trade'] = time_ms
+        if trade_id is not None:
+            self.meta['last_trade_id'] = trade_id
+        self.trades.append((time_ms, price, quantity, seller))
+        if len(self.trades) >= FLUSH_ROWS:
+            self.flush()
+
+    def _append(self, name, values):
+        with open(os.path.join(self.directory, f"{name}.bin"), "ab") as f:
+            f.write(np.ascontiguousarray(values).tobytes())
+
+    def flush(self):
+        if self.books:
+            rows, levels = len(self.books), self.levels
+            arrays = {name: np.full((rows, levels), np.nan) if name.endswith('px') else np.zeros((rows, levels))
+                      for name in BOOK_FIELDS}
+            for row, (_, bids, asks) in enumerate(self.books):
+                for side, levels_ in (('bid', bids), ('ask', asks)):
+                    if len(levels_):
+                        values = np.asarray(levels_[:levels], dtype=float)
+                        arrays[f'{side}_px'][row, :len(values)] = values[:, 0]
+                        arrays[f'{side}_qty'][row, :len(values)] = values[:, 1]
+            self.write_books(np.array([book[0] for book in self.books], dtype=np.int64), arrays)
+            self.books = []
+        if self.trades:
+            self.write_trades(*zip(*self.trades))
+            self.trades = []
+        write_json(os.path.join(self.directory, "meta.json"), self.meta)
+
+    def write_books(self, times, arrays):
+        """스냅샷 배열 추가 (times: (n,) ms, arrays: {BOOK_FIELDS: (n, levels)}, 시각 검사 없음)"""
+        self._append('book_time', np.asarray(times, dtype=np.int64))
+        for name in BOOK_FIELDS:
+            self._append(name, np.asarray(arrays[name], dtype=np.float64))
+        self.meta['books'] += len(times)
+        self.meta['last_book'] = max(self.meta['last_book'], int(times[-1]))
+
+    def write_trades(self, times, prices, quantities, sellers):
+        """체결 배열 추가 (시각 검사 없음)"""
+        for (name, dtype), values in zip(TRADE_FIELDS, (times, prices, quantities, sellers)):
+            self._append(name, np.asarray(values, dtype=dtype))
+        self.meta['trades'] += len(times)
+        self.meta['last_trade'] = max(self.meta['last_trade'], int(times[-1]))
+
+
+def _stream_name(message):
+    """결합 스트림 메시지에서 JSON 파싱 없이 stream 이름 추출 ({"stream":"<name>","data":...})"""
+    if message.startswith('{"stream":"'):
+        return message[11:message.index('"', 11)]
+    return loads(message).get('stream', '')
+
+
+def convert_recordings(paths, directory=FILL_TAPE_DIR, levels=20, sample_ms=500):
+    """
+    stream_recorder 기록 -> 심볼별 테이프 (<directory>/<SYMBOL>/)
+
+    :param sample_ms: diff 오더북 재구성 시 스냅샷 간격
+    :return: {symbol: (스냅샷 수, 체결 수)} (이번에 추가한 행)
+    """
+    os.makedirs(directory, exist_ok=True)
+    sources_path = os.path.join(directory, "sources.json")
+    done = []
+    if os.path.exists(sources_path):
+        with open(sources_path) as f:
+            done = json.load(f)
+    writers, books, next_sample, added = {}, {}, {}, {}
+
+    def writer(symbol):
+        if symbol not in writers:
+            writers[symbol] = TapeWriter(os.path.join(directory, symbol), levels)
+            added[symbol] = [writers[symbol].meta['books'], writers[symbol].meta['trades']]
+        return writers[symbol]
+
+    def book(symbol):
+        if symbol not in books:
+            books[symbol] = LocalOrderBook(symbol)
+            next_sample[symbol] = 0
+        return books[symbol]
+
+    for path in recording_files(paths):
+        name = os.path.basename(path)
+        if name in done:
+            continue
+        for _, channel, message in read_records([path]):
+            if channel == 'combined':
+                stream = _stream_name(message)
+            elif channel.startswith('snapshot@'):
+                book(channel.split('@')[1]).apply_snapshot(loads(message))
+                continue
+            else:
+                stream = channel
+            kind = stream.partition('@')[2]
+            if kind not in ('depth20@500ms', 'depth@100ms', 'aggTrade'):
+                continue
+            data = loads(message)
+            if channel == 'combined':
+                data = data['data']
+            symbol = data['s']
+            if kind == 'aggTrade':
+                writer(symbol).add_trade(data['T'], float(data['p']), float(data['q']), data['m'], data.get('a'))
+            elif kind == 'depth20@500ms':
+                writer(symbol).add_book(data.get('T') or data.get('E', 0), data['b'], data['a'])
+            else:
+                event = decode_depth(data)
+                local = book(symbol)
+                local.on_event(event)
+                event_time = event.transaction_time or event.event_time
+                if local.synced and event_time >= next_sample[symbol]:
+                    writer(symbol).add_book(event_time, local.top_bids(levels), local.top_asks(levels))
+                    next_sample[symbol] = event_time - event_time % sample_ms + sample_ms
+        # 기록 파일 단위로 확정 (중단되면 이 파일부터 다시 변환, 이미 들어간 행은 시각 검사로 버려짐)
+        for tape in writers.values():
+            tape.flush()
+        done.append(name)
+        write_json(sources_path, done)
+    return {symbol: (tape.meta['books'] - added[symbol][0], tape.meta['trades'] - added[symbol][1])
+            for symbol, tape in writers.items()}
+
+
+def _map(directory, name, dtype, shape):
+    if not shape[0]:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode='r', shape=shape)
+
+
+class MarketTape:
+    """심볼 하나의 테이프 (np.memmap, 읽은 구간만 디스크에서 올라옴)"""
+    def __init__(self, directory):
+        meta = read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"테이프 없음: {directory}")
+        self.directory = directory
+        self.levels = meta['levels']
+        books, trades = meta['books'], meta['trades']
+        self.book_time = _map(directory, 'book_time', np.int64, (books,))
+        for name in BOOK_FIELDS:
+            setattr(self, name, _map(directory, name, np.float64, (books, self.levels)))
+        for name, dtype in TRADE_FIELDS:
+            setattr(self, name, _map(directory, name, dtype, (trades,)))
+
+    @classmethod
+    def open(cls, symbol, directory=FILL_TAPE_DIR):
+        return cls(os.path.join(directory, symbol))
+
+    def book_index(self, time_ms):
+        """time_ms 시점에 유효한 스냅샷 번호 (없으면 -1)"""
+        return int(np.searchsorted(self.book_time, time_ms, side='right')) - 1
+
+    def mid(self, index):
+        return (self.bid_px[index, 0] + self.ask_px[index, 0]) / 2
+
+
+class LimitOrder:
+    """
+    :param side: 'BUY' | 'SELL'
+    :param time: 주문 시각 (ms, 거래소 시각 기준)
+    :param cancel_time: 취소 시각 (None이면 expire_ms 또는 테이프 끝까지 대기)
+    :param reference: 슬리피지 기준 가격 (None이면 주문 시점 중간가)
+    """
+    __slots__ = ('side', 'price', 'quantity', 'time', 'cancel_time', 'reference')
+
+    def __init__(self, side, price, quantity, time, cancel_time=None, reference=None):
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.time = time
+        self.cancel_time = cancel_time
+        self.reference = reference
+
+
+class FillResult:
+    """fills: [(시각 ms, 가격, 수량, 메이커 여부)]"""
+    __slots__ = ('order', 'fills', 'reference', 'queue_ahead', 'filled', 'avg_price', 'fee', 'status')
+
+    def __init__(self, order, fills, reference, queue_ahead, maker_fee=MAKER_FEE, taker_fee=TAKER_FEE):
+        self.order = order
+        self.fills = fills
+        self.reference = reference
+        self.queue_ahead = queue_ahead  # 대기 시작 시 앞 대기열 수량 (테이커로 일부 체결됐으면 0, 전량 테이커면 None)
+        self.filled = sum(fill[2] for fill in fills)
+        self.avg_price = sum(fill[1] * fill[2] for fill in fills) / self.filled if self.filled else 0.0
+        self.fee = sum(fill[1] * fill[2] * (maker_fee if fill[3] else taker_fee) for fill in fills)
+        if self.filled >= order.quantity * (1 - 1e-9):
+            self.status = 'FILLED'
+        else:
+            self.status = 'PARTIALLY_FILLED' if fills else 'UNFILLED'
+
+    @property
+    def slippage_bps(self):
+        """기준 가격 대비 평균 체결가 (bp, 불리한 방향이 +)"""
+        if not self.filled or not self.reference:
+            return 0.0
+        sign = 1 if self.order.side == 'BUY' else -1
+        return sign * (self.avg_price - self.reference) / self.reference * 1e4
+
+    @property
+    def wait_ms(self):
+        """주문 시각 -> 마지막 체결 (미체결이면 None)"""
+        return self.fills[-1][0] - self.order.time if self.fills else None
+
+
+class FillSimulator:
+    """
+    :param tape: MarketTape
+    :param latency_ms: 주문 시각 -> 거래소 접수 지연 (이 시점 스냅샷으로 테이커 부분 계산)
+    :param expire_ms: cancel_time이 없는 주문의 대기 시간 (None이면 테이프 끝까지)
+    """
+    def __init__(self, tape, latency_ms=50, expire_ms=None, maker_fee=MAKER_FEE, taker_fee=TAKER_FEE):
+        self.tape = tape
+        self.latency_ms = latency_ms
+        self.expire_ms = expire_ms
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+
+    def simulate(self, order):
+        tape = self.tape
+        buy = order.side == 'BUY'
+        start = order.time + self.latency_ms
+        if order.cancel_time is not None:
+            end = order.cancel_time
+        else:
+            end = start + self.expire_ms if self.expire_ms else np.inf
+        index = tape.book_index(start)
+        if index < 0:
+            return FillResult(order, [], order.reference, None, self.maker_fee, self.taker_fee)
+        reference = order.reference or float(tape.mid(index))
+
+        # 1. 접수 시점 반대편 호가 중 지정가 이내 레벨을 최우선부터 소진 (테이커)
+        prices = np.asarray(tape.ask_px[index] if buy else tape.bid_px[index])
+        quantities = np.asarray(tape.ask_qty[index] if buy else tape.bid_qty[index])
+        take = (prices <= order.price) if buy else (prices >= order.price)
+        fills = []
+        remaining = order.quantity
+        if take.any():
+            available = quantities[take]
+            taken = np.minimum(available, np.maximum(remaining - (np.cumsum(available) - available), 0.0))
+            for price, quantity in zip(prices[take].tolist(), taken.tolist()):
+                if quantity > 0:
+                    fills.append((start, price, quantity, False))
+            remaining -= float(taken.sum())
+        if remaining <= order.quantity * 1e-9:
+            return FillResult(order, fills, reference, None, self.maker_fee, self.taker_fee)
+
+        # 2. 남은 수량 대기 (메이커)
+        if fills:
+            ahead = 0.0  # 지정가까지 반대편을 모두 소진했으므로 우리가 최우선
+        else:
+            ahead = self._level(buy, order.price, index, index + 1)[0]
+        fills.extend(self._rest(buy, order.price, start, end, index + 1, remaining, ahead))
+        return FillResult(order, fills, reference, ahead, self.maker_fee, self.taker_fee)
+
+    def _level(self, buy, price, first, last):
+        """스냅샷 [first, last)의 지정가 레벨 수량 (표시 범위 밖이면 inf)"""
+        tape = self.tape
+        prices = np.asarray(tape.bid_px[first:last] if buy else tape.ask_px[first:last])
+        quantities = np.asarray(tape.bid_qty[first:last] if buy else tape.ask_qty[first:last])
+        level = np.where(prices == price, quantities, 0.0).sum(axis=1)
+        if buy:
+            visible = price >= np.where(np.isnan(prices), np.inf, prices).min(axis=1)
+        else:
+            visible = price <= np.where(np.isnan(prices), -np.inf, prices).max(axis=1)
+        return np.where(visible, level, np.inf)
+
+    def _rest(self, buy, price, start, end, book_first, quantity, ahead):
+        """
+        대기 주문 체결 (시간 블록 단위)
+        - 앞 대기열 a: 같은 가격 체결 d만큼 줄고 스냅샷 레벨 수량 L로 상한 -> a_t = min(a_{t-1} - d_t, L_t)
+          누적 체결 C_t로 b_t = a_t + C_t 를 두면 b_t = min(b_{t-1}, L_t + C_t) (누적 최소)
+        - 우리 주문까지 온 누적 체결 = max(C_t - b_t, 0)
+        """
+        tape = self.tape
+        fills = []
+        cum, bound, done = 0.0, ahead, 0.0
+        trade_first = int(np.searchsorted(tape.trade_time, start, side='left'))
+        clock, block = start, FIRST_BLOCK_MS
+        while clock < end and done < quantity * (1 - 1e-9):
+            if trade_first >= len(tape.trade_time) and book_first >= len(tape.book_time):
+                break  # 테이프 끝
+            stop = min(clock + block, end)
+            block = min(block * 2, BLOCK_MS)
+            trade_last = int(np.searchsorted(tape.trade_time, stop, side='left'))
+            book_last = int(np.searchsorted(tape.book_time, stop, side='left'))
+            if trade_last == trade_first and book_last == book_first:
+                # 이벤트 없는 구간은 다음 이벤트 시각으로 건너뜀
+                upcoming = [int(values[i]) for values, i in ((tape.trade_time, trade_first), (tape.book_time, book_first))
+                            if i < len(values)]
+                clock = max(stop, min(upcoming))
+                continue
+
+            trade_time = np.asarray(tape.trade_time[trade_first:trade_last])
+            trade_px = np.asarray(tape.trade_px[trade_first:trade_last])
+            aggressive = np.asarray(tape.trade_sell[trade_first:trade_last])
+            if not buy:
+                aggressive = ~aggressive
+            traded = np.where(aggressive & (trade_px == price), np.asarray(tape.trade_qty[trade_first:trade_last]), 0.0)
+            through = aggressive & ((trade_px < price) if buy else (trade_px > price))
+
+            book_time = np.asarray(tape.book_time[book_first:book_last])
+            level = self._level(buy, price, book_first, book_last)
+            best = np.asarray(tape.ask_px[book_first:book_last, 0] if buy else tape.bid_px[book_first:book_last, 0])
+            cross = (best <= price) if buy else (best >= price)
+
+            # 체결과 스냅샷을 시각 순으로 병합 (같은 시각이면 체결 먼저, 스냅샷은 체결 이후 상태)
+            order = np.argsort(np.concatenate([trade_time, book_time]), kind='stable')
+            times = np.concatenate([trade_time, book_time])[order]
+            volume = np.concatenate([traded, np.zeros(len(book_time))])[order]
+            limits = np.concatenate([np.full(len(trade_time), np.inf), level])[order]
+            swept = np.concatenate([through, cross])[order]
+
+            cumulative = cum + np.cumsum(volume)
+            bounds = np.minimum.accumulate(np.concatenate([[bound], limits + cumulative]))[1:]
+            reached = np.minimum(np.maximum(cumulative - bounds, 0.0), quantity)
+            hits = np.flatnonzero(swept)
+            if hits.size:
+                reached[hits[0]:] = quantity
+            increments = np.diff(np.concatenate([[done], reached]))
+            for i in np.flatnonzero(increments > quantity * 1e-12).tolist():
+                fills.append((int(times[i]), price, float(increments[i]), True))
+            done, cum, bound = float(reached[-1]), float(cumulative[-1]), float(bounds[-1])
+            trade_first, book_first, clock = trade_last, book_last, stop
+        return fills
+
+    def simulate_many(self, orders):
+        return [self.simulate(order) for order in orders]
+
+
+def summarize(results):
+    """체결률, 대기 시간, 슬리피지 요약"""
+    ordered = sum(result.order.quantity for result in results)
+    filled = [result for result in results if result.filled]
+    maker = sum(fill[2] for result in results for fill in result.fills if fill[3])
+    total = sum(result.filled for result in results)
+    waits = [result.wait_ms for result in results if result.status == 'FILLED']
+    return {
+        'orders': len(results),
+        'filled': sum(result.status == 'FILLED' for result in results),
+        'partial': sum(result.status == 'PARTIALLY_FILLED' for result in results),
+        'unfilled': sum(result.status == 'UNFILLED' for result in results),
+        'fill_ratio': total / ordered if ordered else 0.0,
+        'maker_share': maker / total if total else 0.0,
+        'wait_p50_ms': float(np.median(waits)) if waits else None,
+        'wait_p90_ms': float(np.percentile(waits, 90)) if waits else None,
+        'slippage_bps': float(np.average([result.slippage_bps for result in filled],
+                                         weights=[result.filled for result in filled])) if filled else 0.0,
+        'fees': sum(result.fee for result in results),
+    }
+
+
+def periodic_orders(tape, side, quantity, every_ms, price_mode='bot', levels=ORDERBOOK_LEVELS, start=None, end=None):
+    """
+    테이프 구간에서 every_ms마다 주문 생성
+
+    :param price_mode: 'bot' (OrderHandler와 같은 high_ask/low_bid = 상위 levels번째 반대편 호가)
+                       | 'touch' (같은 편 최우선 호가에 대기)
+    """
+    if not len(tape.book_time):
+        return []
+    start = int(tape.book_time[0]) if start is None else start
+    end = int(tape.book_time[-1]) if end is None else end
+    times = np.arange(start, end, every_ms)
+    indexes = np.searchsorted(tape.book_time, times, side='right') - 1
+    buy = side == 'BUY'
+    if price_mode == 'bot':
+        # 상위 levels개 반대편 호가 중 가장 먼 가격 (레벨이 덜 채워진 스냅샷은 마지막 유효 레벨)
+        level = min(levels, tape.levels)
+        if buy:
+            prices = np.asarray(tape.ask_px[indexes, :level])
+            prices = np.where(np.isnan(prices), -np.inf, prices).max(axis=1)
+        else:
+            prices = np.asarray(tape.bid_px[indexes, :level])
+            prices = np.where(np.isnan(prices), np.inf, prices).min(axis=1)
+        prices[np.isinf(prices)] = np.nan
+    else:
+        prices = np.asarray((tape.bid_px if buy else tape.ask_px)[indexes, 0])
+    return [LimitOrder(side, price, quantity, int(time_)) for time_, price in zip(times.tolist(), prices.tolist())
+            if not np.isnan(price)]
+
+
+def format_summary(summary):
+    wait = (f"대기 p50 {summary['wait_p50_ms'] / 1000:.1f}s p90 {summary['wait_p90_ms'] / 1000:.1f}s"
+            if summary['wait_p50_ms'] is not None else "대기 -")
+    return (f"주문 {summary['orders']:,} 전량 {summary['filled']:,} 부분 {summary['partial']:,} 미체결 {summary['unfilled']:,} "
+            f"체결률 {summary['fill_ratio']:.1%} 메이커 {summary['maker_share']:.1%} {wait} "
+            f"슬리피지 {summary['slippage_bps']:.2f}bp 수수료 {summary['fees']:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지정가 주문 체결 시뮬레이션")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help="스트림 기록 -> 심볼별 테이프")
+    convert.add_argument('paths', nargs='+', help="stream_recorder 기록 디렉토리 또는 파일")
+    convert.add_argument('--out', default=FILL_TAPE_DIR, help="테이프 디렉토리")
+    convert.add_argument('--levels', type=int, default=20, help="저장할 호가 레벨 수 (새 테이프만 적용)")
+    convert.add_argument('--sample', type=int, default=500, help="diff 오더북 스냅샷 간격 (ms)")
+    sim = commands.add_parser('sim', help="테이프 구간에 주기적으로 지정가 주문을 넣어 체결 통계 계산")
+    sim.add_argument('symbol')
+    sim.add_argument('--tape', default=FILL_TAPE_DIR, help="테이프 디렉토리")
+    sim.add_argument('--side', default='BUY', choices=('BUY', 'SELL'))
+    sim.add_argument('--price', default='bot', choices=('bot', 'touch'), help="bot: high_ask/low_bid, touch: 같은 편 최우선 호가")
+    sim.add_argument('--quantity', type=float, default=100)
+    sim.add_argument('--every', type=float, default=60, help="주문 간격 (초)")
+    sim.add_argument('--latency', type=int, default=50, help="주문 접수 지연 (ms)")
+    sim.add_argument('--expire', type=float, default=300, help="미체결 주문 취소까지 시간 (초, 0이면 테이프 끝까지)")
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        t0 = time.perf_counter()
+        counts = convert_recordings(args.paths, args.out, args.levels, args.sample)
+        for symbol, (books, trades) in sorted(counts.items()):
+            print(f"{symbol}: 스냅샷 {books:,}개, 체결 {trades:,}건 추가")
+        print(f"변환 {time.perf_counter() - t0:.1f}s -> {args.out}")
+    else:
+        tape = MarketTape.open(args.symbol, args.tape)
+        orders = periodic_orders(tape, args.side, args.quantity, int(args.every * 1000), args.price)
+        simulator = FillSimulator(tape, args.latency, int(args.expire * 1000) or None)
+        t0 = time.perf_counter()
+        results = simulator.simulate_many(orders)
+        elapsed = time.perf_counter() - t0
+        print(f"{args.symbol} 스냅샷 {len(tape.book_time):,}개, 체결 {len(tape.trade_time):,}건")
+        print(format_summary(summarize(results)))
+        print(f"시뮬레이션 {elapsed:.2f}s (주문당 {elapsed / max(len(results), 1) * 1000:.2f}ms)")
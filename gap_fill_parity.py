@@ -0,0 +1,186 @@
+"""
+캔들 누락 백필 동등성 검사
+- data/klines_<symbol>_1m.csv 를 거래소 데이터로 보고, 앞부분으로 버퍼/리샘플러를 초기화한 뒤
+  나머지 1m 캔들을 kline 이벤트처럼 넣으면서 중간 구간을 빼서 (웹소켓 끊김) 누락을 만듦
+- CandleGapFiller가 누락을 감지하고 csv에서 페이지 단위로 조회해 채운 결과가
+  끊김 없이 모든 캔들을 받은 경우의 1m / 합성 타임프레임 버퍼와 같은지 확인
+- check()의 평가 보류 해제: 백필 조회 중 같은 심볼에 새 누락이 생기면 그 누락까지 채운 뒤 해제,
+  조회에 실패한 심볼은 보류 유지
+
+사용법: python gap_fill_parity.py [1m csv 경로 ...]
+"""
+import glob
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from candle_store import CandleRingBuffer
+from gap_filler import CandleGapFiller, find_gaps
+from resample_parity import load_rows
+from resampler import CandleResampler
+
+CAPACITY = 260
+TIMEFRAMES = ('15m', '1h')
+OUTAGES = ((5, 3), (20, 15), (40, 25))  # (이어서 받은 캔들 수, 끊긴 캔들 수)
+
+
+class _KlineClient:
+    """futures_klines(startTime, endTime, limit)만 csv 데이터로 응답"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def futures_klines(self, symbol, interval, startTime, endTime, limit):
+        self.calls += 1
+        times = self.rows[:, 0]
+        page = self.rows[(times >= startTime) & (times <= endTime)][:limit]
+        return [[int(row[0])] + [str(value) for value in row[1:6]] for row in page]
+
+
+class _DataHandler:
+    """CandleGapFiller가 사용하는 data_handler 속성만 가진 캔들 저장소"""
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.coin_data = {}
+        self.resamplers = {}
+        self.queued = 0
+
+    def queue_candle_update(self, symbol, timeframe, candle, closed=False):
+        self.queued += 1
+
+
+def build(history, client=None):
+    """과거 1m 캔들로 1m 버퍼와 리샘플러 초기화 (DataHandler.initialize_data / init_resamplers와 같은 구성)"""
+    handler = _DataHandler(client)
+    handler.coin_data['TEST'] = {'1m': CandleRingBuffer(CAPACITY)}
+    handler.resamplers['TEST'] = {}
+    for row in history[-CAPACITY:]:
+        handler.coin_data['TEST']['1m'].append(row)
+    for tf in TIMEFRAMES:
+        resampler = CandleResampler(tf, CAPACITY)
+        resampler.backfill(history)
+        handler.resamplers['TEST'][tf] = resampler
+        handler.coin_data['TEST'][tf] = resampler.candles
+    return handler
+
+
+def feed(handler, rows):
+    for row in rows:
+        open_time = int(row[0])
+        handler.coin_data['TEST']['1m'].upsert(open_time, *row[1:6])
+        for resampler in handler.resamplers['TEST'].values():
+            resampler.update(open_time, *row[1:6])
+
+
+def check(path):
+    rows = load_rows(path)
+    warmup = len(rows) // 2
+    expected = build(rows[:warmup])
+    feed(expected, rows[warmup:])
+
+    client = _KlineClient(rows)
+    handler = build(rows[:warmup], client)
+
+    # 끊김 구간을 빼고 수신, 재연결 후 첫 캔들에서 open time 점프 감지 -> 백필
+    filler = CandleGapFiller(handler, ['TEST'], ['1m'], CAPACITY, workers=4, grace_ms=0)
+    position, detected = warmup, 0
+    for received, missed in OUTAGES:
+        feed(handler, rows[position:position + received])
+        position += received + missed
+        last = handler.coin_data['TEST']['1m'].last_open_time
+        detected += filler.on_kline('TEST', '1m', last, int(rows[position, 0]))
+        feed(handler, rows[position:position + 1])
+        now_ms = int(rows[position, 0]) + 1  # 재연결 후 첫 캔들이 진행 중인 시각
+        position += 1
+        filler.fill(filler.find(now_ms), now_ms)
+    feed(handler, rows[position:])
+    now_ms = int(rows[-1, 0]) + 1
+    filler.executor.shutdown()
+
+    messages = [f"감지 {detected}/{len(OUTAGES)}, REST 호출 {client.calls}회, 백필 {filler.filled}개"]
+    # 원본 데이터 자체에 빠진 구간이 있으면 그 구간만 남아 있어야 함
+    source_gaps = find_gaps(expected.coin_data['TEST']['1m'].column('Open time'), 60_000, now_ms)
+    remaining = [(start, end) for _, _, start, end in filler.find(now_ms)]
+    ok = detected == len(OUTAGES) and remaining == source_gaps
+    if source_gaps:
+        messages.append(f"원본 누락 구간 {len(source_gaps)}개")
+    for tf in ('1m',) + TIMEFRAMES:
+        reference = expected.coin_data['TEST'][tf].view()
+        actual = handler.coin_data['TEST'][tf].view()
+        same = (reference.shape == actual.shape and np.array_equal(reference[:, :5], actual[:, :5])
+                and np.allclose(reference[:, 5], actual[:, 5], rtol=1e-12, atol=0))
+        ok &= same
+        messages.append(f"{tf} {'일치' if same else '불일치'}")
+    return ok, ", ".join(messages)
+
+
+class _FailingClient:
+    def futures_klines(self, **params):
+        raise ConnectionError("조회 실패")
+
+
+def check_pending():
+    """현재 시각까지의 합성 1m 캔들로 CandleGapFiller.check()의 보류 해제 확인"""
+    now_ms = int(time.time() * 1000)
+    last = now_ms - now_ms % 60_000 - 2 * 60_000
+    times = np.arange(last - (CAPACITY + 99) * 60_000, last + 1, 60_000, dtype=float)
+    rows = np.column_stack((times, np.ones((len(times), 4)), np.full(len(times), 10.0)))
+    messages, ok = [], True
+
+    # 첫 조회 중 재연결로 같은 심볼에 새 누락이 생김 (rows[311:330] 누락 후 rows[330] 수신)
+    client = _KlineClient(rows)
+    handler = build(rows[:300], client)
+    released = []
+    # find()의 현재 시각을 rows[311] 구간 중간으로 (rows[310] 이후 마감 캔들은 아직 누락이 아님)
+    grace_ms = now_ms - int(rows[311, 0]) - 30_000
+    filler = CandleGapFiller(handler, ['TEST'], ['1m'], CAPACITY, workers=1, grace_ms=grace_ms,
+                             on_filled=released.append)
+    fetch = client.futures_klines
+
+    def reconnect_during_fetch(**params):
+        if client.calls == 0:
+            filler.on_kline('TEST', '1m', handler.coin_data['TEST']['1m'].last_open_time, int(rows[330, 0]))
+            feed(handler, rows[330:331])
+        return fetch(**params)
+
+    client.futures_klines = reconnect_during_fetch
+    feed(handler, rows[310:311])
+    filler.on_kline('TEST', '1m', int(rows[299, 0]), int(rows[310, 0]))
+    filler.check("재연결")
+    filler.executor.shutdown()
+    missing = set(rows[231:331, 0]) - set(handler.coin_data['TEST']['1m'].column('Open time'))
+    same = not missing and not filler.is_pending('TEST') and released
+    ok &= bool(same)
+    messages.append("조회 중 새 누락 " + ("백필 후 해제" if same else f"미백필 {len(missing)}개, 보류 {filler.is_pending('TEST')}"))
+
+    # 조회 실패: 보류 유지, 다음 검사에서 성공하면 해제
+    handler = build(rows[:300], _FailingClient())
+    released = []
+    filler = CandleGapFiller(handler, ['TEST'], ['1m'], CAPACITY, workers=1, grace_ms=0, on_filled=released.append)
+    feed(handler, rows[310:311])
+    filler.on_kline('TEST', '1m', int(rows[299, 0]), int(rows[310, 0]))
+    filler.check("재연결")
+    held = filler.is_pending('TEST') and not released
+    handler.client = _KlineClient(rows)
+    filler.check()
+    filler.executor.shutdown()
+    same = held and not filler.is_pending('TEST') and released == ['TEST']
+    ok &= bool(same)
+    messages.append(f"조회 실패 {'보류 유지 후 재시도 해제' if same else '보류 처리 불일치'}")
+    return ok, ", ".join(messages)
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "klines_*_1m.csv")))
+    ok, message = check_pending()
+    failed = not ok
+    print(f"{'OK  ' if ok else 'FAIL'} 평가 보류 해제: {message}")
+    for path in paths:
+        ok, message = check(path)
+        failed += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {os.path.basename(path)}: {message}")
+    sys.exit(1 if failed else 0)
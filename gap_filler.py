@@ -0,0 +1,280 @@
+"""
+캔들 연속성 검사 + 누락 구간 REST 백필
+- 웹소켓 재연결 / kline open time 점프 / 주기 검사(시계 점프, 조용한 끊김) 시 캔들 버퍼의 빠진 open time 탐색
+- 빠진 구간만 futures_klines(startTime, endTime)로 페이지 단위 병렬 조회 후 버퍼에 끼워 넣고 DB에 기록
+  (load_historical_data 전체 재로드 없음)
+- 1m 누락이면 1m에서 합성하는 상위 타임프레임도 해당 구간 경계부터 다시 합성
+- 백필 대기 중인 심볼은 평가 알림을 보류 (누락 구간이 섞인 지표로 매매하지 않도록)
+"""
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from logger import logger
+from resampler import timeframe_ms
+
+KLINE_PAGE_LIMIT = 1500  # futures_klines 1회 최대 캔들 수
+
+
+def find_gaps(open_times, period_ms, now_ms=None):
+    """
+    누락 구간 탐색
+
+    :param open_times: 오름차순 open time (UTC ms) 배열
+    :param now_ms: 주어지면 마지막 캔들 이후 이 시각까지 마감됐어야 할 캔들도 누락으로 봄
+    :return: [(첫 누락 open time, 마지막 누락 open time)] (양 끝 포함)
+    """
+    times = np.asarray(open_times).astype('int64')
+    gaps = []
+    if len(times) > 1:
+        for i in np.flatnonzero(np.diff(times) > period_ms).tolist():
+            gaps.append((int(times[i]) + period_ms, int(times[i + 1]) - period_ms))
+    if now_ms is not None and len(times):
+        # 진행 중 캔들 직전 캔들보다 앞에서 끊겼으면 그 사이가 누락
+        current = now_ms - now_ms % period_ms
+        if times[-1] < current - period_ms:
+            gaps.append((int(times[-1]) + period_ms, current - period_ms))
+    return gaps
+
+
+def merge_rows(preferred, rows):
+    """두 캔들 배열을 open time 기준으로 합침 (같은 open time이면 preferred 값 사용)"""
+    merged = np.concatenate((preferred, rows))
+    _, index = np.unique(merged[:, 0], return_index=True)
+    return merged[index]
+
+
+def candle_row(row):
+    """캔들 배열 한 행 -> queue_candle_update 형식 dict"""
+    return {
+        'Open time': pd.to_datetime(int(row[0]), unit='ms') + pd.Timedelta(hours=9),
+        'Open': float(row[1]),
+        'High': float(row[2]),
+        'Low': float(row[3]),
+        'Close': float(row[4]),
+        'Volume': float(row[5])
+    }
+
+
+class CandleGapFiller:
+    """
+    심볼/타임프레임별 캔들 버퍼 누락 감시 + 백필
+    - request(): 웹소켓 스레드에서 검사 요청 (즉시 반환)
+    - 작업 스레드가 요청 또는 check_interval마다 전체 버퍼를 검사하고 누락 구간을 채움
+    """
+    def __init__(self, data_handler, symbols, timeframes, capacity, workers=4, check_interval=30,
+                 grace_ms=3000, on_filled=None):
+        self.data_handler = data_handler
+        self.symbols = list(symbols)
+        self.timeframes = list(timeframes)
+        self.capacity = capacity
+        self.check_interval = check_interval
+        self.grace_ms = grace_ms  # 마감 직후 캔들은 스트림 마감 이벤트를 기다림
+        self.on_filled = on_filled
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="GapFill")
+        self.requests = queue.Queue()
+        self.pending = {}  # {백필 대기 중인 심볼 (평가 보류): 마지막 요청 번호}
+        self.pending_lock = threading.Lock()
+        self.request_ids = itertools.count(1)
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.filled = 0
+
+    def on_kline(self, symbol, timeframe, last_open_time, open_time):
+        """
+        kline 수신 시 open time 점프 확인 (data_handler.lock 보유 상태에서 호출 가능, REST 호출 없음)
+
+        :return: 누락이 있으면 True (백필 요청됨)
+        """
+        if last_open_time is None or open_time - last_open_time <= timeframe_ms(timeframe):
+            return False
+        self.request(f"{symbol} {timeframe} open time 점프", symbol)
+        return True
+
+    def request(self, reason, symbol=None):
+        if symbol is not None:
+            with self.pending_lock:
+                self.pending[symbol] = next(self.request_ids)
+        self.requests.put(reason)
+
+    def is_pending(self, symbol):
+        return symbol in self.pending
+
+    def find(self, now_ms=None):
+        """전체 버퍼 누락 구간 [(symbol, timeframe, start, end)]"""
+        if now_ms is None:
+            now_ms = int(time.time() * 1000) - self.grace_ms
+        gaps = []
+        with self.data_handler.lock:
+            for symbol in self.symbols:
+                for timeframe in self.timeframes:
+                    candles = self.data_handler.coin_data.get(symbol, {}).get(timeframe)
+                    if candles is None or candles.empty:
+                        continue
+                    for start, end in find_gaps(candles.column('Open time'), timeframe_ms(timeframe), now_ms):
+                        gaps.append((symbol, timeframe, start, end))
+        return gaps
+
+    def check(self, reason=None):
+        """
+        누락 검사 + 백필, 채운 캔들 수 반환
+        - 검사 시작 전에 보류된 심볼과 누락이 발견된 심볼 중 조회에 성공한 심볼만 보류 해제
+        - 조회에 실패한 심볼은 보류 상태로 두고 다음 검사에서 다시 조회
+        - 검사 중 다시 요청된 심볼(백필 중 재연결 등)은 요청 번호가 바뀌므로 해제하지 않고 바로 다시 검사
+        """
+        total, failed = 0, set()
+        while True:
+            with self.pending_lock:  # find() 전에 읽어야 그 요청의 누락이 이번 검사에 포함됨
+                requested = {symbol: request_id for symbol, request_id in self.pending.items() if symbol not in failed}
+            gaps = self.find()
+            for symbol, timeframe, start, end in gaps:
+                count = (end - start) // timeframe_ms(timeframe) + 1
+                logger.warning(f"{symbol} {timeframe} 캔들 누락 {count}개 감지 ({reason or '주기 검사'})")
+                if symbol not in requested:
+                    request_id = next(self.request_ids)
+                    with self.pending_lock:
+                        # 검사 시작 후 다른 스레드가 요청한 심볼이면 그 요청은 다음 반복에서 처리
+                        if self.pending.setdefault(symbol, request_id) == request_id:
+                            requested[symbol] = request_id
+            if gaps:
+                total += self.fill(gaps, failed=failed)
+            released = []
+            with self.pending_lock:
+                for symbol, request_id in requested.items():
+                    if symbol not in failed and self.pending.get(symbol) == request_id:
+                        del self.pending[symbol]
+                        released.append(symbol)
+                retry = any(symbol not in failed for symbol in self.pending)
+            for symbol in released:
+                self._filled(symbol)
+            if not retry:
+                return total
+            reason = "백필 중 추가 요청"
+
+    def fill(self, gaps, now_ms=None, failed=None):
+        """
+        누락 구간 조회 (모든 구간의 페이지를 한 번에 병렬 요청) 후 버퍼/DB 반영
+
+        :param failed: 조회에 실패한 심볼을 추가할 set (None이면 기록하지 않음)
+        """
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        jobs = []
+        for symbol, timeframe, start, end in gaps:
+            start = self._fetch_start(symbol, timeframe, start, now_ms)
+            if start > end:
+                continue
+            jobs.append((symbol, timeframe, start, end, self._submit_pages(symbol, timeframe, start, end)))
+
+        fetched = {}
+        for symbol, timeframe, start, end, pages in jobs:
+            try:
+                rows = [row[:6] for page in pages for row in page.result()]
+            except Exception as e:
+                logger.error(f"{symbol} {timeframe} 누락 캔들 조회 실패: {e}")
+                if failed is not None:
+                    failed.add(symbol)
+                continue
+            rows = np.array(rows, dtype=float).reshape(-1, 6)
+            rows = rows[(rows[:, 0] >= start) & (rows[:, 0] <= end)]
+            fetched.setdefault((symbol, timeframe), []).append(rows)
+
+        total = 0
+        for (symbol, timeframe), parts in fetched.items():
+            rows = np.concatenate(parts)
+            if not len(rows):
+                continue
+            rows = rows[np.argsort(rows[:, 0], kind='stable')]
+            with self.data_handler.lock:
+                added = self.data_handler.coin_data[symbol][timeframe].splice(rows)
+                rebuilt = self._resample(symbol, rows) if timeframe == '1m' else []
+            for row in rows:
+                self.data_handler.queue_candle_update(symbol, timeframe, candle_row(row), closed=True)
+            for resampled_tf, bars in rebuilt:
+                for bar in bars:
+                    self.data_handler.queue_candle_update(symbol, resampled_tf, candle_row(bar), closed=True)
+            total += added
+            resampled = f" ({', '.join(tf for tf, _ in rebuilt)} 재합성)" if rebuilt else ""
+            logger.system(f"{symbol} {timeframe} 누락 캔들 {added}개 백필{resampled}")
+        self.filled += total
+        return total
+
+    def _fetch_start(self, symbol, timeframe, start, now_ms):
+        """
+        조회 시작 시각
+        - 1m에서 합성하는 타임프레임이 있으면 구간 경계까지 당겨서 조회 (해당 상위 캔들을 온전히 다시 합성)
+        - 버퍼에 남지 않을 만큼 오래된 구간은 조회하지 않음
+        """
+        period = timeframe_ms(timeframe)
+        if timeframe == '1m':
+            for resampler in self.data_handler.resamplers.get(symbol, {}).values():
+                start = min(start, start - start % resampler.period)
+                period = max(period, resampler.period)
+        horizon = now_ms - now_ms % period - self.capacity * period
+        return max(start, horizon)
+
+    def _submit_pages(self, symbol, timeframe, start, end):
+        period = timeframe_ms(timeframe)
+        page_span = period * KLINE_PAGE_LIMIT
+        return [
+            self.executor.submit(self.data_handler.client.futures_klines, symbol=symbol, interval=timeframe,
+                                 startTime=page_start, endTime=min(end, page_start + page_span - period),
+                                 limit=KLINE_PAGE_LIMIT)
+            for page_start in range(start, end + 1, page_span)
+        ]
+
+    def _resample(self, symbol, rows):
+        """
+        백필한 1m 구간부터 현재까지의 1m 캔들로 합성 타임프레임 재구성 (data_handler.lock 보유 상태에서 호출)
+
+        :return: [(timeframe, 다시 만든 캔들 배열)]
+        """
+        resamplers = self.data_handler.resamplers.get(symbol, {})
+        if not resamplers:
+            return []
+        first = int(rows[0, 0])
+        minutes = merge_rows(rows, self.data_handler.coin_data[symbol]['1m'].view())
+        rebuilt = []
+        for timeframe, resampler in resamplers.items():
+            bucket = first + (-first % resampler.period)  # 조회 시작 이후 첫 구간 경계
+            rebuilt.append((timeframe, resampler.splice(minutes[minutes[:, 0] >= bucket])))
+        return rebuilt
+
+    def _filled(self, symbol):
+        if self.on_filled is not None:
+            self.on_filled(symbol)
+
+    def start(self):
+        def run():
+            while not self.stop_event.is_set():
+                try:
+                    reason = self.requests.get(timeout=self.check_interval)
+                except queue.Empty:
+                    reason = None  # 주기 검사
+                # 쌓인 요청은 검사 한 번으로 처리
+                while not self.requests.empty():
+                    self.requests.get_nowait()
+                if self.stop_event.is_set():
+                    break
+                try:
+                    self.check(reason)
+                except Exception as e:
+                    logger.error(f"캔들 누락 검사 실패: {e}")
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.name = "CandleGapFillThread"
+        self.thread.start()
+        logger.system(f"캔들 누락 감시 시작 ({', '.join(self.timeframes)}, 주기 {self.check_interval}s)")
+
+    def stop(self):
+        self.stop_event.set()
+        self.requests.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,61 @@
+"""
+심볼 묶음 지표 계산(numpy_batch) 동등성 검사
+- data/klines_*_1m.csv 캔들을 심볼마다 다른 길이(전체, 260, 200, 120, 60, 30행)로 잘라 한 묶음으로 계산
+  (새로 추가된 심볼/과거 데이터가 짧은 심볼이 섞인 경우)
+- 심볼마다 Indicators.calculate_indicators_numpy 단독 계산과 행/값이 모두 같아야 통과
+  (짧은 심볼이 다른 심볼의 계산 구간을 바꾸지 않는지, 계산 불가 심볼 결과도 같은지)
+
+사용법: python indicator_batch_parity.py [csv 경로 ...]
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from candle_store import CANDLE_COLUMNS
+from indicators import Indicators
+from streaming_indicators import INDICATOR_COLUMNS
+
+LENGTHS = (None, 260, 200, 120, 60, 30)  # None: 전체
+
+
+def load_klines(path):
+    df = pd.read_csv(path, sep='\t', usecols=CANDLE_COLUMNS)
+    df['Open time'] = pd.to_datetime(df['Open time'])
+    return df
+
+
+def check(expected, actual):
+    if isinstance(expected, str) or isinstance(actual, str):
+        same = isinstance(expected, str) and isinstance(actual, str)
+        return same, "둘 다 계산 불가" if same else f"단독 {type(expected).__name__}, 묶음 {type(actual).__name__}"
+    if list(expected.index) != list(actual.index):
+        return False, f"행 불일치 (단독 {len(expected)}, 묶음 {len(actual)})"
+    a = expected[INDICATOR_COLUMNS].to_numpy()
+    b = actual[INDICATOR_COLUMNS].to_numpy()
+    mismatch = ~((a == b) | (np.isnan(a) & np.isnan(b)))
+    if mismatch.any():
+        return False, f"{mismatch.sum()}개 값 불일치, 최대 차이 {np.nanmax(np.abs(a - b)):.6g}"
+    return True, f"{len(expected)}행 일치"
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "klines_*_1m.csv")))
+    indicators = Indicators()
+    frames = {}
+    for path in paths:
+        df = load_klines(path)
+        for length in LENGTHS:
+            frames[f"{os.path.basename(path)}:{length or len(df)}"] = (df if length is None else df.tail(length)).reset_index(drop=True)
+    frames['empty'] = load_klines(paths[0]).iloc[:0] if paths else pd.DataFrame()
+
+    batch = indicators.calculate_indicators_batch(frames)
+    failed = 0
+    for symbol, df in frames.items():
+        expected = indicators.calculate_indicators_numpy(df.copy()) if not df.empty else "Error_State"
+        ok, message = check(expected, batch[symbol])
+        failed += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {symbol}: {message}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,116 @@
+"""
+지표 행렬 디스크 캐시 (내용 주소 방식)
+- 키: sha256(심볼, 타임프레임, 데이터 구간(계산 구간/보관 시작 시각/행 수), OHLCV 내용, Indicators 기간 설정, 지표 컬럼)
+- 값: <INDICATOR_CACHE_DIR>/<키 앞 2자리>/<키>.npz
+  (OHLCV + 지표 (컬럼 x 봉) float64 행렬, Open time, 컬럼 이름)
+- 데이터나 지표 설정이 바뀌면 키가 바뀌므로 무효화가 필요 없음 (겹치는 구간/재실행/다른 프로세스가 같은 파일 재사용)
+- 쓰기는 임시 파일 + os.replace (중단돼도 깨진 파일이 남지 않음, 읽기 실패한 파일은 다시 계산해서 덮어씀)
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from candle_store import CANDLE_COLUMNS
+from config import INDICATOR_CACHE_DIR
+from indicators import Indicators
+from logger import logger
+from streaming_indicators import INDICATOR_COLUMNS
+
+CACHE_VERSION = 1  # 지표 커널 계산 방식이 바뀌면 올림 (이전 캐시 파일은 쓰이지 않음)
+OHLCV_COLUMNS = list(CANDLE_COLUMNS[1:])
+
+
+def indicator_settings(indicators):
+    """Indicators 기간 설정 (숫자 속성 전체)"""
+    return {name: value for name, value in sorted(vars(indicators).items())
+            if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+
+class IndicatorCache:
+    def __init__(self, directory=INDICATOR_CACHE_DIR, indicators=None):
+        self.directory = directory
+        self.indicators = indicators or Indicators()
+        self.settings = indicator_settings(self.indicators)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, symbol, interval, df, start):
+        """
+        :param df: 계산에 쓰는 OHLCV 구간 (워밍업 행 포함)
+        :param start: 보관 시작 Open time (datetime64[ns] 정수, 이전 행은 워밍업)
+        """
+        times = df['Open time'].to_numpy(dtype='datetime64[ns]').astype('int64')
+        header = {
+            'version': CACHE_VERSION, 'symbol': symbol, 'interval': interval, 'start': int(start),
+            'first': int(times[0]) if len(times) else None, 'last': int(times[-1]) if len(times) else None,
+            'rows': len(times), 'settings': self.settings, 'columns': INDICATOR_COLUMNS,
+        }
+        digest = hashlib.sha256(json.dumps(header, sort_keys=True).encode())
+        digest.update(np.ascontiguousarray(times).tobytes())
+        digest.update(np.ascontiguousarray(df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)).tobytes())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.npz")
+
+    def load(self, key):
+        """캐시 파일 -> {컬럼: ndarray} (없거나 읽기 실패하면 None)"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {column: values for column, values in zip(data['columns'].tolist(), data['values'])}
+                arrays['Open time'] = data['times']
+            return arrays
+        except Exception as e:
+            logger.warning(f"지표 캐시 읽기 실패 ({path}): {e}")
+            return None
+
+    def store(self, key, arrays):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        columns = [column for column in arrays if column != 'Open time']
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            np.savez(f, values=np.array([arrays[column] for column in columns], dtype=np.float64).reshape(len(columns), -1),
+                     times=arrays['Open time'].astype('datetime64[ns]'), columns=np.array(columns))
+        os.replace(temp, path)
+
+    def compute(self, df, start):
+        """OHLCV -> 지표 배열 (지표 준비 전 행과 start 이전 워밍업 행 제외)"""
+        if len(df) == 0:
+            arrays = {column: np.empty(0) for column in OHLCV_COLUMNS + INDICATOR_COLUMNS}
+            arrays['Open time'] = np.empty(0, dtype='datetime64[ns]')
+            return arrays
+        frame = self.indicators.calculate_indicators_numpy(df.reset_index(drop=True))
+        if isinstance(frame, str):
+            raise ValueError("지표 계산 실패")
+        times = frame['Open time'].to_numpy(dtype='datetime64[ns]')
+        keep = times.astype('int64') >= start
+        arrays = {column: frame[column].to_numpy(dtype=float)[keep] for column in frame.columns if column != 'Open time'}
+        arrays['Open time'] = times[keep]
+        return arrays
+
+    def frame(self, symbol, interval, df, start, end, warmup=0):
+        """
+        [start, end) 구간 지표 배열 (앞쪽 warmup봉을 같이 계산하고 버림, EMA/ADX 등 재귀 지표의 시작점 영향 제거)
+
+        :param df: 심볼 전체 OHLCV DataFrame (Open time 오름차순)
+        :param start, end: Open time 경계 (datetime64[ns] 정수)
+        :return: {컬럼: ndarray} (Open time은 datetime64[ns])
+        """
+        times = df['Open time'].to_numpy(dtype='datetime64[ns]').astype('int64')
+        first, last = np.searchsorted(times, [start, end])
+        data = df.iloc[max(first - warmup, 0):last]
+        key = self.key(symbol, interval, data, start)
+        arrays = self.load(key)
+        if arrays is not None:
+            self.hits += 1
+            return arrays
+        self.misses += 1
+        arrays = self.compute(data, start)
+        self.store(key, arrays)
+        return arrays
@@ -0,0 +1,230 @@
+"""
+NumPy 벡터화 지표 커널
+- 모든 커널은 마지막 축(시간)을 따라 계산 → 1차원 (T,) 와 2차원 (심볼 수, T) 입력 모두 지원
+- compute_indicators()는 전체 지표를 미리 할당한 출력 행렬 하나 (..., 지표 수, T)에 기록
+- 재귀형 지표(ewm)는 블록 단위 선형 점화식 풀이로 계산 (시간 축 파이썬 루프는 블록 수만큼)
+- pandas_ta 결과와는 부동소수점 연산 순서 차이(~1e-15) 외에는 같은 값 (반올림 경계에서 드물게 1e-4 차이 가능)
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from streaming_indicators import INDICATOR_COLUMNS, ROUNDED_COLUMNS
+
+EPSILON = np.finfo(float).eps
+RECURRENCE_BLOCK = 64  # 점화식 블록 길이 (f^-k 값이 너무 커지지 않도록 제한)
+MIN_RECURRENCE_POWER = 1e-100  # 블록 안 factor^k 하한 (factor가 작으면 블록을 줄여 0으로 언더플로하지 않게)
+COLUMN_INDEX = {name: i for i, name in enumerate(INDICATOR_COLUMNS)}
+
+
+def _shift(x, periods):
+    """x.shift(periods) (마지막 축)"""
+    out = np.full_like(x, np.nan)
+    if periods < x.shape[-1]:
+        out[..., periods:] = x[..., :-periods]
+    return out
+
+
+def _non_zero(x):
+    """pandas_ta non_zero_range: 0인 범위를 epsilon으로 대체"""
+    return np.where(x == 0, EPSILON, x)
+
+
+def _rolling(x, length, func):
+    """rolling(length).func() - 윈도우에 NaN이 있거나 길이가 부족하면 NaN"""
+    out = np.full_like(x, np.nan)
+    if length <= x.shape[-1]:
+        out[..., length - 1:] = func(sliding_window_view(x, length, axis=-1), axis=-1)
+    return out
+
+
+def rolling_mean(x, length):
+    return _rolling(x, length, np.mean)
+
+
+def rolling_max(x, length):
+    return _rolling(x, length, np.max)
+
+
+def rolling_min(x, length):
+    return _rolling(x, length, np.min)
+
+
+def rolling_var(x, length):
+    """rolling(length).var(ddof=0)"""
+    return _rolling(x, length, np.var)
+
+
+def rolling_mad(x, length):
+    """pandas_ta mad: 윈도우 평균 대비 평균 절대 편차"""
+    def mad(windows, axis):
+        return np.abs(windows - windows.mean(axis=axis, keepdims=True)).mean(axis=axis)
+    return _rolling(x, length, mad)
+
+
+def linear_recurrence(u, factor):
+    """
+    s[t] = factor * s[t-1] + u[t] (s[-1] = 0) 를 마지막 축을 따라 계산
+    - 블록 내부는 factor^-k 가중 누적합으로 한 번에 풀고, 블록 경계에서만 상태를 이어받음
+    - factor^(블록 길이-1)이 MIN_RECURRENCE_POWER 아래로 내려가지 않게 블록 길이 제한, factor 0이면 s = u
+    """
+    if factor == 0:
+        return u.copy()
+    block_length = RECURRENCE_BLOCK
+    if factor ** (RECURRENCE_BLOCK - 1) < MIN_RECURRENCE_POWER:
+        block_length = max(1, int(np.log(MIN_RECURRENCE_POWER) / np.log(factor)) + 1)
+    out = np.empty_like(u)
+    length = u.shape[-1]
+    powers = factor ** np.arange(block_length)
+    carry = np.zeros(u.shape[:-1])
+    for start in range(0, length, block_length):
+        stop = min(start + block_length, length)
+        p = powers[:stop - start]
+        block = np.cumsum(u[..., start:stop] / p, axis=-1) * p
+        block += carry[..., None] * (p * factor)
+        out[..., start:stop] = block
+        carry = block[..., -1]
+    return out
+
+
+def ewm_mean(x, com, adjust, min_periods=0):
+    """
+    pandas ewm(com=com, adjust=adjust, min_periods=min_periods).mean()
+    - 앞쪽 NaN은 건너뜀, 중간 NaN은 가중치만 감쇠 (adjust=True는 pandas와 동일)
+    """
+    alpha = 1.0 / (1.0 + com)
+    factor = 1.0 - alpha
+    valid = ~np.isnan(x)
+    values = np.where(valid, x, 0.0)
+    nobs = np.cumsum(valid, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if factor == 0:
+            # alpha=1: 마지막 관측값 그대로 (중간 NaN은 직전 값 유지, pandas와 동일)
+            last = np.maximum.accumulate(np.where(valid, np.arange(x.shape[-1]), 0), axis=-1)
+            result = np.take_along_axis(values, last, axis=-1)
+        elif adjust:
+            result = linear_recurrence(values, factor) / linear_recurrence(valid.astype(float), factor)
+        else:
+            # 첫 관측값은 그대로 시작값, 이후 y = factor * y + alpha * x
+            first = valid & (nobs == 1)
+            result = linear_recurrence(np.where(first, values, alpha * values), factor)
+    result[nobs < max(min_periods, 1)] = np.nan
+    return result
+
+
+def rma(x, length):
+    """pandas_ta rma: ewm(alpha=1/length, min_periods=length)"""
+    alpha = 1.0 / length
+    return ewm_mean(x, (1.0 - alpha) / alpha, adjust=True, min_periods=length)
+
+
+def ema(x, length):
+    """pandas_ta ema: 첫 유효값부터 length개 SMA로 시작하는 ewm(span=length, adjust=False)"""
+    x2 = np.atleast_2d(x)
+    seeded = np.full_like(x2, np.nan)
+    first_valid = np.argmax(~np.isnan(x2), axis=-1)
+    sma = rolling_mean(x2, length)
+    for row, first in enumerate(first_valid):
+        seed_at = first + length - 1
+        if seed_at < x2.shape[-1]:
+            seeded[row, seed_at] = sma[row, seed_at]
+            seeded[row, seed_at + 1:] = x2[row, seed_at + 1:]
+    return ewm_mean(seeded, (length - 1) / 2.0, adjust=False).reshape(x.shape)
+
+
+def true_range(high, low, close):
+    prev_close = _shift(close, 1)
+    tr = np.maximum(np.abs(_non_zero(high - low)), np.maximum(np.abs(high - prev_close), np.abs(prev_close - low)))
+    tr[..., :1] = np.nan
+    return tr
+
+
+def compute_indicators(params, high, low, close, out=None):
+    """
+    전체 지표 계산
+
+    :param params: 지표 기간 설정 (Indicators 인스턴스)
+    :param high, low, close: (T,) 또는 (심볼 수, T) float64 배열
+    :param out: (..., len(INDICATOR_COLUMNS), T) 출력 행렬 (없으면 새로 할당)
+    :return: out (행 순서는 INDICATOR_COLUMNS)
+    """
+    p = params
+    if out is None:
+        out = np.empty(close.shape[:-1] + (len(INDICATOR_COLUMNS), close.shape[-1]))
+    col = COLUMN_INDEX
+
+    def put(name, values):
+        out[..., col[name], :] = values
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        put('EMA_fast', ema(close, p.ema_fast_length))
+        put('EMA_slow', ema(close, p.ema_slow_length))
+        put('SMA_short', rolling_mean(close, p.sma_short_length))
+        put('SMA_mid', rolling_mean(close, p.sma_mid_length))
+        put('SMA_long', rolling_mean(close, p.sma_long_length))
+
+        diff = close - _shift(close, 1)
+        pos_avg = rma(np.where(diff < 0, 0.0, diff), p.rsi_length)
+        neg_avg = rma(np.where(diff > 0, 0.0, diff), p.rsi_length)
+        put('RSI', 100 * pos_avg / (pos_avg + np.abs(neg_avg)))
+
+        lowest = rolling_min(low, p.stoch_k_length)
+        highest = rolling_max(high, p.stoch_k_length)
+        stoch_k = rolling_mean(100 * (close - lowest) / _non_zero(highest - lowest), p.stoch_smooth)
+        put('STOCH_k', stoch_k)
+        put('STOCH_d', rolling_mean(stoch_k, p.stoch_d_length))
+
+        put('Momentum', close - _shift(close, p.momentum_length))
+        roc_base = _shift(close, p.roc_length)
+        put('ROC', 100 * (close - roc_base) / roc_base)
+
+        typical = (high + low + close) / 3.0
+        put('CCI', (typical - rolling_mean(typical, p.cci_length)) / (0.015 * rolling_mad(typical, p.cci_length)))
+
+        willr_low = rolling_min(low, p.willr_length)
+        put('Williams_R', 100 * ((close - willr_low) / (rolling_max(high, p.willr_length) - willr_low) - 1))
+
+        # True Range는 ATR과 ADX가 공유
+        tr = true_range(high, low, close)
+        atr = rma(tr, p.atr_length)
+        adx_atr = atr if p.adx_length == p.atr_length else rma(tr, p.adx_length)
+        up = high - _shift(high, 1)
+        down = _shift(low, 1) - low
+        pos_dm = np.where((up > down) & (up > 0), up, 0.0)
+        neg_dm = np.where((down > up) & (down > 0), down, 0.0)
+        pos_dm[np.abs(pos_dm) < EPSILON] = 0.0
+        neg_dm[np.abs(neg_dm) < EPSILON] = 0.0
+        pos_dm[..., :1] = neg_dm[..., :1] = np.nan
+        k = 100 / adx_atr
+        dmp = k * rma(pos_dm, p.adx_length)
+        dmn = k * rma(neg_dm, p.adx_length)
+        put('ADX', rma(100 * np.abs(dmp - dmn) / (dmp + dmn), p.adx_length))
+        put('DMP', dmp)
+        put('DMN', dmn)
+
+        macd = ema(close, p.macd_fast) - ema(close, p.macd_slow)
+        macd_signal = ema(macd, p.macd_signal)
+        put('MACD', macd)
+        put('MACD_histogram', macd - macd_signal)
+        put('MACD_signal', macd_signal)
+        put('ATR', atr)
+
+        bb_mid = rolling_mean(close, p.bbands_length)
+        deviation = p.bbands_std * np.sqrt(rolling_var(close, p.bbands_length))
+        bb_lower = bb_mid - deviation
+        bb_upper = bb_mid + deviation
+        band_range = _non_zero(bb_upper - bb_lower)
+        put('BB_lower', bb_lower)
+        put('BB_middle', bb_mid)
+        put('BB_upper', bb_upper)
+        put('BBB', 100 * band_range / bb_mid)
+        put('BBP', _non_zero(close - bb_lower) / band_range)
+
+        rounded = out[..., :ROUNDED_COLUMNS, :]
+        np.round(rounded, 4, out=rounded)
+
+        recent_high = np.round(rolling_max(high, p.fib_length), 4)
+        recent_low = np.round(rolling_min(low, p.fib_length), 4)
+        span = recent_high - recent_low
+        for level in ('0.236', '0.5', '0.786', '0.618'):
+            put(f'fib_{level}', recent_high - span * float(level))
+    return out
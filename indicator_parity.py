@@ -0,0 +1,105 @@
+"""
+증분 지표 엔진 동등성 검사
+- data/klines_*.csv 각 파일에 대해
+  배치: Indicators.calculate_indicators (pandas_ta, 전체 재계산)
+  증분: 캔들을 한 개씩 CandleRingBuffer에 넣으며 StreamingIndicators로 갱신
+        (각 캔들은 시가로 먼저 들어온 뒤 최종값으로 갱신되어 진행 중 캔들 peek 경로도 거침)
+- 두 결과의 행과 값이 모두 같아야 통과
+- NumPy 커널 짧은 기간 검사: 첫 파일 종가로 ema(길이 1~3)는 pandas_ta.ema, ewm_mean(com 0~0.5)은 pandas ewm과 비교
+  (alpha=1, factor^k 언더플로 경계, 상대 오차 KERNEL_RTOL 이내면 통과)
+
+사용법: python indicator_parity.py [csv 경로 ...]
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+from candle_store import CANDLE_COLUMNS, CandleRingBuffer, KST_OFFSET
+from config import DATA_DIR
+from indicator_kernels import ema, ewm_mean
+from indicators import Indicators
+from streaming_indicators import INDICATOR_COLUMNS, StreamingIndicators
+
+
+KERNEL_RTOL = 1e-12
+EMA_LENGTHS = (1, 2, 3)
+EWM_COMS = (0.0, 1e-9, 1e-6, 0.01, 0.5)
+
+
+def load_klines(path):
+    df = pd.read_csv(path, sep='\t', usecols=CANDLE_COLUMNS)
+    df['Open time'] = pd.to_datetime(df['Open time'])
+    return df
+
+
+def run_streaming(indicators, df):
+    candles = CandleRingBuffer(len(df) + 1)
+    engine = StreamingIndicators(indicators, candles.capacity)
+    open_times = (df['Open time'] - KST_OFFSET).to_numpy(dtype='datetime64[ms]').astype('int64')
+    for open_time, row in zip(open_times, df.itertuples(index=False)):
+        candles.upsert(open_time, row.Open, row.Open, row.Open, row.Open, 0.0)
+        engine.sync(candles)
+        candles.upsert(open_time, row.Open, row.High, row.Low, row.Close, row.Volume)
+        engine.sync(candles)
+    return engine.frame(candles)
+
+
+def check(path, indicators):
+    df = load_klines(path)
+    batch = indicators.calculate_indicators(df.copy())
+    stream = run_streaming(indicators, df)
+    if isinstance(batch, str):
+        return False, "배치 계산 실패"
+    if list(batch.index) != list(stream.index):
+        return False, f"행 불일치 (배치 {len(batch)}, 증분 {len(stream)})"
+    expected = batch[INDICATOR_COLUMNS].to_numpy()
+    actual = stream[INDICATOR_COLUMNS].to_numpy()
+    mismatch = ~((expected == actual) | (np.isnan(expected) & np.isnan(actual)))
+    if mismatch.any():
+        row, col = np.argwhere(mismatch)[0]
+        max_diff = np.nanmax(np.abs(expected - actual))
+        return False, (f"{mismatch.sum()}개 값 불일치, 최대 차이 {max_diff:.6g} "
+                       f"(첫 불일치: {INDICATOR_COLUMNS[col]} 행 {row}, {expected[row, col]} != {actual[row, col]})")
+    return True, f"{len(batch)}행 일치"
+
+
+def check_kernels(path):
+    """짧은 기간 ema/ewm_mean 커널 vs pandas_ta/pandas ([(이름, 통과 여부, 메시지)])"""
+    close = load_klines(path)['Close'].to_numpy(dtype=float)
+    cases = [(f"ema({length})", ema(close, length), ta.ema(pd.Series(close), length)) for length in EMA_LENGTHS]
+    leading_nan = np.concatenate([np.full(3, np.nan), close])  # 앞쪽 NaN 건너뛰기 경로 포함
+    series = pd.Series(leading_nan)
+    cases += [(f"ewm(com={com:g}, adjust={adjust})", ewm_mean(leading_nan, com, adjust),
+               series.ewm(com=com, adjust=adjust).mean()) for com in EWM_COMS for adjust in (True, False)]
+    results = []
+    for name, actual, expected in cases:
+        expected = expected.to_numpy(dtype=float)
+        close_enough = np.isclose(actual, expected, rtol=KERNEL_RTOL, atol=0, equal_nan=True)
+        if close_enough.all():
+            results.append((name, True, f"{len(expected)}행 일치"))
+        else:
+            row = np.flatnonzero(~close_enough)[0]
+            results.append((name, False, f"{(~close_enough).sum()}개 값 불일치 (첫 불일치: 행 {row}, "
+                                         f"{expected[row]} != {actual[row]})"))
+    return results
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(DATA_DIR, "klines_*.csv")))
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "klines_*.csv")))
+    indicators = Indicators()
+    failed = 0
+    for path in paths:
+        ok, message = check(path, indicators)
+        failed += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {os.path.basename(path)}: {message}")
+    if paths:
+        for name, ok, message in check_kernels(paths[0]):
+            failed += not ok
+            print(f"{'OK  ' if ok else 'FAIL'} 커널 {name}: {message}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,192 @@
+"""
+지표 계산 계획기 (필요한 지표만 계산)
+- 각 지표를 indicator_kernels 연산 노드의 의존 그래프로 표현
+- 노드 이름에 입력과 기간이 들어가므로 같은 중간 결과는 자동으로 한 번만 계산
+  (예: MACD 안의 EMA와 EMA_fast, ATR과 ADX가 쓰는 True Range / RMA(TR), SMA와 BB_middle)
+- plan(columns): 요청한 컬럼에 필요한 노드만 위상 정렬한 실행 순서 (컬럼 조합별 캐시)
+- 값은 indicator_kernels.compute_indicators와 같은 식/순서로 계산 (결과 동일)
+"""
+import numpy as np
+
+import indicator_kernels as kernels
+from streaming_indicators import INDICATOR_COLUMNS, ROUNDED_COLUMNS
+
+SOURCES = ('high', 'low', 'close')
+ROUNDED = frozenset(INDICATOR_COLUMNS[:ROUNDED_COLUMNS])
+FIB_LEVELS = ('0.236', '0.5', '0.786', '0.618')
+
+
+class IndicatorPlanner:
+    def __init__(self, params):
+        """
+        :param params: 지표 기간 설정 (Indicators 인스턴스)
+        """
+        self.nodes = {}     # 노드 이름 -> (의존 노드, 함수)
+        self.columns = {}   # 지표 컬럼 -> 노드 이름
+        self.plans = {}     # frozenset(columns) -> 실행 순서
+        self._build(params)
+
+    # ------------------------------------------------------------------
+    # 그래프 구성
+    # ------------------------------------------------------------------
+    def _node(self, name, deps, func):
+        self.nodes.setdefault(name, (tuple(deps), func))
+        return name
+
+    def _sma(self, source, length):
+        return self._node(f"sma({source},{length})", (source,), lambda x: kernels.rolling_mean(x, length))
+
+    def _max(self, source, length):
+        return self._node(f"max({source},{length})", (source,), lambda x: kernels.rolling_max(x, length))
+
+    def _min(self, source, length):
+        return self._node(f"min({source},{length})", (source,), lambda x: kernels.rolling_min(x, length))
+
+    def _ema(self, source, length):
+        return self._node(f"ema({source},{length})", (source,), lambda x: kernels.ema(x, length))
+
+    def _rma(self, source, length):
+        return self._node(f"rma({source},{length})", (source,), lambda x: kernels.rma(x, length))
+
+    def _shift(self, source, periods):
+        return self._node(f"shift({source},{periods})", (source,), lambda x: kernels._shift(x, periods))
+
+    def _build(self, p):
+        c = self.columns
+        c['EMA_fast'] = self._ema('close', p.ema_fast_length)
+        c['EMA_slow'] = self._ema('close', p.ema_slow_length)
+        c['SMA_short'] = self._sma('close', p.sma_short_length)
+        c['SMA_mid'] = self._sma('close', p.sma_mid_length)
+        c['SMA_long'] = self._sma('close', p.sma_long_length)
+
+        # RSI
+        diff = self._node('diff(close)', ('close', self._shift('close', 1)), lambda x, prev: x - prev)
+        pos = self._rma(self._node('gain', (diff,), lambda d: np.where(d < 0, 0.0, d)), p.rsi_length)
+        neg = self._rma(self._node('loss', (diff,), lambda d: np.where(d > 0, 0.0, d)), p.rsi_length)
+        c['RSI'] = self._node(f"rsi({p.rsi_length})", (pos, neg), lambda g, l: 100 * g / (g + np.abs(l)))
+
+        # Stochastic
+        lowest, highest = self._min('low', p.stoch_k_length), self._max('high', p.stoch_k_length)
+        raw_k = self._node(f"stoch_raw({p.stoch_k_length})", ('close', lowest, highest),
+                           lambda x, lo, hi: 100 * (x - lo) / kernels._non_zero(hi - lo))
+        c['STOCH_k'] = self._sma(raw_k, p.stoch_smooth)
+        c['STOCH_d'] = self._sma(c['STOCH_k'], p.stoch_d_length)
+
+        c['Momentum'] = self._node(f"mom({p.momentum_length})", ('close', self._shift('close', p.momentum_length)),
+                                   lambda x, prev: x - prev)
+        c['ROC'] = self._node(f"roc({p.roc_length})", ('close', self._shift('close', p.roc_length)),
+                              lambda x, prev: 100 * (x - prev) / prev)
+
+        typical = self._node('typical', SOURCES, lambda h, l, x: (h + l + x) / 3.0)
+        mad = self._node(f"mad(typical,{p.cci_length})", (typical,), lambda x: kernels.rolling_mad(x, p.cci_length))
+        c['CCI'] = self._node(f"cci({p.cci_length})", (typical, self._sma(typical, p.cci_length), mad),
+                              lambda x, mean, dev: (x - mean) / (0.015 * dev))
+
+        willr_low, willr_high = self._min('low', p.willr_length), self._max('high', p.willr_length)
+        c['Williams_R'] = self._node(f"willr({p.willr_length})", ('close', willr_low, willr_high),
+                                     lambda x, lo, hi: 100 * ((x - lo) / (hi - lo) - 1))
+
+        # ATR / ADX (True Range와 RMA(TR) 공유)
+        tr = self._node('tr', SOURCES, kernels.true_range)
+        c['ATR'] = self._rma(tr, p.atr_length)
+        adx_atr = self._rma(tr, p.adx_length)
+        dm = self._node('dm', ('high', 'low'), _directional_movement)
+        pos_dm = self._node('pos_dm', (dm,), lambda pair: pair[0])
+        neg_dm = self._node('neg_dm', (dm,), lambda pair: pair[1])
+        c['DMP'] = self._node(f"dmp({p.adx_length})", (adx_atr, self._rma(pos_dm, p.adx_length)),
+                              lambda atr, dm: (100 / atr) * dm)
+        c['DMN'] = self._node(f"dmn({p.adx_length})", (adx_atr, self._rma(neg_dm, p.adx_length)),
+                              lambda atr, dm: (100 / atr) * dm)
+        dx = self._node(f"dx({p.adx_length})", (c['DMP'], c['DMN']),
+                        lambda dmp, dmn: 100 * np.abs(dmp - dmn) / (dmp + dmn))
+        c['ADX'] = self._rma(dx, p.adx_length)
+
+        # MACD (EMA는 EMA_fast/EMA_slow와 기간이 같으면 공유)
+        macd = self._node(f"macd({p.macd_fast},{p.macd_slow})",
+                          (self._ema('close', p.macd_fast), self._ema('close', p.macd_slow)),
+                          lambda fast, slow: fast - slow)
+        c['MACD'] = macd
+        c['MACD_signal'] = self._ema(macd, p.macd_signal)
+        c['MACD_histogram'] = self._node(f"macd_hist({p.macd_signal})", (macd, c['MACD_signal']),
+                                         lambda m, s: m - s)
+
+        # Bollinger Bands (가운데 선은 같은 기간 SMA와 공유)
+        bb_mid = self._sma('close', p.bbands_length)
+        deviation = self._node(f"bb_dev({p.bbands_length},{p.bbands_std})", ('close',),
+                               lambda x: p.bbands_std * np.sqrt(kernels.rolling_var(x, p.bbands_length)))
+        c['BB_middle'] = bb_mid
+        c['BB_lower'] = self._node('bb_lower', (bb_mid, deviation), lambda mid, dev: mid - dev)
+        c['BB_upper'] = self._node('bb_upper', (bb_mid, deviation), lambda mid, dev: mid + dev)
+        band_range = self._node('bb_range', (c['BB_upper'], c['BB_lower']),
+                                lambda up, lo: kernels._non_zero(up - lo))
+        c['BBB'] = self._node('bbb', (band_range, bb_mid), lambda r, mid: 100 * r / mid)
+        c['BBP'] = self._node('bbp', ('close', c['BB_lower'], band_range),
+                              lambda x, lo, r: kernels._non_zero(x - lo) / r)
+
+        # 피보나치 되돌림 (반올림한 최근 고가/저가 기준)
+        recent_high = self._node(f"fib_high({p.fib_length})", (self._max('high', p.fib_length),),
+                                 lambda x: np.round(x, 4))
+        recent_low = self._node(f"fib_low({p.fib_length})", (self._min('low', p.fib_length),),
+                                lambda x: np.round(x, 4))
+        for level in FIB_LEVELS:
+            c[f'fib_{level}'] = self._node(f"fib_{level}({p.fib_length})", (recent_high, recent_low),
+                                           lambda hi, lo, ratio=float(level): hi - (hi - lo) * ratio)
+
+    # ------------------------------------------------------------------
+    # 계획 / 실행
+    # ------------------------------------------------------------------
+    def plan(self, columns):
+        """
+        요청 컬럼 계산에 필요한 노드의 실행 순서 (의존 노드가 항상 먼저)
+        - 지표 컬럼이 아닌 이름(Open/Close/Volume 등 원본 컬럼)은 무시
+        """
+        targets = frozenset(column for column in columns if column in self.columns)
+        order = self.plans.get(targets)
+        if order is None:
+            order, visited = [], set(SOURCES)
+
+            def visit(name):
+                if name in visited:
+                    return
+                visited.add(name)
+                for dep in self.nodes[name][0]:
+                    visit(dep)
+                order.append(name)
+
+            for column in INDICATOR_COLUMNS:  # 컬럼 순서를 고정해 실행 순서가 요청 순서와 무관하도록
+                if column in targets:
+                    visit(self.columns[column])
+            self.plans[targets] = order
+        return targets, order
+
+    def compute(self, columns, high, low, close):
+        """
+        요청한 지표만 계산
+
+        :param high, low, close: (T,) 또는 (심볼 수, T) float64 배열
+        :return: {컬럼: 배열} (INDICATOR_COLUMNS 순서, 요청한 지표 컬럼만)
+        """
+        targets, order = self.plan(columns)
+        values = {'high': high, 'low': low, 'close': close}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for name in order:
+                deps, func = self.nodes[name]
+                values[name] = func(*(values[dep] for dep in deps))
+        result = {}
+        for column in INDICATOR_COLUMNS:
+            if column in targets:
+                value = values[self.columns[column]]
+                result[column] = np.round(value, 4) if column in ROUNDED else value
+        return result
+
+
+def _directional_movement(high, low):
+    """ADX용 +DM / -DM (compute_indicators와 같은 처리)"""
+    up = high - kernels._shift(high, 1)
+    down = kernels._shift(low, 1) - low
+    pos_dm = np.where((up > down) & (up > 0), up, 0.0)
+    neg_dm = np.where((down > up) & (down > 0), down, 0.0)
+    pos_dm[np.abs(pos_dm) < kernels.EPSILON] = 0.0
+    neg_dm[np.abs(neg_dm) < kernels.EPSILON] = 0.0
+    pos_dm[..., :1] = neg_dm[..., :1] = np.nan
+    return pos_dm, neg_dm
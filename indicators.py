@@ -1,6 +1,14 @@
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from typing import Dict, List, Optional
+from orderbook_features import OrderBookFeatures
+from streaming_indicators import INDICATOR_COLUMNS, StreamingIndicators
+from indicator_kernels import compute_indicators
+from indicator_planner import IndicatorPlanner
+
+# determine_market_status가 읽는 지표 컬럼
+MARKET_STATUS_FEATURES = ('MACD', 'MACD_signal', 'SMA_short', 'SMA_mid', 'SMA_long', 'ADX')
 
 
 class Indicators:
@@ -27,6 +35,9 @@ class Indicators:
         self.bbands_length = 20
         self.bbands_std = 2.0
         self.fib_length = 20
+        self.streaming = {}  # (symbol, timeframe) -> StreamingIndicators
+        self.orderbook_features = OrderBookFeatures()
+        self.planner = None  # IndicatorPlanner (첫 planned 계산 시 생성)
 
     def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -83,48 +94,100 @@ class Indicators:
             print(f"지표 계산 중 오류: {e}")
             return "Error_State"
 
+    def calculate_indicators_numpy(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        NumPy 커널 방식 지표 계산 (calculate_indicators와 같은 컬럼)
+        - 전체 지표를 하나의 출력 행렬에 계산한 뒤 DataFrame을 한 번만 합침
+        :param df: OHLCV 데이터프레임
+        :return: 계산된 지표가 추가된 데이터프레임
+        """
+        try:
+            values = compute_indicators(
+                self, df['High'].to_numpy(dtype=float), df['Low'].to_numpy(dtype=float),
+                df['Close'].to_numpy(dtype=float)
+            )
+            features = pd.DataFrame(values.T, index=df.index, columns=INDICATOR_COLUMNS)
+            return pd.concat([df, features], axis=1).dropna()
+        except Exception as e:
+            print(f"NumPy 지표 계산 중 오류: {e}")
+            return "Error_State"
+
+    def calculate_indicators_planned(self, df: pd.DataFrame, features) -> pd.DataFrame:
+        """
+        필요한 지표만 계산 (IndicatorPlanner 의존 그래프, 중간 결과 공유)
+        :param df: OHLCV 데이터프레임
+        :param features: 필요한 컬럼 목록 (원본 OHLCV 컬럼은 무시)
+        :return: 요청한 지표 컬럼만 추가된 데이터프레임
+        """
+        try:
+            if self.planner is None:
+                self.planner = IndicatorPlanner(self)
+            values = self.planner.compute(
+                features, df['High'].to_numpy(dtype=float), df['Low'].to_numpy(dtype=float),
+                df['Close'].to_numpy(dtype=float)
+            )
+            planned = pd.DataFrame(values, index=df.index)
+            return pd.concat([df, planned], axis=1).dropna()
+        except Exception as e:
+            print(f"planned 지표 계산 중 오류: {e}")
+            return "Error_State"
+
+    def calculate_indicators_batch(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        여러 심볼의 지표를 한 번에 계산
+        - 길이가 같은 심볼끼리 (심볼 수, T) 행렬로 쌓아 길이별로 NumPy 커널을 한 번씩 실행
+          (길이가 다른 심볼을 자르거나 채우지 않으므로 결과는 심볼별 calculate_indicators_numpy와 같음)
+        :param frames: {symbol: OHLCV 데이터프레임}
+        :return: {symbol: 지표가 추가된 데이터프레임} (계산 불가 심볼은 "Error_State")
+        """
+        result = {symbol: "Error_State" for symbol in frames}
+        groups = {}  # 길이 -> [symbol]
+        for symbol, df in frames.items():
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                groups.setdefault(len(df), []).append(symbol)
+        for symbols in groups.values():
+            try:
+                group = [frames[s] for s in symbols]
+                values = compute_indicators(
+                    self,
+                    np.stack([df['High'].to_numpy(dtype=float) for df in group]),
+                    np.stack([df['Low'].to_numpy(dtype=float) for df in group]),
+                    np.stack([df['Close'].to_numpy(dtype=float) for df in group])
+                )
+                for i, (symbol, df) in enumerate(zip(symbols, group)):
+                    features = pd.DataFrame(values[i].T, index=df.index, columns=INDICATOR_COLUMNS)
+                    result[symbol] = pd.concat([df, features], axis=1).dropna()
+            except Exception as e:
+                print(f"심볼 묶음 지표 계산 중 오류: {e}")
+        return result
+
+    def calculate_indicators_incremental(self, key, candles, rows: Optional[int] = None) -> pd.DataFrame:
+        """
+        증분 방식 지표 계산 (calculate_indicators와 같은 컬럼/값)
+        :param key: (symbol, timeframe)
+        :param candles: CandleRingBuffer (data_handler.lock 보유 상태에서 호출)
+        :param rows: 반환할 최근 행 수 (None이면 버퍼 전체)
+        :return: 지표가 추가된 데이터프레임
+        """
+        try:
+            engine = self.streaming.get(key)
+            if engine is None:
+                engine = self.streaming[key] = StreamingIndicators(self, candles.capacity)
+            engine.sync(candles)
+            return engine.frame(candles, rows)
+        except Exception as e:
+            print(f"증분 지표 계산 중 오류: {e}")
+            return "Error_State"
+
     def calculate_orderbook_indicators(self, orderbook: Dict) -> Dict:
         """
-        orderbook_data를 활용한 지표 계산
-        :param orderbook_data: orderbook 데이터 (bids, asks 포함)
-        :return: 계산된 지표 (spread, order_imbalance, price_depth 등)
+        orderbook_data를 활용한 지표 계산 (orderbook_features.OrderBookFeatures에 위임)
+        - depth 업데이트당 한 번만 계산, 다음 업데이트 전까지 결과 캐시
+        :param orderbook_data: orderbook 데이터 (DepthEvent, LocalOrderBook 또는 원본 dict)
+        :return: 계산된 지표 (spread, order_imbalance, price_depth, microprice 등)
         """
         try:
-            symbol = orderbook.get('s')
-            bids = orderbook.get('b', [])
-            asks = orderbook.get('a', [])
-
-            # 호가 간격(Spread) - 매수/매도 최우선 호가 차이, 유동성 지표
-            best_bid = float(bids[0][0]) if bids else 0
-            best_ask = float(asks[0][0]) if asks else 0
-            spread = round(best_ask - best_bid, 6)
-            low_bid = float(bids[-1][0]) if bids else 0
-            high_ask = float(asks[-1][0]) if asks else 0
-
-            # 누적 주문량 차이(Order Imbalance) - 매수/매도 세력 불균형, 시장 심리 반영
-            total_bid_volume = sum(float(bid[1]) for bid in bids)
-            total_ask_volume = sum(float(ask[1]) for ask in asks)
-            order_imbalance = round((total_bid_volume - total_ask_volume) / (total_bid_volume + total_ask_volume) if (total_bid_volume + total_ask_volume) > 0 else 0, 4)
-
-            # 시장참여비율 (MPR) - 매수 압력 비율, 시장 방향성 판단
-            mpr = round(total_bid_volume / (total_bid_volume + total_ask_volume), 4) if (total_bid_volume + total_ask_volume) > 0 else 0.5
-
-            # 가격 깊이(Price Depth) - ±1% 범위 내 매수/매도 주문량, 유동성 측정
-            current_price = (best_bid + best_ask) / 2
-            price_range = current_price * 0.01
-            bid_depth = round(sum(float(bid[1]) for bid in bids if current_price - price_range <= float(bid[0]) <= current_price), 4)
-            ask_depth = round(sum(float(ask[1]) for ask in asks if current_price <= float(ask[0]) <= current_price + price_range), 4)
-
-            return {
-                'symbol': symbol,
-                'high_ask': high_ask,
-                'low_bid': low_bid,
-                'spread': spread,
-                'order_imbalance': order_imbalance,
-                'bid_depth': bid_depth,
-                'ask_depth': ask_depth,
-                'mpr': mpr
-            }
+            return self.orderbook_features.features(orderbook)
         except Exception as e:
             print(f"orderbook indicator 계산 중 오류: {e}")
             return "Error_State"
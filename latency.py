@@ -0,0 +1,236 @@
+"""
+구간별 지연 측정 (거래소 이벤트 -> 수신 -> 매매 판단 -> 주문 응답 -> 체결)
+- 구간:
+  event_to_receive     거래소 이벤트 시각(E) -> 수신 처리 완료 (벽시계, 거래소와 로컬 시계 차이 포함)
+  receive_to_decision  평가를 일으킨 이벤트 수신 -> generate_trading_signals 완료 (평가 대기/최소 간격 포함)
+  decision_to_ack      매매 판단 -> futures_create_order 응답 (미체결 주문 취소 등 주문 준비 포함)
+  order_rtt            futures_create_order 요청 -> 응답
+  ack_to_fill          주문 응답 -> ORDER_TRADE_UPDATE FILLED 수신
+  receive_to_fill      이벤트 수신 -> 체결 수신
+- 수신 이후 구간은 time.monotonic 기준
+- 주문 응답보다 체결 이벤트가 먼저 오면 (시장가성 지정가, 모의 거래 즉시 체결) 체결 시각을 보관했다가
+  주문 응답 때 기록 (ack_to_fill 0)
+- (심볼, 구간)별 HDR 방식 히스토그램 (2진 지수 구간 x 128 하위 구간, 상대 오차 0.4% 미만, 메모리는 값이 나온 구간만)
+"""
+import json
+import os
+import threading
+import time
+
+from config import LATENCY_TRACING
+from logger import logger
+
+STAGES = ('event_to_receive', 'receive_to_decision', 'decision_to_ack', 'order_rtt', 'ack_to_fill', 'receive_to_fill')
+PERCENTILES = (50, 90, 99, 99.9)
+SUB_BUCKETS = 128
+MAX_PENDING_ORDERS = 10_000  # 체결 이벤트를 기다리는 주문 수 상한 (취소/만료 주문 정리)
+MAX_EARLY_FILLS = 1_000      # 주문 응답을 기다리는 체결 수 상한 (봇 외부 주문 체결 정리)
+
+
+def bucket_index(value):
+    """마이크로초 값 -> 구간 번호 (256 미만은 값 그대로)"""
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - 8
+    return 2 * SUB_BUCKETS + (shift - 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+
+def bucket_value(index):
+    """구간 번호 -> 구간 중간값 (마이크로초)"""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = (index - 2 * SUB_BUCKETS) // SUB_BUCKETS + 1
+    top = (index - 2 * SUB_BUCKETS) % SUB_BUCKETS + SUB_BUCKETS
+    return (top << shift) + (1 << (shift - 1))
+
+
+class LatencyHistogram:
+    """마이크로초 단위 지연 히스토그램 (호출 측에서 lock 보유)"""
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, micros):
+        micros = max(int(micros), 0)
+        index = bucket_index(micros)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += micros
+        self.max = max(self.max, micros)
+        self.min = micros if self.min is None else min(self.min, micros)
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0
+        rank = max(1, int(self.count * pct / 100 + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        """ms 단위 통계 dict"""
+        if not self.count:
+            return {'count': 0}
+        summary = {'count': self.count, 'mean': round(self.total / self.count / 1000, 3),
+                   'min': round(self.min / 1000, 3), 'max': round(self.max / 1000, 3)}
+        for pct in PERCENTILES:
+            summary[f"p{pct:g}"] = round(self.percentile(pct) / 1000, 3)
+        return summary
+
+
+class _Trace:
+    """평가를 일으킨 이벤트 하나의 단계별 시각"""
+    __slots__ = ('received', 'decided')
+
+    def __init__(self, received):
+        self.received = received
+        self.decided = None
+
+
+class LatencyTracer:
+    """
+    단계 시각 기록 + 구간 히스토그램
+    - on_receive: 마켓 이벤트 수신 처리 완료 (거래소 시각 E 대비 지연)
+    - on_trigger: 평가 예약 (평가 대기 중인 이벤트가 없으면 이 시각을 평가 시작점으로 사용)
+    - on_decision: 매매 신호 생성 완료, 진입/청산 신호면 주문 대기
+    - on_order_ack: 주문 응답 (orderId로 체결 대기, 먼저 온 체결이 있으면 바로 기록)
+    - on_fill: ORDER_TRADE_UPDATE FILLED 수신 (주문 응답 전이면 체결 시각 보관)
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}    # (symbol, stage) -> LatencyHistogram
+        self.totals = {stage: LatencyHistogram() for stage in STAGES}
+        self.pending = {}       # symbol -> 평가 대기 중인 _Trace
+        self.decisions = {}     # symbol -> 주문 대기 중인 _Trace
+        self.orders = {}        # orderId -> (symbol, 주문 응답 시각, _Trace)
+        self.early_fills = {}   # orderId -> 체결 수신 시각 (주문 응답 전에 온 체결)
+        self.started = time.time()
+
+    def _record(self, symbol, stage, seconds):
+        micros = seconds * 1e6
+        histogram = self.histograms.get((symbol, stage))
+        if histogram is None:
+            histogram = self.histograms[(symbol, stage)] = LatencyHistogram()
+        histogram.record(micros)
+        self.totals[stage].record(micros)
+
+    def on_receive(self, symbol, event_time):
+        """
+        거래소 이벤트 수신 처리 완료
+
+        :param event_time: 거래소 이벤트 시각 E (ms)
+        """
+        if not self.enabled or not event_time:
+            return
+        with self.lock:
+            self._record(symbol, 'event_to_receive', time.time() - event_time / 1000)
+
+    def on_trigger(self, symbol):
+        """평가 예약 (평가 대기 중인 이벤트가 없으면 이 시각을 평가 시작점으로 사용)"""
+        if not self.enabled:
+            return
+        received = time.monotonic()
+        with self.lock:
+            if symbol not in self.pending:
+                self.pending[symbol] = _Trace(received)
+
+    def on_decision(self, symbol, action):
+        if not self.enabled:
+            return
+        decided = time.monotonic()
+        with self.lock:
+            self.decisions.pop(symbol, None)  # 주문으로 이어지지 않은 이전 판단
+            trace = self.pending.pop(symbol, None)
+            if trace is None:
+                return  # 폴링 모드 등 이벤트 없이 평가
+            trace.decided = decided
+            self._record(symbol, 'receive_to_decision', decided - trace.received)
+            if action != 'HOLD':
+                self.decisions[symbol] = trace
+
+    def on_order_ack(self, symbol, order_id, sent):
+        """
+        :param sent: 주문 요청 직전 time.monotonic()
+        """
+        if not self.enabled:
+            return
+        acked = time.monotonic()
+        with self.lock:
+            self._record(symbol, 'order_rtt', acked - sent)
+            trace = self.decisions.pop(symbol, None)
+            if trace is not None:
+                self._record(symbol, 'decision_to_ack', acked - trace.decided)
+            if order_id is None:
+                return
+            filled = self.early_fills.pop(order_id, None)
+            if filled is not None:
+                self._record(symbol, 'ack_to_fill', 0)
+                if trace is not None:
+                    self._record(symbol, 'receive_to_fill', filled - trace.received)
+            else:
+                if len(self.orders) >= MAX_PENDING_ORDERS:
+                    self.orders.pop(next(iter(self.orders)))
+                self.orders[order_id] = (symbol, acked, trace)
+
+    def on_fill(self, order_id):
+        if not self.enabled:
+            return
+        filled = time.monotonic()
+        with self.lock:
+            order = self.orders.pop(order_id, None)
+            if order is None:
+                if len(self.early_fills) >= MAX_EARLY_FILLS:
+                    self.early_fills.pop(next(iter(self.early_fills)))
+                self.early_fills[order_id] = filled
+                return
+            symbol, acked, trace = order
+            self._record(symbol, 'ack_to_fill', filled - acked)
+            if trace is not None:
+                self._record(symbol, 'receive_to_fill', filled - trace.received)
+
+    def summary(self, symbol=None):
+        """{stage: 통계} (symbol이 없으면 전체 심볼 합산)"""
+        with self.lock:
+            if symbol is None:
+                return {stage: histogram.summary() for stage, histogram in self.totals.items() if histogram.count}
+            return {stage: histogram.summary() for (s, stage), histogram in self.histograms.items() if s == symbol}
+
+    def snapshot(self):
+        """전체 + 심볼별 통계 (latency.json 형식)"""
+        with self.lock:
+            symbols = {}
+            for (symbol, stage), histogram in self.histograms.items():
+                symbols.setdefault(symbol, {})[stage] = histogram.summary()
+            stages = {stage: histogram.summary() for stage, histogram in self.totals.items() if histogram.count}
+        return {'updated': time.time(), 'since': self.started, 'stages': stages, 'symbols': symbols}
+
+    def log_summary(self):
+        for stage, summary in self.summary().items():
+            logger.system(f"지연 {stage}: {summary['count']}건 p50 {summary['p50']}ms, p90 {summary['p90']}ms, "
+                          f"p99 {summary['p99']}ms, max {summary['max']}ms")
+
+    def write(self, path):
+        """통계 파일 기록 (app.py /latency에서 읽음)"""
+        temp = f"{path}.tmp"
+        with open(temp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp, path)
+
+    def report(self, path):
+        try:
+            self.log_summary()
+            self.write(path)
+        except Exception as e:
+            logger.error(f"지연 통계 기록 실패: {e}")
+
+
+tracer = LatencyTracer(LATENCY_TRACING)
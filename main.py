@@ -4,17 +4,22 @@ import signal
 import threading
 import time
 from logger import logger
-from config import COIN_LIST,BASE_DIR
+from config import (COIN_LIST, BASE_DIR, EVENT_DRIVEN_TRADING, SYMBOL_MIN_EVAL_INTERVAL,
+                    EVAL_ON_ORDERBOOK, EVAL_WORKERS, INDICATOR_BACKEND, INDICATOR_FRAME_ROWS,
+                    BOOK_TICKER_REPORT_INTERVAL, LATENCY_TRACING, LATENCY_REPORT_INTERVAL, SIGNAL_TIMEFRAME)
 from data_handler import DataHandler
 from order_handler import OrderHandler
 from basic_strategy import BasicStrategy
 from ws_manager import WebSocketManager
-from indicators import Indicators
+from indicators import Indicators, MARKET_STATUS_FEATURES
 from time_sync import TimeSync
+from scheduler import EvaluationScheduler
+from latency import tracer
 
 import schedule
 import traceback
 STATUS_FILE = os.path.join(BASE_DIR, "bot_status.json")
+LATENCY_FILE = os.path.join(BASE_DIR, "latency.json")
 
 class TradingBot:
     def __init__(self):
@@ -30,6 +35,36 @@ class TradingBot:
         self.indicators = Indicators()
         self.balance_data = self.data_handler.balance_data
         self.position_data = self.data_handler.position_data
+        self.scheduler = EvaluationScheduler(
+            self.evaluate_symbol, SYMBOL_MIN_EVAL_INTERVAL, EVAL_WORKERS,
+            evaluate_batch=self.evaluate_symbols if INDICATOR_BACKEND == 'numpy_batch' else None
+        )
+
+    @classmethod
+    def offline(cls, data_handler, ws_manager, order_handler=None):
+        """
+        네트워크 연결 없이 평가 경로만 쓰는 인스턴스 (스트림 재생/벤치마크용)
+        - 스케줄러/시간 동기화 없음, evaluate_symbol은 호출한 스레드에서 실행
+        - order_handler가 없으면 신호만 만들고 주문은 내지 않음 (모의 거래 재생은 PaperExchange를 쓰는 OrderHandler)
+        """
+        bot = cls.__new__(cls)
+        bot.running = False
+        bot.marketstatus = None
+        bot.signals = ws_manager.signals
+        bot.orderbook = ws_manager.orderbook
+        bot.data_handler = data_handler
+        bot.ws_manager = ws_manager
+        bot.order_handler = order_handler
+        if order_handler is not None:
+            order_handler.order_delay = 0
+        bot.strategy = BasicStrategy(data_handler)
+        bot.strategy.signal_delay = 0
+        bot.time_sync = None
+        bot.indicators = Indicators()
+        bot.balance_data = data_handler.balance_data
+        bot.position_data = data_handler.position_data
+        bot.scheduler = None
+        return bot
 
     def run(self):
         self.running = True
@@ -41,16 +76,36 @@ class TradingBot:
             schedule.every(1).hour.at(":01").do(
                 lambda: self.time_sync.check_time_diff()
             )
+            if self.data_handler.book_ticker is not None:
+                # depth 대비 bookTicker 최우선 호가 지연 통계
+                schedule.every(BOOK_TICKER_REPORT_INTERVAL).minutes.do(self.data_handler.book_ticker.log_staleness)
+            if LATENCY_TRACING:
+                # 구간별 지연 백분위 로그 + app.py /latency 조회용 파일
+                schedule.every(LATENCY_REPORT_INTERVAL).seconds.do(tracer.report, LATENCY_FILE)
             self.data_handler.initialize_data() 
 
-            self.ws_manager.start_account_websocket()  # 계정 업데이트
+            if EVENT_DRIVEN_TRADING:
+                self.ws_manager.add_listener(self.on_market_update)
+            if self.data_handler.paper is not None:
+                # 모의 거래: 계정 이벤트는 PaperExchange가 만들어서 전달 (시세 갱신으로 대기 주문 체결 판정)
+                self.data_handler.paper.attach(self.ws_manager)
+                self.data_handler.paper.start()
+            else:
+                self.ws_manager.start_account_websocket()  # 계정 업데이트
             self.ws_manager.start_coin_websockets()    # 코인별 3개 웹소켓
             time.sleep(5)
 
-            while self.running:
-                self.trade_cycle()
-                time.sleep(0.5)
-                schedule.run_pending()
+            if EVENT_DRIVEN_TRADING:
+                # 심볼별 평가는 스케줄러 작업 스레드에서 수행, 메인 스레드는 주기 작업만 처리
+                self.scheduler.start()
+                while self.running:
+                    schedule.run_pending()
+                    time.sleep(1)
+            else:
+                while self.running:
+                    self.trade_cycle()
+                    time.sleep(0.5)
+                    schedule.run_pending()
         except Exception as e:
             logger.error(f"TradingBot error: {str(e)}")
             traceback.print_exc()
@@ -60,7 +115,14 @@ class TradingBot:
     def stop(self):
         if self.running:  # 중복 호출 방지
             self.running = False
+            self.scheduler.stop()
             self.ws_manager.stop_all()
+            if self.data_handler.paper is not None:
+                self.data_handler.paper.stop()
+            self.data_handler.flush_pending_candles()  # 대기 중인 캔들 DB 반영
+            self.data_handler.stop_sinks()  # 대기 중인 파일 기록 마무리
+            if self.data_handler.recorder is not None:
+                self.data_handler.recorder.stop()  # 스트림 기록 마지막 청크 닫기
             self.update_status({"status": "stopped", "pid": None})
             logger.info("Trading bot stopped cleanly.")
 
@@ -71,65 +133,142 @@ class TradingBot:
         logger.info("Trading bot stopped.")    
 
     def trade_cycle(self):
-        """매매 주기 실행"""
-        for symbol in self.data_handler.coin_data.keys():
-            # 데이터 가져오기
-            df_1m = self.data_handler.coin_data[symbol]['1m']
-            df_1h = self.data_handler.coin_data[symbol]['15m']
-            # 지표 계산
-            df_1m = self.indicators.calculate_indicators(df_1m)
-            df_1h = self.indicators.calculate_indicators(df_1h)
-            # print(df_1m)
-            # 시장 상태 분석
-            market_status_long = self.indicators.determine_market_status(df_1h)
-            market_status_short = self.indicators.determine_market_status(df_1m)
-            market_status = {'symbol' : symbol,'market_status_long': market_status_long,'market_status_short': market_status_short}
-            self.data_handler.save_db_market_status(market_status)
-            self.marketstatus = market_status_short
-            
-            # tick_size = self.data_handler.tick_size[symbol]
-
-            orderbook_data = self.data_handler.orderbook_data[symbol]
-            orderbook = self.indicators.calculate_orderbook_indicators(orderbook_data)
-
-            # orderbook['tick_size'] = tick_size
-            # orderbook['market_status_1h'] = market_status_1h
-            # orderbook['market_status_1m'] = market_status_1m
-            # print(orderbook)
-            # 매매 신호 생성
-            position = self.data_handler.position_data[symbol]
-            # position['market_status_1h'] = market_status_1h
-            position['symbol'] = symbol
-            position['market_status'] = market_status_short
-            self.data_handler.position_data[symbol] = position
-            self.data_handler.save_db_position_data(position)
-            
-            signals = self.strategy.generate_trading_signals(df_1m, position, orderbook)
-            # print(f"{symbol} 매매 신호: {signals}")
-
-            self.signals[symbol] = signals.copy()
-            self.orderbook[symbol] = orderbook.copy()
-
-            # 신호에 따라 매매 실행
-            if position['position_amount'] == 0:
-                if signals['action'] == 'ENTER_LONG':
-                    self.order_handler.enter_long(symbol, signals)
-                elif signals['action'] == 'ENTER_SHORT':
-                    self.order_handler.enter_short(symbol, signals)
-                    continue
-            elif position['position_amount'] > 0:
-                if signals['action'] == 'ENTER_LONG':
-                    self.order_handler.enter_long(symbol, signals)
-                elif signals['action'] == 'EXIT_LONG':
-                    self.order_handler.exit_long(symbol, signals)
-                    continue
-            elif position['position_amount'] < 0:
-                if signals['action'] == 'EXIT_SHORT':
-                    self.order_handler.exit_short(symbol, signals)
-                elif signals['action'] == 'ENTER_SHORT':
-                    self.order_handler.enter_short(symbol, signals)
+        """매매 주기 실행 (폴링 모드)"""
+        symbols = list(self.data_handler.coin_data.keys())
+        frames_1m = frames_1h = {}
+        if INDICATOR_BACKEND == 'numpy_batch':
+            frames_1m = self.indicator_frames(symbols)
+            frames_1h = self.indicator_frames(symbols, '15m')
+        for symbol in symbols:
+            if self.evaluate_symbol(symbol, frames_1m.get(symbol), frames_1h.get(symbol)) is None:
+                continue  # 오더북 미수신/동기화 중이면 대기 없이 다음 심볼
             time.sleep(1)
 
+    def on_market_update(self, symbol, kind):
+        """웹소켓 데이터 갱신 알림 -> 심볼 평가 예약"""
+        if kind == 'orderbook' and not EVAL_ON_ORDERBOOK:
+            return
+        tracer.on_trigger(symbol)
+        self.scheduler.notify(symbol, kind)
+
+    def evaluate_symbols(self, symbols):
+        """여러 심볼 평가 (지표는 심볼 묶음 단위로 한 번에 계산)"""
+        frames_1m = self.indicator_frames(symbols)
+        frames_1h = self.indicator_frames(symbols, '15m')
+        for symbol in symbols:
+            try:
+                self.evaluate_symbol(symbol, frames_1m[symbol], frames_1h[symbol])
+            except Exception as e:
+                logger.error(f"{symbol} 평가 실패: {e}")
+
+    def evaluate_symbol(self, symbol, df_1m=None, df_1h=None):
+        """
+        심볼 하나에 대한 지표 계산, 신호 생성, 주문 실행
+
+        :param df_1m, df_1h: 미리 계산된 지표 DataFrame (없으면 여기서 계산)
+        :return: 매매 신호 dict (오더북 미수신/동기화 중이면 None)
+        """
+        # 데이터 가져오기 + 지표 계산 (planned: 시장 상태 판단 + 활성 전략이 읽는 지표만)
+        if df_1m is None:
+            features = set(MARKET_STATUS_FEATURES) | self.strategy.required_features(self.data_handler.position_data[symbol])
+            df_1m = self.indicator_frame(symbol, self.signal_timeframe(symbol), features)
+        if df_1h is None:
+            df_1h = self.indicator_frame(symbol, '15m', MARKET_STATUS_FEATURES)
+        # print(df_1m)
+        # 시장 상태 분석
+        market_status_long = self.indicators.determine_market_status(df_1h)
+        market_status_short = self.indicators.determine_market_status(df_1m)
+        market_status = {'symbol' : symbol,'market_status_long': market_status_long,'market_status_short': market_status_short}
+        self.data_handler.save_db_market_status(market_status)
+        self.marketstatus = market_status_short
+        
+        # tick_size = self.data_handler.tick_size[symbol]
+
+        orderbook_data = self.data_handler.orderbook_data[symbol]
+        orderbook = self.indicators.calculate_orderbook_indicators(orderbook_data)
+        if orderbook == "Error_State":  # 오더북 미수신/동기화 중
+            return
+        if self.data_handler.book_ticker is not None:
+            # 주문 가격(high_ask/low_bid)과 스프레드를 더 최신인 bookTicker 최우선 호가 기준으로 갱신
+            self.data_handler.book_ticker.apply(symbol, orderbook)
+
+        # orderbook['tick_size'] = tick_size
+        # orderbook['market_status_1h'] = market_status_1h
+        # orderbook['market_status_1m'] = market_status_1m
+        # print(orderbook)
+        # 매매 신호 생성
+        position = self.data_handler.position_data[symbol]
+        # position['market_status_1h'] = market_status_1h
+        position['symbol'] = symbol
+        position['market_status'] = market_status_short
+        self.data_handler.position_data[symbol] = position
+        self.data_handler.save_db_position_data(position)
+        
+        signals = self.strategy.generate_trading_signals(df_1m, position, orderbook)
+        tracer.on_decision(symbol, signals['action'])
+        # print(f"{symbol} 매매 신호: {signals}")
+
+        self.signals[symbol] = signals.copy()
+        self.orderbook[symbol] = orderbook.copy()
+        if self.order_handler is None:  # offline: 신호만 생성
+            return signals
+
+        # 신호에 따라 매매 실행
+        if position['position_amount'] == 0:
+            if signals['action'] == 'ENTER_LONG':
+                self.order_handler.enter_long(symbol, signals)
+            elif signals['action'] == 'ENTER_SHORT':
+                self.order_handler.enter_short(symbol, signals)
+        elif position['position_amount'] > 0:
+            if signals['action'] == 'ENTER_LONG':
+                self.order_handler.enter_long(symbol, signals)
+            elif signals['action'] == 'EXIT_LONG':
+                self.order_handler.exit_long(symbol, signals)
+        elif position['position_amount'] < 0:
+            if signals['action'] == 'EXIT_SHORT':
+                self.order_handler.exit_short(symbol, signals)
+            elif signals['action'] == 'ENTER_SHORT':
+                self.order_handler.enter_short(symbol, signals)
+        return signals
+
+    def indicator_frame(self, symbol, timeframe, features=None):
+        """
+        지표가 계산된 캔들 DataFrame (INDICATOR_BACKEND 설정에 따라 증분/전체/필요 지표만 계산)
+
+        :param features: 필요한 지표 컬럼 (planned 백엔드에서만 사용, None이면 전체)
+        """
+        if INDICATOR_BACKEND == 'streaming':
+            with self.data_handler.lock:
+                candles = self.data_handler.get_candle_buffer(symbol, timeframe)
+                return self.indicators.calculate_indicators_incremental(
+                    (symbol, timeframe), candles, INDICATOR_FRAME_ROWS)
+        df = self.data_handler.get_candles(symbol, timeframe)
+        if INDICATOR_BACKEND == 'planned' and features is not None:
+            return self.indicators.calculate_indicators_planned(df, features)
+        if INDICATOR_BACKEND in ('numpy', 'numpy_batch', 'planned'):
+            return self.indicators.calculate_indicators_numpy(df)
+        return self.indicators.calculate_indicators(df)
+
+    def indicator_frames(self, symbols, timeframe=None):
+        """여러 심볼의 지표 DataFrame을 한 번에 계산 (numpy_batch, timeframe이 없으면 심볼별 신호 타임프레임)"""
+        frames = {symbol: self.data_handler.get_candles(symbol, timeframe or self.signal_timeframe(symbol))
+                  for symbol in symbols}
+        return self.indicators.calculate_indicators_batch(frames)
+
+    def signal_timeframe(self, symbol):
+        """
+        매매 신호/단기 시장 상태를 계산할 캔들 타임프레임 (SIGNAL_TIMEFRAME)
+        - 해당 캔들이 없는 심볼(AGG_TRADE_SYMBOLS 밖)이나 과거 데이터 없이 쌓이는 aggTrade 캔들 버퍼가
+          아직 차지 않은 동안은 1m
+        """
+        if SIGNAL_TIMEFRAME == '1m':
+            return '1m'
+        with self.data_handler.lock:
+            candles = self.data_handler.coin_data.get(symbol, {}).get(SIGNAL_TIMEFRAME)
+            if candles is None or len(candles) < candles.capacity:
+                return '1m'
+        return SIGNAL_TIMEFRAME
+
     def update_status(self, status):
         with open(STATUS_FILE, "w") as f:
             json.dump(status, f)
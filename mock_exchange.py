@@ -0,0 +1,952 @@
+"""
+로컬 모의 바이낸스 선물 거래소 (부하 테스트용)
+- 봇이 쓰는 REST 엔드포인트 응답: klines, exchangeInfo, depth, account, positionRisk, order, openOrders,
+  allOpenOrders, leverage, listenKey, time/ping
+- 웹소켓: /ws/<stream> 단일 스트림, /stream?streams=a/b/c 결합 스트림, /ws/<listenKey> 유저 데이터
+  kline_<tf> / depth@100ms / depth20@500ms / bookTicker / aggTrade
+- 시세: 심볼별 고정 시드 랜덤워크 (합성) 또는 stream_recorder 기록 파일 (--recording)
+  합성 시세는 초당 발생 횟수 설정 (--trade-rate, --depth-rate, --kline-rate), 구독자가 있는 스트림만 전송
+- 주문: MARKET, LIMIT만 지원 (즉시 체결 가능한 LIMIT은 최우선 호가에 테이커 체결, 나머지는 체결가가 닿으면 메이커 체결)
+  단일 계정/단방향 포지션, 체결 시 ORDER_TRADE_UPDATE + ACCOUNT_UPDATE 푸시
+- 서명/API 키는 검사하지 않음 (클라이언트 서명 생성을 위해 아무 값이나 설정)
+
+사용법:
+  python mock_exchange.py --symbols 120 [--trade-rate 10 --depth-rate 10 --kline-rate 4] [--recording <기록 디렉토리>]
+  BINANCE_BASE_URL=http://127.0.0.1:8090 BINANCE_WS_HOST=ws://127.0.0.1:8091 BINANCE_API_KEY=mock BINANCE_SECRET_KEY=mock \\
+  BOT_COIN_LIST=<모의 거래소가 출력한 심볼 목록> python main.py
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import numpy as np
+import websockets
+
+from config import COIN_LIST
+from logger import logger
+from order_book import LocalOrderBook
+from resampler import resample_rows, timeframe_ms
+from stream_events import loads, decode_depth
+from stream_recorder import read_records
+
+MINUTE_MS = 60_000
+HISTORY_BARS = 1500         # 시작 시 만들어 두는 1m 과거 캔들 수 (futures_klines 1회 최대)
+MAX_HISTORY_BARS = 10_000   # 메모리에 유지하는 1m 캔들 수
+BOOK_LEVELS = 50            # 합성 오더북 한쪽 레벨 수 (레벨 간격은 가격의 약 0.02%)
+PARTIAL_DEPTH_LEVELS = 20
+WALLET_BALANCE = 10_000.0
+DEFAULT_LEVERAGE = 20
+MAKER_FEE = 0.0002
+TAKER_FEE = 0.0005
+ORDER_TYPES = ('LIMIT', 'MARKET')
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+class MockExchangeError(Exception):
+    """바이낸스 오류 응답 {"code", "msg"} (HTTP status 포함)"""
+    def __init__(self, code, msg, status=400):
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+class MockMarket:
+    """
+    심볼 하나의 시세 상태 (1m 캔들, 오더북, 체결)
+    - 모든 메서드는 MockExchange.lock 보유 상태에서 호출
+    """
+    def __init__(self, symbol, start_ms, seed=0):
+        self.symbol = symbol
+        self.stream = symbol.lower()
+        seed = zlib.crc32(symbol.encode()) ^ seed
+        self.random = random.Random(seed)
+        price = 10 ** self.random.uniform(-2, 3)
+        self.decimals = min(8, max(0, 4 - math.floor(math.log10(price))))  # 유효숫자 5자리
+        self.tick = 10 ** -self.decimals
+        self.qty_decimals = min(3, max(0, math.floor(math.log10(price)) + 1))
+        self.volatility = self.random.uniform(0.0005, 0.002)  # 1분 로그 수익률 표준편차
+        self.level_ticks = max(1, round(price * 0.0002 / self.tick))
+        self.level_size = 2000 / price  # 레벨 평균 수량 (약 2000 USDT)
+
+        self.history = self._history(price, start_ms, np.random.default_rng(seed))
+        last = self.history[-1]
+        self.price = last[4]
+        self.current = [last[0] + MINUTE_MS, self.price, self.price, self.price, self.price, 0.0]
+        self.last_trade_ms = start_ms
+        self.trade_id = self.random.randrange(10 ** 8, 10 ** 9)
+
+        self.bids = {}
+        self.asks = {}
+        self.book_bid = None
+        self.update_id = self.random.randrange(10 ** 9, 2 * 10 ** 9)
+        self.prev_update_id = 0
+        self.recorded_book = None  # 기록 재생 시 기록된 diff로 유지하는 오더북
+
+    def _history(self, price, start_ms, rng):
+        """고정 시드 랜덤워크 1m 캔들 (현재 진행 중 분 직전까지)"""
+        n = HISTORY_BARS
+        first = start_ms - start_ms % MINUTE_MS - n * MINUTE_MS
+        closes = price * np.exp(np.cumsum(rng.normal(0, self.volatility, n)))
+        opens = np.r_[price, closes[:-1]]
+        highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, self.volatility / 2, n)))
+        lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, self.volatility / 2, n)))
+        volumes = rng.lognormal(0, 0.5, n) * self.level_size * 20
+        rows = np.column_stack((first + np.arange(n) * MINUTE_MS, opens, highs, lows, closes, volumes))
+        rows[:, 1:5] = np.round(rows[:, 1:5], self.decimals)
+        rows[:, 5] = np.round(rows[:, 5], self.qty_decimals)
+        return rows.tolist()
+
+    def fmt_price(self, price):
+        return f"{price:.{self.decimals}f}"
+
+    def fmt_qty(self, qty):
+        return f"{qty:.{self.qty_decimals}f}"
+
+    # ------------------------------------------------------------------
+    # 캔들
+    # ------------------------------------------------------------------
+    def trade(self, time_ms):
+        """
+        랜덤워크 체결 한 건
+
+        :return: (가격, 수량, 매수자 메이커 여부, 마감된 1m 캔들 리스트)
+        """
+        minutes = max(time_ms - self.last_trade_ms, 1) / MINUTE_MS
+        step = self.random.gauss(0, self.volatility * math.sqrt(minutes))
+        price = max(round(self.price * math.exp(step), self.decimals), self.tick)
+        qty = max(round(self.random.expovariate(1) * self.level_size / 4, self.qty_decimals), 10 ** -self.qty_decimals)
+        buyer_maker = price < self.price or (price == self.price and self.random.random() < 0.5)
+        self.last_trade_ms = time_ms
+        closed = self.roll(time_ms)
+        bar = self.current
+        bar[2] = max(bar[2], price)
+        bar[3] = min(bar[3], price)
+        bar[4] = price
+        bar[5] = round(bar[5] + qty, self.qty_decimals)
+        self.price = price
+        self.trade_id += 1
+        return price, qty, buyer_maker, closed
+
+    def roll(self, time_ms):
+        """분이 바뀌었으면 진행 중 캔들 마감 (체결 없는 분은 보합 캔들), 마감 캔들 리스트 반환"""
+        minute = time_ms - time_ms % MINUTE_MS
+        closed = []
+        while self.current[0] < minute:
+            closed.append(self.current)
+            close = self.current[4]
+            self.current = [self.current[0] + MINUTE_MS, close, close, close, close, 0.0]
+        if closed:
+            self.history.extend(closed)
+            del self.history[:-MAX_HISTORY_BARS]
+        return closed
+
+    def load_history(self, raw_data):
+        """기록된 futures_klines 응답으로 1m 과거 캔들 교체"""
+        rows = [[float(row[0])] + [float(value) for value in row[1:6]] for row in raw_data]
+        if not rows:
+            return
+        self.history = rows[:-1]
+        self.current = rows[-1]
+        self.price = self.current[4]
+
+    def on_kline(self, open_time, open_, high, low, close, volume):
+        """기록된 1m kline 반영 (REST klines 응답과 주문 체결 가격용)"""
+        if open_time > self.current[0]:
+            self.history.append(self.current)
+            del self.history[:-MAX_HISTORY_BARS]
+        self.current = [open_time, open_, high, low, close, volume]
+        self.price = close
+
+    def klines(self, interval, limit=500, start_time=None, end_time=None):
+        """futures_klines 응답 형식 (진행 중 캔들 포함)"""
+        rows = np.array(self.history + [self.current], dtype=float)
+        period = timeframe_ms(interval)
+        if period != MINUTE_MS:
+            rows = resample_rows(rows, period, drop_partial=False)
+        if start_time is not None:
+            rows = rows[rows[:, 0] >= start_time]
+        if end_time is not None:
+            rows = rows[rows[:, 0] <= end_time]
+        rows = rows[:limit] if start_time is not None else rows[-limit:]
+        return [self._kline_row(row, period) for row in rows.tolist()]
+
+    def _kline_row(self, row, period):
+        open_time = int(row[0])
+        return [open_time, self.fmt_price(row[1]), self.fmt_price(row[2]), self.fmt_price(row[3]),
+                self.fmt_price(row[4]), self.fmt_qty(row[5]), open_time + period - 1,
+                f"{row[5] * row[4]:.4f}", 0, "0", "0", "0"]
+
+    def bar(self, interval):
+        """interval 진행 중 캔들 [open time, O, H, L, C, V] (1m 외에는 1m 캔들로 합성)"""
+        period = timeframe_ms(interval)
+        if period == MINUTE_MS:
+            return list(self.current)
+        bucket = self.current[0] - self.current[0] % period
+        rows = [self.current]
+        for row in reversed(self.history):
+            if row[0] < bucket:
+                break
+            rows.append(row)
+        rows.reverse()
+        return [bucket, rows[0][1], max(r[2] for r in rows), min(r[3] for r in rows), rows[-1][4], sum(r[5] for r in rows)]
+
+    def kline_event(self, interval, bar, closed, time_ms):
+        period = timeframe_ms(interval)
+        return {
+            'e': 'kline', 'E': time_ms, 's': self.symbol,
+            'k': {
+                't': int(bar[0]), 'T': int(bar[0]) + period - 1, 's': self.symbol, 'i': interval,
+                'f': 0, 'L': 0, 'o': self.fmt_price(bar[1]), 'c': self.fmt_price(bar[4]),
+                'h': self.fmt_price(bar[2]), 'l': self.fmt_price(bar[3]), 'v': self.fmt_qty(bar[5]),
+                'n': 0, 'x': closed, 'q': f"{bar[5] * bar[4]:.4f}", 'V': "0", 'Q': "0", 'B': "0"
+            }
+        }
+
+    def agg_trade_event(self, price, qty, buyer_maker, time_ms):
+        return {'e': 'aggTrade', 'E': time_ms, 'a': self.trade_id, 's': self.symbol, 'p': self.fmt_price(price),
+                'q': self.fmt_qty(qty), 'f': self.trade_id, 'l': self.trade_id, 'T': time_ms, 'm': buyer_maker}
+
+    # ------------------------------------------------------------------
+    # 오더북
+    # ------------------------------------------------------------------
+    def best_bid(self):
+        if self.recorded_book is not None and self.recorded_book.synced:
+            return self.recorded_book.best_bid()[0]
+        return max(self.bids) if self.bids else self.price
+
+    def best_ask(self):
+        if self.recorded_book is not None and self.recorded_book.synced:
+            return self.recorded_book.best_ask()[0]
+        return min(self.asks) if self.asks else round(self.price + self.tick, self.decimals)
+
+    def _level_qty(self):
+        return max(round(self.random.expovariate(1) * self.level_size, self.qty_decimals), 10 ** -self.qty_decimals)
+
+    def depth_update(self, time_ms):
+        """
+        합성 오더북 갱신 (최우선 매수호가 = 마지막 체결가, 매도호가 = +1틱)
+        - 가격이 움직였으면 레벨 전체를 다시 배치, 그대로면 몇 개 레벨 수량만 변경
+
+        :return: diff-depth 이벤트 (바뀐 레벨, 없어진 레벨은 수량 0)
+        """
+        bid = self.price
+        changed_bids, changed_asks = {}, {}
+        if bid != self.book_bid:
+            step = self.tick * self.level_ticks
+            ask = bid + self.tick
+            for old, side, start, sign, changed in ((self.bids, 'bid', bid, -1, changed_bids),
+                                                    (self.asks, 'ask', ask, 1, changed_asks)):
+                levels = {}
+                for k in range(BOOK_LEVELS):
+                    price = round(start + sign * k * step, self.decimals)
+                    if price <= 0:
+                        break
+                    qty = old.get(price)
+                    levels[price] = qty if qty is not None and self.random.random() < 0.7 else self._level_qty()
+                for price in old:
+                    if price not in levels:
+                        changed[price] = 0.0
+                for price, qty in levels.items():
+                    if old.get(price) != qty:
+                        changed[price] = qty
+                old.clear()
+                old.update(levels)
+            self.book_bid = bid
+        else:
+            for _ in range(4):
+                book, changed = (self.bids, changed_bids) if self.random.random() < 0.5 else (self.asks, changed_asks)
+                price = self.random.choice(list(book))
+                book[price] = changed[price] = self._level_qty()
+
+        self.prev_update_id = self.update_id
+        self.update_id += self.random.randint(1, 20)
+        return {
+            'e': 'depthUpdate', 'E': time_ms, 'T': time_ms, 's': self.symbol,
+            'U': self.prev_update_id + 1, 'u': self.update_id, 'pu': self.prev_update_id,
+            'b': [[self.fmt_price(p), self.fmt_qty(q)] for p, q in changed_bids.items()],
+            'a': [[self.fmt_price(p), self.fmt_qty(q)] for p, q in changed_asks.items()]
+        }
+
+    def top_levels(self, levels):
+        bids = sorted(self.bids.items(), reverse=True)[:levels]
+        asks = sorted(self.asks.items())[:levels]
+        return ([[self.fmt_price(p), self.fmt_qty(q)] for p, q in bids],
+                [[self.fmt_price(p), self.fmt_qty(q)] for p, q in asks])
+
+    def partial_depth_event(self, time_ms):
+        bids, asks = self.top_levels(PARTIAL_DEPTH_LEVELS)
+        return {'e': 'depthUpdate', 'E': time_ms, 'T': time_ms, 's': self.symbol, 'U': self.prev_update_id + 1,
+                'u': self.update_id, 'pu': self.prev_update_id, 'b': bids, 'a': asks}
+
+    def book_ticker_event(self, time_ms):
+        bid, ask = self.best_bid(), self.best_ask()
+        return {'e': 'bookTicker', 'u': self.update_id, 's': self.symbol,
+                'b': self.fmt_price(bid), 'B': self.fmt_qty(self.bids.get(bid, 0.0)),
+                'a': self.fmt_price(ask), 'A': self.fmt_qty(self.asks.get(ask, 0.0)), 'T': time_ms, 'E': time_ms}
+
+    def snapshot(self, limit, time_ms):
+        """/fapi/v1/depth 응답 (마지막으로 보낸 diff 이벤트의 u = lastUpdateId)"""
+        if self.recorded_book is not None:
+            book = self.recorded_book
+            if not book.synced:
+                raise MockExchangeError(-1003, "Order book not ready.", 503)
+            with book.lock:
+                bids, asks = book.top_bids(limit), book.top_asks(limit)
+                update_id = book.last_update_id
+            return {'lastUpdateId': update_id, 'E': time_ms, 'T': time_ms,
+                    'bids': [[self.fmt_price(p), self.fmt_qty(q)] for p, q in bids],
+                    'asks': [[self.fmt_price(p), self.fmt_qty(q)] for p, q in asks]}
+        if not self.bids:
+            self.depth_update(time_ms)
+        bids, asks = self.top_levels(limit)
+        return {'lastUpdateId': self.update_id, 'E': time_ms, 'T': time_ms, 'bids': bids, 'asks': asks}
+
+    def symbol_info(self):
+        return {
+            'symbol': self.symbol, 'pair': self.symbol, 'contractType': 'PERPETUAL', 'status': 'TRADING',
+            'baseAsset': self.symbol[:-4], 'quoteAsset': 'USDT', 'marginAsset': 'USDT',
+            'pricePrecision': self.decimals, 'quantityPrecision': self.qty_decimals,
+            'orderTypes': list(ORDER_TYPES), 'timeInForce': ['GTC', 'IOC', 'FOK', 'GTX'],
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'tickSize': self.fmt_price(self.tick),
+                 'minPrice': self.fmt_price(self.tick), 'maxPrice': "1000000"},
+                {'filterType': 'LOT_SIZE', 'stepSize': self.fmt_qty(10 ** -self.qty_decimals),
+                 'minQty': self.fmt_qty(10 ** -self.qty_decimals), 'maxQty': "10000000"},
+                {'filterType': 'MIN_NOTIONAL', 'notional': "5"},
+            ]
+        }
+
+
+class MockExchange:
+    """
+    모의 거래소 상태 + REST 처리 + 스트림 발행
+    - 시세/계정 상태는 self.lock 하나로 보호 (REST 스레드, 시세 루프)
+    - 구독 테이블과 전송은 이벤트 루프 스레드에서만 다룸 (REST 스레드는 call_soon_threadsafe로 전달)
+    """
+    def __init__(self, symbols, seed=0, trade_rate=10.0, depth_rate=10.0, kline_rate=4.0, rest_delay=0.0):
+        self.seed = seed
+        self.trade_rate = trade_rate
+        self.depth_rate = depth_rate
+        self.kline_rate = kline_rate
+        self.rest_delay = rest_delay
+        self.lock = threading.RLock()
+        self.loop = None
+        self.markets = {}
+        start = now_ms()
+        for symbol in symbols:
+            self.markets[symbol] = MockMarket(symbol, start, seed)
+        # 구독: stream 이름 -> 연결 set (단일 스트림 연결 / 결합 스트림 연결)
+        self.streams = defaultdict(set)
+        self.combined = defaultdict(set)
+        self.kline_timeframes = set()
+        self.depth_ticks = 0
+        self.recording = False  # 기록 재생 중이면 캔들 시각은 기록 기준 (벽시계로 마감하지 않음)
+        self.listen_keys = set()
+        # 계정 (단일 계정, 단방향 포지션)
+        self.wallet = WALLET_BALANCE
+        self.positions = {}     # symbol -> {'amount', 'entry', 'leverage'}
+        self.orders = {}        # orderId -> 미체결 주문
+        self.filled_orders = {} # orderId -> 체결/취소된 주문 (주문 조회용)
+        self.next_order_id = 1
+        # 통계
+        self.connections = 0
+        self.sent = 0
+        self.rest_requests = 0
+        self.order_count = 0
+        self.fill_count = 0
+
+    def market(self, symbol):
+        market = self.markets.get(symbol)
+        if market is None:
+            with self.lock:
+                market = self.markets.get(symbol)
+                if market is None:
+                    market = self.markets[symbol] = MockMarket(symbol, now_ms(), self.seed)
+        return market
+
+    # ------------------------------------------------------------------
+    # 스트림 발행 (이벤트 루프 스레드)
+    # ------------------------------------------------------------------
+    def subscribed(self, stream):
+        return stream in self.streams or stream in self.combined
+
+    def publish(self, stream, payload):
+        """payload: dict 또는 이미 직렬화된 JSON 문자열"""
+        raw = self.streams.get(stream)
+        wrapped = self.combined.get(stream)
+        if not raw and not wrapped:
+            return
+        message = payload if isinstance(payload, str) else json.dumps(payload, separators=(',', ':'))
+        if raw:
+            websockets.broadcast(raw, message)
+            self.sent += len(raw)
+        if wrapped:
+            websockets.broadcast(wrapped, f'{{"stream":"{stream}","data":{message}}}')
+            self.sent += len(wrapped)
+
+    def publish_user(self, payload):
+        for listen_key in self.listen_keys:
+            self.publish(listen_key, payload)
+
+    def _user_event(self, payload):
+        """어느 스레드에서든 유저 데이터 이벤트 전송 예약"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.publish_user, payload)
+
+    async def serve_connection(self, connection):
+        parts = urlsplit(connection.request.path)
+        if parts.path == '/stream':
+            table, streams = self.combined, dict(parse_qsl(parts.query)).get('streams', '').split('/')
+        elif parts.path.startswith('/ws/'):
+            table, streams = self.streams, [parts.path[4:]]
+        else:
+            await connection.close(1008, "unknown path")
+            return
+        streams = [stream for stream in streams if stream]
+        for stream in streams:
+            if '@' in stream:
+                name, kind = stream.split('@', 1)
+                self.market(name.upper())
+                if kind.startswith('kline_'):
+                    self.kline_timeframes.add(kind[6:])
+            table[stream].add(connection)
+        self.connections += 1
+        try:
+            async for _ in connection:
+                pass  # SUBSCRIBE 등 클라이언트 메시지는 무시
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections -= 1
+            for stream in streams:
+                subscribers = table.get(stream)
+                if subscribers is not None:
+                    subscribers.discard(connection)
+                    if not subscribers:
+                        del table[stream]
+
+    # ------------------------------------------------------------------
+    # 합성 시세 루프
+    # ------------------------------------------------------------------
+    async def run_feed(self, rate, step):
+        """step(time_ms)를 초당 rate번 실행 (처리가 밀리면 밀린 만큼 건너뜀)"""
+        interval = 1.0 / rate
+        next_time = time.monotonic()
+        while True:
+            try:
+                with self.lock:
+                    step(now_ms())
+            except Exception as e:
+                logger.error(f"모의 시세 생성 실패: {e}")
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_time = time.monotonic()
+                await asyncio.sleep(0)
+
+    def trade_step(self, time_ms):
+        for market in list(self.markets.values()):
+            price, qty, buyer_maker, closed = market.trade(time_ms)
+            self._after_trade(market, time_ms, closed)
+            if self.subscribed(f"{market.stream}@aggTrade"):
+                self.publish(f"{market.stream}@aggTrade", market.agg_trade_event(price, qty, buyer_maker, time_ms))
+
+    def _after_trade(self, market, time_ms, closed):
+        """마감 캔들 발행 + 지정가 주문 체결 확인"""
+        for bar in closed:
+            close_time = bar[0] + MINUTE_MS
+            for interval in self.kline_timeframes:
+                stream = f"{market.stream}@kline_{interval}"
+                if close_time % timeframe_ms(interval) == 0 and self.subscribed(stream):
+                    if interval == '1m':
+                        final = bar
+                    else:
+                        period = timeframe_ms(interval)
+                        rows = [row for row in market.history[-(period // MINUTE_MS):] if row[0] >= close_time - period]
+                        final = [close_time - period, rows[0][1], max(r[2] for r in rows),
+                                 min(r[3] for r in rows), rows[-1][4], sum(r[5] for r in rows)]
+                    self.publish(stream, market.kline_event(interval, final, True, time_ms))
+        self._match_orders(market, time_ms)
+
+    def depth_step(self, time_ms):
+        partial = self.depth_ticks % max(1, round(self.depth_rate / 2)) == 0  # depth20은 약 500ms 간격
+        self.depth_ticks += 1
+        for market in list(self.markets.values()):
+            diff = f"{market.stream}@depth@100ms"
+            top = f"{market.stream}@depth20@500ms"
+            ticker = f"{market.stream}@bookTicker"
+            if not (self.subscribed(diff) or self.subscribed(top) or self.subscribed(ticker)):
+                continue
+            event = market.depth_update(time_ms)
+            self.publish(diff, event)
+            if partial:
+                self.publish(top, market.partial_depth_event(time_ms))
+            self.publish(ticker, market.book_ticker_event(time_ms))
+
+    def kline_step(self, time_ms):
+        for market in list(self.markets.values()):
+            for interval in self.kline_timeframes:
+                stream = f"{market.stream}@kline_{interval}"
+                if self.subscribed(stream):
+                    self.publish(stream, market.kline_event(interval, market.bar(interval), False, time_ms))
+
+    # ------------------------------------------------------------------
+    # 기록 재생 시세
+    # ------------------------------------------------------------------
+    async def run_recording(self, paths, speed=1.0):
+        """
+        기록 파일의 마켓 스트림 메시지를 기록 시각 간격(speed 배속)대로 그대로 발행
+        - history/snapshot 항목은 REST klines/depth 응답에 사용, 계정 기록(user/state)은 사용하지 않음
+        """
+        start_wall = time.monotonic()
+        start_us = None
+        count = 0
+        for received, channel, message in read_records(paths):
+            if start_us is None:
+                start_us = received
+            delay = (received - start_us) / 1e6 / speed - (time.monotonic() - start_wall)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif count % 1000 == 0:
+                await asyncio.sleep(0)
+            count += 1
+            try:
+                with self.lock:
+                    self._replay_record(channel, message)
+            except Exception as e:
+                logger.error(f"기록 재생 실패 ({channel}): {e}")
+        logger.system(f"기록 재생 완료: {count:,}건")
+
+    def _replay_record(self, channel, message):
+        if channel in ('user', 'state'):
+            return
+        if channel.startswith('history@'):
+            _, symbol, interval = channel.split('@')
+            if interval == '1m':
+                self.market(symbol).load_history(loads(message))
+            return
+        if channel.startswith('snapshot@'):
+            market = self.market(channel.split('@')[1])
+            market.recorded_book = market.recorded_book or LocalOrderBook(market.symbol)
+            market.recorded_book.apply_snapshot(loads(message))
+            return
+        if channel == 'combined':
+            data = loads(message)
+            stream, payload = data['stream'], data['data']
+            message = json.dumps(payload, separators=(',', ':'))
+        else:
+            stream, payload = channel, loads(message)
+        name, _, kind = stream.partition('@')
+        market = self.market(name.upper())
+        if kind.startswith('kline_'):
+            self.kline_timeframes.add(kind[6:])
+            kline = payload['k']
+            if kind == 'kline_1m':
+                market.on_kline(kline['t'], float(kline['o']), float(kline['h']), float(kline['l']),
+                                float(kline['c']), float(kline['v']))
+                self._match_orders(market, payload.get('E', now_ms()))
+        elif kind == 'aggTrade':
+            market.price = float(payload['p'])
+            self._match_orders(market, payload.get('E', now_ms()))
+        elif kind == 'depth@100ms':
+            market.recorded_book = market.recorded_book or LocalOrderBook(market.symbol)
+            market.recorded_book.on_event(decode_depth(payload))
+        self.publish(stream, message)
+
+    # ------------------------------------------------------------------
+    # 계정/주문
+    # ------------------------------------------------------------------
+    def position(self, symbol):
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = {'amount': 0.0, 'entry': 0.0, 'leverage': DEFAULT_LEVERAGE}
+        return position
+
+    def create_order(self, params):
+        symbol, side, order_type = params.get('symbol'), params.get('side'), params.get('type')
+        if not symbol or side not in ('BUY', 'SELL') or not order_type:
+            raise MockExchangeError(-1102, "Mandatory parameter was not sent, was empty/null, or malformed.")
+        if order_type not in ORDER_TYPES:
+            raise MockExchangeError(-1116, "Invalid orderType.")
+        quantity = float(params.get('quantity', 0))
+        price = float(params.get('price', 0))
+        if quantity <= 0:
+            raise MockExchangeError(-4003, "Quantity less than or equal to zero.")
+        if order_type == 'LIMIT' and price <= 0:
+            raise MockExchangeError(-4001, "Price less than 0.")
+        market = self.market(symbol)
+        time_ms = now_ms()
+        with self.lock:
+            order_id = self.next_order_id
+            self.next_order_id += 1
+            order = {
+                'orderId': order_id, 'symbol': symbol, 'status': 'NEW',
+                'clientOrderId': params.get('newClientOrderId') or f"mock_{order_id}",
+                'price': price, 'avgPrice': 0.0, 'origQty': quantity, 'executedQty': 0.0, 'cumQuote': 0.0,
+                'timeInForce': params.get('timeInForce', 'GTC'), 'type': order_type, 'side': side,
+                'reduceOnly': str(params.get('reduceOnly', 'false')).lower() == 'true',
+                'time': time_ms, 'updateTime': time_ms, 'realizedProfit': 0.0, 'commission': 0.0,
+            }
+            self.orders[order_id] = order
+            self.order_count += 1
+            best = market.best_ask() if side == 'BUY' else market.best_bid()
+            marketable = order_type == 'MARKET' or (price >= best if side == 'BUY' else price <= best)
+            if marketable:
+                self._fill(order, market, best, time_ms, maker=False)
+            else:
+                self._user_event(self._order_event(order, market, time_ms, 'NEW'))
+            return self.order_response(order)
+
+    def _match_orders(self, market, time_ms):
+        """체결가가 지정가에 닿은 미체결 LIMIT 주문 메이커 체결"""
+        for order in list(self.orders.values()):
+            if order['symbol'] != market.symbol or order['status'] != 'NEW':
+                continue
+            if (order['side'] == 'BUY' and market.price <= order['price']) or \
+                    (order['side'] == 'SELL' and market.price >= order['price']):
+                self._fill(order, market, order['price'], time_ms, maker=True)
+
+    def _fill(self, order, market, price, time_ms, maker):
+        """주문 전량 체결 + 포지션/잔고 반영 (self.lock 보유 상태에서 호출)"""
+        quantity = order['origQty']
+        position = self.position(order['symbol'])
+        signed = quantity if order['side'] == 'BUY' else -quantity
+        amount, entry = position['amount'], position['entry']
+        realized = 0.0
+        if amount == 0 or (amount > 0) == (signed > 0):
+            position['entry'] = (abs(amount) * entry + quantity * price) / (abs(amount) + quantity)
+        else:
+            closing = min(quantity, abs(amount))
+            realized = closing * (price - entry) * (1 if amount > 0 else -1)
+            if quantity > abs(amount):
+                position['entry'] = price  # 반대 방향으로 전환
+        position['amount'] = round(amount + signed, 8)
+        if position['amount'] == 0:
+            position['entry'] = 0.0
+        commission = quantity * price * (MAKER_FEE if maker else TAKER_FEE)
+        self.wallet += realized - commission
+        order.update({'status': 'FILLED', 'avgPrice': price, 'executedQty': quantity, 'cumQuote': quantity * price,
+                      'updateTime': time_ms, 'realizedProfit': realized, 'commission': commission})
+        self.orders.pop(order['orderId'], None)
+        self.filled_orders[order['orderId']] = order
+        self.fill_count += 1
+        self._user_event(self._account_event(market, position, time_ms))
+        self._user_event(self._order_event(order, market, time_ms, 'TRADE', maker))
+
+    def _order_event(self, order, market, time_ms, execution, maker=False):
+        filled = order['status'] == 'FILLED'
+        return {
+            'e': 'ORDER_TRADE_UPDATE', 'E': time_ms, 'T': time_ms,
+            'o': {
+                's': order['symbol'], 'c': order['clientOrderId'], 'S': order['side'], 'o': order['type'],
+                'f': order['timeInForce'], 'q': market.fmt_qty(order['origQty']), 'p': market.fmt_price(order['price']),
+                'ap': market.fmt_price(order['avgPrice']), 'sp': "0", 'x': execution, 'X': order['status'],
+                'i': order['orderId'], 'l': market.fmt_qty(order['executedQty'] if filled else 0),
+                'z': market.fmt_qty(order['executedQty']), 'L': market.fmt_price(order['avgPrice']),
+                'N': 'USDT', 'n': f"{order['commission']:.8f}", 'T': time_ms, 't': order['orderId'],
+                'b': "0", 'a': "0", 'm': maker, 'R': order['reduceOnly'], 'wt': 'CONTRACT_PRICE',
+                'ot': order['type'], 'ps': 'BOTH', 'cp': False, 'rp': f"{order['realizedProfit']:.8f}"
+            }
+        }
+
+    def _account_event(self, market, position, time_ms):
+        unrealized = position['amount'] * (market.price - position['entry'])
+        return {
+            'e': 'ACCOUNT_UPDATE', 'E': time_ms, 'T': time_ms,
+            'a': {
+                'm': 'ORDER',
+                'B': [{'a': 'USDT', 'wb': f"{self.wallet:.8f}", 'cw': f"{self.wallet:.8f}", 'bc': "0"}],
+                'P': [{'s': market.symbol, 'pa': f"{position['amount']}", 'ep': f"{position['entry']:.8f}",
+                       'bep': f"{position['entry']:.8f}", 'cr': "0", 'up': f"{unrealized:.8f}",
+                       'mt': 'cross', 'iw': "0", 'ps': 'BOTH'}]
+            }
+        }
+
+    def order_response(self, order):
+        market = self.market(order['symbol'])
+        return {
+            'orderId': order['orderId'], 'symbol': order['symbol'], 'status': order['status'],
+            'clientOrderId': order['clientOrderId'], 'price': market.fmt_price(order['price']),
+            'avgPrice': market.fmt_price(order['avgPrice']), 'origQty': market.fmt_qty(order['origQty']),
+            'executedQty': market.fmt_qty(order['executedQty']), 'cumQuote': f"{order['cumQuote']:.8f}",
+            'timeInForce': order['timeInForce'], 'type': order['type'], 'reduceOnly': order['reduceOnly'],
+            'side': order['side'], 'positionSide': 'BOTH', 'origType': order['type'],
+            'time': order['time'], 'updateTime': order['updateTime']
+        }
+
+    def find_order(self, params):
+        order_id = params.get('orderId')
+        with self.lock:
+            order = self.orders.get(int(order_id)) if order_id else None
+            order = order or (self.filled_orders.get(int(order_id)) if order_id else None)
+            if order is None and params.get('origClientOrderId'):
+                order = next((o for o in list(self.orders.values()) + list(self.filled_orders.values())
+                              if o['clientOrderId'] == params['origClientOrderId']), None)
+        if order is None or order['symbol'] != params.get('symbol', order['symbol']):
+            raise MockExchangeError(-2013, "Order does not exist.")
+        return order
+
+    def cancel_order(self, params):
+        with self.lock:
+            order = self.find_order(params)
+            if order['status'] != 'NEW':
+                raise MockExchangeError(-2011, "Unknown order sent.")
+            self._cancel(order, now_ms())
+            return self.order_response(order)
+
+    def _cancel(self, order, time_ms):
+        order['status'] = 'CANCELED'
+        order['updateTime'] = time_ms
+        self.orders.pop(order['orderId'], None)
+        self.filled_orders[order['orderId']] = order
+        self._user_event(self._order_event(order, self.market(order['symbol']), time_ms, 'CANCELED'))
+
+    def cancel_all_orders(self, params):
+        symbol = params.get('symbol')
+        time_ms = now_ms()
+        with self.lock:
+            for order in [o for o in self.orders.values() if o['symbol'] == symbol]:
+                self._cancel(order, time_ms)
+        return {'code': 200, 'msg': "The operation of cancel all open order is done."}
+
+    def open_orders(self, params):
+        symbol = params.get('symbol')
+        with self.lock:
+            return [self.order_response(o) for o in self.orders.values() if symbol is None or o['symbol'] == symbol]
+
+    def change_leverage(self, params):
+        symbol, leverage = params.get('symbol'), int(params.get('leverage', 0))
+        if not 1 <= leverage <= 125:
+            raise MockExchangeError(-4028, "Leverage is not valid.")
+        self.market(symbol)
+        with self.lock:
+            self.position(symbol)['leverage'] = leverage
+        time_ms = now_ms()
+        self._user_event({'e': 'ACCOUNT_CONFIG_UPDATE', 'E': time_ms, 'T': time_ms, 'ac': {'s': symbol, 'l': leverage}})
+        return {'leverage': leverage, 'maxNotionalValue': "1000000", 'symbol': symbol}
+
+    def _position_rows(self, symbol=None):
+        rows = []
+        for market in list(self.markets.values()):
+            if symbol is not None and market.symbol != symbol:
+                continue
+            position = self.position(market.symbol)
+            unrealized = position['amount'] * (market.price - position['entry'])
+            notional = position['amount'] * market.price
+            rows.append({
+                'symbol': market.symbol, 'positionAmt': f"{position['amount']}",
+                'entryPrice': f"{position['entry']:.8f}", 'breakEvenPrice': f"{position['entry']:.8f}",
+                'markPrice': market.fmt_price(market.price), 'unRealizedProfit': f"{unrealized:.8f}",
+                'unrealizedProfit': f"{unrealized:.8f}", 'leverage': str(position['leverage']),
+                'notional': f"{notional:.8f}", 'initialMargin': f"{abs(notional) / position['leverage']:.8f}",
+                'marginType': 'cross', 'isolated': False, 'positionSide': 'BOTH', 'updateTime': now_ms()
+            })
+        return rows
+
+    def account(self, params):
+        with self.lock:
+            positions = self._position_rows()
+        unrealized = sum(float(p['unrealizedProfit']) for p in positions)
+        initial_margin = sum(float(p['initialMargin']) for p in positions)
+        margin_balance = self.wallet + unrealized
+        available = margin_balance - initial_margin
+        return {
+            'totalWalletBalance': f"{self.wallet:.8f}", 'totalUnrealizedProfit': f"{unrealized:.8f}",
+            'totalMarginBalance': f"{margin_balance:.8f}", 'totalInitialMargin': f"{initial_margin:.8f}",
+            'availableBalance': f"{available:.8f}", 'maxWithdrawAmount': f"{available:.8f}",
+            'assets': [{'asset': 'USDT', 'walletBalance': f"{self.wallet:.8f}", 'unrealizedProfit': f"{unrealized:.8f}",
+                        'marginBalance': f"{margin_balance:.8f}", 'initialMargin': f"{initial_margin:.8f}",
+                        'availableBalance': f"{available:.8f}", 'maxWithdrawAmount': f"{available:.8f}"}],
+            'positions': positions
+        }
+
+    def position_risk(self, params):
+        symbol = params.get('symbol')
+        if symbol is not None:
+            self.market(symbol)
+        with self.lock:
+            return self._position_rows(symbol)
+
+    def exchange_info(self, params):
+        with self.lock:
+            return {'timezone': 'UTC', 'serverTime': now_ms(),
+                    'symbols': [market.symbol_info() for market in self.markets.values()]}
+
+    def klines(self, params):
+        market = self.market(params['symbol'])
+        limit = min(int(params.get('limit', 500)), 1500)
+        start, end = params.get('startTime'), params.get('endTime')
+        with self.lock:
+            if not self.recording:
+                market.roll(now_ms())
+            return market.klines(params['interval'], limit, int(start) if start else None, int(end) if end else None)
+
+    def depth(self, params):
+        market = self.market(params['symbol'])
+        with self.lock:
+            return market.snapshot(int(params.get('limit', 500)), now_ms())
+
+    def listen_key(self, params):
+        listen_key = params.get('listenKey') or uuid.uuid4().hex * 2
+        self.listen_keys.add(listen_key)
+        return {'listenKey': listen_key}
+
+    def routes(self):
+        return {
+            ('GET', '/fapi/v1/ping'): lambda params: {},
+            ('GET', '/api/v3/ping'): lambda params: {},
+            ('GET', '/fapi/v1/time'): lambda params: {'serverTime': now_ms()},
+            ('GET', '/api/v3/time'): lambda params: {'serverTime': now_ms()},
+            ('GET', '/fapi/v1/exchangeInfo'): self.exchange_info,
+            ('GET', '/fapi/v1/klines'): self.klines,
+            ('GET', '/fapi/v1/depth'): self.depth,
+            ('GET', '/fapi/v2/account'): self.account,
+            ('GET', '/fapi/v3/account'): self.account,
+            ('GET', '/fapi/v2/positionRisk'): self.position_risk,
+            ('GET', '/fapi/v3/positionRisk'): self.position_risk,
+            ('POST', '/fapi/v1/order'): self.create_order,
+            ('GET', '/fapi/v1/order'): lambda params: self.order_response(self.find_order(params)),
+            ('GET', '/api/v3/order'): lambda params: self.order_response(self.find_order(params)),
+            ('DELETE', '/fapi/v1/order'): self.cancel_order,
+            ('GET', '/fapi/v1/openOrders'): self.open_orders,
+            ('DELETE', '/fapi/v1/allOpenOrders'): self.cancel_all_orders,
+            ('POST', '/fapi/v1/leverage'): self.change_leverage,
+            ('POST', '/fapi/v1/listenKey'): self.listen_key,
+            ('PUT', '/fapi/v1/listenKey'): self.listen_key,
+            ('DELETE', '/fapi/v1/listenKey'): lambda params: {},
+        }
+
+    # ------------------------------------------------------------------
+    # 서버
+    # ------------------------------------------------------------------
+    def rest_handler(self):
+        exchange = self
+        routes = self.routes()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (requests.Session 연결 재사용)
+
+            def _handle(self, method):
+                exchange.rest_requests += 1
+                parts = urlsplit(self.path)
+                params = dict(parse_qsl(parts.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    params.update(parse_qsl(self.rfile.read(length).decode()))
+                route = routes.get((method, parts.path))
+                status = 200
+                try:
+                    if route is None:
+                        raise MockExchangeError(-5000, f"Path {parts.path} not supported by mock exchange.", 404)
+                    if exchange.rest_delay:
+                        time.sleep(exchange.rest_delay)
+                    body = route(params)
+                except MockExchangeError as e:
+                    status, body = e.status, {'code': e.code, 'msg': e.msg}
+                except (KeyError, ValueError) as e:
+                    status, body = 400, {'code': -1102, 'msg': f"Mandatory parameter {e} was not sent or malformed."}
+                data = json.dumps(body, separators=(',', ':')).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_PUT(self):
+                self._handle('PUT')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    async def report(self, interval):
+        sent, requests = self.sent, self.rest_requests
+        while True:
+            await asyncio.sleep(interval)
+            logger.system(
+                f"모의 거래소: 연결 {self.connections}, 구독 스트림 {len(self.streams) + len(self.combined)}, "
+                f"전송 {(self.sent - sent) / interval:,.0f}건/s, REST {(self.rest_requests - requests) / interval:,.1f}건/s, "
+                f"주문 {self.order_count}건 (체결 {self.fill_count}, 미체결 {len(self.orders)}), "
+                f"잔고 {self.wallet:,.2f} USDT")
+            sent, requests = self.sent, self.rest_requests
+
+    async def serve(self, host, port, ws_port, recording=None, speed=1.0, report_interval=10):
+        self.loop = asyncio.get_running_loop()
+        server = ThreadingHTTPServer((host, port), self.rest_handler())
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.name = "MockRestThread"
+        thread.start()
+        async with websockets.serve(self.serve_connection, host, ws_port, max_size=None, compression=None):
+            logger.system(f"모의 거래소 시작: REST http://{host}:{port}, 스트림 ws://{host}:{ws_port}, "
+                          f"심볼 {len(self.markets)}개")
+            tasks = [asyncio.create_task(self.report(report_interval))]
+            if recording:
+                self.recording = True
+                tasks.append(asyncio.create_task(self.run_recording(recording, speed)))
+            else:
+                tasks.append(asyncio.create_task(self.run_feed(self.trade_rate, self.trade_step)))
+                tasks.append(asyncio.create_task(self.run_feed(self.depth_rate, self.depth_step)))
+                tasks.append(asyncio.create_task(self.run_feed(self.kline_rate, self.kline_step)))
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                server.shutdown()
+
+
+def symbol_list(value):
+    """--symbols: 개수(M001USDT...) 또는 쉼표 구분 심볼 목록"""
+    if value.isdigit():
+        return [f"M{i:03d}USDT" for i in range(1, int(value) + 1)]
+    return [symbol.strip().upper() for symbol in value.split(',') if symbol.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 모의 바이낸스 선물 거래소")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090, help="REST 포트")
+    parser.add_argument('--ws-port', type=int, default=8091, help="웹소켓 포트")
+    parser.add_argument('--symbols', default=','.join(COIN_LIST), help="심볼 개수 또는 쉼표 구분 목록")
+    parser.add_argument('--seed', type=int, default=0, help="합성 시세 시드")
+    parser.add_argument('--trade-rate', type=float, default=10, help="심볼당 초당 체결 수 (aggTrade)")
+    parser.add_argument('--depth-rate', type=float, default=10, help="심볼당 초당 오더북 갱신 수 (depth/bookTicker)")
+    parser.add_argument('--kline-rate', type=float, default=4, help="심볼당 초당 진행 중 kline 전송 수")
+    parser.add_argument('--rest-delay', type=float, default=0, help="REST 응답 지연 (ms, 네트워크 지연 흉내)")
+    parser.add_argument('--recording', nargs='*', help="합성 시세 대신 재생할 stream_recorder 기록 디렉토리/파일")
+    parser.add_argument('--speed', type=float, default=1.0, help="기록 재생 배속")
+    parser.add_argument('--report', type=float, default=10, help="통계 로그 주기 (초)")
+    args = parser.parse_args()
+
+    exchange = MockExchange(symbol_list(args.symbols), args.seed, args.trade_rate, args.depth_rate,
+                            args.kline_rate, args.rest_delay / 1000)
+    print(f"BINANCE_BASE_URL=http://{args.host}:{args.port} BINANCE_WS_HOST=ws://{args.host}:{args.ws_port} "
+          f"BINANCE_API_KEY=mock BINANCE_SECRET_KEY=mock BOT_COIN_LIST={','.join(exchange.markets)}")
+    try:
+        asyncio.run(exchange.serve(args.host, args.port, args.ws_port, args.recording, args.speed, args.report))
+    except KeyboardInterrupt:
+        pass
@@ -55,6 +55,28 @@ class CoinData(Base):
     close = Column(Float)
     volume = Column(Float)
 
+class SweepResult(Base):
+    """
+    SweepResult 테이블은 전략 임계값 탐색(param_sweep.py) 결과를 저장합니다.
+    후보 파라미터 x 심볼마다 한 행, 같은 실행은 sweep_id로 묶습니다.
+    """
+    __tablename__ = 'sweep_result'
+    id = Column(Integer, primary_key=True)
+    sweep_id = Column(String, index=True)      # 예: '20250101-120000-macd_rsi'
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    symbol = Column(String, index=True)
+    strategy = Column(String)                  # 탐색 대상 전략
+    params = Column(String)                    # 후보 파라미터 JSON
+    regime = Column(Integer)                   # 1: 시장 상태별 전략 선택
+    orderbook = Column(String)
+    bars = Column(Integer)
+    trades = Column(Integer)
+    win_rate = Column(Float)
+    realized = Column(Float)
+    fees = Column(Float)
+    return_pct = Column(Float)
+    max_drawdown = Column(Float)
+
 # 데이터베이스 위치 및 연결 설정
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # 예: /my_bot
 DATABASE_URL = f"sqlite:///{os.path.join(BASE_DIR, 'my_bot.db')}"
@@ -0,0 +1,234 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+from logger import logger
+
+
+class LocalOrderBook:
+    """
+    diff-depth 스트림(<symbol>@depth@100ms) 기반 로컬 오더북
+    - 바이낸스 선물 문서의 스냅샷 + diff 동기화 절차 구현 (U / u / pu 연속성 검사)
+    - 가격 레벨: 오름차순 가격 리스트(bisect) + {가격: 수량} dict
+      최우선 호가 O(1), 레벨 탐색 O(log n), ±x% 깊이 O(log n + 구간 레벨 수)
+    """
+    def __init__(self, symbol, buffer_size=1000):
+        self.symbol = symbol
+        self.lock = threading.Lock()
+        self.bids = {}          # {price: qty}
+        self.asks = {}
+        self.bid_prices = []    # 오름차순 (최우선 매수호가 = 마지막 원소)
+        self.ask_prices = []    # 오름차순 (최우선 매도호가 = 첫 원소)
+        self.last_update_id = None
+        self.event_time = 0
+        self.transaction_time = 0
+        self.synced = False         # 스냅샷 적용 여부
+        self.first_event = True     # 스냅샷 이후 첫 이벤트 대기 중
+        self.buffer = deque(maxlen=buffer_size)  # 스냅샷 적용 전 수신 이벤트
+
+    # ------------------------------------------------------------------
+    # 동기화
+    # ------------------------------------------------------------------
+    def on_event(self, event):
+        """
+        diff-depth 이벤트(stream_events.DepthEvent) 처리
+
+        :return: False면 시퀀스 단절로 재동기화(스냅샷 재요청)가 필요함
+        """
+        with self.lock:
+            if not self.synced:
+                self.buffer.append(event)
+                return True
+            if self._process(event):
+                return True
+            # 시퀀스 단절: 오더북 폐기 후 재동기화 대기
+            logger.warning(f"{self.symbol} 오더북 시퀀스 단절 (pu={event.prev_final_update_id}, last={self.last_update_id}), 재동기화")
+            self.synced = False
+            self.buffer.clear()
+            self.buffer.append(event)
+            return False
+
+    def apply_snapshot(self, snapshot):
+        """
+        REST 스냅샷(/fapi/v1/depth) 적용 후 버퍼 이벤트 재생
+
+        :return: False면 버퍼 이벤트와 연결되지 않아 스냅샷을 다시 받아야 함
+        """
+        with self.lock:
+            self.bids.clear()
+            self.asks.clear()
+            for price, qty in snapshot['bids']:
+                self.bids[float(price)] = float(qty)
+            for price, qty in snapshot['asks']:
+                self.asks[float(price)] = float(qty)
+            self.bid_prices = sorted(self.bids)
+            self.ask_prices = sorted(self.asks)
+            self.last_update_id = snapshot['lastUpdateId']
+            self.event_time = snapshot.get('E', 0)
+            self.transaction_time = snapshot.get('T', 0)
+            self.first_event = True
+            self.synced = True
+
+            buffered = list(self.buffer)
+            self.buffer.clear()
+            for event in buffered:
+                if not self._process(event):
+                    self.synced = False
+                    self.buffer.extend(buffered)
+                    return False
+            return True
+
+    def _process(self, event):
+        """시퀀스 검사 후 이벤트 적용 (lock 보유 상태에서 호출)"""
+        first_id, final_id = event.first_update_id, event.final_update_id
+        if self.first_event:
+            # 스냅샷보다 오래된 이벤트는 버림
+            if final_id < self.last_update_id:
+                return True
+            # 첫 이벤트는 U <= lastUpdateId <= u 이어야 함
+            if not first_id <= self.last_update_id <= final_id:
+                return False
+            self.first_event = False
+        elif event.prev_final_update_id != self.last_update_id:
+            return False
+
+        self._apply_levels(event.bids, self.bids, self.bid_prices)
+        self._apply_levels(event.asks, self.asks, self.ask_prices)
+        self.last_update_id = final_id
+        self.event_time = event.event_time
+        self.transaction_time = event.transaction_time
+        return True
+
+    @staticmethod
+    def _apply_levels(levels, book, prices):
+        # levels는 디코딩 단계에서 이미 float 변환됨
+        for price, qty in levels:
+            if qty == 0:
+                if book.pop(price, None) is not None:
+                    del prices[bisect.bisect_left(prices, price)]
+            else:
+                if price not in book:
+                    bisect.insort(prices, price)
+                book[price] = qty
+
+    # ------------------------------------------------------------------
+    # 조회 (호출 측에서 self.lock 보유 권장)
+    # ------------------------------------------------------------------
+    def best_bid(self):
+        """최우선 매수호가 (price, qty)"""
+        if not self.bid_prices:
+            return 0.0, 0.0
+        price = self.bid_prices[-1]
+        return price, self.bids[price]
+
+    def best_ask(self):
+        """최우선 매도호가 (price, qty)"""
+        if not self.ask_prices:
+            return 0.0, 0.0
+        price = self.ask_prices[0]
+        return price, self.asks[price]
+
+    def top_bids(self, levels):
+        """상위 n개 매수 레벨 [(price, qty)] (가격 내림차순)"""
+        prices = self.bid_prices[:-levels - 1:-1]
+        return list(zip(prices, map(self.bids.__getitem__, prices)))
+
+    def top_asks(self, levels):
+        """상위 n개 매도 레벨 [(price, qty)] (가격 오름차순)"""
+        prices = self.ask_prices[:levels]
+        return list(zip(prices, map(self.asks.__getitem__, prices)))
+
+    def depth_within(self, pct):
+        """
+        중간가 기준 ±pct 범위 내 매수/매도 누적 수량
+
+        :param pct: 비율 (0.01 = 1%)
+        :return: (bid_depth, ask_depth)
+        """
+        best_bid, _ = self.best_bid()
+        best_ask, _ = self.best_ask()
+        mid = (best_bid + best_ask) / 2
+        lo = bisect.bisect_left(self.bid_prices, mid * (1 - pct))
+        hi = bisect.bisect_right(self.bid_prices, mid)
+        bid_depth = sum(map(self.bids.__getitem__, self.bid_prices[lo:hi]))
+        lo = bisect.bisect_left(self.ask_prices, mid)
+        hi = bisect.bisect_right(self.ask_prices, mid * (1 + pct))
+        ask_depth = sum(map(self.asks.__getitem__, self.ask_prices[lo:hi]))
+        return bid_depth, ask_depth
+
+    def imbalance(self, levels):
+        """상위 n개 레벨 매수/매도 수량 불균형 (-1 ~ 1)"""
+        bid_volume = sum(q for _, q in self.top_bids(levels))
+        ask_volume = sum(q for _, q in self.top_asks(levels))
+        total = bid_volume + ask_volume
+        return (bid_volume - ask_volume) / total if total > 0 else 0.0
+
+    def snapshot(self, levels=20):
+        """depth20 메시지와 같은 형식의 dict (파일 기록용)"""
+        with self.lock:
+            return {
+                'e': 'depthUpdate',
+                'E': self.event_time,
+                'T': self.transaction_time,
+                's': self.symbol,
+                'u': self.last_update_id,
+                'b': [[p, q] for p, q in self.top_bids(levels)],
+                'a': [[p, q] for p, q in self.top_asks(levels)]
+            }
+
+
+class OrderBookManager:
+    """
+    심볼별 LocalOrderBook 관리 및 재동기화 처리
+    - 스냅샷 REST 호출은 웹소켓 콜백이 아닌 별도 스레드에서 수행
+    """
+    def __init__(self, client, snapshot_limit=1000):
+        self.client = client
+        self.snapshot_limit = snapshot_limit
+        self.books = {}
+        self.resyncing = set()
+        self.lock = threading.Lock()
+        self.on_snapshot = None  # on_snapshot(symbol, snapshot): 스냅샷 수신 알림 (스트림 기록용)
+
+    def get_book(self, symbol):
+        with self.lock:
+            if symbol not in self.books:
+                self.books[symbol] = LocalOrderBook(symbol)
+            return self.books[symbol]
+
+    def on_event(self, event):
+        """diff-depth 이벤트를 해당 심볼 오더북에 적용, 미동기화 상태면 스냅샷 요청"""
+        book = self.get_book(event.symbol)
+        book.on_event(event)
+        if not book.synced:
+            self._request_snapshot(book)
+        return book
+
+    def _request_snapshot(self, book):
+        with self.lock:
+            if book.symbol in self.resyncing:
+                return
+            self.resyncing.add(book.symbol)
+
+        def run():
+            try:
+                time.sleep(0.5)  # 스냅샷 이전 이벤트가 버퍼에 쌓일 시간 확보
+                while not book.synced:
+                    try:
+                        snapshot = self.client.futures_order_book(symbol=book.symbol, limit=self.snapshot_limit)
+                        if self.on_snapshot is not None:
+                            self.on_snapshot(book.symbol, snapshot)
+                        if book.apply_snapshot(snapshot):
+                            logger.info(f"{book.symbol} 로컬 오더북 동기화 완료 (lastUpdateId={snapshot['lastUpdateId']})")
+                            break
+                    except Exception as e:
+                        logger.error(f"{book.symbol} 오더북 스냅샷 요청 실패: {e}")
+                    time.sleep(1)
+            finally:
+                with self.lock:
+                    self.resyncing.discard(book.symbol)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.name = f"OrderBookResync-{book.symbol}"
+        thread.start()
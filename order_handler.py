@@ -1,10 +1,12 @@
-from binance.client import Client
+from exchange_client import create_client
 from binance.exceptions import BinanceAPIException
 from decimal import Decimal
 from data_handler import DataHandler
 from ws_manager import WebSocketManager
-from config import API_KEY, SECRET_KEY, TARGET_LEVERAGE, TRADE_RATE
+from config import TARGET_LEVERAGE, TRADE_RATE
 from logger import logger
+from latency import tracer
+from paper_exchange import PaperClient
 import threading
 import time
 from datetime import datetime, timedelta,timezone
@@ -12,7 +14,9 @@ from datetime import datetime, timedelta,timezone
 
 class OrderHandler:
     def __init__(self, data_handler,ws_manager):
-        self.client = Client(API_KEY, SECRET_KEY)
+        # 모의 거래면 주문/취소/조회를 PaperExchange로 (실제 주문 없음)
+        self.client = PaperClient(data_handler.paper) if data_handler.paper is not None else create_client()
+        self.order_delay = 1  # 주문 후 대기 (초), offline 평가 경로에서는 0
         self.data_handler = data_handler
         self.ws_manager = ws_manager
         self.lock = threading.Lock()
@@ -39,9 +43,16 @@ class OrderHandler:
     def calculate_order_amount(self, symbol):
         """주문 금액 계산 (기존 트레이드 레이트 적용)"""
         balance = float(self.data_handler.balance_data['wallet'])
-        price = self.data_handler.coin_data[symbol]['1m']['Close'].iloc[-1]
+        price = self.data_handler.coin_data[symbol]['1m'].last_close
         return round((balance * TRADE_RATE * TARGET_LEVERAGE) / price, 2)
 
+    def create_order(self, **params):
+        """futures_create_order + 주문 응답 지연 측정"""
+        sent = time.monotonic()
+        order = self.client.futures_create_order(**params)
+        tracer.on_order_ack(params['symbol'], order.get('orderId'), sent)
+        return order
+
     def get_order_by_order_id(self, symbol: str, order_id: int):
         """
         주어진 심볼과 주문 ID를 기반으로 Binance에서 주문 정보를 조회합니다.
@@ -55,7 +66,7 @@ class OrderHandler:
                 오류 발생 시 error 키가 포함된 dict가 반환됩니다.
         """
         try:
-            client = Client(API_KEY, SECRET_KEY)
+            client = create_client()
             # Binance API에서 주문 정보 조회 (주문 조회 엔드포인트 사용)
             order = self.client.get_order(symbol=symbol, orderId=order_id)
             return order
@@ -71,7 +82,7 @@ class OrderHandler:
         """롱 포지션 진입 (기존 longstart 함수 대체)"""
         try:
 
-            order = self.client.futures_create_order(
+            order = self.create_order(
                 symbol=symbol,
                 side='BUY',
                 type='LIMIT',
@@ -79,7 +90,7 @@ class OrderHandler:
                 price=signal['price'],
                 timeInForce='GTC'
             )
-            time.sleep(1)
+            time.sleep(self.order_delay)
 
             # 롱 진입 주문 완료 후 signal 정보를 그대로 전달하여 trailing stop 주문 설정
             # ts_order = self.set_trailing_stop(signal)
@@ -98,7 +109,7 @@ class OrderHandler:
             self.client.futures_cancel_order(symbol=symbol, orderId=order['orderId'])
 
         try:
-            order = self.client.futures_create_order(
+            order = self.create_order(
                 symbol=symbol,
                 side='SELL',
                 type='LIMIT',
@@ -106,7 +117,7 @@ class OrderHandler:
                 price=signal['price'],
                 timeInForce='GTC'
             )
-            time.sleep(1)
+            time.sleep(self.order_delay)
             # print(order)
 
         except Exception as e:
@@ -116,7 +127,7 @@ class OrderHandler:
     def enter_short(self, symbol, signal):
         """숏 포지션 진입 (기존 shortstart 함수 대체)"""
         try:
-            order = self.client.futures_create_order(
+            order = self.create_order(
                 symbol=symbol,
                 side='SELL',
                 type='LIMIT',
@@ -124,7 +135,7 @@ class OrderHandler:
                 price=signal['price'],
                 timeInForce='GTC'
             )
-            time.sleep(1)
+            time.sleep(self.order_delay)
             # 주문 완료 후 signal 정보를 그대로 전달하여 trailing stop 주문 설정
             # ts_order = self.set_trailing_stop(signal)
              # print(order)
@@ -140,7 +151,7 @@ class OrderHandler:
             print(f"Cancelling open order {order['orderId']}")
             self.client.futures_cancel_order(symbol=symbol, orderId=order['orderId'])
         try:
-            order = self.client.futures_create_order(
+            order = self.create_order(
                 symbol=symbol,
                 side='BUY',
                 type='LIMIT',
@@ -148,10 +159,10 @@ class OrderHandler:
                 price=signal['price'],
                 timeInForce='GTC'
             )
-            time.sleep(1)
+            time.sleep(self.order_delay)
             # print(order)
 
-            time.sleep(1)
+            time.sleep(self.order_delay)
         except Exception as e:
             logger.error(f"{symbol}exit_short {e}")
             return
@@ -178,7 +189,7 @@ class OrderHandler:
             # 현재 포지션 정보에 따라 주문 side 결정 (롱이면 SELL, 숏이면 BUY)
             side = 'SELL' if signal['action'] == 'enter_long' else 'BUY'
             
-            order = self.client.futures_create_order(
+            order = self.create_order(
                 symbol=symbol,
                 side=side,
                 type='TRAILING_STOP_MARKET',
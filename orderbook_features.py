@@ -0,0 +1,180 @@
+"""
+오더북 지표
+- 업데이트당 한 번 최우선 호가부터의 [(price, qty)] 레벨 리스트를 확보
+  (depth20은 디코딩된 리스트 그대로, 로컬 오더북은 상위 ORDERBOOK_LEVELS 레벨만 복사)
+- 전략이 읽는 지표(스프레드, 불균형, MPR, ±1% 깊이)와 마이크로프라이스는 업데이트마다 계산
+  (bisect 구간 경계 + map 합계, 20레벨에서는 NumPy 호출 고정 비용보다 내장 함수가 빠름)
+- 결과는 심볼별로 캐시되어 다음 depth 메시지가 도착할 때까지 재사용
+- 반환 dict는 기존 calculate_orderbook_indicators 키(BasicStrategy가 사용)를 그대로 포함
+"""
+import bisect
+from operator import itemgetter
+
+from config import ORDERBOOK_LEVELS
+from order_book import LocalOrderBook
+from stream_events import DepthEvent, decode_depth
+
+PRICE_DEPTH_PCT = 0.01  # bid_depth / ask_depth 기준 범위 (±1%)
+INF = float('inf')
+quantity_of = itemgetter(1)
+
+
+def depth_within(bids, asks, mid_price, pct):
+    """
+    중간가 기준 ±pct 범위 매수/매도 수량 합계
+
+    :param bids: [(price, qty)] 가격 내림차순, asks: 가격 오름차순
+    :return: (bid_depth, ask_depth) 소수 4자리 반올림
+    """
+    price_range = mid_price * pct
+    bid_start, bid_stop = bid_range(bids, mid_price, mid_price - price_range)
+    ask_start, ask_stop = ask_range(asks, mid_price, mid_price + price_range)
+    return (round(sum(map(quantity_of, bids[bid_start:bid_stop])), 4),
+            round(sum(map(quantity_of, asks[ask_start:ask_stop])), 4))
+
+
+def bid_range(bids, mid_price, low):
+    """low <= 가격 <= mid_price 인 매수 레벨의 [start, stop) (최우선 호가부터)"""
+    count = len(bids)
+    if not count:
+        return 0, 0
+    # 양 끝이 범위 안이면 bisect 생략 (depth20은 대부분 전체가 ±1% 안)
+    start = 0 if bids[0][0] <= mid_price else count - bisect.bisect_right(bids[::-1], (mid_price, INF))
+    stop = count if bids[-1][0] >= low else count - bisect.bisect_left(bids[::-1], (low,))
+    return start, stop
+
+
+def ask_range(asks, mid_price, high):
+    """mid_price <= 가격 <= high 인 매도 레벨의 [start, stop) (최우선 호가부터)"""
+    count = len(asks)
+    if not count:
+        return 0, 0
+    start = 0 if asks[0][0] >= mid_price else bisect.bisect_left(asks, (mid_price,))
+    stop = count if asks[-1][0] <= high else bisect.bisect_right(asks, (high, INF))
+    return start, stop
+
+
+class OrderBookSnapshot:
+    """한 depth 업데이트 시점의 호가 레벨과 계산된 지표"""
+    __slots__ = ('symbol', 'update_id', 'event_time', 'bids', 'asks', 'features')
+
+    def __init__(self, symbol, update_id, event_time, bids, asks):
+        self.symbol = symbol
+        self.update_id = update_id
+        self.event_time = event_time  # depth 이벤트 시각 (거래소 ms, bookTicker와 신선도 비교용)
+        self.bids = bids          # [(price, qty)] 가격 내림차순
+        self.asks = asks          # [(price, qty)] 가격 오름차순
+        self.features = None
+
+
+def compute_features(symbol, bids, asks, top_levels=None, depth=None):
+    """
+    호가 레벨로 오더북 지표 계산
+
+    :param bids: [(price, qty)] 매수 호가 (가격 내림차순)
+    :param asks: [(price, qty)] 매도 호가 (가격 오름차순)
+    :param top_levels: 누적 주문량/MPR/high_ask/low_bid 계산에 사용할 상위 레벨 수 (None이면 전체)
+    :param depth: 미리 계산한 ±1% (bid_depth, ask_depth) (None이면 bids/asks로 계산)
+    :return: 지표 dict
+    """
+    top_bids = bids if top_levels is None else bids[:top_levels]
+    top_asks = asks if top_levels is None else asks[:top_levels]
+    best_bid, best_bid_qty = bids[0] if bids else (0, 0.0)
+    best_ask, best_ask_qty = asks[0] if asks else (0, 0.0)
+
+    total_bid_volume = sum(map(quantity_of, top_bids))
+    total_ask_volume = sum(map(quantity_of, top_asks))
+    total_volume = total_bid_volume + total_ask_volume
+
+    mid_price = (best_bid + best_ask) / 2
+    bid_depth, ask_depth = depth if depth is not None else depth_within(bids, asks, mid_price, PRICE_DEPTH_PCT)
+
+    # 마이크로프라이스 - 최우선 호가 잔량으로 가중한 중간가 (잔량이 적은 쪽으로 가격이 움직일 가능성 반영)
+    best_volume = best_bid_qty + best_ask_qty
+    microprice = (best_bid * best_ask_qty + best_ask * best_bid_qty) / best_volume if best_volume > 0 else mid_price
+
+    return {
+        'symbol': symbol,
+        'high_ask': top_asks[-1][0] if top_asks else 0,
+        'low_bid': top_bids[-1][0] if top_bids else 0,
+        'spread': round(best_ask - best_bid, 6),
+        'order_imbalance': round((total_bid_volume - total_ask_volume) / total_volume if total_volume > 0 else 0, 4),
+        'bid_depth': bid_depth,
+        'ask_depth': ask_depth,
+        'mpr': round(total_bid_volume / total_volume, 4) if total_volume > 0 else 0.5,
+        'best_bid': best_bid,
+        'best_ask': best_ask,
+        'mid_price': mid_price,
+        'microprice': microprice,
+    }
+
+
+class OrderBookFeatures:
+    """
+    심볼별 오더북 지표 캐시
+    - DepthEvent(depth20)와 LocalOrderBook(diff) 모두 지원
+    - 업데이트 ID가 바뀌지 않았으면 이전 계산 결과를 그대로 반환
+    - 심볼 항목은 그 심볼을 평가하는 스레드만 교체하므로 잠금 없음 (dict 조회/대입은 GIL 하에서 원자적,
+      hits/misses는 참고용 통계)
+    """
+    def __init__(self, top_levels=ORDERBOOK_LEVELS):
+        self.top_levels = top_levels
+        self.cache = {}  # symbol -> OrderBookSnapshot
+        self.hits = 0
+        self.misses = 0
+
+    def features(self, orderbook):
+        """
+        지표 dict (calculate_orderbook_indicators 반환 형식 + 확장 키)
+
+        :return: dict 또는 오더북 미수신/동기화 중이면 "Error_State"
+        """
+        snapshot = self.snapshot(orderbook)
+        if snapshot is None:
+            return "Error_State"
+        return dict(snapshot.features)
+
+    def snapshot(self, orderbook):
+        """현재 업데이트의 OrderBookSnapshot (캐시 미스 시에만 계산)"""
+        if not isinstance(orderbook, DepthEvent):
+            if isinstance(orderbook, LocalOrderBook):
+                return self._local_snapshot(orderbook)
+            if orderbook is None:
+                return None
+            orderbook = decode_depth(orderbook)
+        key = (orderbook.final_update_id, orderbook.event_time)
+        cached = self._cached(orderbook.symbol, key)
+        if cached is not None:
+            return cached
+        # 디코딩된 레벨 리스트는 이후 바뀌지 않으므로 복사 없이 보관
+        snapshot = OrderBookSnapshot(orderbook.symbol, key, orderbook.event_time, orderbook.bids, orderbook.asks)
+        return self._compute(snapshot, None)
+
+    def _local_snapshot(self, book):
+        """로컬 오더북 상위 top_levels 레벨 + 전체 오더북 기준 ±1% 깊이 (전체 1000 레벨 변환 없음)"""
+        with book.lock:
+            if not book.synced or not book.bid_prices or not book.ask_prices:
+                return None
+            key = book.last_update_id
+            cached = self._cached(book.symbol, key)
+            if cached is not None:
+                return cached
+            bids = book.top_bids(self.top_levels)
+            asks = book.top_asks(self.top_levels)
+            bid_depth, ask_depth = book.depth_within(PRICE_DEPTH_PCT)
+        snapshot = OrderBookSnapshot(book.symbol, key, book.event_time, bids, asks)
+        return self._compute(snapshot, self.top_levels, (round(bid_depth, 4), round(ask_depth, 4)))
+
+    def _cached(self, symbol, key):
+        cached = self.cache.get(symbol)
+        if cached is not None and cached.update_id == key:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        return None
+
+    def _compute(self, snapshot, top_levels, depth=None):
+        snapshot.features = compute_features(snapshot.symbol, snapshot.bids, snapshot.asks, top_levels, depth)
+        snapshot.features['event_time'] = snapshot.event_time
+        self.cache[snapshot.symbol] = snapshot
+        return snapshot
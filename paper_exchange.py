@@ -0,0 +1,716 @@
+"""
+모의 거래 (실제 주문 없이 주문/포지션/잔고를 메모리에서 관리)
+- PaperExchange: 심볼별 대기 주문을 가격 인덱스 큐 (가격 -> FIFO deque + 가격 오름차순 리스트, LocalOrderBook과 같은 구성)로 보관
+  - depth 갱신: 상대편 최우선 호가가 지정가에 닿으면 지정가로 전량 체결, 지정가 레벨 수량이 줄면 앞 대기열도 같이 줄임
+  - aggTrade: 지정가를 관통한 체결이면 전량, 지정가와 같은 가격 체결이면 앞 대기열을 소진한 나머지만 체결
+  - 새 주문이 상대편 호가와 겹치면 현재 오더북 레벨을 따라 테이커 체결 (오더북 수량은 차감하지 않음), 나머지는 대기
+  - 대기 주문이 없는 심볼의 시세 갱신은 dict 조회 한 번으로 끝남 (심볼이 많아도 부하는 주문이 있는 심볼만)
+  - 주문이 있는 심볼도 체결/대기열 갱신은 닿은 가격 레벨만 확인 (가격 레벨마다 앞 대기열 상한을 두어 줄일 주문이 없는 레벨은 건너뜀)
+- 체결/주문 상태는 유저 데이터 스트림과 같은 형식의 ORDER_TRADE_UPDATE/ACCOUNT_UPDATE 메시지로
+  WebSocketManager._on_account_update에 전달 (실거래와 같은 처리 경로, JSON 변환은 전달 스레드에서)
+- 단방향(One-way) 포지션, 교차 증거금, USDT 잔고만 지원
+- PaperClient: OrderHandler가 쓰는 python-binance 주문/계정 메서드 (DataHandler.paper가 있으면 OrderHandler가 사용)
+"""
+import bisect
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+
+from config import TARGET_LEVERAGE, PAPER_BALANCE, PAPER_MAKER_FEE, PAPER_TAKER_FEE, PAPER_FILL_LOG
+from logger import logger
+from order_book import LocalOrderBook
+
+EPSILON = 1e-9  # 잔량 0 판정 (부동소수 오차)
+MAX_CLOSED_ORDERS = 10000  # 주문 조회용으로 보관하는 종료 주문 수
+TIME_IN_FORCE = ('GTC', 'IOC', 'GTX')
+
+
+class PaperOrderError(Exception):
+    """주문 거부 (바이낸스 오류 코드/메시지 형식)"""
+    def __init__(self, code, message):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+
+def _number(value):
+    """이벤트/응답 숫자 필드 (바이낸스처럼 문자열)"""
+    return str(round(float(value), 8))
+
+
+def book_lock(book):
+    """LocalOrderBook은 자체 lock, DepthEvent(depth20 스냅샷)는 바뀌지 않으므로 lock 없음"""
+    return book.lock if isinstance(book, LocalOrderBook) else nullcontext()
+
+
+def book_levels(book, bids):
+    """오더북 한쪽 레벨 [(price, qty)] iterator (최우선부터, LocalOrderBook은 lock 보유 상태에서 호출)"""
+    if isinstance(book, LocalOrderBook):
+        if bids:
+            return ((price, book.bids[price]) for price in reversed(book.bid_prices))
+        return ((price, book.asks[price]) for price in book.ask_prices)
+    return iter(book.bids if bids else book.asks)
+
+
+def best_prices(book):
+    """(최우선 매수호가, 최우선 매도호가), 없는 쪽은 0"""
+    if isinstance(book, LocalOrderBook):
+        return book.best_bid()[0], book.best_ask()[0]
+    return (book.bids[0][0] if book.bids else 0.0), (book.asks[0][0] if book.asks else 0.0)
+
+
+def visible_levels(book, bids):
+    """
+    한쪽 호가 레벨 수량 조회용 ({price: qty}, 보이는 범위 끝 가격 (매수는 최저, 매도는 최고)), 호가가 없으면 (None, None)
+    (범위 안에 없는 가격은 수량 0, 범위 밖은 알 수 없음)
+    """
+    if isinstance(book, LocalOrderBook):
+        prices, levels = (book.bid_prices, book.bids) if bids else (book.ask_prices, book.asks)
+        if not prices:
+            return None, None
+        return levels, prices[0] if bids else prices[-1]
+    levels = book.bids if bids else book.asks
+    if not levels:
+        return None, None
+    return dict(levels), levels[-1][0]
+
+
+class PaperOrder:
+    __slots__ = ('order_id', 'client_order_id', 'symbol', 'side', 'type', 'time_in_force', 'price', 'quantity',
+                 'filled', 'cost', 'commission', 'realized', 'ahead', 'status', 'time', 'update_time')
+
+    def __init__(self, order_id, client_order_id, symbol, side, order_type, time_in_force, price, quantity, time_ms):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.symbol = symbol
+        self.side = side
+        self.type = order_type
+        self.time_in_force = time_in_force
+        self.price = price
+        self.quantity = quantity
+        self.filled = 0.0
+        self.cost = 0.0         # 체결 금액 합 (평균 체결가 계산용)
+        self.commission = 0.0
+        self.realized = 0.0
+        self.ahead = 0.0        # 같은 가격 레벨에서 앞에 있는 수량
+        self.status = 'NEW'
+        self.time = time_ms
+        self.update_time = time_ms
+
+    @property
+    def buy(self):
+        return self.side == 'BUY'
+
+    @property
+    def remaining(self):
+        return self.quantity - self.filled
+
+    @property
+    def avg_price(self):
+        return self.cost / self.filled if self.filled else 0.0
+
+    def as_dict(self):
+        """futures_create_order / futures_get_open_orders 응답 형식"""
+        return {
+            'orderId': self.order_id, 'clientOrderId': self.client_order_id, 'symbol': self.symbol,
+            'side': self.side, 'type': self.type, 'origType': self.type, 'timeInForce': self.time_in_force,
+            'status': self.status, 'price': _number(self.price), 'avgPrice': _number(self.avg_price),
+            'origQty': _number(self.quantity), 'executedQty': _number(self.filled), 'cumQuote': _number(self.cost),
+            'reduceOnly': False, 'positionSide': 'BOTH', 'time': self.time, 'updateTime': self.update_time,
+        }
+
+
+class OrderQueue:
+    """한쪽 방향 대기 주문 (가격 -> FIFO deque, 가격 오름차순 리스트)"""
+    def __init__(self, buy):
+        self.buy = buy
+        self.levels = {}    # {price: deque[PaperOrder]}
+        self.prices = []    # 오름차순 (최우선 매수 = 마지막 원소, 최우선 매도 = 첫 원소)
+        self.ahead = {}     # {price: 레벨 주문들의 앞 대기열 상한} (호가 수량이 이 이상이면 줄일 주문 없음)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def add(self, order):
+        level = self.levels.get(order.price)
+        if level is None:
+            level = self.levels[order.price] = deque()
+            bisect.insort(self.prices, order.price)
+            self.ahead[order.price] = order.ahead
+        elif order.ahead > self.ahead[order.price]:
+            self.ahead[order.price] = order.ahead
+        level.append(order)
+
+    def remove(self, order):
+        level = self.levels[order.price]
+        level.remove(order)
+        if not level:
+            del self.levels[order.price]
+            del self.ahead[order.price]
+            del self.prices[bisect.bisect_left(self.prices, order.price)]
+
+    def clamp(self, price, quantity):
+        """호가 레벨 수량이 quantity로 줄었을 때 레벨 주문의 앞 대기열을 quantity 이하로"""
+        if self.ahead[price] > quantity:
+            for order in self.levels[price]:
+                if order.ahead > quantity:
+                    order.ahead = quantity
+            self.ahead[price] = quantity
+
+    def through(self, price, inclusive=True):
+        """
+        상대편 가격 price에 체결되는 대기 가격 (우선순위 순서)
+
+        :param inclusive: True면 같은 가격 포함 (매수는 price 이상, 매도는 price 이하), False면 관통한 가격만
+        """
+        if self.buy:
+            start = bisect.bisect_left(self.prices, price) if inclusive else bisect.bisect_right(self.prices, price)
+            return self.prices[start:][::-1]
+        end = bisect.bisect_right(self.prices, price) if inclusive else bisect.bisect_left(self.prices, price)
+        return self.prices[:end]
+
+
+class PaperPosition:
+    """단방향 포지션 (amount: 롱 +, 숏 -)"""
+    __slots__ = ('amount', 'entry_price', 'open_fees')
+
+    def __init__(self):
+        self.amount = 0.0
+        self.entry_price = 0.0
+        self.open_fees = 0.0    # 남은 포지션 진입 수수료 (손익분기 가격 계산용)
+
+    def apply(self, quantity, price, fee):
+        """
+        체결 반영
+
+        :param quantity: 부호 있는 체결 수량 (매수 +, 매도 -)
+        :return: 실현 손익 (수수료 제외)
+        """
+        if self.amount * quantity >= 0:  # 신규/추가 진입
+            size = abs(self.amount) + abs(quantity)
+            self.entry_price = (abs(self.amount) * self.entry_price + abs(quantity) * price) / size
+            self.amount = round(self.amount + quantity, 10)
+            self.open_fees += fee
+            return 0.0
+        closing = min(abs(quantity), abs(self.amount))
+        direction = 1.0 if self.amount > 0 else -1.0
+        realized = closing * (price - self.entry_price) * direction
+        self.open_fees *= 1 - closing / abs(self.amount)
+        self.amount = round(self.amount - closing * direction, 10)
+        opening = abs(quantity) - closing
+        if abs(self.amount) <= EPSILON:
+            self.amount = self.entry_price = self.open_fees = 0.0
+        if opening > EPSILON:  # 반대 방향으로 전환
+            self.amount = round(-direction * opening, 10)
+            self.entry_price = price
+            self.open_fees = fee * opening / abs(quantity)
+        return realized
+
+    def breakeven_price(self):
+        return self.entry_price + self.open_fees / self.amount if self.amount else 0.0
+
+    def unrealized(self, mark):
+        return self.amount * (mark - self.entry_price) if self.amount else 0.0
+
+
+class PaperExchange:
+    def __init__(self, orderbook_data, balance=PAPER_BALANCE, maker_fee=PAPER_MAKER_FEE, taker_fee=PAPER_TAKER_FEE,
+                 log_fills=PAPER_FILL_LOG):
+        """
+        :param orderbook_data: DataHandler.orderbook_data (심볼 -> LocalOrderBook 또는 DepthEvent), 테이커 체결/대기열/평가 기준
+        :param log_fills: 체결마다 로그 기록 (종료 시 요약은 항상 기록)
+        """
+        self.orderbook_data = orderbook_data
+        self.wallet = float(balance)
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.log_fills = log_fills
+        self.lock = threading.Lock()
+        self.queues = {}                # symbol -> (매수 OrderQueue, 매도 OrderQueue)
+        self.orders = {}                # order_id -> 미체결 PaperOrder
+        self.closed = OrderedDict()     # order_id -> 종료된 PaperOrder (futures_get_order 조회용)
+        self.positions = {}             # symbol -> PaperPosition
+        self.leverage = {}              # symbol -> 레버리지 (없으면 TARGET_LEVERAGE)
+        self.marks = {}                 # symbol -> 마지막 체결가 (오더북이 없을 때 평가 기준)
+        self.order_margin = 0.0         # 대기 주문 증거금 합 (주문 접수/체결/취소 시 갱신)
+        self.order_ids = itertools.count(1)
+        self.trade_ids = itertools.count(1)
+        self.clock = 0                  # 마지막 시세 이벤트 시각 (ms, 재생 중에는 기록 시각 기준)
+        self.stats = {'orders': 0, 'fills': 0, 'maker_fills': 0, 'volume': 0.0, 'fees': 0.0, 'realized': 0.0}
+        self.on_event = None            # callback(message): 유저 데이터 스트림 메시지 (JSON 문자열)
+        self.events = queue.Queue()     # 미전달 이벤트 dict (전달 스레드에서 JSON 변환)
+        self.stop_event = threading.Event()
+        self.thread = None
+        logger.system(f"PaperExchange 시작 (모의 거래, 잔고 {self.wallet:.2f} USDT)")
+
+    def attach(self, ws_manager):
+        """
+        WebSocketManager 연결: depth/aggTrade 갱신으로 체결 판정, 계정 이벤트는 _on_account_update로 전달
+        (체결 알림/거래 기록 파일은 실거래 기록과 섞이지 않도록 끔)
+        """
+        ws_manager.add_listener(self.on_market_update)
+        ws_manager.trade_listeners.append(self.on_trade)
+        ws_manager.trade_alerts = False
+        self.on_event = lambda message: ws_manager._on_account_update(None, message)
+
+    def start(self):
+        """계정 이벤트 전달 스레드 시작 (시작하지 않으면 주문/시세 처리한 스레드에서 바로 전달)"""
+        def run():
+            while not self.stop_event.is_set():
+                try:
+                    event = self.events.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                self._deliver(event)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.name = "PaperExchangeThread"
+        self.thread = thread
+        thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        logger.info(f"모의 거래 종료: {format_summary(self.summary())}")
+
+    # ------------------------------------------------------------------
+    # 주문 API (PaperClient에서 호출)
+    # ------------------------------------------------------------------
+    def create_order(self, symbol, side, type, quantity, price=None, timeInForce='GTC', newClientOrderId=None, **params):
+        """LIMIT(GTC/IOC/GTX) / MARKET 주문 (겹치는 호가는 바로 체결, 남은 GTC 수량은 대기)"""
+        side, order_type = side.upper(), type.upper()
+        if side not in ('BUY', 'SELL'):
+            raise PaperOrderError(-1117, "Invalid side.")
+        if order_type not in ('LIMIT', 'MARKET'):
+            raise PaperOrderError(-1116, "Invalid orderType.")
+        quantity = float(quantity)
+        if quantity <= 0:
+            raise PaperOrderError(-4003, "Quantity less than or equal to zero.")
+        if order_type == 'LIMIT':
+            if price is None or float(price) <= 0:
+                raise PaperOrderError(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+            if timeInForce not in TIME_IN_FORCE:
+                raise PaperOrderError(-1115, "Invalid timeInForce.")
+        buy = side == 'BUY'
+
+        messages = []
+        with self.lock:
+            book = self._book(symbol)
+            if order_type == 'MARKET':
+                with book_lock(book):
+                    reference = best_prices(book)[1 if buy else 0] if book is not None else 0.0
+                if not reference:
+                    raise PaperOrderError(-1000, f"No order book for {symbol}.")
+                limit = float('inf') if buy else 0.0
+            else:
+                reference = limit = float(price)
+            self._check_margin(symbol, buy, quantity, reference)
+
+            # 상대편 호가 중 지정가와 겹치는 레벨 (주문 수량만큼) + 같은 편 지정가 레벨 수량 (대기열 앞 수량)
+            crossing, ahead = [], None
+            if book is not None:
+                with book_lock(book):
+                    total = 0.0
+                    for level_price, qty in book_levels(book, not buy):
+                        if total >= quantity or ((level_price > limit) if buy else (level_price < limit)):
+                            break
+                        crossing.append((level_price, qty))
+                        total += qty
+                    levels, edge = visible_levels(book, buy)
+                    if order_type == 'LIMIT' and levels is not None and ((limit >= edge) if buy else (limit <= edge)):
+                        ahead = levels.get(limit, 0.0)
+
+            now = self._now()
+            order_id = next(self.order_ids)
+            order = PaperOrder(order_id, newClientOrderId or f"paper_{order_id}", symbol, side, order_type,
+                               timeInForce if order_type == 'LIMIT' else 'GTC',
+                               limit if order_type == 'LIMIT' else 0.0, quantity, now)
+            self.stats['orders'] += 1
+            messages.append(self._order_update(order, 'NEW', now))
+            if crossing and order.time_in_force == 'GTX':
+                order.status = 'EXPIRED'  # post-only: 겹치면 체결하지 않고 만료
+            else:
+                for level_price, qty in crossing:
+                    messages += self._fill(order, min(qty, order.remaining), level_price, False, now)
+                    if order.status == 'FILLED':
+                        break
+                if order.status != 'FILLED':
+                    if order_type == 'MARKET' or order.time_in_force == 'IOC':
+                        order.status = 'EXPIRED'
+                    else:
+                        order.ahead = ahead or 0.0
+                        self._queues(symbol)[0 if buy else 1].add(order)
+                        self.orders[order_id] = order
+                        self._reserve(order, order.remaining)
+            if order.status == 'EXPIRED':
+                messages.append(self._order_update(order, 'EXPIRED', now))
+                self._close(order)
+            response = order.as_dict()
+        self._publish(messages)
+        return response
+
+    def cancel_order(self, symbol, order_id=None, client_order_id=None):
+        messages = []
+        with self.lock:
+            order = self._find(symbol, order_id, client_order_id, open_only=True)
+            if order is None:
+                raise PaperOrderError(-2011, "Unknown order sent.")
+            self._unqueue(order)
+            order.status = 'CANCELED'
+            order.update_time = self._now()
+            messages.append(self._order_update(order, 'CANCELED', order.update_time))
+            self._close(order)
+            response = order.as_dict()
+        self._publish(messages)
+        return response
+
+    def cancel_all(self, symbol):
+        messages = []
+        with self.lock:
+            now = self._now()
+            for order in [order for order in self.orders.values() if order.symbol == symbol]:
+                self._unqueue(order)
+                order.status = 'CANCELED'
+                order.update_time = now
+                messages.append(self._order_update(order, 'CANCELED', now))
+                self._close(order)
+        self._publish(messages)
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+    def open_orders(self, symbol=None):
+        with self.lock:
+            return [order.as_dict() for order in self.orders.values() if symbol is None or order.symbol == symbol]
+
+    def get_order(self, symbol, order_id=None, client_order_id=None):
+        with self.lock:
+            order = self._find(symbol, order_id, client_order_id)
+            if order is None:
+                raise PaperOrderError(-2013, "Order does not exist.")
+            return order.as_dict()
+
+    def change_leverage(self, symbol, leverage):
+        with self.lock:
+            self.leverage[symbol] = int(leverage)
+            self.order_margin = sum(order.remaining * order.price / self._leverage(order.symbol)
+                                    for order in self.orders.values())
+            now = self._now()
+            event = {'e': 'ACCOUNT_CONFIG_UPDATE', 'E': now, 'T': now, 'ac': {'s': symbol, 'l': int(leverage)}}
+        self._publish([event])
+        return {'symbol': symbol, 'leverage': int(leverage), 'maxNotionalValue': 'INF'}
+
+    # ------------------------------------------------------------------
+    # 계정 조회 (REST 응답 형식)
+    # ------------------------------------------------------------------
+    def account_info(self):
+        """/fapi/v2/account 형식 (DataHandler.get_account_info 대체)"""
+        with self.lock:
+            unrealized = margin = 0.0
+            positions = []
+            for symbol in sorted(set(self.positions) | set(self.leverage)):
+                position = self.positions.get(symbol) or PaperPosition()
+                leverage = self._leverage(symbol)
+                profit = position.unrealized(self._mark(symbol, position)) if position.amount else 0.0
+                unrealized += profit
+                margin += abs(position.amount) * position.entry_price / leverage
+                positions.append({
+                    'symbol': symbol, 'positionAmt': _number(position.amount), 'entryPrice': _number(position.entry_price),
+                    'breakEvenPrice': _number(position.breakeven_price()), 'leverage': str(leverage),
+                    'unrealizedProfit': _number(profit), 'positionSide': 'BOTH',
+                })
+            available = self.wallet + unrealized - margin - self.order_margin
+            balance = {
+                'walletBalance': _number(self.wallet), 'unrealizedProfit': _number(unrealized),
+                'marginBalance': _number(self.wallet + unrealized), 'availableBalance': _number(available),
+                'initialMargin': _number(margin + self.order_margin),
+            }
+            return {
+                'totalWalletBalance': balance['walletBalance'], 'totalUnrealizedProfit': balance['unrealizedProfit'],
+                'totalMarginBalance': balance['marginBalance'], 'availableBalance': balance['availableBalance'],
+                'totalInitialMargin': balance['initialMargin'],
+                'assets': [dict(balance, asset='USDT')], 'positions': positions,
+            }
+
+    def position_risk(self, symbol=None):
+        """/fapi/v2/positionRisk 형식 (DataHandler.position_data_update 대체)"""
+        with self.lock:
+            symbols = [symbol] if symbol else sorted(set(self.positions) | set(self.leverage))
+            risks = []
+            for name in symbols:
+                position = self.positions.get(name) or PaperPosition()
+                mark = self._mark(name, position)
+                risks.append({
+                    'symbol': name, 'positionAmt': _number(position.amount), 'entryPrice': _number(position.entry_price),
+                    'breakEvenPrice': _number(position.breakeven_price()), 'markPrice': _number(mark),
+                    'unRealizedProfit': _number(position.unrealized(mark)), 'leverage': str(self._leverage(name)),
+                    'marginType': 'cross', 'positionSide': 'BOTH',
+                })
+            return risks
+
+    def summary(self):
+        with self.lock:
+            unrealized = sum(position.unrealized(self._mark(symbol, position))
+                             for symbol, position in self.positions.items())
+            return dict(self.stats, wallet=self.wallet, unrealized=unrealized, open_orders=len(self.orders),
+                        positions=sum(1 for position in self.positions.values() if position.amount))
+
+    # ------------------------------------------------------------------
+    # 시세 갱신 -> 대기 주문 체결
+    # ------------------------------------------------------------------
+    def on_market_update(self, symbol, kind):
+        """WebSocketManager 알림 (depth 갱신 시 최우선 호가 교차 체결 + 앞 대기열 갱신)"""
+        if kind != 'orderbook':
+            return
+        queues = self.queues.get(symbol)
+        if queues is None or not (queues[0] or queues[1]):
+            return
+        messages = []
+        with self.lock:
+            book = self._book(symbol)
+            if book is None:
+                return
+            with book_lock(book):
+                self.clock = max(self.clock, book.event_time)
+                now = self._now()
+                bid, ask = best_prices(book)
+                for resting, opposite in ((queues[0], ask), (queues[1], bid)):
+                    if opposite:
+                        for price in resting.through(opposite):
+                            for order in list(resting.levels[price]):
+                                messages += self._fill(order, order.remaining, price, True, now)
+                    # 보이는 범위 안의 대기 가격만 앞 대기열 축소 (레벨 수량보다 많이 남아 있을 수 없음)
+                    levels, edge = visible_levels(book, resting.buy)
+                    if levels is not None:
+                        for price in resting.through(edge):
+                            resting.clamp(price, levels.get(price, 0.0))
+        self._publish(messages)
+
+    def on_trade(self, event):
+        """aggTrade (stream_events.AggTradeEvent): 관통 체결은 전량, 같은 가격 체결은 앞 대기열 소진 후 나머지"""
+        queues = self.queues.get(event.symbol)
+        if queues is None or not (queues[0] or queues[1]):
+            return
+        messages = []
+        with self.lock:
+            self.clock = max(self.clock, event.trade_time)
+            now = self._now()
+            resting = queues[0] if event.buyer_maker else queues[1]  # 매도 테이커면 매수 대기 주문 체결
+            for price in resting.through(event.price, inclusive=False):
+                for order in list(resting.levels[price]):
+                    messages += self._fill(order, order.remaining, price, True, now)
+            # 체결 수량은 레벨의 모든 주문 앞 대기열을 지나감 (앞 대기열은 주문마다 같은 호가 레벨에서 잰 값이라 한 번만 차감)
+            # 앞 대기열을 넘어선 수량은 접수 순서대로, 먼저 체결된 내 주문 수량을 빼고 나눔
+            level = resting.levels.get(event.price)
+            if level:
+                volume, taken = event.quantity, 0.0
+                for order in list(level):
+                    available = volume - order.ahead - taken
+                    order.ahead = max(order.ahead - volume, 0.0)
+                    if available > EPSILON:
+                        take = min(available, order.remaining)
+                        messages += self._fill(order, take, order.price, True, now)
+                        taken += take
+                if event.price in resting.ahead:
+                    resting.ahead[event.price] = max(resting.ahead[event.price] - volume, 0.0)
+        self._publish(messages)
+
+    # ------------------------------------------------------------------
+    # 내부 (self.lock 보유 상태에서 호출)
+    # ------------------------------------------------------------------
+    def _now(self):
+        return self.clock or int(time.time() * 1000)
+
+    def _book(self, symbol):
+        book = self.orderbook_data.get(symbol)
+        if book is None or (isinstance(book, LocalOrderBook) and not book.synced):
+            return None
+        return book
+
+    def _queues(self, symbol):
+        queues = self.queues.get(symbol)
+        if queues is None:
+            queues = self.queues[symbol] = (OrderQueue(True), OrderQueue(False))
+        return queues
+
+    def _leverage(self, symbol):
+        return self.leverage.get(symbol, TARGET_LEVERAGE)
+
+    def _mark(self, symbol, position):
+        """평가 가격 (오더북 중간가, 없으면 마지막 체결가/진입가)"""
+        book = self._book(symbol)
+        if book is not None:
+            with book_lock(book):
+                bid, ask = best_prices(book)
+            if bid and ask:
+                return (bid + ask) / 2
+        return self.marks.get(symbol, position.entry_price)
+
+    def _reserve(self, order, quantity):
+        """대기 주문 증거금 합 갱신 (주문 접수 +, 체결/취소 -)"""
+        self.order_margin += quantity * order.price / self._leverage(order.symbol)
+
+    def _position_totals(self):
+        """(보유 포지션 미실현 손익 합, 포지션 증거금 합)"""
+        unrealized = margin = 0.0
+        for symbol, position in self.positions.items():
+            if position.amount:
+                unrealized += position.unrealized(self._mark(symbol, position))
+                margin += abs(position.amount) * position.entry_price / self._leverage(symbol)
+        return unrealized, margin
+
+    def _check_margin(self, symbol, buy, quantity, price):
+        """포지션을 늘리는 수량의 증거금이 가용 잔고보다 크면 거부 (줄이는 수량은 검사하지 않음)"""
+        position = self.positions.get(symbol)
+        reducible = abs(position.amount) if position is not None and (position.amount < 0) == buy else 0.0
+        opening = max(quantity - reducible, 0.0)
+        if opening <= 0:
+            return
+        unrealized, margin = self._position_totals()
+        available = self.wallet + unrealized - margin - self.order_margin
+        if opening * price / self._leverage(symbol) > available + EPSILON:
+            raise PaperOrderError(-2019, "Margin is insufficient.")
+
+    def _fill(self, order, quantity, price, maker, now):
+        """
+        체결 반영 (포지션/잔고/주문 상태), 전량 체결되면 대기 큐에서 제거
+
+        :return: [ACCOUNT_UPDATE, ORDER_TRADE_UPDATE] 이벤트 dict
+        """
+        if quantity <= EPSILON:
+            return []
+        if order.order_id in self.orders:
+            self._reserve(order, -quantity)
+        fee = quantity * price * (self.maker_fee if maker else self.taker_fee)
+        position = self.positions.get(order.symbol)
+        if position is None:
+            position = self.positions[order.symbol] = PaperPosition()
+        realized = position.apply(quantity if order.buy else -quantity, price, fee)
+        self.wallet += realized - fee
+        self.marks[order.symbol] = price
+
+        order.filled += quantity
+        if order.remaining <= EPSILON * max(order.quantity, 1.0):
+            order.filled = order.quantity
+        order.cost += quantity * price
+        order.commission += fee
+        order.realized += realized
+        order.update_time = now
+        order.status = 'FILLED' if order.filled >= order.quantity else 'PARTIALLY_FILLED'
+        if order.status == 'FILLED':
+            self._unqueue(order)
+            self._close(order)
+
+        self.stats['fills'] += 1
+        self.stats['maker_fills'] += int(maker)
+        self.stats['volume'] += quantity * price
+        self.stats['fees'] += fee
+        self.stats['realized'] += realized
+        if self.log_fills:
+            logger.info(f"[모의] {order.symbol} {order.side} {quantity:g} @ {price:g} ({'maker' if maker else 'taker'}, "
+                        f"{order.status}) 실현 {realized:.4f} 수수료 {fee:.4f} 지갑 {self.wallet:.4f}")
+
+        account = {'e': 'ACCOUNT_UPDATE', 'E': now, 'T': now, 'a': {
+            'm': 'ORDER',
+            'B': [{'a': 'USDT', 'wb': _number(self.wallet), 'cw': _number(self.wallet), 'bc': _number(realized - fee)}],
+            'P': [{'s': order.symbol, 'pa': _number(position.amount), 'ep': _number(position.entry_price),
+                   'bep': _number(position.breakeven_price()), 'cr': _number(self.stats['realized']),
+                   'up': _number(position.unrealized(price)), 'mt': 'cross', 'iw': '0', 'ps': 'BOTH'}],
+        }}
+        return [account, self._order_update(order, 'TRADE', now, quantity, price, fee, realized, maker)]
+
+    def _order_update(self, order, execution, now, last_qty=0.0, last_price=0.0, fee=0.0, realized=0.0, maker=False):
+        """ORDER_TRADE_UPDATE 이벤트 dict (execution: NEW/TRADE/CANCELED/EXPIRED)"""
+        return {'e': 'ORDER_TRADE_UPDATE', 'E': now, 'T': now, 'o': {
+            's': order.symbol, 'c': order.client_order_id, 'S': order.side, 'o': order.type, 'f': order.time_in_force,
+            'q': _number(order.quantity), 'p': _number(order.price), 'ap': _number(order.avg_price), 'sp': '0',
+            'x': execution, 'X': order.status, 'i': order.order_id, 'l': _number(last_qty), 'z': _number(order.filled),
+            'L': _number(last_price), 'N': 'USDT', 'n': _number(fee), 'T': now,
+            't': next(self.trade_ids) if execution == 'TRADE' else 0, 'b': '0', 'a': '0', 'm': maker, 'R': False,
+            'wt': 'CONTRACT_PRICE', 'ot': order.type, 'ps': 'BOTH', 'cp': False, 'rp': _number(realized),
+        }}
+
+    def _unqueue(self, order):
+        if self.orders.pop(order.order_id, None) is not None:
+            self._reserve(order, -order.remaining)
+            self.queues[order.symbol][0 if order.buy else 1].remove(order)
+            if not self.orders:
+                self.order_margin = 0.0  # 부동소수 누적 오차 정리
+
+    def _close(self, order):
+        self.closed[order.order_id] = order
+        if len(self.closed) > MAX_CLOSED_ORDERS:
+            self.closed.popitem(last=False)
+
+    def _find(self, symbol, order_id=None, client_order_id=None, open_only=False):
+        candidates = [self.orders] if open_only else [self.orders, self.closed]
+        for orders in candidates:
+            if order_id is not None:
+                order = orders.get(int(order_id))
+                if order is not None and order.symbol == symbol:
+                    return order
+            elif client_order_id is not None:
+                for order in orders.values():
+                    if order.symbol == symbol and order.client_order_id == client_order_id:
+                        return order
+        return None
+
+    # ------------------------------------------------------------------
+    # 이벤트 전달 (lock 밖에서 호출: _on_account_update가 계정 조회로 다시 들어올 수 있음)
+    # ------------------------------------------------------------------
+    def _publish(self, events):
+        for event in events:
+            if self.thread is not None:
+                self.events.put(event)
+            else:
+                self._deliver(event)
+
+    def _deliver(self, event):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(json.dumps(event))
+        except Exception as e:
+            logger.error(f"모의 거래 계정 이벤트 처리 실패: {e}")
+
+
+class PaperClient:
+    """OrderHandler가 쓰는 python-binance 주문/계정 메서드 (실제 요청 없이 PaperExchange로 처리)"""
+    def __init__(self, exchange):
+        self.exchange = exchange
+
+    def futures_create_order(self, **params):
+        return self.exchange.create_order(**params)
+
+    def futures_get_open_orders(self, symbol=None, **params):
+        return self.exchange.open_orders(symbol)
+
+    def futures_cancel_order(self, symbol, orderId=None, origClientOrderId=None, **params):
+        return self.exchange.cancel_order(symbol, orderId, origClientOrderId)
+
+    def futures_cancel_all_open_orders(self, symbol, **params):
+        return self.exchange.cancel_all(symbol)
+
+    def futures_get_order(self, symbol, orderId=None, origClientOrderId=None, **params):
+        return self.exchange.get_order(symbol, orderId, origClientOrderId)
+
+    get_order = futures_get_order  # OrderHandler.get_order_by_order_id
+
+    def futures_change_leverage(self, symbol, leverage, **params):
+        return self.exchange.change_leverage(symbol, leverage)
+
+    def futures_account(self, **params):
+        return self.exchange.account_info()
+
+    def futures_position_information(self, symbol=None, **params):
+        return self.exchange.position_risk(symbol)
+
+
+def format_summary(summary):
+    return (f"주문 {summary['orders']:,}건 체결 {summary['fills']:,}건 (maker {summary['maker_fills']:,}), "
+            f"거래대금 {summary['volume']:,.2f} 실현 {summary['realized']:.4f} 수수료 {summary['fees']:.4f} "
+            f"미실현 {summary['unrealized']:.4f} 지갑 {summary['wallet']:.4f} USDT, "
+            f"대기 주문 {summary['open_orders']} 보유 포지션 {summary['positions']}")
@@ -0,0 +1,224 @@
+"""
+BasicStrategy 임계값 병렬 탐색
+- 후보: strategy_params.grid(격자) 또는 random_params(무작위), 후보 x 심볼마다 backtest vector 엔진 실행
+- 지표는 부모 프로세스에서 심볼별로 한 번만 계산해서 공유 메모리(multiprocessing.shared_memory)에
+  (컬럼 x 봉) float64 행렬로 올리고, 워커는 복사 없이 ndarray로 붙여서 사용
+- 워커(ProcessPoolExecutor, 기본 CPU 코어 수)는 임계값과 무관한 배열(오더북 대용값, 조건 파생 배열, 시장 상태)을
+  심볼별로 처음 한 번만 계산하고 이후 후보에서 재사용 (Backtester.precompute)
+- 결과는 SweepResult 테이블 (후보 x 심볼마다 한 행, 같은 실행은 sweep_id로 묶음), --top으로 후보별 집계 조회
+
+사용법:
+  python param_sweep.py HBARUSDT XRPUSDT --strategy macd_rsi --grid 3 [--names rsi_lower,rsi_upper] [--workers 8]
+  python param_sweep.py HBARUSDT --strategy bollinger_rsi --random 500 [--seed 1] [--regime] [--db]
+  python param_sweep.py --top 20 [--sweep <sweep_id>] [--sort return_pct]
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import Backtester, csv_path, frame_arrays, load_csv, load_db, strategy_name
+from strategy_params import PARAM_SPACE, grid, random_params
+
+SORT_KEYS = ('return_pct', 'realized', 'win_rate', 'max_drawdown', 'trades')
+
+_worker = {}  # 워커 프로세스 상태 (attach에서 채움)
+
+
+def share_arrays(arrays):
+    """
+    {컬럼: ndarray} -> 공유 메모리 행렬
+
+    :return: (SharedMemory, 워커에서 붙일 때 쓰는 명세 {'name', 'columns', 'bars'})
+    """
+    columns = [column for column in arrays if column != 'Open time']
+    bars = len(arrays['Close'])
+    memory = shared_memory.SharedMemory(create=True, size=max(len(columns) * bars * 8, 1))
+    matrix = np.ndarray((len(columns), bars), dtype=np.float64, buffer=memory.buf)
+    for row, column in enumerate(columns):
+        matrix[row] = arrays[column]
+    return memory, {'name': memory.name, 'columns': columns, 'bars': bars}
+
+
+def attach(specs, options):
+    """
+    워커 초기화: 심볼별 공유 메모리를 ndarray 뷰로 붙임
+
+    :param specs: {symbol: share_arrays 명세}
+    :param options: Backtester 생성 인자
+    """
+    _worker['backtester'] = Backtester(**options)
+    _worker['memory'] = []  # 참조 유지 (닫히면 버퍼 해제)
+    _worker['arrays'] = {}
+    _worker['cache'] = {}
+    for symbol, spec in specs.items():
+        memory = shared_memory.SharedMemory(name=spec['name'])
+        _worker['memory'].append(memory)
+        matrix = np.ndarray((len(spec['columns']), spec['bars']), dtype=np.float64, buffer=memory.buf)
+        _worker['arrays'][symbol] = {column: matrix[row] for row, column in enumerate(spec['columns'])}
+
+
+def evaluate(task):
+    """(후보 번호, 심볼, {전략: 파라미터}) -> (후보 번호, 심볼, 요약)"""
+    index, symbol, params = task
+    backtester = _worker['backtester']
+    arrays = _worker['arrays'][symbol]
+    cache = _worker['cache'].get(symbol)
+    if cache is None:
+        cache = _worker['cache'][symbol] = backtester.precompute(arrays)
+    backtester.params = params
+    return index, symbol, backtester.run_arrays(arrays, symbol, cache).summary()
+
+
+def load_arrays(symbols, backtester, interval='1m', db=False):
+    """심볼별 캔들 -> 지표 배열 (부모 프로세스에서 한 번)"""
+    arrays = {}
+    for symbol in symbols:
+        df = load_db(symbol, interval) if db else load_csv(csv_path(symbol, interval))
+        t0 = time.perf_counter()
+        arrays[symbol] = frame_arrays(backtester.prepare(df))
+        print(f"{symbol} {interval} {len(df):,}봉, 지표 계산 {time.perf_counter() - t0:.2f}s")
+    return arrays
+
+
+def sweep(arrays, strategy, candidates, regime=False, orderbook='candle', workers=None):
+    """
+    후보 x 심볼 병렬 실행
+
+    :param arrays: {symbol: 지표 배열}
+    :param strategy: 탐색 대상 전략 (regime이 아니면 이 전략만 실행)
+    :param candidates: [{파라미터: 값}]
+    :param workers: 프로세스 수 (None이면 CPU 코어 수, 1이면 현재 프로세스에서 실행)
+    :return: [(후보 번호, 심볼, 요약)]
+    """
+    workers = workers or os.cpu_count() or 1
+    options = dict(strategies=None if regime else [strategy], regime=regime, orderbook=orderbook)
+    tasks = [(index, symbol, {strategy: candidate}) for index, candidate in enumerate(candidates) for symbol in arrays]
+    memories, specs = [], {}
+    try:
+        for symbol, columns in arrays.items():
+            memory, specs[symbol] = share_arrays(columns)
+            memories.append(memory)
+        if workers == 1:
+            attach(specs, options)
+            return list(map(evaluate, tasks))
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach, initargs=(specs, options)) as executor:
+            return list(executor.map(evaluate, tasks, chunksize=chunksize))
+    finally:
+        _worker.clear()
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+
+def save_results(sweep_id, strategy, candidates, results, regime, orderbook):
+    from models import Session, SweepResult
+
+    session = Session()
+    try:
+        session.add_all([SweepResult(
+            sweep_id=sweep_id, symbol=symbol, strategy=strategy, params=json.dumps(candidates[index], sort_keys=True),
+            regime=int(regime), orderbook=orderbook, bars=summary['bars'], trades=summary['trades'],
+            win_rate=summary['win_rate'], realized=summary['realized'], fees=summary['fees'],
+            return_pct=summary['return'] * 100, max_drawdown=summary['max_drawdown'] * 100,
+        ) for index, symbol, summary in results])
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def top_results(sweep_id=None, count=20, sort='return_pct'):
+    """
+    후보 파라미터별 심볼 합산 순위 (sweep_id가 없으면 마지막 탐색)
+
+    :return: [{'sweep_id', 'strategy', 'params', 'symbols', 'trades', 'win_rate', 'realized', 'return_pct', 'max_drawdown'}]
+             (수익률/승률은 심볼 평균, MDD는 심볼 중 최대, max_drawdown 정렬은 오름차순)
+    """
+    from models import Session, SweepResult
+
+    session = Session()
+    try:
+        if sweep_id is None:
+            latest = session.query(SweepResult).order_by(SweepResult.id.desc()).first()
+            if latest is None:
+                return []
+            sweep_id = latest.sweep_id
+        rows = session.query(SweepResult).filter_by(sweep_id=sweep_id).all()
+    finally:
+        session.close()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.params, []).append(row)
+    ranked = [{
+        'sweep_id': sweep_id,
+        'strategy': group[0].strategy,
+        'params': json.loads(params),
+        'symbols': len(group),
+        'trades': sum(row.trades for row in group),
+        'win_rate': float(np.mean([row.win_rate for row in group])),
+        'realized': sum(row.realized for row in group),
+        'return_pct': float(np.mean([row.return_pct for row in group])),
+        'max_drawdown': max(row.max_drawdown for row in group),
+    } for params, group in groups.items()]
+    ranked.sort(key=lambda item: item[sort], reverse=sort != 'max_drawdown')
+    return ranked[:count]
+
+
+def format_result(item):
+    params = ' '.join(f"{name}={value:g}" for name, value in item['params'].items())
+    return (f"수익률 {item['return_pct']:>8.2f}% MDD {item['max_drawdown']:>6.2f}% 승률 {item['win_rate']:>6.1%} "
+            f"체결 {item['trades']:>6,} 실현 {item['realized']:>10.2f} ({item['symbols']}심볼) {params}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BasicStrategy 임계값 병렬 탐색")
+    parser.add_argument('symbols', nargs='*', help="심볼 (data/klines_<심볼>_<tf>.csv 또는 --db)")
+    parser.add_argument('--strategy', help="탐색할 전략 (예: macd_rsi)")
+    parser.add_argument('--names', help="탐색할 파라미터 (쉼표 구분, 기본: 전략의 전체 파라미터)")
+    parser.add_argument('--grid', type=int, help="격자 탐색 (파라미터별 값 개수)")
+    parser.add_argument('--random', type=int, help="무작위 탐색 (후보 수)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--interval', default='1m', help="캔들 타임프레임")
+    parser.add_argument('--db', action='store_true', help="CSV 대신 CoinData 테이블에서 읽기")
+    parser.add_argument('--regime', action='store_true', help="봉마다 시장 상태(1m)로 strategy_map 전략 선택")
+    parser.add_argument('--orderbook', default='candle', choices=('candle', 'neutral'), help="오더북 대용값")
+    parser.add_argument('--workers', type=int, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--top', type=int, default=20, help="출력할 상위 후보 수")
+    parser.add_argument('--sweep', help="조회할 sweep_id (기본: 마지막 탐색)")
+    parser.add_argument('--sort', default='return_pct', choices=SORT_KEYS, help="정렬 기준")
+    args = parser.parse_args()
+
+    if args.symbols:
+        if not args.strategy or not (args.grid or args.random):
+            parser.error("탐색에는 --strategy와 --grid 또는 --random이 필요합니다")
+        strategy = strategy_name(args.strategy)
+        if strategy not in PARAM_SPACE:
+            parser.error(f"알 수 없는 전략: {args.strategy}")
+        names = [name.strip() for name in args.names.split(',')] if args.names else None
+        try:
+            candidates = (grid(strategy, args.grid, names) if args.grid
+                          else random_params(strategy, args.random, args.seed, names))
+        except KeyError as e:
+            parser.error(e.args[0])
+        arrays = load_arrays(args.symbols, Backtester(), args.interval, args.db)
+        sweep_id = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{strategy.strip('_').replace('_strategy', '')}"
+        workers = args.workers or os.cpu_count() or 1
+        print(f"{sweep_id}: 후보 {len(candidates):,}개 x {len(arrays)}심볼, 프로세스 {workers}개")
+        t0 = time.perf_counter()
+        results = sweep(arrays, strategy, candidates, args.regime, args.orderbook, workers)
+        print(f"실행 {len(results):,}건 {time.perf_counter() - t0:.2f}s")
+        save_results(sweep_id, strategy, candidates, results, args.regime, args.orderbook)
+        args.sweep = sweep_id
+
+    for item in top_results(args.sweep, args.top, args.sort):
+        print(format_result(item))
@@ -0,0 +1,69 @@
+"""
+로컬 리샘플링 동등성 검사
+- data/klines_<symbol>_1m.csv를 캔들 하나씩 CandleResampler에 넣어 상위 타임프레임 생성
+  (각 1m 캔들은 시가로 먼저 들어온 뒤 최종값으로 갱신되어 진행 중 캔들 경로도 거침)
+- 증분 결과 == 한 번에 변환한 resample_rows 결과 (거래량은 합산 순서에 따른 상대 오차 1e-12까지 허용)
+- klines_<symbol>_15m.csv(거래소 15m 캔들)가 있으면 겹치는 완성 구간의 OHLC가 같은지, 거래량 차이가 1e-6 이하인지 확인
+
+사용법: python resample_parity.py [1m csv 경로 ...]
+"""
+import glob
+import os
+import sys
+
+import numpy as np
+
+from candle_store import CandleRingBuffer
+from indicator_parity import load_klines
+from resampler import CandleResampler, resample_rows, timeframe_ms
+
+TIMEFRAMES = ('5m', '15m', '1h')
+
+
+def load_rows(path):
+    df = load_klines(path)
+    return CandleRingBuffer.from_frame(df, len(df)).view()
+
+
+def replay(rows, timeframe):
+    resampler = CandleResampler(timeframe, len(rows) + 1)
+    for open_time, open_, high, low, close, volume in rows:
+        resampler.update(int(open_time), open_, open_, open_, open_, 0.0)
+        resampler.update(int(open_time), open_, high, low, close, volume)
+    return resampler.candles.view()
+
+
+def check(path):
+    rows = load_rows(path)
+    messages = []
+    ok = True
+    for timeframe in TIMEFRAMES:
+        incremental = replay(rows, timeframe)
+        batch = resample_rows(rows, timeframe_ms(timeframe), drop_partial=False)
+        # OHLC는 정확히 같아야 하고, 거래량은 합산 순서 차이만 허용
+        same = (incremental.shape == batch.shape and np.array_equal(incremental[:, :5], batch[:, :5])
+                and np.allclose(incremental[:, 5], batch[:, 5], rtol=1e-12, atol=0))
+        ok &= same
+        messages.append(f"{timeframe} {len(batch)}개 {'일치' if same else '불일치'}")
+
+    exchange_path = path.replace('_1m.csv', '_15m.csv')
+    if os.path.exists(exchange_path):
+        exchange = load_rows(exchange_path)
+        local = resample_rows(rows, timeframe_ms('15m'))[:-1]  # 마지막 구간은 진행 중일 수 있음
+        common, local_i, exchange_i = np.intersect1d(local[:, 0], exchange[:, 0], return_indices=True)
+        ohlc_same = np.array_equal(local[local_i, 1:5], exchange[exchange_i, 1:5])
+        volume_diff = np.max(np.abs(local[local_i, 5] - exchange[exchange_i, 5])) if len(common) else 0.0
+        same = ohlc_same and volume_diff <= 1e-6
+        ok &= same
+        messages.append(f"거래소 15m {len(common)}개 {'일치' if same else f'불일치 (거래량 최대 차이 {volume_diff:.3g})'}")
+    return ok, ", ".join(messages)
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "klines_*_1m.csv")))
+    failed = 0
+    for path in paths:
+        ok, message = check(path)
+        failed += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {os.path.basename(path)}: {message}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,144 @@
+"""
+1분 캔들 -> 상위 타임프레임 로컬 리샘플링
+- 상위 타임프레임 캔들을 별도 @kline_<tf> 스트림/REST 없이 1m 스트림에서 증분으로 생성
+- 구간 경계는 UTC epoch 기준 정렬 (바이낸스 kline open time과 동일: 15m은 :00/:15/:30/:45, 1h는 정시, 1d는 UTC 0시)
+- 진행 중인 1m 캔들 갱신은 진행 중인 상위 캔들에 바로 반영
+  (마감된 1m 캔들 누적값 + 현재 1m 캔들 값으로 상위 캔들을 다시 합성)
+"""
+import numpy as np
+
+from candle_store import CandleRingBuffer
+
+MINUTE_MS = 60_000
+UNIT_MS = {'s': 1000, 'm': MINUTE_MS, 'h': 60 * MINUTE_MS, 'd': 24 * 60 * MINUTE_MS}
+
+
+def timeframe_ms(timeframe):
+    """'5s' / '15m' / '1h' / '1d' -> 밀리초"""
+    return int(timeframe[:-1]) * UNIT_MS[timeframe[-1]]
+
+
+def resample_rows(rows, period_ms, drop_partial=True):
+    """
+    1m 캔들 배열을 상위 타임프레임으로 한 번에 변환 (초기 구성용)
+
+    :param rows: (n, 6) [open time(UTC ms), Open, High, Low, Close, Volume], open time 오름차순
+    :param period_ms: 상위 타임프레임 길이 (ms)
+    :param drop_partial: 데이터가 구간 중간부터 시작하면 첫 구간 제외
+    :return: (m, 6) 상위 타임프레임 캔들 배열
+    """
+    if len(rows) == 0:
+        return np.empty((0, 6))
+    times = rows[:, 0].astype('int64')
+    buckets = times - times % period_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rows)] - 1
+    bars = np.column_stack((
+        buckets[starts].astype(float),
+        rows[starts, 1],
+        np.maximum.reduceat(rows[:, 2], starts),
+        np.minimum.reduceat(rows[:, 3], starts),
+        rows[ends, 4],
+        np.add.reduceat(rows[:, 5], starts),
+    ))
+    if drop_partial and times[0] != buckets[0]:
+        bars = bars[1:]
+    return bars
+
+
+class CandleResampler:
+    """
+    한 심볼의 1m 캔들로 상위 타임프레임 CandleRingBuffer를 유지
+    - update(): 1m kline 이벤트마다 호출, O(1)
+    - 현재 구간 상태: 마감된 1m 캔들 누적 (open, high, low, volume) + 마지막 1m 캔들
+    """
+    def __init__(self, timeframe, capacity):
+        self.timeframe = timeframe
+        self.period = timeframe_ms(timeframe)
+        self.candles = CandleRingBuffer(capacity)
+        self.bucket = None          # 현재 구간 시작 시각 (UTC ms)
+        self.committed = None       # 현재 구간에서 마감된 1m 캔들 누적 [open, high, low, volume]
+        self.minute_time = None     # 마지막 1m 캔들 open time
+        self.minute = None          # 마지막 1m 캔들 (open, high, low, close, volume)
+
+    def backfill(self, rows):
+        """
+        과거 1m 캔들로 상위 타임프레임 버퍼를 채우고 증분 상태를 마지막 구간에 맞춤
+
+        :param rows: (n, 6) 1m 캔들 배열 (CandleRingBuffer.view() 형식)
+        """
+        bars = resample_rows(rows, self.period)
+        self.candles.clear()
+        for bar in bars[-self.candles.capacity:]:
+            self.candles.append(bar)
+        self._sync(rows, bars)
+
+    def splice(self, rows):
+        """
+        누락 구간을 메운 1m 캔들로 해당 구간의 상위 캔들을 다시 만들어 끼워 넣음 (백필용)
+
+        :param rows: (n, 6) 구간 경계부터 현재까지 빠짐없이 이어진 1m 캔들 배열
+        :return: 다시 만든 상위 캔들 배열
+        """
+        bars = resample_rows(rows, self.period, drop_partial=False)
+        self.candles.splice(bars)
+        self._sync(rows, bars)
+        return bars
+
+    def _sync(self, rows, bars):
+        """마지막 구간의 1m 캔들로 증분 상태 재구성"""
+        self.bucket = self.committed = self.minute_time = self.minute = None
+        if not len(bars):
+            return
+        # 마지막 구간의 1m 캔들 중 마지막 하나는 진행 중일 수 있으므로 누적에서 제외
+        times = rows[:, 0].astype('int64')
+        self.bucket = int(bars[-1, 0])
+        in_bucket = rows[times >= self.bucket]
+        self.minute_time = int(in_bucket[-1, 0])
+        self.minute = tuple(in_bucket[-1, 1:6].tolist())
+        if len(in_bucket) > 1:
+            closed = in_bucket[:-1]
+            self.committed = [closed[0, 1], closed[:, 2].max(), closed[:, 3].min(), closed[:, 5].sum()]
+
+    def update(self, open_time_ms, open_, high, low, close, volume):
+        """
+        1m 캔들 추가/갱신 반영
+
+        :return: 갱신된 상위 캔들 (open time, open, high, low, close, volume) 또는 None (과거 1m 캔들 무시)
+        """
+        if self.minute_time is not None:
+            if open_time_ms < self.minute_time:
+                return None
+            if open_time_ms > self.minute_time:
+                self._commit_minute()
+        bucket = open_time_ms - open_time_ms % self.period
+        if bucket != self.bucket:
+            self.bucket = bucket
+            self.committed = None
+        self.minute_time = open_time_ms
+        self.minute = (open_, high, low, close, volume)
+
+        if self.committed is None:
+            bar = (bucket, open_, high, low, close, volume)
+        else:
+            c_open, c_high, c_low, c_volume = self.committed
+            bar = (bucket, c_open, max(c_high, high), min(c_low, low), close, c_volume + volume)
+        self.candles.upsert(*bar)
+        return bar
+
+    def is_closing(self, open_time_ms):
+        """이 1m 캔들이 현재 상위 구간의 마지막 1분인지 (1m 마감 = 상위 캔들 마감)"""
+        return (open_time_ms + MINUTE_MS) % self.period == 0
+
+    def _commit_minute(self):
+        """마지막 1m 캔들을 마감으로 보고 현재 구간 누적에 더함"""
+        if self.minute is None:
+            return
+        open_, high, low, _, volume = self.minute
+        if self.committed is None:
+            self.committed = [open_, high, low, volume]
+        else:
+            committed = self.committed
+            committed[1] = max(committed[1], high)
+            committed[2] = min(committed[2], low)
+            committed[3] += volume
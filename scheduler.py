@@ -0,0 +1,101 @@
+import threading
+import time
+
+from logger import logger
+
+
+class EvaluationScheduler:
+    """
+    심볼별 이벤트 기반 평가 스케줄러
+    - notify(symbol): 캔들 마감/오더북 갱신 시 해당 심볼 평가 예약
+    - 병합(coalescing): 평가 전까지 들어온 알림은 한 번의 평가로 합쳐짐
+    - 같은 심볼은 min_interval 초 이내에 다시 평가하지 않음 (전역 sleep 대신 심볼별 간격)
+    - 한 심볼은 동시에 하나의 작업 스레드에서만 평가됨
+    - evaluate_batch가 주어지면 평가 가능한 심볼을 모두 모아 evaluate_batch(symbols)로 한 번에 넘김
+      (캔들 마감처럼 여러 심볼이 동시에 갱신될 때 지표를 심볼 묶음 단위로 계산)
+    """
+    def __init__(self, evaluate, min_interval=1.0, workers=1, evaluate_batch=None):
+        self.evaluate = evaluate
+        self.evaluate_batch = evaluate_batch
+        self.min_interval = min_interval
+        self.workers = workers
+        self.pending = {}       # {symbol: 첫 알림 시각}
+        self.running = set()    # 평가 중인 심볼
+        self.last_run = {}      # {symbol: 마지막 평가 시작 시각}
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.coalesced = 0      # 병합된 알림 수 (통계)
+        self.evaluations = 0
+
+    def notify(self, symbol, kind=None):
+        """평가 예약 (웹소켓 콜백에서 호출, 즉시 반환)"""
+        with self.condition:
+            if symbol in self.pending:
+                self.coalesced += 1
+                return
+            self.pending[symbol] = time.monotonic()
+            self.condition.notify()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.name = f"EvaluationWorker-{i}"
+            thread.start()
+            self.threads.append(thread)
+        logger.system(f"이벤트 기반 평가 스케줄러 시작 (작업 스레드 {self.workers}개, 최소 간격 {self.min_interval}s)")
+
+    def stop(self):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.threads = []
+
+    def _ready_symbols(self):
+        """
+        지금 평가 가능한 심볼을 오래 기다린 순서로 반환 (condition 보유 상태에서 호출)
+
+        :return: (symbols, 다음 평가 가능까지 대기 시간 또는 None)
+        """
+        now = time.monotonic()
+        ready, wait = [], None
+        for candidate, queued_at in self.pending.items():
+            if candidate in self.running:
+                continue
+            due = self.last_run.get(candidate, 0.0) + self.min_interval
+            if due <= now:
+                ready.append((queued_at, candidate))
+            elif wait is None or due - now < wait:
+                wait = due - now
+        return [symbol for _, symbol in sorted(ready)], wait
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            with self.condition:
+                symbols, wait = self._ready_symbols()
+                if not symbols:
+                    self.condition.wait(wait)
+                    continue
+                if self.evaluate_batch is None:
+                    symbols = symbols[:1]
+                now = time.monotonic()
+                for symbol in symbols:
+                    del self.pending[symbol]
+                    self.running.add(symbol)
+                    self.last_run[symbol] = now
+            try:
+                if self.evaluate_batch is None:
+                    self.evaluate(symbols[0])
+                else:
+                    self.evaluate_batch(symbols)
+                self.evaluations += len(symbols)
+            except Exception as e:
+                logger.error(f"{', '.join(symbols)} 평가 실패: {e}")
+            finally:
+                with self.condition:
+                    self.running.difference_update(symbols)
+                    # 평가 중 들어온 알림이 있으면 다른 작업 스레드가 처리할 수 있도록 깨움
+                    if self.pending:
+                        self.condition.notify()
@@ -0,0 +1,153 @@
+"""
+BasicStrategy 전략별 임계값
+- PARAM_SPACE: {전략: {파라미터: (기본값, 최소, 최대)}}, 탐색 범위는 여기에서만 관리
+- 기본값은 기존 하드코딩 값과 같음 (params와 config.STRATEGY_PARAMS가 없으면 동작 변화 없음)
+- 실행 중인 봇은 config.STRATEGY_PARAMS로 탐색 결과 적용 (strategy_params()에서 기본값 위에 덮어씀)
+- 기본값이 정수인 파라미터는 탐색 값도 정수
+"""
+import itertools
+
+import numpy as np
+
+from config import STRATEGY_PARAMS
+
+PARAM_SPACE = {
+    '_volume_breakout_strategy': {
+        'adx_threshold': (25, 20, 30),
+        'volume_ratio': (1.5, 1.2, 2.0),     # 거래량 > 20봉 평균 x
+        'mpr_long': (0.6, 0.55, 0.7),        # 롱 진입 MPR 하한
+        'mpr_short': (0.45, 0.4, 0.5),       # 숏 진입 MPR 상한
+        'imbalance': (0.2, 0.1, 0.3),        # 진입 호가 불균형 기준 (롱 > +, 숏 < -)
+        'exit_long_mpr': (0.4, 0.35, 0.45),
+        'exit_short_mpr': (0.55, 0.5, 0.6),
+        'atr_ratio': (2.0, 1.5, 3.0),        # 변동성 안정/급등 기준 (ATR 대 14봉 평균)
+    },
+    '_trend_momentum_strategy': {
+        'adx_threshold_strong': (25, 20, 27),  # Strong_Trend_Up 상태 ADX 기준
+        'adx_threshold': (22, 20, 27),
+        'atr_ratio': (1.5, 1.2, 2.0),
+        'mpr_long': (0.55, 0.5, 0.6),
+        'mpr_short': (0.45, 0.4, 0.5),
+        'depth_ratio': (1.2, 1.0, 1.5),      # 호가 깊이 우세 배수
+        'exit_long_mpr': (0.45, 0.35, 0.45),
+        'exit_short_mpr': (0.55, 0.5, 0.6),
+        'exit_atr_ratio': (2.0, 1.5, 3.0),   # 청산 변동성 급등 기준
+    },
+    '_macd_rsi_strategy': {
+        'rsi_lower': (45, 30, 45),
+        'rsi_upper': (55, 55, 70),
+        'rsi_min_lower': (35, 25, 40),       # 최근 7~2봉 RSI 최소값 기준 (롱)
+        'rsi_min_upper': (65, 60, 75),       # (숏)
+        'mpr_long': (0.55, 0.5, 0.6),        # 롱 진입/숏 청산 MPR 하한
+        'mpr_short': (0.45, 0.4, 0.5),       # 숏 진입/롱 청산 MPR 상한
+        'signal_rate': (10, 5, 20),          # MACD-신호선 차이 비율 (%)
+    },
+    '_bollinger_rsi_strategy': {
+        'rsi_lower': (35, 30, 40),
+        'rsi_upper': (65, 60, 70),
+        'mpr_long': (0.55, 0.5, 0.6),
+        'mpr_short': (0.45, 0.4, 0.5),
+        'imbalance': (0.2, 0.1, 0.3),
+        'atr_ratio': (1.5, 1.2, 2.0),
+        'exit_long_mpr': (0.5, 0.45, 0.55),
+        'exit_short_mpr': (0.5, 0.45, 0.55),
+        'exit_atr_ratio': (2.0, 1.5, 3.0),
+    },
+    '_atr_trend_follow_strategy': {
+        'adx_threshold': (32, 30, 35),
+        'atr_threshold': (1.4, 1.3, 1.5),
+        'depth_ratio': (1.8, 1.5, 2.2),      # 호가 깊이 우세 배수
+        'mpr_long': (0.55, 0.5, 0.6),        # 롱 진입/숏 청산 MPR 하한
+        'mpr_short': (0.45, 0.4, 0.5),       # 숏 진입/롱 청산 MPR 상한
+        'exit_atr_ratio': (2.5, 2.0, 3.0),   # 청산/긴급 청산 변동성 급등 기준
+    },
+    '_rsi_divergence_strategy': {
+        'adx_threshold': (25, 20, 30),
+        'rsi_lower': (30, 25, 35),
+        'rsi_upper': (70, 65, 75),
+        'mpr_long': (0.5, 0.45, 0.55),
+        'mpr_short': (0.45, 0.4, 0.5),
+        'depth_ratio': (1.5, 1.2, 2.0),
+        'atr_ratio': (1.5, 1.2, 2.0),
+        'exit_long_mpr': (0.4, 0.35, 0.45),
+        'exit_short_mpr': (0.55, 0.5, 0.6),
+        'exit_atr_ratio': (2.0, 1.5, 3.0),
+    },
+}
+
+DEFAULT_STRATEGY_PARAMS = {strategy: {name: spec[0] for name, spec in space.items()}
+                           for strategy, space in PARAM_SPACE.items()}
+
+
+def strategy_key(name):
+    """'macd_rsi' | '_macd_rsi_strategy' -> '_macd_rsi_strategy'"""
+    name = name.strip()
+    return name if name.startswith('_') else f"_{name}_strategy"
+
+
+def strategy_params(overrides=None):
+    """
+    기본값 -> config.STRATEGY_PARAMS -> overrides 순서로 덮어쓴 전체 파라미터
+
+    :param overrides: {전략: {파라미터: 값}} (전략 이름은 'macd_rsi'/'_macd_rsi_strategy' 모두 가능)
+    :raises KeyError: 알 수 없는 전략/파라미터 이름
+    """
+    params = {strategy: dict(values) for strategy, values in DEFAULT_STRATEGY_PARAMS.items()}
+    for layer in (STRATEGY_PARAMS, overrides or {}):
+        for strategy, values in layer.items():
+            strategy = strategy_key(strategy)
+            if strategy not in params:
+                raise KeyError(f"알 수 없는 전략 {strategy}")
+            for name, value in values.items():
+                if name not in params[strategy]:
+                    raise KeyError(f"{strategy}: 알 수 없는 파라미터 {name}")
+                params[strategy][name] = value
+    return params
+
+
+def _cast(default, value):
+    return int(round(value)) if isinstance(default, int) else round(float(value), 4)
+
+
+def _space(strategy, names=None):
+    """
+    탐색할 파라미터의 (기본값, 최소, 최대)
+
+    :raises KeyError: PARAM_SPACE에 없는 파라미터 이름 (오타면 기본값만 탐색하게 되므로)
+    """
+    space = PARAM_SPACE[strategy]
+    if names is None:
+        return space
+    unknown = [name for name in names if name not in space]
+    if unknown:
+        raise KeyError(f"{strategy}: 알 수 없는 파라미터 {', '.join(unknown)}")
+    return {name: spec for name, spec in space.items() if name in names}
+
+
+def grid(strategy, steps=3, names=None):
+    """
+    격자 탐색 후보
+
+    :param steps: 파라미터별 값 개수 (최소~최대 균등 분할, 정수 파라미터는 중복 제거)
+    :param names: 탐색할 파라미터 (None이면 전체, 나머지는 strategy_params 값)
+    :return: [{파라미터: 값}]
+    :raises KeyError: 알 수 없는 파라미터 이름
+    """
+    space = _space(strategy, names)
+    axes = []
+    for name, (default, low, high) in space.items():
+        values = sorted({_cast(default, value) for value in np.linspace(low, high, steps)})
+        axes.append([(name, value) for value in values])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+
+def random_params(strategy, count, seed=0, names=None):
+    """
+    무작위 탐색 후보 (범위 내 균등 분포)
+
+    :raises KeyError: 알 수 없는 파라미터 이름
+    """
+    rng = np.random.default_rng(seed)
+    space = _space(strategy, names)
+    return [{name: _cast(default, rng.uniform(low, high)) for name, (default, low, high) in space.items()}
+            for _ in range(count)]
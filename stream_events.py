@@ -0,0 +1,240 @@
+"""
+웹소켓 스트림 이벤트 디코딩
+- 이벤트 종류별로 __slots__ 기반 레코드를 만들고 숫자 필드는 여기서 한 번만 float/int 변환
+- orjson이 설치되어 있으면 더 빠른 JSON 파서를 사용 (없으면 표준 json)
+"""
+try:
+    import orjson
+
+    def loads(message):
+        return orjson.loads(message)
+
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    import json
+
+    loads = json.loads
+    JSON_BACKEND = 'json'
+
+
+class KlineEvent:
+    """<symbol>@kline_<interval> 이벤트"""
+    __slots__ = ('symbol', 'event_time', 'interval', 'open_time', 'close_time',
+                 'open', 'high', 'low', 'close', 'volume', 'closed')
+
+    def __init__(self, symbol, event_time, interval, open_time, close_time,
+                 open, high, low, close, volume, closed):
+        self.symbol = symbol
+        self.event_time = event_time
+        self.interval = interval
+        self.open_time = open_time
+        self.close_time = close_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.closed = closed
+
+
+class DepthEvent:
+    """
+    depth 이벤트 (<symbol>@depth20@500ms 부분 스냅샷, <symbol>@depth@100ms diff 공용)
+    - bids / asks: [(price, qty)] float 튜플 리스트
+    """
+    __slots__ = ('symbol', 'event_time', 'transaction_time', 'first_update_id',
+                 'final_update_id', 'prev_final_update_id', 'bids', 'asks')
+
+    def __init__(self, symbol, event_time, transaction_time, first_update_id,
+                 final_update_id, prev_final_update_id, bids, asks):
+        self.symbol = symbol
+        self.event_time = event_time
+        self.transaction_time = transaction_time
+        self.first_update_id = first_update_id
+        self.final_update_id = final_update_id
+        self.prev_final_update_id = prev_final_update_id
+        self.bids = bids
+        self.asks = asks
+
+    def as_dict(self):
+        """원본 depth 메시지와 같은 키 구성 (파일 기록용)"""
+        return {
+            'e': 'depthUpdate', 'E': self.event_time, 'T': self.transaction_time, 's': self.symbol,
+            'U': self.first_update_id, 'u': self.final_update_id, 'pu': self.prev_final_update_id,
+            'b': [list(level) for level in self.bids], 'a': [list(level) for level in self.asks]
+        }
+
+
+class AggTradeEvent:
+    """<symbol>@aggTrade 이벤트 (buyer_maker=True면 테이커가 매도)"""
+    __slots__ = ('symbol', 'event_time', 'trade_id', 'price', 'quantity', 'trade_time', 'buyer_maker')
+
+    def __init__(self, symbol, event_time, trade_id, price, quantity, trade_time, buyer_maker):
+        self.symbol = symbol
+        self.event_time = event_time
+        self.trade_id = trade_id
+        self.price = price
+        self.quantity = quantity
+        self.trade_time = trade_time
+        self.buyer_maker = buyer_maker
+
+
+class BookTickerEvent:
+    """<symbol>@bookTicker 이벤트 (최우선 매수/매도 호가, 변경 즉시 전송)"""
+    __slots__ = ('symbol', 'update_id', 'event_time', 'transaction_time', 'bid', 'bid_qty', 'ask', 'ask_qty')
+
+    def __init__(self, symbol, update_id, event_time, transaction_time, bid, bid_qty, ask, ask_qty):
+        self.symbol = symbol
+        self.update_id = update_id
+        self.event_time = event_time
+        self.transaction_time = transaction_time
+        self.bid = bid
+        self.bid_qty = bid_qty
+        self.ask = ask
+        self.ask_qty = ask_qty
+
+
+class BalanceUpdate:
+    __slots__ = ('asset', 'wallet_balance', 'balance_change')
+
+    def __init__(self, asset, wallet_balance, balance_change):
+        self.asset = asset
+        self.wallet_balance = wallet_balance
+        self.balance_change = balance_change
+
+
+class PositionUpdate:
+    __slots__ = ('symbol', 'position_amount', 'entry_price', 'breakeven_price', 'unrealized_profit')
+
+    def __init__(self, symbol, position_amount, entry_price, breakeven_price, unrealized_profit):
+        self.symbol = symbol
+        self.position_amount = position_amount
+        self.entry_price = entry_price
+        self.breakeven_price = breakeven_price
+        self.unrealized_profit = unrealized_profit
+
+
+class AccountUpdateEvent:
+    """ACCOUNT_UPDATE 이벤트"""
+    __slots__ = ('event_time', 'reason', 'balances', 'positions')
+
+    def __init__(self, event_time, reason, balances, positions):
+        self.event_time = event_time
+        self.reason = reason
+        self.balances = balances
+        self.positions = positions
+
+
+class AccountConfigUpdateEvent:
+    """ACCOUNT_CONFIG_UPDATE 이벤트 (레버리지 변경)"""
+    __slots__ = ('event_time', 'symbol', 'leverage')
+
+    def __init__(self, event_time, symbol, leverage):
+        self.event_time = event_time
+        self.symbol = symbol
+        self.leverage = leverage
+
+
+class OrderTradeUpdateEvent:
+    """ORDER_TRADE_UPDATE 이벤트"""
+    __slots__ = ('event_time', 'transaction_time', 'symbol', 'order_id', 'client_order_id', 'side',
+                 'order_type', 'status', 'price', 'avg_price', 'orig_qty', 'filled_qty',
+                 'last_filled_qty', 'last_filled_price', 'commission', 'realized_profit')
+
+    def __init__(self, event_time, transaction_time, symbol, order_id, client_order_id, side,
+                 order_type, status, price, avg_price, orig_qty, filled_qty,
+                 last_filled_qty, last_filled_price, commission, realized_profit):
+        self.event_time = event_time
+        self.transaction_time = transaction_time
+        self.symbol = symbol
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.side = side
+        self.order_type = order_type
+        self.status = status
+        self.price = price
+        self.avg_price = avg_price
+        self.orig_qty = orig_qty
+        self.filled_qty = filled_qty
+        self.last_filled_qty = last_filled_qty
+        self.last_filled_price = last_filled_price
+        self.commission = commission
+        self.realized_profit = realized_profit
+
+
+def _levels(levels):
+    return [(float(price), float(qty)) for price, qty in levels]
+
+
+def decode_kline(data):
+    kline = data['k']
+    return KlineEvent(
+        data['s'], data.get('E', 0), kline['i'], kline['t'], kline['T'],
+        float(kline['o']), float(kline['h']), float(kline['l']), float(kline['c']), float(kline['v']),
+        kline['x']
+    )
+
+
+def decode_depth(data):
+    return DepthEvent(
+        data['s'], data.get('E', 0), data.get('T', 0), data.get('U'), data.get('u'), data.get('pu'),
+        _levels(data.get('b', [])), _levels(data.get('a', []))
+    )
+
+
+def decode_agg_trade(data):
+    return AggTradeEvent(
+        data['s'], data.get('E', 0), data.get('a'), float(data['p']), float(data['q']), data['T'], data['m']
+    )
+
+
+def decode_book_ticker(data):
+    return BookTickerEvent(
+        data['s'], data.get('u', 0), data.get('E', 0), data.get('T', 0),
+        float(data['b']), float(data['B']), float(data['a']), float(data['A'])
+    )
+
+
+def decode_account_update(data):
+    account = data.get('a', {})
+    balances = [
+        BalanceUpdate(wallet.get('a'), float(wallet.get('wb', 0)), float(wallet.get('bc', 0)))
+        for wallet in account.get('B', [])
+    ]
+    positions = [
+        PositionUpdate(
+            position.get('s'), float(position.get('pa')), float(position.get('ep')),
+            float(position.get('bep', 0) or 0), float(position.get('up'))
+        )
+        for position in account.get('P', [])
+    ]
+    return AccountUpdateEvent(int(data.get('E', 0)), account.get('m'), balances, positions)
+
+
+def decode_account_config_update(data):
+    config = data.get('ac', {})
+    return AccountConfigUpdateEvent(int(data.get('E', 0)), config.get('s'), config.get('l'))
+
+
+def decode_order_trade_update(data):
+    order = data.get('o')
+    return OrderTradeUpdateEvent(
+        int(data.get('E', 0)), int(data.get('T', 0)), order.get('s'), order.get('i'), order.get('c'),
+        order.get('S'), order.get('o'), order.get('X'),
+        float(order.get('p', 0)), float(order.get('ap', 0)), float(order.get('q', 0)),
+        float(order.get('z', 0)), float(order.get('l', 0)), float(order.get('L', 0)),
+        float(order.get('n', 0)), float(order.get('rp', 0))
+    )
+
+
+USER_EVENT_DECODERS = {
+    'ACCOUNT_UPDATE': decode_account_update,
+    'ACCOUNT_CONFIG_UPDATE': decode_account_config_update,
+    'ORDER_TRADE_UPDATE': decode_order_trade_update,
+}
+
+
+def decode_user_event(data):
+    """user data 스트림 이벤트 디코딩 (처리 대상이 아니면 None)"""
+    decoder = USER_EVENT_DECODERS.get(data.get('e'))
+    return decoder(data) if decoder else None
@@ -0,0 +1,130 @@
+"""
+웹소켓 원본 메시지 기록
+- WebSocketManager가 받은 메시지(마켓/유저 데이터)를 수신 시각과 함께 그대로 기록 (파싱/재직렬화 없음)
+- 재생에 필요한 REST 응답(초기 캔들, 오더북 스냅샷, 계정 상태)도 같은 순서로 함께 기록
+- 웹소켓 콜백은 리스트에 append만 하고, 기록 스레드가 주기적으로 gzip 청크 파일에 씀
+- 한 줄 = "수신 시각(us)\t채널\t원본 메시지" (바이낸스 메시지는 공백/탭 없는 한 줄 JSON)
+  채널: 스트림 이름(xrpusdt@kline_1m 등) | combined(결합 스트림) | user(유저 데이터)
+        | history@<symbol>@<tf> | snapshot@<symbol> | state
+- 청크: stream_<시작 UTC>_<순번>.tsv.gz, chunk_seconds마다 새 파일
+"""
+import glob
+import gzip
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from logger import logger
+
+FILE_PATTERN = "stream_*.tsv.gz"
+
+
+def stream_channel(url):
+    """웹소켓 URL -> 기록 채널 이름"""
+    if '/stream?' in url:
+        return 'combined'  # streams=a/b/c 에도 '/'가 들어감
+    return url.rsplit('/', 1)[-1]
+
+
+class StreamRecorder:
+    def __init__(self, directory, chunk_seconds=300, flush_interval=1.0, compresslevel=6):
+        self.directory = directory
+        self.chunk_seconds = chunk_seconds
+        self.flush_interval = flush_interval
+        self.compresslevel = compresslevel
+        self.pending = []
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.file = None
+        self.chunk_started = 0.0
+        self.chunks = 0
+        self.records = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, channel, message):
+        """메시지 한 건 기록 요청 (수신 스레드에서 호출, 즉시 반환)"""
+        if isinstance(message, bytes):
+            message = message.decode('utf-8')
+        received = time.time_ns() // 1000
+        with self.lock:
+            self.pending.append((received, channel, message))
+
+    def tee(self, channel, on_message):
+        """on_message(ws, message) 앞에 기록을 끼운 처리 함수"""
+        def recording(ws, message, *args):
+            self.record(channel, message)
+            return on_message(ws, message, *args)
+        return recording
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if not pending:
+            return
+        if self.file is None or time.time() - self.chunk_started >= self.chunk_seconds:
+            self._rotate()
+        self.file.write(''.join(f"{received}\t{channel}\t{message}\n" for received, channel, message in pending))
+        self.file.flush()
+        self.records += len(pending)
+
+    def _rotate(self):
+        if self.file is not None:
+            self.file.close()
+        self.chunk_started = time.time()
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.directory, f"stream_{stamp}_{self.chunks:04d}.tsv.gz")
+        self.file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=self.compresslevel)
+        self.chunks += 1
+
+    def start(self):
+        def run():
+            while not self.stop_event.wait(self.flush_interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"스트림 기록 실패: {e}")
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.name = "StreamRecorderThread"
+        self.thread.start()
+        logger.system(f"스트림 기록 시작: {self.directory} (청크 {self.chunk_seconds}s)")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def recording_files(paths):
+    """파일/디렉토리 목록 -> 기록 청크 파일 (이름 = 시작 시각 순서)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, FILE_PATTERN)))
+        else:
+            files.append(path)
+    return sorted(files, key=os.path.basename)
+
+
+def read_records(paths):
+    """
+    기록 파일을 순서대로 읽음
+
+    :return: (수신 시각 us, 채널, 원본 메시지) iterator
+    - 기록 중 종료되어 끝이 잘린 청크는 읽을 수 있는 부분까지만 사용
+    """
+    for path in recording_files(paths):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as fp:
+                for line in fp:
+                    received, channel, message = line.rstrip('\n').split('\t', 2)
+                    yield int(received), channel, message
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"기록 파일 끝이 잘림: {path} ({e})")
@@ -0,0 +1,361 @@
+"""
+기록된 스트림 재생
+- stream_recorder 기록 파일을 네트워크 없이 WebSocketManager 처리 함수에 그대로 다시 넣음
+  (kline/depth/aggTrade/bookTicker -> stream_handler, 유저 데이터 -> _on_account_update)
+- 초기 캔들(history), 오더북 스냅샷(snapshot), 잔고/포지션(state)도 기록된 순서대로 반영
+- 재생 속도: 실시간(1), N배속(N), 최대 속도(0)
+- --paper: 매매 신호를 PaperExchange 모의 주문으로 실행 (기록된 실제 계정 이벤트/상태는 무시, 계정 조회는 기록 시각 10초마다)
+- 결과는 재생 속도와 무관 (기록 순서대로 한 스레드에서 처리, 평가 최소 간격/aggTrade 플러시는 기록 시각 기준)
+  -> 수신 -> 지표 -> 전략 전체 경로의 처리량 벤치마크로 사용
+
+사용법: python stream_replay.py <기록 디렉토리 또는 파일 ...> [--speed N] [--no-eval] [--paper] [--check]
+"""
+import argparse
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from book_ticker import BookTickerStore
+from candle_store import CandleRingBuffer
+from config import (COIN_LIST, TARGET_LEVERAGE, CANDLE_BUFFER_SIZE, ORDERBOOK_SNAPSHOT_LIMIT, BOOK_TICKER_ENABLED,
+                    SYMBOL_MIN_EVAL_INTERVAL, EVAL_ON_ORDERBOOK, AGG_TRADE_FLUSH_INTERVAL)
+from data_handler import DataHandler, klines_frame
+from logger import logger
+from order_book import OrderBookManager
+from paper_exchange import PaperExchange, format_summary
+from stream_events import loads
+from stream_recorder import read_records
+from ws_manager import WebSocketManager
+
+ACCOUNT_REFRESH_INTERVAL = 10  # 모의 거래 재생 잔고/포지션 조회 주기 (초, DataHandler 계정 정보 스레드와 같음)
+
+
+class ReplayOrderBookManager(OrderBookManager):
+    """REST 스냅샷 요청 대신 기록된 snapshot 항목을 적용"""
+    def __init__(self, snapshot_limit=ORDERBOOK_SNAPSHOT_LIMIT):
+        super().__init__(None, snapshot_limit)
+
+    def _request_snapshot(self, book):
+        pass  # 스냅샷은 기록 순서대로 apply_recorded로 들어옴
+
+    def apply_recorded(self, symbol, snapshot):
+        return self.get_book(symbol).apply_snapshot(snapshot)
+
+
+class ReplayDataHandler(DataHandler):
+    """
+    재생용 DataHandler
+    - REST/DB/파일 기록 없이 메모리 상태(캔들 버퍼, 오더북, 잔고/포지션)만 유지
+    - DataHandler 싱글톤과 별개 인스턴스
+    """
+    def __new__(cls, *args, **kwargs):
+        return object.__new__(cls)
+
+    def __init__(self, symbols=COIN_LIST):
+        self.client = None
+        self.lock = threading.Lock()
+        self.coin_data = {symbol: {} for symbol in symbols}
+        self.resamplers = {symbol: {} for symbol in symbols}
+        self.orderbook_data = {symbol: None for symbol in symbols}
+        self.position_data = {symbol: {'leverage': TARGET_LEVERAGE, 'avg_price': 0.0, 'position_amount': 0.0,
+                                       'unrealizedProfit': 0.0, 'breakeven_price': 0.0} for symbol in symbols}
+        self.balance_data = {"wallet": 0.0, "total": 0.0, "free": 0, "used": 0.0, "PNL": 0.0}
+        self.tick_size = {symbol: {} for symbol in symbols}
+        self.order_book_manager = ReplayOrderBookManager()
+        self.book_ticker = BookTickerStore(symbols) if BOOK_TICKER_ENABLED else None
+        self.recorder = None
+        self.paper = None  # 모의 거래 재생 (replay(paper=True))
+        self.candle_updates = 0
+
+    def load_history(self, symbol, interval, raw_data):
+        """history 항목 반영 (initialize_data와 같은 버퍼 구성)"""
+        df = klines_frame(raw_data)
+        self.coin_data.setdefault(symbol, {})[interval] = CandleRingBuffer.from_frame(df, CANDLE_BUFFER_SIZE)
+        if interval == '1m':
+            self.resamplers.setdefault(symbol, {})
+            self.init_resamplers(symbol, df, save_to_file=False)
+
+    def apply_state(self, state):
+        """state 항목 반영 (REST로 받은 잔고/포지션)"""
+        self.balance_data.update(state['balance'])
+        for symbol, position in state['positions'].items():
+            self.position_data.setdefault(symbol, {}).update(position)
+
+    # 기록/REST 호출 없음 (계정 상태는 state 항목으로 반영)
+    def queue_candle_update(self, symbol, timeframe, candle, closed=False):
+        self.candle_updates += 1
+
+    def save_kline_data(self, symbol, timeframe, candle, closed):
+        pass
+
+    def save_orderbook_data(self, symbol):
+        pass
+
+    def save_to_coin_data_db(self, symbol, interval, df):
+        pass
+
+    def save_db_market_status(self, market_status):
+        pass
+
+    def save_db_position_data(self, position_data):
+        pass
+
+    def save_db_balance_data(self, balance_data):
+        pass
+
+    def flush_pending_candles(self):
+        pass
+
+    def balance_data_update(self, event_reason=None):
+        if self.paper is not None:
+            self.update_account_data(self.paper.account_info())
+        return self.balance_data
+
+    def position_data_update(self, symbol):
+        if self.paper is not None:
+            return self.update_position_risk(symbol, self.paper.position_risk(symbol))
+        return self.position_data.setdefault(symbol, {'leverage': TARGET_LEVERAGE, 'avg_price': 0.0, 'position_amount': 0.0,
+                                                      'unrealizedProfit': 0.0, 'breakeven_price': 0.0})
+
+
+def replay_manager(data_handler):
+    """재생용 WebSocketManager (연결/백필/알림 없이 처리 함수만 사용)"""
+    ws_manager = WebSocketManager(data_handler, {symbol: {} for symbol in COIN_LIST},
+                                  {symbol: {'action': 'HOLD', 'reason': ''} for symbol in COIN_LIST})
+    ws_manager.gap_filler = None    # 기록에 있는 누락은 그대로 재현
+    ws_manager.trade_alerts = False
+    return ws_manager
+
+
+class StreamReplayer:
+    def __init__(self, ws_manager, speed=0):
+        """
+        :param speed: 0이면 최대 속도, 1이면 기록 시각 그대로, N이면 N배속
+        """
+        self.ws_manager = ws_manager
+        self.data_handler = ws_manager.data_handler
+        self.speed = speed
+        self.handlers = {}          # stream 이름 -> 처리 함수
+        self.clock_us = 0           # 재생 중인 기록의 수신 시각
+        self.before_dispatch = []   # callback(clock_us): 기록 하나를 처리하기 전에 호출
+        self.counts = Counter()
+        self.errors = 0
+        self.flush_period_us = int(AGG_TRADE_FLUSH_INTERVAL * 1e6)
+        self.next_flush_us = None
+
+    def _stream_handler(self, stream):
+        handler = self.handlers.get(stream, False)
+        if handler is False:
+            handler = self.handlers[stream] = self.ws_manager.stream_handler(stream)
+        return handler
+
+    def dispatch(self, channel, message):
+        """
+        기록 한 건 처리
+
+        :return: 처리한 채널 이름 (결합 스트림이면 안쪽 stream 이름)
+        """
+        if channel == 'combined':
+            data = loads(message)
+            channel, payload = data.get('stream'), data['data']
+        elif channel in ('user', 'state') and self.data_handler.paper is not None:
+            return channel  # 모의 거래: 기록된 실제 계정 이벤트/상태 대신 PaperExchange 상태 사용
+        elif channel == 'user':
+            self.ws_manager._on_account_update(None, message)
+            return channel
+        elif channel == 'state':
+            self.data_handler.apply_state(loads(message))
+            return channel
+        elif channel.startswith(('history@', 'snapshot@')):
+            kind, symbol, *interval = channel.split('@')
+            if kind == 'history':
+                self.data_handler.load_history(symbol, interval[0], loads(message))
+            else:
+                self.data_handler.order_book_manager.apply_recorded(symbol, loads(message))
+            return channel
+        else:
+            payload = loads(message)
+        handler = self._stream_handler(channel)
+        if handler is not None:
+            handler(payload)
+        return channel
+
+    @staticmethod
+    def _count_key(channel):
+        """채널별 집계 이름 (심볼 구분 없이 stream 종류/기록 종류)"""
+        kind, _, rest = channel.partition('@')
+        if not rest or kind in ('history', 'snapshot'):
+            return kind
+        return rest
+
+    def _flush_trades(self, clock_us):
+        """aggTrade 집계 플러시를 기록 시각 기준 주기로 실행"""
+        aggregator = self.ws_manager.trade_aggregator
+        if aggregator is None:
+            return
+        if self.next_flush_us is None:
+            self.next_flush_us = clock_us + self.flush_period_us
+        elif clock_us >= self.next_flush_us:
+            aggregator.flush()
+            self.next_flush_us = clock_us - clock_us % self.flush_period_us + self.flush_period_us
+
+    def run(self, records):
+        """
+        기록 재생
+
+        :param records: (수신 시각 us, 채널, 원본 메시지) iterator (stream_recorder.read_records)
+        :return: 처리한 기록 수
+        """
+        start_wall = time.perf_counter()
+        start_us = None
+        count = 0
+        for received, channel, message in records:
+            if start_us is None:
+                start_us = received
+            if self.speed:
+                delay = (received - start_us) / 1e6 / self.speed - (time.perf_counter() - start_wall)
+                if delay > 0:
+                    time.sleep(delay)
+            self.clock_us = received
+            self._flush_trades(received)
+            for callback in self.before_dispatch:
+                callback(received)
+            try:
+                channel = self.dispatch(channel, message)
+            except Exception as e:
+                self.errors += 1
+                if self.errors <= 10:
+                    logger.error(f"재생 처리 실패 ({channel}): {e}")
+            self.counts[self._count_key(channel)] += 1
+            count += 1
+        if self.ws_manager.trade_aggregator is not None:
+            self.ws_manager.trade_aggregator.flush()
+        return count
+
+
+class ReplayEvaluator:
+    """
+    재생 중 데이터 갱신 알림 -> 심볼 평가 (EvaluationScheduler 대신 재생 스레드에서 실행)
+    - 같은 심볼은 기록 시각 기준 min_interval 안에 한 번만 평가, 그사이 알림은 모았다가 간격이 지나면 평가
+    """
+    def __init__(self, bot, replayer, min_interval=SYMBOL_MIN_EVAL_INTERVAL):
+        self.bot = bot
+        self.replayer = replayer
+        self.min_interval_us = int(min_interval * 1e6)
+        self.last = {}          # symbol -> 마지막 평가 기록 시각
+        self.pending = {}       # symbol -> 보류된 알림 (간격이 지나면 평가)
+        self.signals = []       # (기록 시각 us, symbol, action, reason)
+        self.evaluations = 0
+        self.seconds = 0.0
+        replayer.ws_manager.add_listener(self.on_update)
+        replayer.before_dispatch.append(self.run_pending)
+
+    def on_update(self, symbol, kind):
+        if kind == 'orderbook' and not EVAL_ON_ORDERBOOK:
+            return
+        now = self.replayer.clock_us
+        if now - self.last.get(symbol, now - self.min_interval_us) < self.min_interval_us:
+            self.pending[symbol] = True
+            return
+        self.evaluate(symbol, now)
+
+    def run_pending(self, now):
+        for symbol in [s for s in self.pending if now - self.last[s] >= self.min_interval_us]:
+            del self.pending[symbol]
+            self.evaluate(symbol, now)
+
+    def evaluate(self, symbol, now):
+        self.last[symbol] = now
+        t0 = time.perf_counter()
+        try:
+            signals = self.bot.evaluate_symbol(symbol)
+        except Exception as e:
+            logger.error(f"{symbol} 재생 평가 실패: {e}")
+            signals = None
+        self.seconds += time.perf_counter() - t0
+        self.evaluations += 1
+        if signals and signals.get('action', 'HOLD') != 'HOLD':
+            self.signals.append((now, symbol, signals['action'], signals.get('reason', '')))
+
+
+def account_refresh(data_handler, period=ACCOUNT_REFRESH_INTERVAL):
+    """모의 거래 재생: 기록 시각 기준 period초마다 잔고/포지션 조회 (DataHandler 계정 정보 스레드 대체)"""
+    period_us = int(period * 1e6)
+    due = [0]
+
+    def refresh(clock_us):
+        if clock_us >= due[0]:
+            due[0] = clock_us + period_us
+            data_handler.balance_data_update()
+    return refresh
+
+
+def state_digest(data_handler, signals=()):
+    """캔들 버퍼 + 매매 신호 해시 (재생 결과 비교용)"""
+    digest = hashlib.sha256()
+    for symbol in sorted(data_handler.coin_data):
+        for timeframe in sorted(data_handler.coin_data[symbol]):
+            digest.update(f"{symbol}{timeframe}".encode())
+            digest.update(data_handler.coin_data[symbol][timeframe].view().tobytes())
+    digest.update(repr(list(signals)).encode())
+    return digest.hexdigest()[:16]
+
+
+def replay(paths, speed=0, evaluate=True, paper=False):
+    """
+    기록 파일 재생
+
+    :param paper: 매매 신호를 모의 주문으로 실행 (evaluate일 때만)
+    :return: (ReplayDataHandler, StreamReplayer, ReplayEvaluator 또는 None, 재생 시간)
+    """
+    from main import TradingBot  # 평가 경로 (main은 재생할 때만 필요)
+    from order_handler import OrderHandler
+
+    data_handler = ReplayDataHandler()
+    ws_manager = replay_manager(data_handler)
+    replayer = StreamReplayer(ws_manager, speed)
+    order_handler = None
+    if paper and evaluate:
+        data_handler.paper = PaperExchange(data_handler.orderbook_data)
+        data_handler.paper.attach(ws_manager)
+        order_handler = OrderHandler(data_handler, ws_manager)
+        replayer.before_dispatch.append(account_refresh(data_handler))
+    evaluator = ReplayEvaluator(TradingBot.offline(data_handler, ws_manager, order_handler), replayer) if evaluate else None
+    t0 = time.perf_counter()
+    replayer.run(read_records(paths))
+    return data_handler, replayer, evaluator, time.perf_counter() - t0
+
+
+def report(replayer, evaluator, seconds):
+    total = sum(replayer.counts.values())
+    print(f"기록 {total:,}건 재생 {seconds:.2f}s ({total / seconds:,.0f}건/s), 처리 실패 {replayer.errors}건")
+    for channel, count in replayer.counts.most_common():
+        print(f"  {channel:<16} {count:>10,}")
+    if evaluator is not None:
+        per_eval = evaluator.seconds / evaluator.evaluations * 1e3 if evaluator.evaluations else 0.0
+        print(f"평가 {evaluator.evaluations:,}회 ({per_eval:.2f}ms/회, 전체의 {evaluator.seconds / seconds:.0%}), "
+              f"매매 신호 {len(evaluator.signals)}건")
+    paper = replayer.data_handler.paper
+    if paper is not None:
+        print(f"모의 거래: {format_summary(paper.summary())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기록된 스트림 재생")
+    parser.add_argument('paths', nargs='+', help="기록 디렉토리 또는 stream_*.tsv.gz 파일")
+    parser.add_argument('--speed', type=float, default=0, help="재생 배속 (0: 최대 속도, 1: 실시간)")
+    parser.add_argument('--no-eval', action='store_true', help="지표/전략 평가 없이 수신 처리만 재생")
+    parser.add_argument('--paper', action='store_true', help="매매 신호를 PaperExchange 모의 주문으로 실행")
+    parser.add_argument('--check', action='store_true', help="두 번 재생해서 결과가 같은지 확인")
+    args = parser.parse_args()
+
+    data_handler, replayer, evaluator, seconds = replay(args.paths, args.speed, not args.no_eval, args.paper)
+    report(replayer, evaluator, seconds)
+    digest = state_digest(data_handler, evaluator.signals if evaluator else ())
+    print(f"결과 해시 {digest}")
+    if args.check:
+        data_handler, _, evaluator, _ = replay(args.paths, args.speed, not args.no_eval, args.paper)
+        again = state_digest(data_handler, evaluator.signals if evaluator else ())
+        print(f"재실행 해시 {again}: {'일치' if again == digest else '불일치'}")
+        raise SystemExit(0 if again == digest else 1)
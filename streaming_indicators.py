@@ -0,0 +1,450 @@
+"""
+증분(스트리밍) 지표 엔진
+- 캔들 마감 시 각 지표 상태를 한 번 갱신(commit)하고, 진행 중 캔들은 상태를 바꾸지 않고 값만 계산(peek)
+- Indicators.calculate_indicators(pandas_ta) 와 같은 값을 내도록 pandas의 ewm / rolling 연산 순서를 그대로 재현
+- 캔들 1개당 연산량은 지표 수에만 비례 (버퍼 길이와 무관)
+"""
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from candle_store import KST_OFFSET, RingBuffer
+
+NAN = float('nan')
+EPSILON = float(np.finfo(float).eps)  # pandas_ta non_zero_range / zero 에서 사용하는 값
+
+INDICATOR_COLUMNS = [
+    'EMA_fast', 'EMA_slow', 'SMA_short', 'SMA_mid', 'SMA_long', 'RSI', 'STOCH_k', 'STOCH_d',
+    'Momentum', 'ROC', 'CCI', 'Williams_R', 'ADX', 'DMP', 'DMN', 'MACD', 'MACD_histogram',
+    'MACD_signal', 'ATR', 'BB_lower', 'BB_middle', 'BB_upper', 'BBB', 'BBP',
+    'fib_0.236', 'fib_0.5', 'fib_0.786', 'fib_0.618'
+]
+ROUNDED_COLUMNS = len(INDICATOR_COLUMNS) - 4  # 피보나치 레벨은 반올림하지 않음 (배치 경로와 동일)
+
+
+def _div(a, b):
+    """numpy float 나눗셈과 같은 결과 (0으로 나누면 inf / nan)"""
+    if b == 0:
+        if a != a or a == 0:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _non_zero(x):
+    """pandas_ta non_zero_range: 범위가 0이면 epsilon으로 대체"""
+    return EPSILON if x == 0 else x
+
+
+class _Ewm:
+    """pandas Series.ewm(...).mean() 재귀 (ignore_na=False)"""
+    def __init__(self, com, adjust, min_periods=0):
+        alpha = 1.0 / (1.0 + com)
+        self.factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, x, commit=True):
+        weighted, old_wt = self.weighted, self.old_wt
+        is_obs = x == x
+        nobs = self.nobs + is_obs
+        if weighted == weighted:
+            old_wt *= self.factor
+            if is_obs:
+                if weighted != x:
+                    weighted = old_wt * weighted + self.new_wt * x
+                    weighted /= old_wt + self.new_wt
+                old_wt = old_wt + self.new_wt if self.adjust else 1.0
+        elif is_obs:
+            weighted = x
+        if commit:
+            self.weighted, self.old_wt, self.nobs = weighted, old_wt, nobs
+        return weighted if nobs >= self.min_periods else NAN
+
+
+class _Rma(_Ewm):
+    """pandas_ta rma: ewm(alpha=1/length, min_periods=length)"""
+    def __init__(self, length):
+        alpha = 1.0 / length
+        super().__init__((1.0 - alpha) / alpha, adjust=True, min_periods=length)
+
+
+class _Ema:
+    """pandas_ta ema: 첫 length개 SMA로 시작하는 ewm(span=length, adjust=False), 앞쪽 NaN 입력은 건너뜀"""
+    def __init__(self, length):
+        self.length = length
+        self.seed = []
+        self.ewm = _Ewm((length - 1) / 2.0, adjust=False)
+
+    def update(self, x, commit=True):
+        if self.seed is None:
+            return self.ewm.update(x, commit)
+        if x != x:
+            return NAN
+        seed = self.seed + [x]
+        if len(seed) < self.length:
+            if commit:
+                self.seed = seed
+            return NAN
+        value = self.ewm.update(np.array(seed).sum() / self.length, commit)
+        if commit:
+            self.seed = None
+        return value
+
+
+class _RollingMean:
+    """pandas rolling(length).mean() (Kahan 보정 add/remove 방식 그대로)"""
+    def __init__(self, length):
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.count = 0
+        # nobs, sum_x, neg_ct, comp_add, comp_remove, same_count, prev_value
+        self.state = (0, 0.0, 0, 0.0, 0.0, 0, NAN)
+
+    def update(self, x, commit=True):
+        nobs, sum_x, neg_ct, comp_add, comp_remove, same_count, prev_value = self.state
+        if self.count == 0:
+            prev_value, same_count = x, 0
+        if len(self.window) == self.length:
+            old = self.window[0]
+            if old == old:
+                nobs -= 1
+                y = -old - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+        if x == x:
+            nobs += 1
+            y = x - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, x) < 0:
+                neg_ct += 1
+            same_count = same_count + 1 if x == prev_value else 1
+            prev_value = x
+        if commit:
+            self.state = (nobs, sum_x, neg_ct, comp_add, comp_remove, same_count, prev_value)
+            self.window.append(x)
+            self.count += 1
+        if nobs < self.length or nobs == 0:
+            return NAN
+        result = sum_x / nobs
+        if same_count >= nobs:
+            return prev_value
+        if neg_ct == 0 and result < 0:
+            return 0.0
+        if neg_ct == nobs and result > 0:
+            return 0.0
+        return result
+
+
+class _RollingVar:
+    """pandas rolling(length).var(ddof) (Welford + Kahan 보정 add/remove 방식 그대로)"""
+    def __init__(self, length, ddof=0):
+        self.length = length
+        self.ddof = ddof
+        self.window = deque(maxlen=length)
+        self.count = 0
+        # nobs, mean_x, ssqdm_x, comp_add, comp_remove, same_count, prev_value
+        self.state = (0, 0.0, 0.0, 0.0, 0.0, 0, NAN)
+
+    def update(self, x, commit=True):
+        nobs, mean_x, ssqdm_x, comp_add, comp_remove, same_count, prev_value = self.state
+        if self.count == 0:
+            prev_value, same_count = x, 0
+        if len(self.window) == self.length:
+            old = self.window[0]
+            if old == old:
+                nobs -= 1
+                if nobs:
+                    prev_mean = mean_x - comp_remove
+                    y = old - comp_remove
+                    t = y - mean_x
+                    comp_remove = t + mean_x - y
+                    mean_x -= t / nobs
+                    ssqdm_x -= (old - prev_mean) * (old - mean_x)
+                else:
+                    mean_x = ssqdm_x = 0.0
+        if x == x:
+            nobs += 1
+            if x == prev_value:
+                same_count += 1
+            else:
+                same_count = 1
+                prev_value = x
+            prev_mean = mean_x - comp_add
+            y = x - comp_add
+            t = y - mean_x
+            comp_add = t + mean_x - y
+            mean_x += t / nobs
+            ssqdm_x += (x - prev_mean) * (x - mean_x)
+        if commit:
+            self.state = (nobs, mean_x, ssqdm_x, comp_add, comp_remove, same_count, prev_value)
+            self.window.append(x)
+            self.count += 1
+        if nobs < self.length or nobs <= self.ddof:
+            return NAN
+        if nobs == 1 or same_count >= nobs:
+            return 0.0
+        return ssqdm_x / (nobs - self.ddof)
+
+
+class _RollingExtreme:
+    """rolling(length).max() / min() - 단조 덱으로 최근 length-1개 확정값의 극값 유지"""
+    def __init__(self, length, use_max=True):
+        self.length = length
+        self.use_max = use_max
+        self.deque = deque()  # (index, value)
+        self.count = 0
+
+    def update(self, x, commit=True):
+        if self.count < self.length - 1:
+            value = NAN
+        elif self.deque:
+            best = self.deque[0][1]
+            value = max(best, x) if self.use_max else min(best, x)
+        else:
+            value = x
+        if commit:
+            dq = self.deque
+            if self.use_max:
+                while dq and dq[-1][1] <= x:
+                    dq.pop()
+            else:
+                while dq and dq[-1][1] >= x:
+                    dq.pop()
+            dq.append((self.count, x))
+            self.count += 1
+            while dq[0][0] <= self.count - self.length:
+                dq.popleft()
+        return value
+
+
+class _RollingMad:
+    """pandas_ta mad: rolling(length).apply(lambda x: fabs(x - x.mean()).mean(), raw=True)"""
+    def __init__(self, length):
+        self.length = length
+        self.window = deque(maxlen=length - 1)
+
+    def update(self, x, commit=True):
+        if len(self.window) < self.length - 1:
+            value = NAN
+        else:
+            values = np.array(list(self.window) + [x])
+            value = float(np.fabs(values - values.mean()).mean())
+        if commit:
+            self.window.append(x)
+        return value
+
+
+class _Lag:
+    """close.shift(length)"""
+    def __init__(self, length):
+        self.window = deque(maxlen=length)
+
+    def value(self):
+        return self.window[0] if len(self.window) == self.window.maxlen else NAN
+
+    def push(self, x):
+        self.window.append(x)
+
+
+class StreamingIndicators:
+    """
+    (symbol, timeframe) 하나에 대한 증분 지표 계산기
+    - sync(candles): CandleRingBuffer에서 새로 마감된 캔들만 commit, 마지막(진행 중) 캔들은 peek
+    - frame(rows): calculate_indicators와 같은 컬럼의 최근 rows개 DataFrame (dropna 적용)
+    - 버퍼가 다시 채워지면(generation 변경 등) 현재 버퍼 내용으로 상태를 다시 만듦
+    """
+    def __init__(self, params, capacity):
+        self.params = params
+        self.history = RingBuffer(INDICATOR_COLUMNS, capacity)
+        self.forming = np.full(len(INDICATOR_COLUMNS), np.nan)
+        self.generation = None      # 동기화한 캔들 버퍼의 generation (None이면 미동기화)
+        self.last_open_time = None  # 마지막으로 commit한 캔들의 open time
+        self._reset_state()
+
+    def _reset_state(self):
+        p = self.params
+        self.history.clear()
+        self.last_open_time = None
+        self.prev_close = self.prev_high = self.prev_low = NAN
+        self.ema_fast = _Ema(p.ema_fast_length)
+        self.ema_slow = _Ema(p.ema_slow_length)
+        self.sma_short = _RollingMean(p.sma_short_length)
+        self.sma_mid = _RollingMean(p.sma_mid_length)
+        self.sma_long = _RollingMean(p.sma_long_length)
+        self.rsi_pos = _Rma(p.rsi_length)
+        self.rsi_neg = _Rma(p.rsi_length)
+        self.stoch_high = _RollingExtreme(p.stoch_k_length, use_max=True)
+        self.stoch_low = _RollingExtreme(p.stoch_k_length, use_max=False)
+        self.stoch_k = _RollingMean(p.stoch_smooth)
+        self.stoch_d = _RollingMean(p.stoch_d_length)
+        self.momentum_lag = _Lag(p.momentum_length)
+        self.roc_lag = _Lag(p.roc_length)
+        self.cci_mean = _RollingMean(p.cci_length)
+        self.cci_mad = _RollingMad(p.cci_length)
+        self.willr_high = _RollingExtreme(p.willr_length, use_max=True)
+        self.willr_low = _RollingExtreme(p.willr_length, use_max=False)
+        self.adx_atr = _Rma(p.adx_length)
+        self.adx_pos = _Rma(p.adx_length)
+        self.adx_neg = _Rma(p.adx_length)
+        self.adx = _Rma(p.adx_length)
+        self.macd_fast = _Ema(p.macd_fast)
+        self.macd_slow = _Ema(p.macd_slow)
+        self.macd_signal = _Ema(p.macd_signal)
+        self.atr = _Rma(p.atr_length)
+        self.bb_mid = _RollingMean(p.bbands_length)
+        self.bb_var = _RollingVar(p.bbands_length, ddof=0)
+        self.fib_high = _RollingExtreme(p.fib_length, use_max=True)
+        self.fib_low = _RollingExtreme(p.fib_length, use_max=False)
+
+    def _compute(self, high, low, close, commit):
+        """캔들 1개에 대한 전체 지표 값 (commit=False면 상태 변경 없음)"""
+        p = self.params
+        prev_close, prev_high, prev_low = self.prev_close, self.prev_high, self.prev_low
+
+        # RSI: 상승/하락분 각각 rma
+        diff = close - prev_close
+        positive = 0.0 if diff < 0 else diff
+        negative = 0.0 if diff > 0 else diff
+        pos_avg = self.rsi_pos.update(positive, commit)
+        neg_avg = self.rsi_neg.update(negative, commit)
+        rsi = _div(100 * pos_avg, pos_avg + abs(neg_avg))
+
+        # Stochastic
+        lowest = self.stoch_low.update(low, commit)
+        highest = self.stoch_high.update(high, commit)
+        stoch = 100 * (close - lowest) / _non_zero(highest - lowest)
+        stoch_k = self.stoch_k.update(stoch, commit)
+        stoch_d = self.stoch_d.update(stoch_k, commit)
+
+        # Momentum / ROC
+        momentum = close - self.momentum_lag.value()
+        roc_base = self.roc_lag.value()
+        roc = _div(100 * (close - roc_base), roc_base)
+
+        # CCI
+        typical = (high + low + close) / 3.0
+        cci_mean = self.cci_mean.update(typical, commit)
+        cci_mad = self.cci_mad.update(typical, commit)
+        cci = _div(typical - cci_mean, 0.015 * cci_mad)
+
+        # Williams %R
+        willr_low = self.willr_low.update(low, commit)
+        willr_high = self.willr_high.update(high, commit)
+        williams_r = 100 * (_div(close - willr_low, willr_high - willr_low) - 1)
+
+        # True Range (첫 캔들은 NaN)
+        if prev_close != prev_close:
+            true_range = NAN
+        else:
+            true_range = max(abs(_non_zero(high - low)), abs(high - prev_close), abs(prev_close - low))
+
+        # ADX / DMP / DMN
+        up = high - prev_high
+        down = prev_low - low
+        if up != up:
+            pos_dm = neg_dm = NAN
+        else:
+            pos_dm = up if up > down and up > 0 else 0.0
+            neg_dm = down if down > up and down > 0 else 0.0
+            pos_dm = 0.0 if abs(pos_dm) < EPSILON else pos_dm
+            neg_dm = 0.0 if abs(neg_dm) < EPSILON else neg_dm
+        k = _div(100, self.adx_atr.update(true_range, commit))
+        dmp = k * self.adx_pos.update(pos_dm, commit)
+        dmn = k * self.adx_neg.update(neg_dm, commit)
+        dx = _div(100 * abs(dmp - dmn), dmp + dmn)
+        adx = self.adx.update(dx, commit)
+
+        # MACD (signal은 MACD 첫 유효값부터 ema)
+        macd = self.macd_fast.update(close, commit) - self.macd_slow.update(close, commit)
+        macd_signal = self.macd_signal.update(macd, commit)
+        macd_hist = macd - macd_signal
+
+        atr = self.atr.update(true_range, commit)
+
+        # Bollinger Bands (ddof=0)
+        bb_mid = self.bb_mid.update(close, commit)
+        variance = self.bb_var.update(close, commit)
+        deviation = p.bbands_std * (math.sqrt(variance) if variance >= 0 else NAN)
+        bb_lower = bb_mid - deviation
+        bb_upper = bb_mid + deviation
+        band_range = _non_zero(bb_upper - bb_lower)
+        bbb = _div(100 * band_range, bb_mid)
+        bbp = _div(_non_zero(close - bb_lower), band_range)
+
+        # 피보나치 되돌림 (반올림된 고가/저가 기준)
+        recent_high = np.round(self.fib_high.update(high, commit), 4)
+        recent_low = np.round(self.fib_low.update(low, commit), 4)
+
+        row = np.array([
+            self.ema_fast.update(close, commit), self.ema_slow.update(close, commit),
+            self.sma_short.update(close, commit), self.sma_mid.update(close, commit),
+            self.sma_long.update(close, commit), rsi, stoch_k, stoch_d, momentum, roc, cci,
+            williams_r, adx, dmp, dmn, macd, macd_hist, macd_signal, atr,
+            bb_lower, bb_mid, bb_upper, bbb, bbp,
+            recent_high - (recent_high - recent_low) * 0.236,
+            recent_high - (recent_high - recent_low) * 0.5,
+            recent_high - (recent_high - recent_low) * 0.786,
+            recent_high - (recent_high - recent_low) * 0.618,
+        ])
+        row[:ROUNDED_COLUMNS] = np.round(row[:ROUNDED_COLUMNS], 4)
+
+        if commit:
+            self.prev_close, self.prev_high, self.prev_low = close, high, low
+            self.momentum_lag.push(close)
+            self.roc_lag.push(close)
+        return row
+
+    def sync(self, candles):
+        """
+        캔들 버퍼와 상태 동기화 (data_handler.lock 보유 상태에서 호출)
+        - 마지막 캔들 이전의 새 캔들은 commit, 마지막 캔들은 진행 중으로 보고 peek
+        """
+        if candles.empty:
+            return
+        data = candles.view()
+        col = candles.col_index
+        h, l, c = col['High'], col['Low'], col['Close']
+        open_times = data[:, 0]
+
+        if self.generation != candles.generation or (
+                self.last_open_time is not None
+                and not open_times[0] <= self.last_open_time <= open_times[-1]):
+            # 최초 동기화, 버퍼 재구성, 또는 확정 캔들이 버퍼에서 밀려남: 버퍼 전체로 상태 재생성
+            self._reset_state()
+            self.generation = candles.generation
+        if self.last_open_time is None:
+            start = 0
+        else:
+            start = int(np.searchsorted(open_times, self.last_open_time, side='right'))
+
+        for row in data[start:-1]:
+            self.history.append(self._compute(row[h], row[l], row[c], commit=True))
+            self.last_open_time = row[0]
+
+        last = data[-1]
+        self.forming = self._compute(last[h], last[l], last[c], commit=False)
+
+    def frame(self, candles, rows=None):
+        """최근 rows개 캔들 + 지표 DataFrame (calculate_indicators 결과와 같은 컬럼 구성)"""
+        data = candles.view()
+        n = len(data) if rows is None else min(rows, len(data))
+        values = np.full((n, len(INDICATOR_COLUMNS)), np.nan)
+        values[-1] = self.forming
+        committed = min(n - 1, len(self.history))
+        if committed:
+            values[n - 1 - committed:-1] = self.history.view()[-committed:]
+        df = pd.DataFrame(np.hstack([data[-n:, 1:], values]), columns=candles.columns[1:] + INDICATOR_COLUMNS)
+        df.insert(0, 'Open time', pd.to_datetime(data[-n:, 0].astype('int64'), unit='ms') + KST_OFFSET)
+        return df.dropna()
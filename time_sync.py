@@ -1,15 +1,15 @@
 import subprocess
 import time
 from datetime import datetime, timezone, timedelta
-from binance.client import Client
-from config import API_KEY, SECRET_KEY, KST
+from exchange_client import create_client
+from config import KST
 from logger import logger
 
 # logger = logger.getLogger(__name__)
 
 class TimeSync:
     def __init__(self):
-        self.client = Client(API_KEY, SECRET_KEY)  # Binance 클라이언트 초기화
+        self.client = create_client()  # Binance 클라이언트 초기화
     
     def sync_system_time(self):
         """윈도우 시간 동기화 (기존 sync_time 함수 개선)"""
@@ -0,0 +1,174 @@
+"""
+aggTrade 스트림 기반 초 단위 캔들 (5s, 15s 등)
+- 웹소켓 콜백은 체결 하나를 (체결 시각, 가격, 수량, buyer_maker) 튜플로 심볼별 리스트에 추가만 함
+- 플러시 스레드가 AGG_TRADE_FLUSH_INTERVAL마다 쌓인 체결을 NumPy 배열로 한 번에 변환하고
+  타임프레임별로 구간 집계(reduceat)한 뒤 캔들 버퍼에 묶음 단위로 반영 (data_handler.lock은 플러시당 한 번)
+- 캔들은 _on_kline과 같은 캔들 저장소(data_handler.coin_data[symbol][timeframe])에 저장
+  컬럼: OHLCV + 'Taker buy volume' / 'Taker sell volume'
+- 체결이 없던 구간은 직전 종가로 거래량 0 캔들을 채워 시간 간격을 일정하게 유지
+- 초 단위 캔들은 양이 많아 DB/파일에는 기록하지 않음
+"""
+import threading
+from itertools import chain
+
+import numpy as np
+
+from candle_store import CandleRingBuffer
+from logger import logger
+from resampler import timeframe_ms
+
+TRADE_BAR_COLUMNS = ['Taker buy volume', 'Taker sell volume']
+
+
+class TradeBarBuilder:
+    """한 심볼/타임프레임의 체결 묶음 -> 캔들 집계"""
+    def __init__(self, timeframe, capacity):
+        self.timeframe = timeframe
+        self.period = timeframe_ms(timeframe)
+        self.candles = CandleRingBuffer(capacity, TRADE_BAR_COLUMNS)
+        self.dropped = 0  # 진행 중 캔들보다 이전 구간의 늦게 도착한 체결 수
+
+    def add_batch(self, times, prices, quantities, seller_taker):
+        """
+        체결 묶음 반영 (호출 측에서 캔들 버퍼 lock 보유)
+
+        :param times: 체결 시각 (ms, 오름차순) float64 배열
+        :param seller_taker: 테이커 매도 여부 (buyer_maker) 배열
+        :return: 이번 묶음으로 마감된 캔들 수
+        """
+        candles = self.candles
+        last_bucket = candles.last_open_time
+        buckets = times - times % self.period
+        if last_bucket is not None and buckets[0] < last_bucket:
+            keep = buckets >= last_bucket
+            self.dropped += int(len(keep) - keep.sum())
+            if not keep.any():
+                return 0
+            times, prices, quantities, seller_taker, buckets = (
+                times[keep], prices[keep], quantities[keep], seller_taker[keep], buckets[keep])
+
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        sell = np.where(seller_taker, quantities, 0.0)
+        bars = np.column_stack((
+            buckets[starts],
+            prices[starts],
+            np.maximum.reduceat(prices, starts),
+            np.minimum.reduceat(prices, starts),
+            prices[ends],
+            np.add.reduceat(quantities, starts),
+            np.add.reduceat(quantities - sell, starts),
+            np.add.reduceat(sell, starts),
+        ))
+
+        closed = len(bars) - 1
+        first = bars[0]
+        if last_bucket is not None and first[0] == last_bucket:
+            # 진행 중 캔들에 이어서 합침
+            last = candles.last()
+            first[1] = last[1]
+            first[2] = max(first[2], last[2])
+            first[3] = min(first[3], last[3])
+            first[5:] += last[5:]
+            candles.update_last(first)
+            bars = bars[1:]
+        elif last_bucket is not None:
+            closed += 1  # 이전 진행 중 캔들 마감
+        for bar in bars:
+            self._fill_gap(bar[0])
+            candles.append(bar)
+        return closed
+
+    def _fill_gap(self, bucket):
+        """직전 캔들과 bucket 사이의 빈 구간을 거래량 0 캔들로 채움 (최대 버퍼 용량만큼)"""
+        candles = self.candles
+        if candles.empty:
+            return
+        last_bucket = candles.last_open_time
+        missing = int((bucket - last_bucket) // self.period) - 1
+        if missing <= 0:
+            return
+        close = candles.last_close
+        start = max(1, missing - candles.capacity + 1)
+        for k in range(start, missing + 1):
+            candles.append((last_bucket + k * self.period, close, close, close, close, 0.0, 0.0, 0.0))
+
+
+class AggTradeAggregator:
+    """
+    심볼별 aggTrade 수집 + 주기적 묶음 집계
+    - on_trade(): 웹소켓 콜백에서 호출 (튜플 append만 수행)
+    - flush(): 대기 체결을 타임프레임별 캔들에 반영, 마감 캔들이 있으면 on_bar_closed(symbol) 호출
+    """
+    def __init__(self, data_handler, symbols, timeframes, capacity, flush_interval=0.1, on_bar_closed=None):
+        self.data_handler = data_handler
+        self.flush_interval = flush_interval
+        self.on_bar_closed = on_bar_closed
+        self.pending = {symbol: [] for symbol in symbols}
+        self.pending_lock = threading.Lock()
+        self.builders = {symbol: [TradeBarBuilder(tf, capacity) for tf in timeframes] for symbol in symbols}
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.trades = 0
+
+        # 초 단위 캔들 버퍼를 기존 캔들 저장소에 등록 (get_candle_buffer / get_candles로 조회 가능)
+        with data_handler.lock:
+            for symbol, builders in self.builders.items():
+                buffers = data_handler.coin_data.setdefault(symbol, {})
+                for builder in builders:
+                    buffers[builder.timeframe] = builder.candles
+
+    def on_trade(self, event):
+        """aggTrade 이벤트 적재 (stream_events.AggTradeEvent)"""
+        with self.pending_lock:
+            pending = self.pending.get(event.symbol)
+            if pending is not None:
+                pending.append((event.trade_time, event.price, event.quantity, event.buyer_maker))
+
+    def flush(self):
+        """대기 중인 체결을 캔들에 반영"""
+        with self.pending_lock:
+            batches = {}
+            for symbol, pending in self.pending.items():
+                if pending:
+                    batches[symbol] = pending
+                    self.pending[symbol] = []
+        closed_symbols = []
+        for symbol, batch in batches.items():
+            # 튜플 리스트를 평탄화해서 한 번에 (n, 4) 배열로 변환 (심볼당 한 번, 모든 타임프레임이 공유)
+            trades = np.fromiter(chain.from_iterable(batch), dtype=float, count=4 * len(batch)).reshape(-1, 4)
+            if np.any(trades[1:, 0] < trades[:-1, 0]):
+                trades = trades[np.argsort(trades[:, 0], kind='stable')]
+            times, prices, quantities, seller_taker = trades.T
+            seller_taker = seller_taker.astype(bool)
+            closed = 0
+            with self.data_handler.lock:
+                for builder in self.builders[symbol]:
+                    closed += builder.add_batch(times, prices, quantities, seller_taker)
+            self.trades += len(batch)
+            if closed:
+                closed_symbols.append(symbol)
+        if self.on_bar_closed is not None:
+            for symbol in closed_symbols:
+                self.on_bar_closed(symbol)
+
+    def start(self):
+        def run():
+            while not self.stop_event.wait(self.flush_interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"aggTrade 캔들 집계 실패: {e}")
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.name = "AggTradeFlushThread"
+        self.thread.start()
+        logger.system(f"aggTrade 초 단위 캔들 시작: {', '.join(self.builders)} "
+                      f"({', '.join(b.timeframe for b in next(iter(self.builders.values()), []))})")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        self.flush()
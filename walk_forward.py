@@ -0,0 +1,266 @@
+"""
+워크포워드 최적화 (학습 구간에서 임계값 탐색 -> 바로 다음 검증 구간에서 최적 후보 평가, 구간을 밀면서 반복)
+- 폴드: 학습 --train봉 / 검증 --test봉, 검증 길이만큼 이동 (--anchored면 학습 시작을 처음으로 고정)
+- 심볼들의 공통 기간을 블록(학습/검증 길이의 최대공약수 봉) 단위로 나누고, 블록마다 앞쪽 WARMUP_BARS봉을 같이 계산한
+  지표를 IndicatorCache에 저장 -> 겹치는 학습 구간, 다음 폴드, 재실행은 블록 지표를 디스크에서 읽기만 함
+  (최대공약수가 MIN_BLOCK_BARS봉보다 작으면 MIN_BLOCK_BARS봉 블록을 폴드 경계에서 잘라 사용, 블록 파일/워밍업 재계산 수 제한)
+- 학습: param_sweep.sweep (공유 메모리 + 프로세스 풀), 심볼 평균 --objective 기준 최적 후보 선택
+- 검증: 최적 후보로 vector 엔진 실행 (학습 구간 끝 INDICATOR_FRAME_ROWS-1봉을 앞에 붙여서 검증 첫 봉부터 평가, 폴드마다 잔고/포지션 초기화)
+- 진행 상태: WALK_FORWARD_DIR/<실행 키>.json (폴드 완료마다 기록), 중단 후 같은 인자로 다시 실행하면 완료된 폴드는 건너뜀
+
+사용법: python walk_forward.py HBARUSDT XRPUSDT --strategy macd_rsi --random 100 --train 20000 --test 5000
+        [--grid 3] [--anchored] [--regime] [--objective return_pct] [--workers 8] [--db] [--fresh]
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest import Backtester, csv_path, load_csv, load_db, strategy_name
+from config import WALK_FORWARD_DIR
+from indicator_cache import IndicatorCache
+from param_sweep import SORT_KEYS, sweep
+from resampler import timeframe_ms
+from strategy_params import PARAM_SPACE, grid, random_params, strategy_params
+
+WARMUP_BARS = 500  # 블록마다 앞에 같이 계산하는 봉 수 (EMA/ADX 시작점 영향이 반올림 자리 아래로 줄어드는 길이)
+MIN_BLOCK_BARS = 1000  # 블록 최소 봉 수 (워밍업 재계산이 블록 길이의 절반을 넘지 않게)
+
+
+def concat(parts):
+    """{컬럼: ndarray} 여러 개를 시간 순으로 이어 붙임"""
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+
+def tail(arrays, rows):
+    return {column: values[max(len(values) - rows, 0):] for column, values in arrays.items()}
+
+
+def score(summary, objective):
+    """요약 -> 클수록 좋은 점수 (max_drawdown은 부호 반전)"""
+    if objective == 'return_pct':
+        return summary['return'] * 100
+    if objective == 'max_drawdown':
+        return -summary['max_drawdown'] * 100
+    return summary[objective]
+
+
+def rank(results, objective):
+    """sweep 결과 -> [(심볼 평균 점수, 후보 번호)] 좋은 순 (같은 점수는 후보 번호 순)"""
+    scores = {}
+    for index, symbol, summary in results:
+        scores.setdefault(index, []).append(score(summary, objective))
+    return sorted(((float(np.mean(values)), index) for index, values in scores.items()), key=lambda item: (-item[0], item[1]))
+
+
+def timestamp(ns):
+    return pd.Timestamp(ns).strftime('%Y-%m-%d %H:%M')
+
+
+class WalkForward:
+    """
+    :param data: {symbol: OHLCV DataFrame} (Open time 오름차순)
+    :param strategy: 탐색 대상 전략 (regime이 아니면 이 전략만 실행)
+    :param candidates: [{파라미터: 값}] (폴드마다 같은 후보)
+    :param train, test: 학습/검증 봉 수
+    """
+    def __init__(self, data, strategy, candidates, train, test, interval='1m', anchored=False, regime=False,
+                 orderbook='candle', objective='return_pct', workers=None, cache=None, warmup=WARMUP_BARS):
+        self.data = data
+        self.strategy = strategy
+        self.candidates = candidates
+        self.train = train
+        self.test = test
+        self.interval = interval
+        self.anchored = anchored
+        self.regime = regime
+        self.orderbook = orderbook
+        self.objective = objective
+        self.workers = workers
+        self.cache = cache or IndicatorCache()
+        self.warmup = warmup
+
+        self.block = max(math.gcd(train, test), MIN_BLOCK_BARS)  # 블록 봉 수
+        self.bar = timeframe_ms(interval) * 1_000_000  # 봉 길이 (ns)
+        times = [df['Open time'].to_numpy(dtype='datetime64[ns]').astype('int64') for df in data.values()]
+        self.origin = max(int(values[0]) for values in times)  # 모든 심볼에 데이터가 있는 첫 시각
+        end = min(int(values[-1]) for values in times) + self.bar
+        self.bars = max((end - self.origin) // self.bar, 0)
+        self.loaded = {}  # (symbol, 블록 번호) -> 지표 배열
+
+    def folds(self):
+        """[(학습 시작 봉, 검증 시작 봉, 검증 끝 봉)] (공통 기간 시작 기준 봉 번호)"""
+        folds = []
+        first = 0
+        while first + self.train + self.test <= self.bars:
+            folds.append((0 if self.anchored else first, first + self.train, first + self.train + self.test))
+            first += self.test
+        return folds
+
+    def boundary(self, bar):
+        return self.origin + bar * self.bar
+
+    def block_arrays(self, symbol, block):
+        arrays = self.loaded.get((symbol, block))
+        if arrays is None:
+            start = block * self.block
+            arrays = self.loaded[(symbol, block)] = self.cache.frame(
+                symbol, self.interval, self.data[symbol], self.boundary(start), self.boundary(start + self.block),
+                self.warmup)
+        return arrays
+
+    def window(self, symbol, first, last):
+        """[first, last) 봉 지표 배열 (블록 경계가 아니면 양 끝 블록을 Open time 기준으로 자름)"""
+        arrays = concat([self.block_arrays(symbol, block) for block in range(first // self.block, -(-last // self.block))])
+        if first % self.block == 0 and last % self.block == 0:
+            return arrays
+        times = arrays['Open time'].astype('int64')
+        start, stop = np.searchsorted(times, [self.boundary(first), self.boundary(last)])
+        return {column: values[start:stop] for column, values in arrays.items()}
+
+    def evict(self, before):
+        """before봉 이전에서 끝나는 블록 해제 (anchored면 학습 시작이 고정이므로 유지)"""
+        if self.anchored:
+            return
+        for key in [key for key in self.loaded if (key[1] + 1) * self.block <= before]:
+            del self.loaded[key]
+
+    def key(self):
+        """실행 키 (인자 + 데이터 시작 시각 + 지표 설정 + 후보 밖 임계값(config.STRATEGY_PARAMS)이 같으면 같은 진행 상태 파일)"""
+        config = {
+            'symbols': sorted(self.data), 'interval': self.interval, 'strategy': self.strategy,
+            'candidates': self.candidates, 'train': self.train, 'test': self.test, 'anchored': self.anchored,
+            'regime': self.regime, 'orderbook': self.orderbook, 'objective': self.objective, 'warmup': self.warmup,
+            'origin': self.origin, 'settings': self.cache.settings, 'base_params': strategy_params(),
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+    def state_path(self):
+        return os.path.join(WALK_FORWARD_DIR, f"{self.key()}.json")
+
+    def load_state(self, fresh=False):
+        path = self.state_path()
+        if not fresh and os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {'key': self.key(), 'symbols': sorted(self.data), 'strategy': self.strategy, 'interval': self.interval,
+                'train': self.train, 'test': self.test, 'anchored': self.anchored, 'regime': self.regime,
+                'objective': self.objective, 'candidates': len(self.candidates), 'folds': []}
+
+    def save_state(self, state):
+        path = self.state_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.tmp"
+        with open(temp, "w") as f:
+            json.dump(state, f, indent=1, default=float)
+        os.replace(temp, path)
+
+    def run_fold(self, index, first, split, last):
+        t0 = time.perf_counter()
+        hits, misses = self.cache.hits, self.cache.misses
+        train = {symbol: self.window(symbol, first, split) for symbol in self.data}
+        ranked = rank(sweep(train, self.strategy, self.candidates, self.regime, self.orderbook, self.workers), self.objective)
+        train_score, best = ranked[0]
+        backtester = Backtester(strategies=None if self.regime else [self.strategy], regime=self.regime,
+                                orderbook=self.orderbook, params={self.strategy: self.candidates[best]})
+        tests = {}
+        for symbol in self.data:
+            arrays = concat([tail(train[symbol], backtester.window - 1), self.window(symbol, split, last)])
+            tests[symbol] = backtester.run_arrays(arrays, symbol).summary()
+        return {
+            'fold': index,
+            'train': [timestamp(self.boundary(first)), timestamp(self.boundary(split))],
+            'test': [timestamp(self.boundary(split)), timestamp(self.boundary(last))],
+            'params': self.candidates[best],
+            'train_score': train_score,
+            'results': tests,
+            'cache': {'hits': self.cache.hits - hits, 'misses': self.cache.misses - misses},
+            'seconds': time.perf_counter() - t0,
+        }
+
+    def run(self, fresh=False):
+        state = self.load_state(fresh)
+        folds = self.folds()
+        if state['folds']:
+            print(f"이어서 실행: {len(state['folds'])}/{len(folds)} 폴드 완료 ({self.state_path()})")
+        for fold in state['folds']:
+            print(format_fold(fold, self.objective))
+        for index, (first, split, last) in enumerate(folds):
+            if index < len(state['folds']):
+                continue
+            fold = self.run_fold(index, first, split, last)
+            state['folds'].append(fold)
+            self.save_state(state)
+            print(format_fold(fold, self.objective))
+            self.evict(folds[index + 1][0] if index + 1 < len(folds) else last)
+        return state
+
+
+def format_fold(fold, objective):
+    returns = [result['return'] for result in fold['results'].values()]
+    trades = sum(result['trades'] for result in fold['results'].values())
+    params = ' '.join(f"{name}={value:g}" for name, value in fold['params'].items())
+    return (f"#{fold['fold']:<3} 학습 {fold['train'][0]} ~ {fold['train'][1]} {objective} {fold['train_score']:>9.2f} | "
+            f"검증 ~ {fold['test'][1]} 수익률 {np.mean(returns):>8.2%} 체결 {trades:>5,} | {params} "
+            f"(캐시 {fold['cache']['hits']}/{fold['cache']['hits'] + fold['cache']['misses']}, {fold['seconds']:.1f}s)")
+
+
+def format_total(state):
+    """검증 구간 합산 (심볼별 폴드 수익률 복리, MDD는 폴드 중 최대)"""
+    lines = []
+    for symbol in state['symbols']:
+        results = [fold['results'][symbol] for fold in state['folds']]
+        total = float(np.prod([1 + result['return'] for result in results]) - 1) if results else 0.0
+        lines.append(f"{symbol:<12} 검증 {len(results)}폴드 수익률 {total:>8.2%} "
+                     f"체결 {sum(result['trades'] for result in results):>6,} "
+                     f"MDD {max((result['max_drawdown'] for result in results), default=0.0):>6.2%}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="워크포워드 최적화")
+    parser.add_argument('symbols', nargs='+', help="심볼 (data/klines_<심볼>_<tf>.csv 또는 --db)")
+    parser.add_argument('--strategy', required=True, help="탐색할 전략 (예: macd_rsi)")
+    parser.add_argument('--names', help="탐색할 파라미터 (쉼표 구분, 기본: 전략의 전체 파라미터)")
+    parser.add_argument('--grid', type=int, help="격자 탐색 (파라미터별 값 개수)")
+    parser.add_argument('--random', type=int, help="무작위 탐색 (후보 수)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--train', type=int, default=20000, help="학습 구간 봉 수")
+    parser.add_argument('--test', type=int, default=5000, help="검증 구간 봉 수 (폴드 이동 간격)")
+    parser.add_argument('--anchored', action='store_true', help="학습 시작을 처음으로 고정 (학습 구간이 계속 늘어남)")
+    parser.add_argument('--interval', default='1m', help="캔들 타임프레임")
+    parser.add_argument('--db', action='store_true', help="CSV 대신 CoinData 테이블에서 읽기")
+    parser.add_argument('--regime', action='store_true', help="봉마다 시장 상태(1m)로 strategy_map 전략 선택")
+    parser.add_argument('--orderbook', default='candle', choices=('candle', 'neutral'), help="오더북 대용값")
+    parser.add_argument('--objective', default='return_pct', choices=SORT_KEYS, help="학습 구간 후보 선택 기준")
+    parser.add_argument('--workers', type=int, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument('--fresh', action='store_true', help="진행 상태를 무시하고 처음부터 실행 (지표 캐시는 유지)")
+    args = parser.parse_args()
+
+    strategy = strategy_name(args.strategy)
+    if strategy not in PARAM_SPACE:
+        parser.error(f"알 수 없는 전략: {args.strategy}")
+    if not (args.grid or args.random):
+        parser.error("--grid 또는 --random이 필요합니다")
+    names = [name.strip() for name in args.names.split(',')] if args.names else None
+    try:
+        candidates = grid(strategy, args.grid, names) if args.grid else random_params(strategy, args.random, args.seed, names)
+    except KeyError as e:
+        parser.error(e.args[0])
+    data = {symbol: load_db(symbol, args.interval) if args.db else load_csv(csv_path(symbol, args.interval))
+            for symbol in args.symbols}
+
+    runner = WalkForward(data, strategy, candidates, args.train, args.test, args.interval, args.anchored, args.regime,
+                         args.orderbook, args.objective, args.workers)
+    folds = runner.folds()
+    print(f"{runner.key()}: 후보 {len(candidates):,}개 x {len(data)}심볼, 폴드 {len(folds)}개 "
+          f"(학습 {args.train:,}봉 / 검증 {args.test:,}봉, 블록 {runner.block:,}봉)")
+    if not folds:
+        parser.error("공통 기간이 학습 + 검증 길이보다 짧습니다")
+    state = runner.run(args.fresh)
+    print(format_total(state))
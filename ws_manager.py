@@ -1,14 +1,25 @@
-import os
 import time
 import pandas as pd
 import websocket
-import json
 import threading
-from config import COIN_LIST, API_KEY, SECRET_KEY, DATA_DIR
+from config import (COIN_LIST, WS_STREAM_HOST,
+                    WS_COMBINED_STREAM, WS_MAX_STREAMS_PER_CONNECTION, WS_ENGINE,
+                    WS_RECONNECT_BASE_DELAY, WS_RECONNECT_MAX_DELAY, ORDERBOOK_SOURCE,
+                    KLINE_TIMEFRAMES, RESAMPLE_TIMEFRAMES, CANDLE_BUFFER_SIZE,
+                    AGG_TRADE_SYMBOLS, AGG_TRADE_TIMEFRAMES, AGG_TRADE_FLUSH_INTERVAL, BOOK_TICKER_ENABLED,
+                    GAP_FILL_ENABLED, GAP_CHECK_INTERVAL, GAP_FILL_WORKERS)
 from data_handler import DataHandler
 from logger import logger
-from datetime import datetime, timedelta
-from binance.client import Client
+from stream_events import (loads, decode_kline, decode_depth, decode_agg_trade, decode_book_ticker, decode_user_event,
+                           AccountConfigUpdateEvent, AccountUpdateEvent, OrderTradeUpdateEvent)
+from exchange_client import create_client
+from trade_aggregator import AggTradeAggregator
+from gap_filler import CandleGapFiller
+from stream_recorder import stream_channel
+from latency import tracer
+
+# 웹소켓으로 받는 캔들 타임프레임 (RESAMPLE_TIMEFRAMES는 1m에서 로컬 합성)
+STREAM_TIMEFRAMES = ['1m'] + [tf for tf in KLINE_TIMEFRAMES if tf != '1m' and tf not in RESAMPLE_TIMEFRAMES]
 
 
 class WebSocketManager:
@@ -19,17 +30,53 @@ class WebSocketManager:
             self.ws_threads = []      # WebSocket 스레드들을 저장            
             self.orderbook = orderbook
             self.signals = signals
+            self.stream_handlers = {}  # 결합 스트림: stream 이름 -> 처리 함수
+            self.listeners = []  # 데이터 갱신 알림 callback(symbol, kind)
+            self.trade_listeners = []  # aggTrade 체결 callback(AggTradeEvent) (있으면 전체 심볼 aggTrade 구독, 모의 거래 체결 판정)
+            self.trade_alerts = True  # 체결 시 텔레그램 알림/거래 기록 파일 작성 (재생 시 False)
+            # aggTrade 초 단위 캔들 (AGG_TRADE_SYMBOLS가 있을 때만)
+            self.trade_aggregator = None
+            if AGG_TRADE_SYMBOLS:
+                self.trade_aggregator = AggTradeAggregator(
+                    data_handler, AGG_TRADE_SYMBOLS, AGG_TRADE_TIMEFRAMES, CANDLE_BUFFER_SIZE,
+                    AGG_TRADE_FLUSH_INTERVAL, on_bar_closed=lambda symbol: self._notify(symbol, 'trade_bar_closed'))
+            # 재연결/시계 점프 후 캔들 누락 백필
+            self.gap_filler = None
+            if GAP_FILL_ENABLED:
+                self.gap_filler = CandleGapFiller(
+                    data_handler, COIN_LIST, STREAM_TIMEFRAMES, CANDLE_BUFFER_SIZE, GAP_FILL_WORKERS,
+                    GAP_CHECK_INTERVAL, on_filled=lambda symbol: self._notify(symbol, 'backfill'))
             self.stop_event = threading.Event()
             # 계정 업데이트 웹소켓 별도 관리
             self.account_ws = None
+            # asyncio 엔진 (WS_ENGINE == "asyncio"일 때 첫 스트림 등록 시 생성)
+            self.async_engine = None
             
             logger.system("WebSocketManager 초기화 완료")
         except Exception as e:
             logger.error(f"WebSocketManager 초기화 실패: {str(e)}")
             raise
 
-    def _start_single_websocket(self, url, on_message):
-        """개별 웹소켓 연결 관리"""
+    def _start_single_websocket(self, url, on_message, blocking=False, channel=None):
+        """
+        개별 웹소켓 연결 관리
+        - WS_ENGINE == "asyncio"면 공용 이벤트 루프에 코루틴으로 등록
+        - blocking=True는 REST 호출 등이 있는 처리 함수 (asyncio 엔진에서 루프 밖 워커로 실행)
+        - 스트림 기록 중이면 받은 메시지를 처리 전에 channel 이름으로 기록 (기본값: URL의 스트림 이름)
+        """
+        recorder = self.data_handler.recorder
+        if recorder is not None:
+            on_message = recorder.tee(channel or stream_channel(url), on_message)
+        if WS_ENGINE == "asyncio":
+            return self._start_async_websocket(url, on_message, blocking)
+
+        connects = [0]
+
+        def on_open(ws):
+            connects[0] += 1
+            if connects[0] > 1:
+                self._on_reconnect(url)
+
         def run():
             while not self.stop_event.is_set():
                 try:
@@ -37,7 +84,8 @@ class WebSocketManager:
                         url,
                         on_message=on_message,
                         on_error=self.on_error,
-                        on_close=self.on_close
+                        on_close=self.on_close,
+                        on_open=on_open
                     )
 
                     self.ws_connections.append(ws)
@@ -60,6 +108,20 @@ class WebSocketManager:
         return thread
 
 
+    def _start_async_websocket(self, url, on_message, blocking=False):
+        """asyncio 엔진에 스트림 등록 (websockets 패키지는 이 모드에서만 필요)"""
+        if self.async_engine is None:
+            from async_ws import AsyncWebSocketEngine
+            self.async_engine = AsyncWebSocketEngine(
+                on_error=self.on_error,
+                on_close=self.on_close,
+                base_delay=WS_RECONNECT_BASE_DELAY,
+                max_delay=WS_RECONNECT_MAX_DELAY,
+                on_open=lambda handle: handle.connects > 1 and self._on_reconnect(handle.url)
+            )
+            logger.system("asyncio 웹소켓 엔진 시작")
+        return self.async_engine.add_stream(url, on_message, blocking)
+
     def get_order_by_order_id(self,symbol: str, order_id: int):
         """
         주어진 심볼과 주문 ID를 기반으로 Binance에서 주문 정보를 조회합니다.
@@ -73,7 +135,7 @@ class WebSocketManager:
                 오류 발생 시 error 키가 포함된 dict가 반환됩니다.
         """
         try:
-            client = Client(API_KEY, SECRET_KEY)
+            client = create_client()
             # Binance API에서 주문 정보 조회 (주문 조회 엔드포인트 사용)
             order = client.get_order(symbol=symbol, orderId=order_id)
             return order
@@ -84,77 +146,61 @@ class WebSocketManager:
 
     # 기존 on_message_account_update 로직 완전 재현
     def _on_account_update(self, ws, message):
-        data = json.loads(message)
-        event_type = data.get('e')
-        event_time_timestamp = int(data.get("E", 0)) / 1000  # 밀리초 단위의 타임스탬프를 초 단위로 변환
-        event_time_datetime = datetime.fromtimestamp(event_time_timestamp) # timestamp를 datetime 객체로 변환
-        # event_time = event_time_datetime + timedelta(hours=9) # datetime 객체에 timedelta를 더함
-        event_time_str = event_time_datetime.strftime('%Y-%m-%d %H:%M:%S') # strftime은 datetime 객체에 사용
-        if event_type == "ACCOUNT_CONFIG_UPDATE":
-            # print(data)
-            symbol = data.get('ac').get('s')  # 'a'와 'B' 키를 안전하게 가져옴
+        event = decode_user_event(loads(message))
+        if event is None:
+            return
+        if isinstance(event, AccountConfigUpdateEvent):
+            symbol = event.symbol
             if symbol not in self.data_handler.position_data:
                 self.data_handler.position_data[symbol] = {'leverage': 0, 'avg_price': 0, 'position_amount': 0, 'unrealizedProfit': 0, 'breakeven_price': 0}
                 self.data_handler.position_data_update(symbol)
                 COIN_LIST.append(symbol)
                 time.sleep(1)
-            leverage = data.get('ac').get('l')
-            self.data_handler.position_data[symbol]['leverage'] = leverage
-            print(symbol,event_type,self.data_handler.position_data[symbol])
-
-        elif event_type == "ACCOUNT_UPDATE":
-            # print("ACCOUNT_UPDATE 이벤트 발생!")
-            # print(data)
-            wallets = data.get('a', {}).get('B', [])  # 'a'와 'B' 키를 안전하게 가져옴
-            reason_type = data.get('a').get('m')
-            for wallet in wallets:
-                if wallet.get('a') == 'USDT':
-                    total_wallet_balance = float(wallet.get('wb',0))  # 'wb' 값을 가져옴
-                    Balance_Change = float(wallet.get('bc', 0))
-                    self.data_handler.balance_data['wallet']=total_wallet_balance
-                    # print('wallet_balance',total_wallet_balance,Balance_Change)
+            self.data_handler.position_data[symbol]['leverage'] = event.leverage
+            print(symbol, "ACCOUNT_CONFIG_UPDATE", self.data_handler.position_data[symbol])
+
+        elif isinstance(event, AccountUpdateEvent):
+            Balance_Change = 0
+            for wallet in event.balances:
+                if wallet.asset == 'USDT':
+                    Balance_Change = wallet.balance_change
+                    self.data_handler.balance_data['wallet'] = wallet.wallet_balance
                     break
-                
-            positions = data.get('a', {}).get('P', [])  # 'P' 역시 리스트로 처리
-            for position in positions:
-                symbol = position.get("s")
+
+            for position in event.positions:
+                symbol = position.symbol
                 if symbol not in self.data_handler.position_data:
                     self.data_handler.position_data_update(symbol)
                     time.sleep(1)
 
                 self.data_handler.position_data[symbol].update({
-                    'avg_price': float(position.get("ep")),
-                    'position_amount': float(position.get("pa")),
-                    'unrealizedProfit': float(position.get("up")),
-                    'breakeven_price': float(position.get("bep", 0) or 0)
+                    'avg_price': position.entry_price,
+                    'position_amount': position.position_amount,
+                    'unrealizedProfit': position.unrealized_profit,
+                    'breakeven_price': position.breakeven_price
                     })
 
-
             if Balance_Change != 0:
-                event_reason = f"{reason_type} {Balance_Change:.4f}" if Balance_Change != 0 else None
+                event_reason = f"{event.reason} {Balance_Change:.4f}"
                 self.data_handler.balance_data_update(event_reason)
 
-        elif event_type == "ORDER_TRADE_UPDATE":
-            order_data = data.get("o")
-            symbol = order_data.get("s")
-            order_id = order_data.get("i")
-            side = order_data.get("S")
-            order_status = order_data.get("X")
+        elif isinstance(event, OrderTradeUpdateEvent):
+            symbol = event.symbol
+            side = event.side
 
             # FILLED 상태면 최종 처리
-            if order_status == 'FILLED':
-                # print(order_data)
+            if event.status == 'FILLED':
+                tracer.on_fill(event.order_id)
                 event_reason = None
                 position_amount=self.data_handler.position_data[symbol]['position_amount']
                 position_price = self.data_handler.position_data[symbol]['avg_price']
                 leverage = float(self.data_handler.position_data[symbol]['leverage'])
                 Wallet = self.data_handler.balance_data['wallet']
 
-                avg_price = float(order_data.get("ap", 0))
-                original_quantity = float(order_data.get("q", 0))
-                accumulated_quantity = float(order_data.get("z", 0))
-                realized_profit = float(order_data.get("rp", 0))
-                commission = float(order_data.get("n", 0))
+                avg_price = event.avg_price
+                accumulated_quantity = event.filled_qty
+                realized_profit = event.realized_profit
+                commission = event.commission
                 total_cost = accumulated_quantity * avg_price
                 initialMargin = total_cost / leverage
 
@@ -192,8 +238,9 @@ class WebSocketManager:
                 )
 
                 # print(trade_info)
-                logger.send_telegram_alert_sync(trade)
-                self.trade_history(trade_info)
+                if self.trade_alerts:
+                    logger.send_telegram_alert_sync(trade)
+                    self.trade_history(trade_info)
                 # logger.trade(trade)
                 # 최종 처리 후 데이터 초기화
 
@@ -204,96 +251,244 @@ class WebSocketManager:
             fp.write('\n')  # 새로운 줄 추가
         return
 
+    def add_listener(self, callback):
+        """
+        데이터 갱신 알림 등록
+
+        :param callback: callback(symbol, kind), kind는 'kline_closed' | 'orderbook' | 'trade_bar_closed'
+        """
+        self.listeners.append(callback)
+
+    def _on_reconnect(self, url):
+        """재연결 시 끊긴 동안 마감된 캔들 확인"""
+        logger.warning(f"웹소켓 재연결: {url}")
+        if self.gap_filler is not None:
+            self.gap_filler.request("재연결")
+
+    def _notify(self, symbol, kind, event_time=0):
+        """:param event_time: 거래소 이벤트 시각 E (ms, 지연 측정용), 없으면 0"""
+        tracer.on_receive(symbol, event_time)
+        if kind != 'backfill' and self.gap_filler is not None and self.gap_filler.is_pending(symbol):
+            return  # 누락 캔들 백필 전에는 평가하지 않음
+        for callback in self.listeners:
+            try:
+                callback(symbol, kind)
+            except Exception as e:
+                logger.error(f"{symbol} {kind} 알림 처리 실패: {e}")
+
     # 기존 on_message_orderbook 로직 재현
     def _on_orderbook(self, ws, message):
-        data = json.loads(message)
-        symbol = data['s']
+        self._handle_orderbook(loads(message))
+
+    def _handle_orderbook(self, data):
+        """파싱된 depth 이벤트 처리 (단일/결합 스트림 공용)"""
+        event = decode_depth(data)
         with self.data_handler.lock:
-            self.data_handler.orderbook_data[symbol] = data
-            self.data_handler.save_orderbook_data(symbol)
+            self.data_handler.orderbook_data[event.symbol] = event
+            self.data_handler.save_orderbook_data(event.symbol)
+        self._notify(event.symbol, 'orderbook', event.event_time)
+
+    def _on_depth_diff(self, ws, message):
+        self._handle_depth_diff(loads(message))
+
+    def _handle_depth_diff(self, data):
+        """diff-depth 이벤트를 로컬 오더북에 반영 (오더북 자체 lock 사용, 전역 lock 불필요)"""
+        event = decode_depth(data)
+        book = self.data_handler.order_book_manager.on_event(event)
+        self.data_handler.orderbook_data[event.symbol] = book
+        self.data_handler.save_orderbook_data(event.symbol)
+        if book.synced:
+            self._notify(event.symbol, 'orderbook', event.event_time)
 
     # 기존 on_message_1m/1h 캔들 처리 재현
     def _on_kline(self, ws, message, timeframe, save_to_file=True):
-        data = json.loads(message)
-        kline = data['k']
-        symbol = data['s']
-        # open_time = pd.to_datetime(candle['t'], unit='ms') + pd.Timedelta(hours=9)  # UTC+9로 변환
-        # open_time_str = open_time.strftime('%Y-%m-%d %H:%M')  # 형식 변환
+        self._handle_kline(loads(message), timeframe, save_to_file)
+
+    def _handle_kline(self, data, timeframe, save_to_file=True):
+        """파싱된 kline 이벤트 처리 (단일/결합 스트림 공용)"""
+        event = decode_kline(data)
+        symbol = event.symbol
 
         with self.data_handler.lock:
-            if self.data_handler.coin_data[symbol][timeframe].empty:
-                self.data_handler.coin_data[symbol][timeframe] = pd.DataFrame(columns=[
-                    'Open time', 'Open', 'High', 'Low', 'Close', 'Volume'
-                ])
-                
-            df = self.data_handler.coin_data[symbol][timeframe]
-
-            # 신규 데이터 생성
-            new_row = {
-                'Open time': pd.to_datetime(kline['t'], unit='ms') + pd.Timedelta(hours=9),
-                'Open': float(kline['o']),
-                'High': float(kline['h']),
-                'Low': float(kline['l']),
-                'Close': float(kline['c']),
-                'Volume': float(kline['v'])
-            }
-
-            self.data_handler._update_incomplete_candle_in_db(symbol, timeframe, new_row)
-
-            # 데이터 업데이트
-            if kline['x']:  # 캔들 종료
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-                if len(df) > 60:
-                    df = df.iloc[1:]  # 80개의 최신 데이터 유지
-                # DB에 신규 캔들 추가
-                # self.data_handler._update_incomplete_candle_in_db(symbol, timeframe, new_row)
-
-            else:  # 캔들 업데이트
-                if not df.empty:
-                    df.loc[df.index[-1], ['Open time', 'Open', 'High', 'Low', 'Close', 'Volume']] = [
-                        new_row['Open time'], new_row['Open'], new_row['High'], 
-                        new_row['Low'], new_row['Close'], new_row['Volume']
-                    ]
-                    self.data_handler.coin_data[symbol][timeframe] = df
-                    # DB에서 마지막 캔들 업데이트
-                    # self.data_handler._update_incomplete_candle_in_db(symbol, timeframe, new_row)
-
-            # 파일로 저장 (옵션)
-            if save_to_file:
-                file_path = os.path.join(DATA_DIR, f"klines_{symbol}_{timeframe}.csv")
-                df.to_csv(file_path, index=False, sep='\t')
+            candles = self.data_handler.get_candle_buffer(symbol, timeframe)
+            if self.gap_filler is not None:
+                # 직전 캔들과 open time이 이어지지 않으면 누락 구간 백필 요청 (REST 조회는 백필 스레드에서)
+                self.gap_filler.on_kline(symbol, timeframe, candles.last_open_time, event.open_time)
+            # 같은 open time이면 진행 중 캔들 제자리 갱신, 새 open time이면 추가 (용량 초과분은 링 버퍼가 밀어냄)
+            candles.upsert(event.open_time, event.open, event.high, event.low, event.close, event.volume)
+            self._store_kline(symbol, timeframe, event.open_time, event.open, event.high, event.low,
+                              event.close, event.volume, event.closed, save_to_file)
+
+            # 1m에서 합성하는 상위 타임프레임 갱신 (버퍼는 리샘플러가 직접 갱신)
+            if timeframe == '1m':
+                for resampled_tf, bar, bar_closed in self.data_handler.update_resampled(
+                        symbol, event.open_time, event.open, event.high, event.low, event.close,
+                        event.volume, event.closed):
+                    self._store_kline(symbol, resampled_tf, *bar, bar_closed, save_to_file)
+
+        if event.closed:
+            self._notify(symbol, 'kline_closed', event.event_time)
+
+    def _store_kline(self, symbol, timeframe, open_time, open_, high, low, close, volume, closed, save_to_file):
+        """캔들 DB/파일 기록 요청 (data_handler.lock 보유 상태에서 호출)"""
+        # 신규 데이터 생성
+        new_row = {
+            'Open time': pd.to_datetime(open_time, unit='ms') + pd.Timedelta(hours=9),
+            'Open': open_,
+            'High': high,
+            'Low': low,
+            'Close': close,
+            'Volume': volume
+        }
+
+        # DB 반영은 write-behind (콜백에서 SQLite commit을 기다리지 않음)
+        self.data_handler.queue_candle_update(symbol, timeframe, new_row, closed=closed)
+
+        # 파일로 저장 (옵션, 기록은 싱크 스레드에서 수행)
+        if save_to_file:
+            self.data_handler.save_kline_data(symbol, timeframe, new_row, closed=closed)
+
+    def _on_agg_trade(self, ws, message):
+        self._handle_agg_trade(loads(message))
+
+    def _handle_agg_trade(self, data):
+        """aggTrade 체결 적재 (집계는 AggTradeAggregator 플러시 스레드에서 묶음 처리) + 체결 리스너 전달"""
+        event = decode_agg_trade(data)
+        if self.trade_aggregator is not None:
+            self.trade_aggregator.on_trade(event)
+        for callback in self.trade_listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"{event.symbol} aggTrade 처리 실패: {e}")
+
+    def agg_trade_symbols(self):
+        """aggTrade 구독 심볼 (집계 캔들 심볼, 체결 리스너가 있으면 전체 심볼)"""
+        symbols = list(AGG_TRADE_SYMBOLS) if self.trade_aggregator is not None else []
+        if self.trade_listeners:
+            symbols += [symbol for symbol in COIN_LIST if symbol not in symbols]
+        return symbols
+
+    def _on_book_ticker(self, ws, message):
+        self._handle_book_ticker(loads(message))
+
+    def _handle_book_ticker(self, data):
+        """bookTicker 최우선 호가 갱신 (BboCell 참조 교체만, lock/평가 알림 없음)"""
+        self.data_handler.book_ticker.update(decode_book_ticker(data))
 
     def start_account_websocket(self):
         """계정 업데이트 웹소켓 (기존 start_account_update_websocket 재현)"""
         listen_key = self.data_handler.client.futures_stream_get_listen_key()
-        url = f"wss://fstream.binance.com/ws/{listen_key}"
-        self.account_ws = self._start_single_websocket(url, self._on_account_update)
+        url = f"{WS_STREAM_HOST}/ws/{listen_key}"
+        self.account_ws = self._start_single_websocket(url, self._on_account_update, blocking=True, channel='user')
         
 
     def start_coin_websockets(self):
-        """코인별 웹소켓 3개씩 생성 (기존 start_websocket 함수 재현)"""
+        """코인별 마켓 스트림 시작 (결합 스트림 모드면 연결 수를 스트림 한도 단위로 묶음)"""
+        if WS_COMBINED_STREAM:
+            self.start_combined_websockets()
+            return
+
         for symbol in COIN_LIST:
             symbol_lower = symbol.lower()
             
             # 1. 오더북 웹소켓
-            self._start_single_websocket(
-                f"wss://fstream.binance.com/ws/{symbol_lower}@depth20@500ms",
-                self._on_orderbook
-            )
-            
-            # 2. 1분 캔들 웹소켓
-            self._start_single_websocket(
-                f"wss://fstream.binance.com/ws/{symbol_lower}@kline_1m",
-                lambda ws, msg: self._on_kline(ws, msg, '1m')
-            )
+            if ORDERBOOK_SOURCE == "diff":
+                self._start_single_websocket(
+                    f"{WS_STREAM_HOST}/ws/{symbol_lower}@depth@100ms",
+                    self._on_depth_diff
+                )
+            else:
+                self._start_single_websocket(
+                    f"{WS_STREAM_HOST}/ws/{symbol_lower}@depth20@500ms",
+                    self._on_orderbook
+                )
             
-            # 3. 1시간 캔들 웹소켓
-            self._start_single_websocket(
-                f"wss://fstream.binance.com/ws/{symbol_lower}@kline_15m",
-                lambda ws, msg: self._on_kline(ws, msg, '15m')
-            )
+            # 2. 캔들 웹소켓 (1m + 로컬 합성하지 않는 타임프레임)
+            for timeframe in STREAM_TIMEFRAMES:
+                self._start_single_websocket(
+                    f"{WS_STREAM_HOST}/ws/{symbol_lower}@kline_{timeframe}",
+                    lambda ws, msg, tf=timeframe: self._on_kline(ws, msg, tf)
+                )
+            # 3. 최우선 호가 웹소켓 (선택)
+            if BOOK_TICKER_ENABLED:
+                self._start_single_websocket(f"{WS_STREAM_HOST}/ws/{symbol_lower}@bookTicker", self._on_book_ticker)
             # time.sleep(1)
 
+        for symbol in self.agg_trade_symbols():
+            self._start_single_websocket(f"{WS_STREAM_HOST}/ws/{symbol.lower()}@aggTrade", self._on_agg_trade)
+        if self.trade_aggregator is not None:
+            self.trade_aggregator.start()
+        if self.gap_filler is not None:
+            self.gap_filler.start()
+
+    def _market_streams(self):
+        """
+        구독할 마켓 스트림 이름과 처리 함수 매핑을 생성합니다.
+
+        :return: {stream 이름: 파싱된 payload를 받는 처리 함수}
+        """
+        names = []
+        for symbol in COIN_LIST:
+            symbol_lower = symbol.lower()
+            names.append(f"{symbol_lower}@depth@100ms" if ORDERBOOK_SOURCE == "diff" else f"{symbol_lower}@depth20@500ms")
+            names.extend(f"{symbol_lower}@kline_{timeframe}" for timeframe in STREAM_TIMEFRAMES)
+            if BOOK_TICKER_ENABLED:
+                names.append(f"{symbol_lower}@bookTicker")
+        names.extend(f"{symbol.lower()}@aggTrade" for symbol in self.agg_trade_symbols())
+        return {name: self.stream_handler(name) for name in names}
+
+    def stream_handler(self, stream):
+        """
+        stream 이름 -> 파싱된 payload 처리 함수 (결합 스트림 구독, 기록 재생 공용)
+
+        :return: 처리 함수, 이 설정에서 처리하지 않는 스트림이면 None
+        """
+        kind = stream.partition('@')[2]
+        if kind.startswith('kline_'):
+            timeframe = kind[len('kline_'):]
+            return lambda data: self._handle_kline(data, timeframe)
+        if kind == 'depth@100ms':
+            return self._handle_depth_diff
+        if kind == 'depth20@500ms':
+            return self._handle_orderbook
+        if kind == 'aggTrade' and (self.trade_aggregator is not None or self.trade_listeners):
+            return self._handle_agg_trade
+        if kind == 'bookTicker' and self.data_handler.book_ticker is not None:
+            return self._handle_book_ticker
+        return None
+
+    def start_combined_websockets(self):
+        """
+        모든 마켓 스트림을 /stream?streams=a/b/c 결합 연결로 구독합니다.
+        연결당 WS_MAX_STREAMS_PER_CONNECTION 개씩 묶으므로 COIN_LIST가 늘어나도
+        소켓/스레드 수는 거의 늘지 않습니다.
+        """
+        self.stream_handlers = self._market_streams()
+        stream_names = list(self.stream_handlers.keys())
+        for i in range(0, len(stream_names), WS_MAX_STREAMS_PER_CONNECTION):
+            chunk = stream_names[i:i + WS_MAX_STREAMS_PER_CONNECTION]
+            url = f"{WS_STREAM_HOST}/stream?streams={'/'.join(chunk)}"
+            self._start_single_websocket(url, self._on_combined_message)
+        if self.trade_aggregator is not None:
+            self.trade_aggregator.start()
+        if self.gap_filler is not None:
+            self.gap_filler.start()
+        logger.system(f"결합 스트림 시작: 스트림 {len(stream_names)}개, "
+                      f"연결 {-(-len(stream_names) // WS_MAX_STREAMS_PER_CONNECTION)}개")
+
+    def _on_combined_message(self, ws, message):
+        """결합 스트림 메시지를 stream 필드 기준으로 처리 함수에 분배"""
+        data = loads(message)
+        handler = self.stream_handlers.get(data.get('stream'))
+        if handler is None:
+            logger.warning(f"처리 함수가 없는 스트림: {data.get('stream')}")
+            return
+        try:
+            handler(data['data'])
+        except Exception as e:
+            logger.error(f"{data.get('stream')} 메시지 처리 실패: {e}")
+
     def on_error(self, ws, error):
         logger.error(f"웹소켓 에러: {error}")
 
@@ -306,11 +501,24 @@ class WebSocketManager:
         try:
             # 중지 이벤트 설정
             self.stop_event.set()
+
+            # aggTrade 집계 스레드 종료
+            if self.trade_aggregator is not None:
+                self.trade_aggregator.stop()
+
+            # 캔들 누락 백필 스레드 종료
+            if self.gap_filler is not None:
+                self.gap_filler.stop()
             
             # 계정 웹소켓 종료
             if self.account_ws and hasattr(self.account_ws, 'close'):
                 self.account_ws.close()
             
+            # asyncio 엔진 종료
+            if self.async_engine is not None:
+                self.async_engine.stop()
+                self.async_engine = None
+
             # 모든 웹소켓 연결 종료
             for ws in self.ws_connections:
                 if ws and hasattr(ws, 'close'):